@@ -0,0 +1,178 @@
+# alloc_trace_parser.py
+# 读取 liballoc_trace.so (src/alloc_trace/alloc_trace.cpp) 写出的二进制分配日志，并按被测区间 (内部运行) 汇总。
+import os
+import re
+
+import numpy as np
+
+# {algo}_{gen}_{type}_alloc_trace.bin
+ALLOC_TRACE_FILENAME_PATTERN = re.compile(r'^(benchmark_.*?)_([^_]+(?:_[^_]+)?)_([^_]+)_alloc_trace\.bin$')
+
+LOG_MAGIC = b"ALLOCTR1"
+LOG_VERSION = 1
+REGION_TAG = 0x314e4752 # "RGN1"
+
+# 与 alloc_trace.cpp 中的 Record / RegionHeader 一一对应 (小端)
+RECORD_DTYPE = np.dtype([("time_ns", "<u8"), ("addr", "<u8"), ("size", "<u8"), ("aux", "<u8"),
+                         ("tid", "<u4"), ("kind", "<u2"), ("reserved", "<u2")])
+REGION_DTYPE = np.dtype([("tag", "<u4"), ("run", "<i4"), ("begin_ns", "<u8"), ("end_ns", "<u8"),
+                         ("count", "<u8"), ("dropped", "<u8")])
+
+KIND_MALLOC, KIND_CALLOC, KIND_REALLOC, KIND_MEMALIGN, KIND_FREE = 1, 2, 3, 4, 5
+KIND_MMAP, KIND_MUNMAP, KIND_MREMAP, KIND_MADVISE = 6, 7, 8, 9
+HEAP_ALLOC_KINDS = (KIND_MALLOC, KIND_CALLOC, KIND_MEMALIGN)
+MAP_ALLOC_KINDS = (KIND_MMAP, KIND_MREMAP)
+
+# 会释放物理页的 madvise (MADV_DONTNEED, MADV_FREE)
+RELEASING_ADVICE = (4, 8)
+
+# 生命周期直方图的公共分箱 (微秒，对数刻度)
+LIFETIME_BIN_EDGES_US = np.geomspace(0.1, 1e8, 28)
+
+def read_alloc_trace(path):
+    """
+    返回 [(region_header, records)]，records 是 RECORD_DTYPE 的结构化数组 (np.memmap 之上的视图，不复制)。
+    文件被截断 (进程在写区间时崩溃) 时保留已完整写入的区间。
+    """
+    data = np.memmap(path, dtype=np.uint8, mode="r") if os.path.getsize(path) else np.zeros(0, dtype=np.uint8)
+    if len(data) < 16 or bytes(data[:8]) != LOG_MAGIC:
+        raise ValueError(f"{path} is not an allocation trace (bad magic)")
+    version, record_size = np.frombuffer(data[8:16], dtype="<u4")
+    if version != LOG_VERSION or record_size != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path}: unsupported trace version {version} / record size {record_size}")
+    regions = []
+    offset = 16
+    while offset + REGION_DTYPE.itemsize <= len(data):
+        header = np.frombuffer(data[offset:offset + REGION_DTYPE.itemsize], dtype=REGION_DTYPE)[0]
+        if header["tag"] != REGION_TAG:
+            raise ValueError(f"{path}: corrupt region header at byte {offset}")
+        offset += REGION_DTYPE.itemsize
+        end = offset + int(header["count"]) * RECORD_DTYPE.itemsize
+        if end > len(data):
+            break
+        regions.append((header, np.frombuffer(data[offset:end], dtype=RECORD_DTYPE)))
+        offset = end
+    return regions
+
+def _events(records):
+    """
+    把记录展开为统一的 (顺序, 地址, 大小, 是否分配) 事件：realloc 拆成旧地址的释放加新地址的分配，
+    mremap 的旧映射在日志中已经有一条 munmap。大小为 0 的事件 (例如 malloc 失败) 被忽略。
+    """
+    kind = records["kind"]
+    addr = records["addr"]
+    index = np.arange(len(records), dtype=np.int64)
+    is_alloc_kind = np.isin(kind, HEAP_ALLOC_KINDS + MAP_ALLOC_KINDS) | (kind == KIND_REALLOC)
+    alloc = is_alloc_kind & (addr != 0)
+    free = (np.isin(kind, (KIND_FREE, KIND_MUNMAP)) & (addr != 0))
+    realloc_free = (kind == KIND_REALLOC) & (records["aux"] != 0)
+    # realloc 的释放排在同一条记录的分配之前 (顺序键 2*i 与 2*i+1)
+    order = np.concatenate([2 * index[alloc] + 1, 2 * index[free] + 1, 2 * index[realloc_free]])
+    event_addr = np.concatenate([addr[alloc], addr[free], records["aux"][realloc_free]])
+    event_size = np.concatenate([records["size"][alloc], records["size"][free],
+                                 np.zeros(int(realloc_free.sum()), dtype=np.uint64)])
+    is_alloc = np.concatenate([np.ones(int(alloc.sum()), bool), np.zeros(int(free.sum() + realloc_free.sum()), bool)])
+    event_time = np.concatenate([records["time_ns"][alloc], records["time_ns"][free], records["time_ns"][realloc_free]])
+    return order, event_addr, event_size.astype(np.int64), is_alloc, event_time.astype(np.int64)
+
+def summarize_region(header, records):
+    """
+    一个被测区间的汇总。释放按地址与之前最近一次分配配对 (按 (地址, 顺序) 稳定排序后相邻比较)：
+    只有区间内分配的块才计入存活字节；释放区间开始前就存在的块不改变存活字节，只计入 frees_unmatched。
+    munmap 的大小取自调用本身 (按映射大小截断)，因此部分 munmap 也能正确减少存活字节。
+    """
+    begin_ns, end_ns = int(header["begin_ns"]), int(header["end_ns"])
+    order, addr, size, is_alloc, time_ns = _events(records)
+    kind = records["kind"]
+
+    # 配对
+    sort_index = np.lexsort((order, addr))
+    s_addr, s_alloc, s_size, s_time = addr[sort_index], is_alloc[sort_index], size[sort_index], time_ns[sort_index]
+    matched = np.zeros(len(sort_index), dtype=bool)
+    if len(sort_index) > 1:
+        matched[1:] = (~s_alloc[1:]) & s_alloc[:-1] & (s_addr[1:] == s_addr[:-1])
+    freed_size = np.zeros(len(sort_index), dtype=np.int64)
+    previous = np.nonzero(matched)[0] - 1
+    # free 的大小为 0，munmap 的大小可能只是映射的一部分
+    freed_size[matched] = np.where(s_size[matched] > 0, np.minimum(s_size[matched], s_size[previous]), s_size[previous])
+    lifetimes_ns = s_time[matched] - s_time[previous]
+    alloc_freed = np.zeros(len(sort_index), dtype=bool)
+    alloc_freed[previous] = True
+    still_live = s_alloc & ~alloc_freed
+
+    # 按发生顺序累加存活字节
+    delta = np.where(s_alloc, s_size, -freed_size)
+    by_time = np.argsort(order[sort_index], kind="stable")
+    live = np.cumsum(delta[by_time])
+    peak_index = int(np.argmax(live)) if len(live) else -1
+    peak_bytes = max(0, int(live[peak_index])) if len(live) else 0
+
+    is_map = np.isin(kind, MAP_ALLOC_KINDS)
+    madvise = kind == KIND_MADVISE
+    releasing = madvise & np.isin(records["aux"], RELEASING_ADVICE)
+    all_lifetimes_us = np.concatenate([lifetimes_ns, end_ns - s_time[still_live]]) / 1000.0
+    return {
+        "run": int(header["run"]),
+        "duration_ms": (end_ns - begin_ns) / 1e6,
+        "events": int(len(records)),
+        "dropped": int(header["dropped"]),
+        "threads": int(len(np.unique(records["tid"]))),
+        "allocations": int(np.isin(kind, HEAP_ALLOC_KINDS + (KIND_REALLOC,)).sum()),
+        "frees": int((kind == KIND_FREE).sum()),
+        "mmaps": int(is_map.sum()),
+        "munmaps": int((kind == KIND_MUNMAP).sum()),
+        "madvises": int(madvise.sum()),
+        "madvise_released_bytes": int(records["size"][releasing].sum()),
+        "allocated_bytes": int(s_size[s_alloc].sum()),
+        "mapped_bytes": int(records["size"][is_map].sum()),
+        "peak_live_bytes": peak_bytes,
+        "peak_time_ms": (int(s_time[by_time][peak_index]) - begin_ns) / 1e6 if peak_index >= 0 else 0.0,
+        "live_at_end_bytes": max(0, int(live[-1])) if len(live) else 0,
+        "frees_unmatched": int(((~s_alloc) & ~matched).sum()),
+        "lifetimes_us": all_lifetimes_us,
+        "largest_allocation": int(s_size[s_alloc].max()) if np.any(s_alloc) else 0,
+        "live_curve": (((s_time[by_time] - begin_ns) / 1e6), live),
+    }
+
+def read_result_sizes(stdout_path):
+    """
+    读取 C++ stdout 中被测运行 (run != 0) 的 RESULT 行，按出现顺序返回 [(run, size)]，
+    与日志中区间的顺序一致。stdout_path 为 None 时返回空列表。
+    """
+    sizes = []
+    if stdout_path is None:
+        return sizes
+    with open(stdout_path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if not line.startswith("RESULT") or "configwarning=1" in line:
+                continue
+            fields = dict(token.split("=", 1) for token in line.rstrip("\n").split("\t") if "=" in token)
+            try:
+                run, size = int(fields["run"]), int(fields["size"])
+            except (KeyError, ValueError):
+                continue
+            if run != 0:
+                sizes.append((run, size))
+    return sizes
+
+def summarize_alloc_trace(path, stdout_path=None):
+    """
+    返回每个区间的汇总列表；能从 stdout 得到输入规模时额外给出 size 与 peak_bytes_per_element。
+    """
+    summaries = [summarize_region(header, records) for header, records in read_alloc_trace(path)]
+    sizes = read_result_sizes(stdout_path)
+    for summary, (run, size) in zip(summaries, sizes):
+        if run != summary["run"]:
+            break # 顺序对不上 (例如某次运行失败)，不再猜测
+        summary["size"] = size
+        summary["peak_bytes_per_element"] = summary["peak_live_bytes"] / size if size else None
+    return summaries
+
+def stdout_for_trace(trace_path, algo, generator, data_type):
+    """
+    record_alloc_trace.sh 把 C++ stdout 写到 <run>/results_stdout/<config>_alloc_trace_stdout.txt，
+    日志在 <run>/alloc_traces/ 下。找不到时返回 None。
+    """
+    run_dir = os.path.dirname(os.path.dirname(os.path.abspath(trace_path)))
+    candidate = os.path.join(run_dir, "results_stdout", f"{algo}_{generator}_{data_type}_alloc_trace_stdout.txt")
+    return candidate if os.path.isfile(candidate) else None
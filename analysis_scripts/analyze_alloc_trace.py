@@ -0,0 +1,210 @@
+# analyze_alloc_trace.py
+import os
+import argparse
+import sys
+from collections import defaultdict
+
+import numpy as np
+
+from alloc_trace_parser import (ALLOC_TRACE_FILENAME_PATTERN, LIFETIME_BIN_EDGES_US, summarize_alloc_trace,
+                                stdout_for_trace)
+from mem_access_analyzer import format_bytes
+from plot_renderer import (MATPLOTLIB_AVAILABLE, make_plot_job, render_plot_jobs, add_plot_arguments,
+                           parse_plot_formats)
+
+def find_alloc_traces(record_dir):
+    """
+    递归查找 record_alloc_trace.sh 的 *_alloc_trace.bin，返回 {(algo, gen, type): path}。
+    """
+    found = {}
+    for root, _dirs, files in os.walk(record_dir):
+        for filename in sorted(files):
+            match = ALLOC_TRACE_FILENAME_PATTERN.match(filename)
+            if match:
+                found[match.groups()] = os.path.join(root, filename)
+    return found
+
+def aggregate_runs(summaries):
+    """
+    把同一配置的各次运行合并为每个算法一行：计数与峰值取中位数，churn = 分配字节 / 峰值存活字节
+    (每次运行先算再取中位数)，生命周期汇总所有运行。
+    """
+    def median(key):
+        values = [s[key] for s in summaries if s.get(key) is not None]
+        return float(np.median(values)) if values else None
+    lifetimes = np.concatenate([s["lifetimes_us"] for s in summaries]) if summaries else np.zeros(0)
+    churn = [s["allocated_bytes"] / s["peak_live_bytes"] for s in summaries if s["peak_live_bytes"] > 0]
+    return {
+        "runs": len(summaries),
+        "size": summaries[0].get("size") if summaries else None,
+        "threads": max((s["threads"] for s in summaries), default=0),
+        "allocations": median("allocations"),
+        "frees": median("frees"),
+        "mmaps": median("mmaps"),
+        "munmaps": median("munmaps"),
+        "madvises": median("madvises"),
+        "allocated_bytes": median("allocated_bytes"),
+        "peak_live_bytes": median("peak_live_bytes"),
+        "peak_bytes_per_element": median("peak_bytes_per_element"),
+        "live_at_end_bytes": median("live_at_end_bytes"),
+        "churn": float(np.median(churn)) if churn else None,
+        "dropped": sum(s["dropped"] for s in summaries),
+        "frees_unmatched": median("frees_unmatched"),
+        "lifetime_p50_us": float(np.percentile(lifetimes, 50)) if len(lifetimes) else None,
+        "lifetime_p99_us": float(np.percentile(lifetimes, 99)) if len(lifetimes) else None,
+        "lifetime_histogram": np.histogram(np.clip(lifetimes, LIFETIME_BIN_EDGES_US[0], LIFETIME_BIN_EDGES_US[-1] * 0.999),
+                                           bins=LIFETIME_BIN_EDGES_US)[0] if len(lifetimes) else
+                              np.zeros(len(LIFETIME_BIN_EDGES_US) - 1, dtype=np.int64),
+    }
+
+def downsample_curve(times_ms, live, max_points=2000):
+    """
+    存活字节曲线按时间分桶，每桶保留最大值 (峰值不能被抽样丢掉)。
+    """
+    if len(times_ms) <= max_points:
+        return times_ms.tolist(), live.tolist()
+    bins = np.minimum((np.arange(len(times_ms)) * max_points) // len(times_ms), max_points - 1)
+    starts = np.searchsorted(bins, np.arange(max_points))
+    return times_ms[starts].tolist(), np.maximum.reduceat(live, starts).tolist()
+
+def format_config_report(generator, data_type, aggregated):
+    lines = [f"\nGenerator={generator}, DataType={data_type}",
+             f"  {'algorithm':<22}{'runs':>5}{'allocs/run':>12}{'mmaps/run':>10}{'madv/run':>9}{'allocated':>12}"
+             f"{'peak live':>12}{'B/elem':>8}{'churn':>8}{'life p50':>10}{'life p99':>10}"]
+    def fmt_time(us):
+        if us is None:
+            return f"{'-':>10}"
+        return f"{us / 1000:8.1f}ms" if us >= 1000 else f"{us:8.1f}us"
+    for algo, result in sorted(aggregated.items(), key=lambda kv: kv[1]["peak_live_bytes"] or 0):
+        label = algo.replace("benchmark_", "")
+        per_element = f"{result['peak_bytes_per_element']:8.2f}" if result["peak_bytes_per_element"] is not None else f"{'-':>8}"
+        churn = f"{result['churn']:8.2f}" if result["churn"] is not None else f"{'-':>8}"
+        lines.append(f"  {label[:21]:<22}{result['runs']:>5}{result['allocations']:>12,.0f}{result['mmaps']:>10,.0f}"
+                     f"{result['madvises']:>9,.0f}{format_bytes(result['allocated_bytes']):>12}"
+                     f"{format_bytes(result['peak_live_bytes']):>12}{per_element}{churn}"
+                     f"{fmt_time(result['lifetime_p50_us'])}{fmt_time(result['lifetime_p99_us'])}")
+        notes = []
+        if result["live_at_end_bytes"]:
+            notes.append(f"{format_bytes(result['live_at_end_bytes'])} still live at the end of the sort")
+        if result["frees_unmatched"]:
+            notes.append(f"{result['frees_unmatched']:,.0f} frees of blocks allocated before the sort")
+        if result["dropped"]:
+            notes.append(f"{result['dropped']:,} events DROPPED (raise ALLOC_TRACE_CAPACITY)")
+        if notes:
+            lines.append(f"    note: {'; '.join(notes)}")
+    return lines
+
+def draw_alloc_plots(fig, axes, spec):
+    """
+    左：最后一次被测运行的存活字节随时间变化 (有规模时按每元素字节)；右：块生命周期分布。
+    """
+    live_ax, life_ax = axes
+    for algo, curve in spec["curves"].items():
+        live_ax.step(curve["t_ms"], curve["live"], where="post", label=algo, linewidth=1.1)
+    live_ax.set_xlabel("Time since start of the sort (ms)")
+    live_ax.set_ylabel("Live bytes per element" if spec["per_element"] else "Live bytes")
+    live_ax.set_title("Live scratch memory (last measured run)", fontsize=10)
+    live_ax.grid(True, alpha=0.3)
+    edges = np.asarray(spec["edges"])
+    centers = np.sqrt(edges[:-1] * edges[1:])
+    for algo, counts in spec["lifetimes"].items():
+        counts = np.asarray(counts, dtype=float)
+        if counts.sum() > 0:
+            life_ax.plot(centers, counts / counts.sum(), label=algo, linewidth=1.2)
+    life_ax.set_xscale("log")
+    life_ax.set_xlabel("Block lifetime (us)")
+    life_ax.set_ylabel("Share of blocks")
+    life_ax.set_title("Allocation lifetimes (all measured runs)", fontsize=10)
+    life_ax.grid(True, which="both", alpha=0.3)
+    if live_ax.get_legend_handles_labels()[0]:
+        live_ax.legend(fontsize=7)
+    fig.suptitle(spec["title"], fontsize=11)
+    fig.tight_layout()
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Summarize the allocation logs written by record_alloc_trace.sh (LD_PRELOAD liballoc_trace.so): "
+                    "peak scratch bytes per element, allocation counts per run and churn per algorithm.")
+    parser.add_argument("record_dir", help="An alloc_trace_run_* directory (searched recursively for *_alloc_trace.bin).")
+    parser.add_argument("--output-dir", default=None,
+                        help="Where to write the report and plots (default: <record_dir>/analysis_result).")
+    add_plot_arguments(parser)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.record_dir):
+        print(f"Error: Record directory does not exist: {args.record_dir}", file=sys.stderr)
+        return 1
+    traces = find_alloc_traces(args.record_dir)
+    if not traces:
+        print(f"Error: No *_alloc_trace.bin files found in {args.record_dir}", file=sys.stderr)
+        return 1
+    output_dir = args.output_dir or os.path.join(args.record_dir, "analysis_result")
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+    except OSError as e:
+        print(f"Error creating output directory {output_dir}: {e}", file=sys.stderr)
+        return 1
+
+    aggregated = defaultdict(dict) # {(gen, type): {algo: aggregate}}
+    last_runs = defaultdict(dict)  # {(gen, type): {algo: summary of the last run}}
+    for (algo, generator, data_type), path in sorted(traces.items()):
+        try:
+            summaries = summarize_alloc_trace(path, stdout_for_trace(path, algo, generator, data_type))
+        except (OSError, ValueError) as e:
+            print(f"Error reading {path}: {e}", file=sys.stderr)
+            continue
+        if not summaries:
+            print(f"Warning: No profiled sections in {path}", file=sys.stderr)
+            continue
+        if "size" not in summaries[0]:
+            print(f"Warning: No matching RESULT lines for {algo}_{generator}_{data_type}; bytes per element unavailable.",
+                  file=sys.stderr)
+        aggregated[(generator, data_type)][algo] = aggregate_runs(summaries)
+        last_runs[(generator, data_type)][algo] = summaries[-1]
+
+    if not aggregated:
+        print("Error: No allocation traces could be read.", file=sys.stderr)
+        return 1
+
+    lines = [f"Allocation trace analysis of {os.path.abspath(args.record_dir)}",
+             "Medians over the measured runs (run 0 is the warm-up and not traced). 'peak live' = peak of bytes "
+             "allocated and not yet freed inside the sort, 'B/elem' = peak live / input size, "
+             "'churn' = bytes allocated / peak live.",
+             "===================================================="]
+    for (generator, data_type), results_by_algo in sorted(aggregated.items()):
+        lines.extend(format_config_report(generator, data_type, results_by_algo))
+    report = "\n".join(lines) + "\n"
+    print("\n" + report)
+    report_path = os.path.join(output_dir, "alloc_trace_report.txt")
+    try:
+        with open(report_path, 'w', encoding='utf-8') as f_out:
+            f_out.write(report)
+        print(f"Allocation trace report saved to: {report_path}")
+    except OSError as e:
+        print(f"Error writing report {report_path}: {e}", file=sys.stderr)
+
+    if not MATPLOTLIB_AVAILABLE:
+        print("\nPlot generation skipped as matplotlib is not available.")
+        return 0
+    jobs = []
+    for (generator, data_type), results_by_algo in sorted(aggregated.items()):
+        per_element = all(s.get("size") for s in last_runs[(generator, data_type)].values())
+        curves = {}
+        for algo, summary in sorted(last_runs[(generator, data_type)].items()):
+            times_ms, live = summary["live_curve"]
+            live = live / summary["size"] if per_element else live
+            t_ms, values = downsample_curve(np.asarray(times_ms), np.asarray(live, dtype=float))
+            curves[algo.replace("benchmark_", "")] = {"t_ms": t_ms, "live": values}
+        jobs.append(make_plot_job(
+            f"alloc_trace_{generator}_{data_type}", draw_alloc_plots, (1, 2, (15, 6)),
+            {"title": f"Allocations inside the sort: {generator}, {data_type}", "per_element": per_element,
+             "curves": curves, "edges": LIFETIME_BIN_EDGES_US.tolist(),
+             "lifetimes": {algo.replace("benchmark_", ""): r["lifetime_histogram"].tolist()
+                           for algo, r in sorted(results_by_algo.items())}}))
+    rendered, skipped, failed = render_plot_jobs(jobs, output_dir, formats=parse_plot_formats(args.plot_format),
+                                                 workers=args.plot_workers, dpi=args.plot_dpi, force=args.force_plots)
+    print(f"Allocation trace plots: {rendered} rendered, {skipped} unchanged, {failed} failed.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
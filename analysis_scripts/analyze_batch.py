@@ -0,0 +1,171 @@
+# analyze_batch.py
+# 批量小数组模式 (--batch，src/batch_sort.hpp) 的分析：读取一个或多个运行目录中带 batch= 的 RESULT 行与 LATENCY 直方图行，
+# 对每个 (生成器, 类型, 小数组元素数, 线程数) 列出各算法的延迟百分位 (各次运行的中位数，丢弃 run=0) 与吞吐量 (数组/s)，
+# 并画出每个算法合并后的延迟分布 (直方图与 CCDF，CCDF 显示尾部)。
+import os
+import re
+import sys
+import math
+import glob
+import argparse
+from collections import defaultdict
+
+import numpy as np
+
+from wall_time_parser import parse_result_line
+from plot_renderer import (MATPLOTLIB_AVAILABLE, make_plot_job, render_plot_jobs, add_plot_arguments,
+                           parse_plot_formats)
+
+STDOUT_FILE_PATTERN = re.compile(r'^(benchmark_.*?)_([^_]+)_([^_]+)_stdout\.txt$')
+PERCENTILE_FIELDS = ("p50us", "p90us", "p99us", "p999us", "maxus")
+BUCKETS_PER_OCTAVE = 4 # 与 BatchSort::BUCKETS_PER_OCTAVE 一致
+
+def bucket_index(lower_bound_ns):
+    return int(round(BUCKETS_PER_OCTAVE * math.log2(lower_bound_ns)))
+
+def collect_batch_results(run_dirs):
+    """
+    返回 {(gen, type, batch, threads): {algo: {"p50us": [...], ..., "arrayspersec": [...], "mode": str,
+                                                "histogram": {桶序号: 次数}}}}，只含计时运行 (run != 0)。
+    """
+    results = defaultdict(lambda: defaultdict(lambda: {"histogram": defaultdict(int), "mode": "",
+                                                       **{key: [] for key in PERCENTILE_FIELDS + ("arrayspersec",)}}))
+    for run_dir in run_dirs:
+        stdout_dir = os.path.join(run_dir, "results_stdout")
+        if not os.path.isdir(stdout_dir):
+            print(f"Warning: results_stdout directory not found: {stdout_dir}", file=sys.stderr)
+            continue
+        for filepath in sorted(glob.glob(os.path.join(stdout_dir, "benchmark_*_stdout.txt"))):
+            match = STDOUT_FILE_PATTERN.match(os.path.basename(filepath))
+            if not match:
+                continue
+            algo = match.group(1)
+            with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    if not (line.startswith("RESULT") or line.startswith("LATENCY")):
+                        continue
+                    fields = parse_result_line(line)
+                    if "batch" not in fields or fields.get("run", "0") == "0" or fields.get("configwarning") == "1":
+                        continue
+                    try:
+                        key = (fields["gen"], fields["datatype"], int(fields["batch"]), int(fields["threads"]))
+                    except (KeyError, ValueError):
+                        continue
+                    entry = results[key][algo]
+                    try:
+                        if line.startswith("LATENCY"):
+                            bounds = [float(v) for v in fields["bucketns"].split(",") if v]
+                            counts = [int(v) for v in fields["counts"].split(",") if v]
+                            for bound, count in zip(bounds, counts):
+                                entry["histogram"][bucket_index(bound)] += count
+                        else:
+                            for field in PERCENTILE_FIELDS + ("arrayspersec",):
+                                entry[field].append(float(fields[field]))
+                            entry["mode"] = fields.get("batchmode", "")
+                    except (KeyError, ValueError):
+                        print(f"Warning: malformed batch line in {filepath}", file=sys.stderr)
+    return results
+
+def format_report(results):
+    lines = ["Batched small-array sorting",
+             "Per-array latency percentiles in microseconds and throughput in arrays/s (median over timed runs).",
+             "===================================================="]
+    for (gen, data_type, batch, threads), algos in sorted(results.items()):
+        lines.append(f"\n{gen}/{data_type}, {batch} elements per array, {threads} threads")
+        lines.append(f"  {'algorithm':<24}{'mode':<11}" + "".join(f"{f[:-2]:>10}" for f in PERCENTILE_FIELDS)
+                     + f"{'arrays/s':>14}")
+        ranked = sorted(algos.items(), key=lambda item: -np.median(item[1]["arrayspersec"] or [0]))
+        for algo, entry in ranked:
+            if not entry["arrayspersec"]:
+                continue
+            cells = "".join(f"{np.median(entry[f]):>10.2f}" for f in PERCENTILE_FIELDS)
+            lines.append(f"  {algo.replace('benchmark_', '')[:23]:<24}{entry['mode']:<11}{cells}"
+                         f"{np.median(entry['arrayspersec']):>14.0f}")
+    return lines
+
+def draw_latency_distribution(fig, axes, spec):
+    """左：延迟直方图 (每个桶的比例，对数 x 轴)；右：CCDF P(latency > x)，对数-对数，显示 p99/p999 尾部。"""
+    hist_ax, ccdf_ax = axes[0], axes[1]
+    for algo, buckets in spec["series"]:
+        total = sum(count for _index, count in buckets)
+        bounds = [2 ** (index / BUCKETS_PER_OCTAVE) / 1000.0 for index, _count in buckets]
+        fractions = [count / total for _index, count in buckets]
+        hist_ax.step(bounds, fractions, where="post", label=algo, linewidth=1.2)
+        remaining, xs, ys = total, [], []
+        for bound, (_index, count) in zip(bounds, buckets):
+            remaining -= count
+            upper = bound * 2 ** (1 / BUCKETS_PER_OCTAVE)
+            if remaining > 0:
+                xs.append(upper)
+                ys.append(remaining / total)
+        if xs:
+            ccdf_ax.plot(xs, ys, marker=".", label=algo, linewidth=1.2)
+    hist_ax.set_xscale("log")
+    hist_ax.set_xlabel("Latency per array (us)")
+    hist_ax.set_ylabel("Fraction of arrays")
+    ccdf_ax.set_xscale("log")
+    ccdf_ax.set_yscale("log")
+    ccdf_ax.set_xlabel("Latency per array (us)")
+    ccdf_ax.set_ylabel("P(latency > x)")
+    for level, label in ((1e-2, "p99"), (1e-3, "p999")):
+        ccdf_ax.axhline(level, color="grey", linewidth=0.8, linestyle="--")
+        ccdf_ax.text(1.0, level, label, transform=ccdf_ax.get_yaxis_transform(), fontsize=7, va="bottom", ha="right")
+    for ax in (hist_ax, ccdf_ax):
+        ax.grid(True, alpha=0.3)
+        if ax.get_legend_handles_labels()[0]:
+            ax.legend(fontsize=7)
+    fig.suptitle(spec["title"], fontsize=11)
+    fig.tight_layout()
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Latency percentiles, throughput and latency distributions of --batch runs (many small "
+                    "independent arrays) per algorithm.")
+    parser.add_argument("run_dirs", nargs="+", help="Run directories containing results_stdout/ from --batch runs.")
+    parser.add_argument("--output-dir", default=None,
+                        help="Where to write the report and plots (default: <first run_dir>/analysis_result).")
+    add_plot_arguments(parser)
+    args = parser.parse_args()
+
+    results = collect_batch_results(args.run_dirs)
+    if not results:
+        print("Error: No --batch results (RESULT lines with batch=) found in " + ", ".join(args.run_dirs),
+              file=sys.stderr)
+        return 1
+    output_dir = args.output_dir or os.path.join(args.run_dirs[0], "analysis_result")
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+    except OSError as e:
+        print(f"Error creating output directory {output_dir}: {e}", file=sys.stderr)
+        return 1
+
+    report = "\n".join(format_report(results)) + "\n"
+    print("\n" + report)
+    report_path = os.path.join(output_dir, "batch_latency_report.txt")
+    try:
+        with open(report_path, 'w', encoding='utf-8') as f_out:
+            f_out.write(report)
+        print(f"Batch latency report saved to: {report_path}")
+    except OSError as e:
+        print(f"Error writing report {report_path}: {e}", file=sys.stderr)
+
+    if not MATPLOTLIB_AVAILABLE:
+        print("\nPlot generation skipped as matplotlib is not available.")
+        return 0
+    jobs = []
+    for (gen, data_type, batch, threads), algos in sorted(results.items()):
+        series = [(algo.replace("benchmark_", ""), sorted(entry["histogram"].items()))
+                  for algo, entry in sorted(algos.items()) if entry["histogram"]]
+        if not series:
+            continue
+        jobs.append(make_plot_job(f"batch_latency_{gen}_{data_type}_b{batch}_t{threads}", draw_latency_distribution,
+                                  (1, 2, (14, 5.5)),
+                                  {"title": f"Per-array latency: {gen}, {data_type}, {batch} elements, "
+                                            f"{threads} threads", "series": series}))
+    rendered, skipped, failed = render_plot_jobs(jobs, output_dir, formats=parse_plot_formats(args.plot_format),
+                                                 workers=args.plot_workers, dpi=args.plot_dpi, force=args.force_plots)
+    print(f"Batch latency plots: {rendered} rendered, {skipped} unchanged, {failed} failed.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+# analyze_cache_modes.py
+# 冷缓存 / 热缓存比较：读取一个或多个运行目录 (通常每个 CACHE_MODE 一个，也可以是同一目录中混合的结果)，
+# 按 RESULT 行的 cachemode= (default / cold / warm，src/cache_mode.hpp；没有该字段的旧结果算作 default) 分组，
+# 对每个 (算法, 生成器, 类型, 数组类型, 线程数, 元素数) 给出各模式的 wall time 中位数、
+# cold/warm 差距 (倍数与毫秒差，Mann-Whitney + Cliff's delta) 以及 default 落在两者之间的位置。
+# 每个 (生成器, 类型) 画出差距倍数随元素数的变化：输入远小于 LLC 时差距最大，远大于 LLC 时热缓存也帮不上忙。
+import os
+import re
+import sys
+import glob
+import argparse
+from collections import defaultdict
+
+import numpy as np
+
+from regression_detector import mann_whitney_u, cliffs_delta, effect_label
+from wall_time_parser import parse_result_line
+from plot_renderer import (MATPLOTLIB_AVAILABLE, make_plot_job, render_plot_jobs, add_plot_arguments,
+                           parse_plot_formats)
+
+STDOUT_FILE_PATTERN = re.compile(r'^(benchmark_.*?)_([^_]+)_([^_]+)_stdout\.txt$')
+CACHE_MODES = ("default", "cold", "warm")
+
+def collect_samples(run_dirs):
+    """
+    读取每个 stdout 文件的所有 RESULT 行 (所有大小)，跳过 configwarning 行与预热运行 (run=0)。
+    返回 {(algo, gen, type, vector, threads, size): {mode: {"milli": [...], "cacheprepmilli": [...]}}}。
+    """
+    samples = defaultdict(lambda: defaultdict(lambda: {"milli": [], "cacheprepmilli": []}))
+    for run_dir in run_dirs:
+        stdout_dir = os.path.join(run_dir, "results_stdout")
+        if not os.path.isdir(stdout_dir):
+            print(f"Warning: results_stdout directory not found: {stdout_dir}", file=sys.stderr)
+            continue
+        for filepath in sorted(glob.glob(os.path.join(stdout_dir, "benchmark_*_stdout.txt"))):
+            match = STDOUT_FILE_PATTERN.match(os.path.basename(filepath))
+            if not match:
+                continue
+            algo = match.group(1)
+            with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
+                records = [parse_result_line(line) for line in f if line.startswith("RESULT")]
+            for fields in records:
+                if fields.get("configwarning") == "1" or fields.get("run", "0") == "0":
+                    continue
+                try:
+                    key = (algo, fields["gen"], fields["datatype"], fields.get("vector", "?"),
+                           int(fields["threads"]), int(fields["size"]))
+                    milli = float(fields["milli"])
+                except (KeyError, ValueError):
+                    continue
+                entry = samples[key][fields.get("cachemode", "default")]
+                entry["milli"].append(milli)
+                if "cacheprepmilli" in fields:
+                    try:
+                        entry["cacheprepmilli"].append(float(fields["cacheprepmilli"]))
+                    except ValueError:
+                        pass
+    return samples
+
+def median_or_nan(values):
+    return float(np.median(values)) if values else np.nan
+
+def summarize(samples):
+    """
+    每个配置一行：各模式的中位数 (没有测量的模式为 nan)、gap (cold / warm)、gap_ms (cold - warm)、
+    p_value / effect (cold 对 warm)、default_position ((default - warm) / (cold - warm)，0 = 和 warm 一样，1 = 和 cold 一样)
+    与 prep_ms (cold 与 warm 的准备时间中位数)。
+    """
+    rows = []
+    for key, modes in samples.items():
+        medians = {mode: median_or_nan(modes[mode]["milli"]) if mode in modes else np.nan for mode in CACHE_MODES}
+        cold, warm, default = medians["cold"], medians["warm"], medians["default"]
+        row = {"key": key, "medians": medians, "gap": np.nan, "gap_ms": np.nan, "p_value": np.nan, "effect": "n/a",
+               "default_position": np.nan,
+               "prep_ms": {mode: median_or_nan(modes[mode]["cacheprepmilli"]) if mode in modes else np.nan
+                           for mode in ("cold", "warm")}}
+        if not np.isnan(cold) and not np.isnan(warm):
+            row["gap"] = cold / warm if warm > 0 else np.nan
+            row["gap_ms"] = cold - warm
+            cold_values, warm_values = modes["cold"]["milli"], modes["warm"]["milli"]
+            if len(cold_values) >= 2 and len(warm_values) >= 2:
+                _u, row["p_value"] = mann_whitney_u(cold_values, warm_values)
+                row["effect"] = effect_label(cliffs_delta(cold_values, warm_values))
+            if not np.isnan(default) and cold != warm:
+                row["default_position"] = (default - warm) / (cold - warm)
+        rows.append(row)
+    return sorted(rows, key=lambda r: (r["key"][1], r["key"][2], r["key"][0], r["key"][3], r["key"][4], r["key"][5]))
+
+def format_value(value, fmt):
+    return "-" if np.isnan(value) else format(value, fmt)
+
+def format_report(rows, alpha):
+    lines = ["Cold-cache vs warm-cache runs",
+             "gap = median cold / median warm (* = significant, Mann-Whitney p < alpha); default pos = where the "
+             "default mode lies between warm (0) and cold (1); prep = median cold flush / warm pre-touch time.",
+             "===================================================="]
+    current = None
+    for row in rows:
+        algo, gen, data_type, vector, threads, size = row["key"]
+        if (gen, data_type) != current:
+            current = (gen, data_type)
+            lines.append(f"\n{gen}/{data_type}")
+            lines.append(f"  {'algorithm':<22}{'vector':<9}{'thr':>5}{'size':>13}{'default ms':>12}{'cold ms':>11}"
+                         f"{'warm ms':>11}{'gap':>8}{'gap ms':>10}{'effect':>12}{'default pos':>13}"
+                         f"{'prep cold':>11}{'prep warm':>11}")
+        medians = row["medians"]
+        mark = "*" if not np.isnan(row["p_value"]) and row["p_value"] < alpha else " "
+        lines.append(f"  {algo.replace('benchmark_', '')[:21]:<22}{vector[:8]:<9}{threads:>5}{size:>13}"
+                     f"{format_value(medians['default'], '.2f'):>12}{format_value(medians['cold'], '.2f'):>11}"
+                     f"{format_value(medians['warm'], '.2f'):>11}{format_value(row['gap'], '.2f'):>7}{mark}"
+                     f"{format_value(row['gap_ms'], '.2f'):>10}{row['effect']:>12}"
+                     f"{format_value(row['default_position'], '.2f'):>13}"
+                     f"{format_value(row['prep_ms']['cold'], '.1f'):>11}{format_value(row['prep_ms']['warm'], '.1f'):>11}")
+    if all(np.isnan(row["gap"]) for row in rows):
+        lines.append("\nNo configuration was measured both cold and warm (run the sweep with CACHE_MODE=cold and "
+                     "CACHE_MODE=warm and pass both run directories).")
+    return lines
+
+def draw_gap_vs_size(fig, axes, spec):
+    """cold / warm 倍数随元素数的变化，每个算法一条线；y = 1 处的虚线表示没有差距。"""
+    ax = axes[0]
+    for label, points in spec["series"]:
+        ax.plot([p[0] for p in points], [p[1] for p in points], marker="o", label=label, linewidth=1.2)
+    ax.set_xscale("log", base=2)
+    ax.axhline(1.0, color="grey", linewidth=0.8, linestyle="--")
+    ax.set_xlabel("Elements")
+    ax.set_ylabel("Median cold time / median warm time")
+    ax.grid(True, alpha=0.3)
+    if ax.get_legend_handles_labels()[0]:
+        ax.legend(fontsize=7)
+    ax.set_title(spec["title"], fontsize=11)
+    fig.tight_layout()
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Wall-time gap between cold-cache and warm-cache runs (--cache cold / warm) per algorithm and "
+                    "input size, with the default mode placed between them.")
+    parser.add_argument("run_dirs", nargs="+", help="Run directories containing results_stdout/.")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Significance level (default: %(default)s).")
+    parser.add_argument("--output-dir", default=None,
+                        help="Where to write the report and plots (default: <first run_dir>/analysis_result).")
+    add_plot_arguments(parser)
+    args = parser.parse_args()
+
+    samples = collect_samples(args.run_dirs)
+    if not samples:
+        print("Error: No RESULT lines found in " + ", ".join(args.run_dirs), file=sys.stderr)
+        return 1
+    rows = summarize(samples)
+    output_dir = args.output_dir or os.path.join(args.run_dirs[0], "analysis_result")
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+    except OSError as e:
+        print(f"Error creating output directory {output_dir}: {e}", file=sys.stderr)
+        return 1
+
+    report = "\n".join(format_report(rows, args.alpha)) + "\n"
+    print("\n" + report)
+    report_path = os.path.join(output_dir, "cache_modes_report.txt")
+    try:
+        with open(report_path, 'w', encoding='utf-8') as f_out:
+            f_out.write(report)
+        print(f"Cache mode report saved to: {report_path}")
+    except OSError as e:
+        print(f"Error writing report {report_path}: {e}", file=sys.stderr)
+
+    if not MATPLOTLIB_AVAILABLE:
+        print("\nPlot generation skipped as matplotlib is not available.")
+        return 0
+    by_config = defaultdict(lambda: defaultdict(list))
+    for row in rows:
+        algo, gen, data_type, vector, threads, size = row["key"]
+        if np.isnan(row["gap"]):
+            continue
+        by_config[(gen, data_type)][f"{algo.replace('benchmark_', '')} ({vector}, t={threads})"].append(
+            (size, row["gap"]))
+    jobs = []
+    for (gen, data_type), series in sorted(by_config.items()):
+        jobs.append(make_plot_job(f"cache_gap_{gen}_{data_type}", draw_gap_vs_size, (1, 1, (9, 5.5)),
+                                  {"title": f"Cold / warm cache gap: {gen}, {data_type}",
+                                   "series": [(label, sorted(points)) for label, points in sorted(series.items())]}))
+    rendered, skipped, failed = render_plot_jobs(jobs, output_dir, formats=parse_plot_formats(args.plot_format),
+                                                 workers=args.plot_workers, dpi=args.plot_dpi, force=args.force_plots)
+    print(f"Cache mode plots: {rendered} rendered, {skipped} unchanged, {failed} failed.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
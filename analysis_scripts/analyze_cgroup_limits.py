@@ -0,0 +1,228 @@
+# analyze_cgroup_limits.py
+import os
+import argparse
+import json
+import sys
+from collections import defaultdict
+
+from mem_access_analyzer import format_bytes
+from plot_renderer import (MATPLOTLIB_AVAILABLE, make_plot_job, render_plot_jobs, add_plot_arguments,
+                           parse_plot_formats)
+
+STATUS_LABELS = {"oom_killed": "OOM", "failed": "FAIL", "timeout": "T/O", "incomplete": "PART",
+                 "cgroup_error": "CGERR", "launch_error": "ERR", "skipped": "skip"}
+
+def load_cgroup_runs(run_dir):
+    """
+    读取 sweep_orchestrator.py 写出的 cgroup_runs.jsonl (可以是多个 cgroup_run_* 目录中的)，返回记录列表，
+    保持写入顺序 (限制从宽到紧)。
+    """
+    records = []
+    for root, _dirs, files in os.walk(run_dir):
+        if "cgroup_runs.jsonl" not in files:
+            continue
+        with open(os.path.join(root, "cgroup_runs.jsonl"), "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    print(f"Warning: {root}/cgroup_runs.jsonl:{line_number}: {e}", file=sys.stderr)
+    return records
+
+def is_baseline(record):
+    return record["memory_limit_arg"].strip().lower() == "max" and record["cpu_limit_arg"].strip().lower() == "max"
+
+def derive_metrics(record, baseline):
+    """
+    每次运行的派生指标：相对无限制运行的排序时间与总时间倍数、被 CPU 配额限流的时间占比、
+    内存与 CPU 的 PSI 停顿占总时间的比例。
+    """
+    wall_us = max(record.get("wall_s", 0.0) * 1e6, 1.0)
+    cpu_stat = record.get("cpu_stat", {})
+    memory_pressure = record.get("memory_pressure", {})
+    cpu_pressure = record.get("cpu_pressure", {})
+    metrics = {
+        "slowdown": None,
+        "wall_slowdown": None,
+        "throttled_share": cpu_stat.get("throttled_usec", 0) / wall_us,
+        "throttled_periods": (cpu_stat.get("nr_throttled", 0) / cpu_stat["nr_periods"]) if cpu_stat.get("nr_periods") else 0.0,
+        "memory_some_share": memory_pressure.get("some_total_us", 0) / wall_us,
+        "memory_full_share": memory_pressure.get("full_total_us", 0) / wall_us,
+        "cpu_some_share": cpu_pressure.get("some_total_us", 0) / wall_us,
+        "memory_max_events": record.get("memory_events", {}).get("max", 0),
+        "oom_kills": record.get("memory_events", {}).get("oom_kill", 0),
+        "major_faults": record.get("memory_stat", {}).get("pgmajfault", 0),
+        "peak": record.get("memory_peak") if isinstance(record.get("memory_peak"), int) else None,
+    }
+    if baseline is not None and record.get("status") == "ok":
+        if record.get("median_milli") and baseline.get("median_milli"):
+            metrics["slowdown"] = record["median_milli"] / baseline["median_milli"]
+        if baseline.get("wall_s"):
+            metrics["wall_slowdown"] = record["wall_s"] / baseline["wall_s"]
+    return metrics
+
+def group_records(records):
+    """
+    {(gen, type): {algo: [(record, metrics)]}}，以及每个 (gen, type) 中限制标签的出现顺序。
+    同一配置出现多次 (多个 sweep 目录) 时保留最后一次。
+    """
+    latest = {}
+    for record in records:
+        latest[(record["gen"], record["datatype"], record["algo"], record["limit_tag"])] = record
+    grouped = defaultdict(lambda: defaultdict(list))
+    tag_order = defaultdict(list)
+    for (generator, data_type, algo, tag), record in latest.items():
+        if tag not in tag_order[(generator, data_type)]:
+            tag_order[(generator, data_type)].append(tag)
+    for (generator, data_type, algo, tag), record in latest.items():
+        baseline = next((r for (g, d, a, _t), r in latest.items()
+                         if (g, d, a) == (generator, data_type, algo) and is_baseline(r) and r.get("status") == "ok"), None)
+        grouped[(generator, data_type)][algo].append((record, derive_metrics(record, baseline)))
+    return grouped, tag_order
+
+def format_config_report(generator, data_type, results_by_algo, tags):
+    lines = [f"\nGenerator={generator}, DataType={data_type}",
+             "  Sort time relative to the unconstrained run (median of the measured runs), or why it did not finish:"]
+    width = max(10, max(len(tag) for tag in tags) + 1)
+    lines.append(f"  {'algorithm':<22}" + "".join(f"{tag:>{width}}" for tag in tags))
+    for algo, entries in sorted(results_by_algo.items()):
+        by_tag = {record["limit_tag"]: (record, metrics) for record, metrics in entries}
+        cells = []
+        for tag in tags:
+            if tag not in by_tag:
+                cells.append(f"{'':>{width}}")
+                continue
+            record, metrics = by_tag[tag]
+            if record.get("status") != "ok":
+                cells.append(f"{STATUS_LABELS.get(record.get('status'), record.get('status')):>{width}}")
+            elif metrics["slowdown"] is None:
+                cells.append(f"{'-':>{width}}")
+            else:
+                cells.append(f"{metrics['slowdown']:>{width - 1}.2f}x")
+        lines.append(f"  {algo.replace('benchmark_', '')[:21]:<22}" + "".join(cells))
+
+    lines.append("  Details (throttled = CPU quota throttling / wall time, PSI = stalled share of wall time):")
+    lines.append(f"    {'algorithm':<20}{'limits':<{width + 2}}{'status':>8}{'wall':>9}{'throttled':>10}{'mem PSI':>9}"
+                 f"{'cpu PSI':>9}{'max ev':>8}{'majflt':>9}{'peak':>12}")
+    for algo, entries in sorted(results_by_algo.items()):
+        for record, metrics in entries:
+            wall = f"{record['wall_s']:8.1f}s" if record.get("wall_s") is not None else f"{'-':>9}"
+            peak = format_bytes(metrics["peak"]) if metrics["peak"] is not None else "-"
+            lines.append(f"    {algo.replace('benchmark_', '')[:19]:<20}{record['limit_tag']:<{width + 2}}"
+                         f"{STATUS_LABELS.get(record.get('status'), 'ok'):>8}{wall}{metrics['throttled_share'] * 100:9.1f}%"
+                         f"{metrics['memory_some_share'] * 100:8.1f}%{metrics['cpu_some_share'] * 100:8.1f}%"
+                         f"{metrics['memory_max_events']:>8,}{metrics['major_faults']:>9,}{peak:>12}")
+    return lines
+
+def sweep_series(results_by_algo, axis):
+    """
+    axis="memory": cpu=max 时沿内存限制的曲线；axis="cpu": memory=max 时沿 CPU 限制的曲线。
+    返回 (x 轴标签, {algo: [(x 下标, 倍数 或 None, status)]})。
+    """
+    fixed_key, varying_key = ("cpu_limit_arg", "memory_limit_arg") if axis == "memory" else ("memory_limit_arg", "cpu_limit_arg")
+    labels = []
+    series = {}
+    for algo, entries in sorted(results_by_algo.items()):
+        points = []
+        for record, metrics in entries:
+            if record[fixed_key].strip().lower() != "max":
+                continue
+            label = record[varying_key]
+            if label not in labels:
+                labels.append(label)
+            points.append((labels.index(label), metrics["slowdown"], record.get("status")))
+        if points:
+            series[algo.replace("benchmark_", "")] = points
+    return labels, series
+
+def draw_limit_plots(fig, axes, spec):
+    """
+    左：内存限制收紧时的排序时间倍数；右：CPU 配额收紧时的倍数。没有完成的配置用红色 x 标在图的顶部。
+    """
+    for ax, (title, labels, series) in zip(axes, spec["panels"]):
+        ax.set_title(title, fontsize=10)
+        for algo, points in series.items():
+            ok = [(x, y) for x, y, status in points if status == "ok" and y is not None]
+            if ok:
+                line, = ax.plot([p[0] for p in ok], [p[1] for p in ok], marker="o", label=algo, linewidth=1.2)
+                color = line.get_color()
+            else:
+                color = "red"
+            failed = [x for x, _y, status in points if status not in ("ok", "skipped")]
+            if failed:
+                ax.scatter(failed, [0.97] * len(failed), marker="x", color=color, s=60, zorder=5,
+                           transform=ax.get_xaxis_transform())
+        ax.set_xticks(range(len(labels)))
+        ax.set_xticklabels(labels)
+        ax.axhline(1.0, color="grey", linewidth=0.8, linestyle="--")
+        ax.set_ylabel("Sort time / unconstrained")
+        ax.grid(True, alpha=0.3)
+        if ax.get_legend_handles_labels()[0]:
+            ax.legend(fontsize=7)
+    axes[0].set_xlabel("memory.max (cpu.max = max)")
+    axes[1].set_xlabel("cpu.max (memory.max = max)")
+    fig.suptitle(spec["title"] + "  (x at the top = OOM / failed / timed out)", fontsize=11)
+    fig.tight_layout()
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Summarize a resource-constrained sweep (run_scripts/sweep_orchestrator.py): how each algorithm's "
+                    "sort time degrades, or fails, as memory.max and cpu.max tighten, with throttling and PSI stalls.")
+    parser.add_argument("run_dir", help="A cgroup_run_* directory, or a directory containing several of them.")
+    parser.add_argument("--output-dir", default=None,
+                        help="Where to write the report and plots (default: <run_dir>/analysis_result).")
+    add_plot_arguments(parser)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.run_dir):
+        print(f"Error: Run directory does not exist: {args.run_dir}", file=sys.stderr)
+        return 1
+    records = load_cgroup_runs(args.run_dir)
+    if not records:
+        print(f"Error: No cgroup_runs.jsonl found in {args.run_dir}", file=sys.stderr)
+        return 1
+    output_dir = args.output_dir or os.path.join(args.run_dir, "analysis_result")
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+    except OSError as e:
+        print(f"Error creating output directory {output_dir}: {e}", file=sys.stderr)
+        return 1
+
+    grouped, tag_order = group_records(records)
+    lines = [f"Resource-constrained sweep analysis of {os.path.abspath(args.run_dir)}",
+             f"{len(records)} runs. " + ", ".join(f"{label} = {status}" for status, label in STATUS_LABELS.items()),
+             "===================================================="]
+    for key, results_by_algo in sorted(grouped.items()):
+        lines.extend(format_config_report(key[0], key[1], results_by_algo, tag_order[key]))
+    report = "\n".join(lines) + "\n"
+    print("\n" + report)
+    report_path = os.path.join(output_dir, "cgroup_limits_report.txt")
+    try:
+        with open(report_path, 'w', encoding='utf-8') as f_out:
+            f_out.write(report)
+        print(f"Constrained sweep report saved to: {report_path}")
+    except OSError as e:
+        print(f"Error writing report {report_path}: {e}", file=sys.stderr)
+
+    if not MATPLOTLIB_AVAILABLE:
+        print("\nPlot generation skipped as matplotlib is not available.")
+        return 0
+    jobs = []
+    for (generator, data_type), results_by_algo in sorted(grouped.items()):
+        panels = []
+        for axis, title in (("memory", "Memory limit"), ("cpu", "CPU quota")):
+            labels, series = sweep_series(results_by_algo, axis)
+            panels.append((title, labels, series))
+        jobs.append(make_plot_job(f"cgroup_limits_{generator}_{data_type}", draw_limit_plots, (1, 2, (15, 6)),
+                                  {"title": f"Degradation under cgroup limits: {generator}, {data_type}",
+                                   "panels": panels}))
+    rendered, skipped, failed = render_plot_jobs(jobs, output_dir, formats=parse_plot_formats(args.plot_format),
+                                                 workers=args.plot_workers, dpi=args.plot_dpi, force=args.force_plots)
+    print(f"Constrained sweep plots: {rendered} rendered, {skipped} unchanged, {failed} failed.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
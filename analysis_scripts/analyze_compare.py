@@ -0,0 +1,112 @@
+# analyze_compare.py
+import os
+import argparse
+import sys
+
+from run_loader import load_run, list_run_dirs
+from run_provenance import parse_where, filter_run_dirs
+from regression_detector import (compare_samples, pool_samples, rank_findings,
+                                 format_finding, WALL_TIME_METRIC)
+
+# 退出码: 0 = 没有显著退化, 1 = 运行出错, 2 = 检测到显著退化 (用于 CI/gating)
+EXIT_REGRESSION = 2
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare a benchmark run against a baseline run (or against the stored run history) "
+                    "and report statistically significant regressions and improvements. "
+                    f"Exits with {EXIT_REGRESSION} if a regression is found.")
+    parser.add_argument("candidate_run", help="Run directory to check (perf_benchmark_run_*).")
+    parser.add_argument("baseline_run", nargs='?', default=None,
+                        help="Known-good run directory to compare against.")
+    parser.add_argument("--history", default=None,
+                        help="Directory holding perf_benchmark_run_* directories. All runs older than the "
+                             "candidate are pooled into the baseline instead of using a single baseline run.")
+    parser.add_argument("--where", action="append", default=[],
+                        help="Only pool history runs whose environment fingerprint matches, e.g. "
+                             "--where governor=performance --where turbo=off (repeatable).")
+    parser.add_argument("--history-runs", type=int, default=0,
+                        help="Only pool the most recent N history runs (default: all).")
+    parser.add_argument("--alpha", type=float, default=0.05,
+                        help="False discovery rate for the Benjamini-Hochberg corrected tests (default: 0.05).")
+    parser.add_argument("--min-change", type=float, default=0.03,
+                        help="Minimum relative change of the median to report a significant result (default: 0.03).")
+    parser.add_argument("--counter-threshold", type=float, default=0.10,
+                        help="Relative change used for per-element counters that only have one sample per side "
+                             "(two-run comparison), where no test is possible (default: 0.10).")
+    parser.add_argument("--gate-on", choices=["wall", "all"], default="wall",
+                        help="Which regressions produce the non-zero exit code: wall time only, or every metric.")
+    parser.add_argument("--output", default=None,
+                        help="Report file. Defaults to analysis_result/regression_report.txt inside the candidate run.")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.candidate_run):
+        print(f"Error: Candidate run directory does not exist: {args.candidate_run}", file=sys.stderr)
+        return 1
+    if (args.baseline_run is None) == (args.history is None):
+        print("Error: Specify exactly one of a baseline run directory or --history.", file=sys.stderr)
+        return 1
+
+    candidate = load_run(args.candidate_run)
+    if args.baseline_run is not None:
+        if not os.path.isdir(args.baseline_run):
+            print(f"Error: Baseline run directory does not exist: {args.baseline_run}", file=sys.stderr)
+            return 1
+        baseline_runs = [load_run(args.baseline_run)]
+    else:
+        try:
+            conditions = parse_where(args.where)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        history_dirs = [d for d in filter_run_dirs(list_run_dirs(args.history), conditions)
+                        if os.path.basename(os.path.normpath(d)) < candidate["name"]]
+        if args.history_runs > 0:
+            history_dirs = history_dirs[-args.history_runs:]
+        if not history_dirs:
+            print(f"Error: No history runs older than {candidate['name']} found in {args.history}", file=sys.stderr)
+            return 1
+        print(f"Pooling {len(history_dirs)} history run(s) as baseline.")
+        baseline_runs = [load_run(d) for d in history_dirs]
+
+    baseline_label = ", ".join(r["name"] for r in baseline_runs) if len(baseline_runs) <= 3 \
+        else f"{len(baseline_runs)} history runs ({baseline_runs[0]['name']} .. {baseline_runs[-1]['name']})"
+
+    findings, unmatched = compare_samples(pool_samples(baseline_runs), pool_samples([candidate]),
+                                          alpha=args.alpha, min_rel_change=args.min_change,
+                                          counter_threshold=args.counter_threshold)
+    if not findings:
+        print("Error: No matching configurations between candidate and baseline.", file=sys.stderr)
+        return 1
+    regressions, improvements = rank_findings(findings)
+
+    lines = [f"Candidate: {candidate['name']}",
+             f"Baseline:  {baseline_label}",
+             f"Tests: {len(findings)} (alpha={args.alpha}, min change={args.min_change:.1%}, "
+             f"counter threshold={args.counter_threshold:.1%})",
+             "===================================================="]
+    lines.append(f"\nSignificant regressions ({len(regressions)}):")
+    lines.extend("  " + format_finding(f) for f in regressions)
+    lines.append(f"\nSignificant improvements ({len(improvements)}):")
+    lines.extend("  " + format_finding(f) for f in improvements)
+    if unmatched:
+        lines.append(f"\nUnmatched configurations ({len(unmatched)}):")
+        lines.extend(f"  {gen} {dtype} {algo.replace('benchmark_', '')}: {reason}"
+                     for (gen, dtype, algo), reason in unmatched)
+    report = "\n".join(lines) + "\n"
+    print("\n" + report)
+
+    output_path = args.output or os.path.join(args.candidate_run, "analysis_result", "regression_report.txt")
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f_out:
+            f_out.write(report)
+        print(f"Regression report saved to: {output_path}")
+    except OSError as e:
+        print(f"Error writing regression report {output_path}: {e}", file=sys.stderr)
+
+    gating = regressions if args.gate_on == "all" else [f for f in regressions if f["metric"] == WALL_TIME_METRIC]
+    return EXIT_REGRESSION if gating else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+# analyze_corun.py
+# 共同运行 (co-run) 干扰分析：比较同一组配置在独占机器 (CORUN_MODE=none) 与旁边有干扰源
+# (CORUN_MODE=stressor / command，见 run_scripts/run_time_perfFIFO.sh) 时的结果。
+# 对每个 (生成器, 类型, 算法) 给出 wall time 的减速倍数 (Mann-Whitney，BH 校正)，
+# 以及每个元素的 L3 未命中停顿周期、L3 load 未命中与 LLC store 未命中相对独占运行的变化，
+# 并按减速倍数列出最受干扰的算法。两个运行应使用相同的 BENCH_CPUS (线程数)。
+import os
+import sys
+import argparse
+
+import numpy as np
+
+from run_loader import load_run
+from regression_detector import pool_samples, compare_samples, effect_label, WALL_TIME_METRIC
+
+# 报告中列出的计数器 (每个元素)，与 run_loader.PER_ELEMENT_COUNTERS 的键名一致
+INTERFERENCE_COUNTERS = [
+    ("Stalls L3 Miss (Cycles)", "L3 stall cyc"),
+    ("L3 Load Misses (Loads hitting DRAM)", "L3 ld miss"),
+    ("LLC Store Misses", "LLC st miss"),
+    ("Cycles", "cycles"),
+]
+
+def describe_corunner(metadata):
+    mode = metadata.get("corun_mode", "")
+    if mode == "stressor":
+        return f"mem_stressor {metadata.get('corun_args', '')} on CPUs {metadata.get('corun_cpus', '?')}"
+    if mode == "command":
+        return f"'{metadata.get('corun_command', '')}' on CPUs {metadata.get('corun_cpus', '?')}"
+    return mode or "unknown (no corun_mode in run_metadata.txt)"
+
+def check_runs(isolated, corun):
+    """返回关于两个运行可比性的警告列表 (核心集合、co-runner 设置)。"""
+    warnings = []
+    iso_meta, co_meta = isolated["metadata"], corun["metadata"]
+    if iso_meta.get("corun_mode", "none") != "none":
+        warnings.append(f"the isolated run {isolated['name']} itself had a co-runner "
+                        f"({iso_meta.get('corun_mode')})")
+    if co_meta.get("corun_mode", "none") == "none":
+        warnings.append(f"the co-run run {corun['name']} has corun_mode=none or no run_metadata.txt")
+    if iso_meta.get("bench_cpus", "") != co_meta.get("bench_cpus", ""):
+        warnings.append(f"benchmark CPUs differ: isolated '{iso_meta.get('bench_cpus', '')}', "
+                        f"co-run '{co_meta.get('bench_cpus', '')}'")
+    return warnings
+
+def interference_rows(findings):
+    """
+    把 compare_samples 的结果按 (gen, type, algo) 汇总为一行：
+    wall time 的中位数、slowdown (co-run / isolated)、p_adjusted、cliffs_delta、verdict，
+    以及每个计数器的相对变化 (没有 perf 数据时为 nan)。
+    """
+    rows = {}
+    for f in findings:
+        row = rows.setdefault((f["generator"], f["datatype"], f["algo"]), {"counters": {}})
+        if f["metric"] == WALL_TIME_METRIC:
+            row.update({"isolated": f["baseline_median"], "corun": f["candidate_median"],
+                        "slowdown": f["candidate_median"] / f["baseline_median"],
+                        "p_adjusted": f["p_adjusted"], "cliffs_delta": f["cliffs_delta"], "verdict": f["verdict"]})
+        else:
+            row["counters"][f["metric"]] = f["rel_change"]
+    return {key: row for key, row in rows.items() if "slowdown" in row}
+
+def format_report(rows, unmatched, isolated, corun, warnings):
+    lines = ["Co-run interference",
+             f"isolated: {isolated['name']}",
+             f"co-run:   {corun['name']} with {describe_corunner(corun['metadata'])}",
+             f"benchmark CPUs: {corun['metadata'].get('bench_cpus') or 'all'}",
+             "slowdown = median co-run wall time / median isolated wall time, * = significant (Mann-Whitney, "
+             "BH-corrected); counter columns are the relative change per element.",
+             "===================================================="]
+    for warning in warnings:
+        lines.append(f"Warning: {warning}")
+    header = (f"{'algorithm':<24}{'gen/type':<20}{'isolated':>11}{'co-run':>11}{'slowdown':>10}"
+              + "".join(f"{label:>13}" for _counter, label in INTERFERENCE_COUNTERS))
+    lines.append(header)
+    for (gen, data_type, algo), row in sorted(rows.items()):
+        mark = "*" if row["verdict"] != "unchanged" else " "
+        cells = ""
+        for counter, _label in INTERFERENCE_COUNTERS:
+            change = row["counters"].get(counter, np.nan)
+            cells += f"{'-':>13}" if np.isnan(change) else f"{change * 100:>+12.1f}%"
+        lines.append(f"{algo.replace('benchmark_', '')[:23]:<24}{(gen + '/' + data_type)[:19]:<20}"
+                     f"{row['isolated']:>11.2f}{row['corun']:>11.2f}{row['slowdown']:>9.2f}{mark}{cells}")
+
+    slowed = sorted((row["slowdown"], key) for key, row in rows.items() if row["verdict"] == "regression")
+    if slowed:
+        lines.append("\nMost affected (significant slowdowns):")
+        for slowdown, (gen, data_type, algo) in reversed(slowed):
+            row = rows[(gen, data_type, algo)]
+            stall = row["counters"].get(INTERFERENCE_COUNTERS[0][0], np.nan)
+            stall_text = "" if np.isnan(stall) else f", L3-miss stall cycles {stall * 100:+.0f}%"
+            lines.append(f"  {algo.replace('benchmark_', '')} {gen}/{data_type}: x{slowdown:.2f} "
+                         f"(effect {effect_label(row['cliffs_delta'])}{stall_text})")
+    else:
+        lines.append("\nNo configuration is significantly slower with the co-runner.")
+    if unmatched:
+        lines.append(f"\n{len(unmatched)} configuration(s) not compared:")
+        for (gen, data_type, algo), reason in unmatched:
+            lines.append(f"  {algo.replace('benchmark_', '')} {gen}/{data_type}: {reason}")
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Slowdown and cache/memory counter changes of each algorithm when a co-runner (memory stressor "
+                    "or another benchmark) shares the machine, relative to an isolated run.")
+    parser.add_argument("isolated_run", help="Run directory measured without a co-runner (CORUN_MODE=none).")
+    parser.add_argument("corun_run", help="Run directory measured with a co-runner.")
+    parser.add_argument("--alpha", type=float, default=0.05, help="False discovery rate (default: %(default)s).")
+    parser.add_argument("--min-slowdown", type=float, default=0.03,
+                        help="Smallest relative wall-time change reported as significant (default: %(default)s).")
+    parser.add_argument("--output", default=None,
+                        help="Report file (default: corun_interference.txt in the co-run directory).")
+    args = parser.parse_args()
+
+    for run_dir in (args.isolated_run, args.corun_run):
+        if not os.path.isdir(os.path.join(run_dir, "results_stdout")):
+            print(f"Error: results_stdout directory not found in {run_dir}", file=sys.stderr)
+            return 1
+    isolated = load_run(args.isolated_run, with_perf=True)
+    corun = load_run(args.corun_run, with_perf=True)
+    warnings = check_runs(isolated, corun)
+    for warning in warnings:
+        print(f"Warning: {warning}", file=sys.stderr)
+
+    findings, unmatched = compare_samples(pool_samples([isolated]), pool_samples([corun]), alpha=args.alpha,
+                                          min_rel_change=args.min_slowdown)
+    rows = interference_rows(findings)
+    if not rows:
+        print("Error: No configuration was measured in both runs.", file=sys.stderr)
+        return 1
+
+    report = "\n".join(format_report(rows, unmatched, isolated, corun, warnings)) + "\n"
+    print("\n" + report)
+    output_path = args.output or os.path.join(args.corun_run, "corun_interference.txt")
+    try:
+        with open(output_path, 'w', encoding='utf-8') as f_out:
+            f_out.write(report)
+        print(f"Co-run interference report saved to: {output_path}")
+    except OSError as e:
+        print(f"Error writing report {output_path}: {e}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
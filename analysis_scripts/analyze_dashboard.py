@@ -0,0 +1,70 @@
+# analyze_dashboard.py
+import os
+import argparse
+import sys
+
+from run_loader import list_run_dirs, RUN_DIR_PREFIX
+from dashboard_builder import build_dashboard_data, write_dashboard
+
+def resolve_run_dirs(paths):
+    """
+    每个路径可以是单个运行目录，也可以是包含多个 perf_benchmark_run_* 的目录 (例如 run/)。
+    """
+    run_dirs = []
+    for path in paths:
+        if not os.path.isdir(path):
+            print(f"Warning: {path} is not a directory, skipped.", file=sys.stderr)
+            continue
+        if os.path.basename(os.path.normpath(path)).startswith(RUN_DIR_PREFIX) or \
+           os.path.isdir(os.path.join(path, "results_stdout")):
+            run_dirs.append(os.path.abspath(path))
+        else:
+            run_dirs.extend(list_run_dirs(path))
+    # 去重但保持顺序
+    return list(dict.fromkeys(run_dirs))
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build a self-contained interactive HTML dashboard (filters, metric toggles, sample "
+                    "distributions) from one or more benchmark runs.")
+    parser.add_argument("paths", nargs='+',
+                        help="Run directories (perf_benchmark_run_*) and/or directories containing them.")
+    parser.add_argument("--output", default=None,
+                        help="Output HTML file. Defaults to analysis_result/dashboard.html inside the run when a "
+                             "single run is given, otherwise dashboard.html in the current directory.")
+    parser.add_argument("--max-samples-per-config", type=int, default=0,
+                        help="Embed at most N raw wall time samples per configuration (evenly spaced; default: all). "
+                             "The page additionally downsamples what it draws.")
+    args = parser.parse_args()
+
+    run_dirs = resolve_run_dirs(args.paths)
+    if not run_dirs:
+        print("Error: No benchmark run directories found.", file=sys.stderr)
+        return 1
+
+    print(f"Collecting {len(run_dirs)} run(s)...")
+    data = build_dashboard_data(run_dirs, max_samples_per_row=args.max_samples_per_config)
+    if not data["rows"]["run"]:
+        print("Error: No RESULT data found in the given runs.", file=sys.stderr)
+        return 1
+
+    output_path = args.output
+    if output_path is None:
+        if len(run_dirs) == 1:
+            output_path = os.path.join(run_dirs[0], "analysis_result", "dashboard.html")
+        else:
+            output_path = "dashboard.html"
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        raw_size, compressed_size = write_dashboard(data, output_path)
+    except (OSError, ValueError) as e:
+        print(f"Error writing dashboard {output_path}: {e}", file=sys.stderr)
+        return 1
+
+    print(f"Dashboard: {len(data['rows']['run'])} configuration(s), {len(data['samples']['row'])} sample(s), "
+          f"{len(data['metrics']['names'])} metric(s); data {raw_size / 1024:.1f} KiB -> {compressed_size / 1024:.1f} KiB compressed.")
+    print(f"Dashboard saved to: {output_path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
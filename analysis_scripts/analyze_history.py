@@ -0,0 +1,109 @@
+# analyze_history.py
+import os
+import argparse
+import sys
+
+from run_loader import list_run_dirs
+from run_provenance import parse_where, filter_run_dirs
+from changepoint_detector import (load_state, save_state, empty_state, ingest_runs,
+                                  update_change_points, describe_change_point, split_series_key)
+
+STATE_FILENAME = "changepoint_state.json"
+REPORT_FILENAME = "changepoints_report.txt"
+
+def format_change_point(info, is_new):
+    machine, generator, data_type, algo, size, threads = split_series_key(info["series"])
+    direction = "slower" if info["rel_change"] > 0 else "faster"
+    if info["attribution"]:
+        cause = "; ".join(f"{key}: {before or '?'} -> {after or '?'}"
+                          for key, (before, after) in info["attribution"].items())
+    else:
+        cause = "no metadata change (environment noise or an unrecorded change)"
+    marker = "[NEW] " if is_new else "      "
+    return (f"{marker}{info['run']}  {machine or '-'} {algo.replace('benchmark_', '')} {generator} {data_type} "
+            f"size={size} threads={threads}: {info['before_ms']:.3f} ms -> {info['after_ms']:.3f} ms "
+            f"({info['rel_change'] * 100:+.2f}%, {direction})\n"
+            f"        cause: {cause}")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Detect change points in the wall time history of all benchmark runs in a directory. "
+                    "Only runs that were not seen before are processed; the detector state is kept in "
+                    f"{STATE_FILENAME} next to the runs.")
+    parser.add_argument("base_run_dir", nargs='?', default=None,
+                        help="Directory holding perf_benchmark_run_* directories (default: ../run).")
+    parser.add_argument("--state", default=None,
+                        help=f"State file (default: <base_run_dir>/{STATE_FILENAME}).")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Ignore the stored state and re-ingest the whole history.")
+    parser.add_argument("--penalty", type=float, default=2.0,
+                        help="PELT penalty factor, multiplied by log(n). Higher = fewer change points (default: 2.0).")
+    parser.add_argument("--min-shift", type=float, default=0.05,
+                        help="Minimum relative shift of the median to report a change point (default: 0.05).")
+    parser.add_argument("--min-segment", type=int, default=2,
+                        help="Runs required on each side before a change point is confirmed (default: 2).")
+    parser.add_argument("--where", action="append", default=[],
+                        help="Only use runs whose environment fingerprint matches, e.g. --where governor=performance "
+                             "(repeatable). Use a separate --state file per filter.")
+    parser.add_argument("--output", default=None,
+                        help=f"Report file (default: <base_run_dir>/{REPORT_FILENAME}).")
+    args = parser.parse_args()
+
+    if args.base_run_dir is None:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        args.base_run_dir = os.path.join(script_dir, "..", "run")
+    base_run_dir = os.path.abspath(args.base_run_dir)
+    try:
+        run_dirs = filter_run_dirs(list_run_dirs(base_run_dir), parse_where(args.where))
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if not run_dirs:
+        print(f"Error: No perf_benchmark_run_* directories found in {base_run_dir}", file=sys.stderr)
+        return 1
+    if args.min_segment < 1:
+        print("Error: --min-segment must be at least 1.", file=sys.stderr)
+        return 1
+
+    state_path = args.state or os.path.join(base_run_dir, STATE_FILENAME)
+    state = empty_state() if args.rebuild else load_state(state_path)
+    new_runs = ingest_runs(state, run_dirs)
+    print(f"Ingested {len(new_runs)} new run(s); {len(state['ingested_runs'])} run(s) in history, "
+          f"{len(state['series'])} series.")
+
+    newly_confirmed = set(update_change_points(state, penalty_factor=args.penalty,
+                                               min_shift=args.min_shift, min_segment=args.min_segment))
+    try:
+        save_state(state, state_path)
+    except OSError as e:
+        print(f"Warning: Could not save change-point state {state_path}: {e}", file=sys.stderr)
+
+    entries = []
+    for key, series in state["series"].items():
+        for index in series["change_points"]:
+            entries.append((series["runs"][index], key, index))
+    entries.sort()
+
+    lines = [f"History: {base_run_dir}",
+             f"Runs: {len(state['ingested_runs'])}, series: {len(state['series'])}, "
+             f"change points: {len(entries)} ({len(newly_confirmed)} new)",
+             f"(penalty={args.penalty} * log(n), min shift={args.min_shift:.1%}, min segment={args.min_segment})",
+             "===================================================="]
+    for _run, key, index in entries:
+        lines.append(format_change_point(describe_change_point(state, key, index), (key, index) in newly_confirmed))
+    if not entries:
+        lines.append("No change points detected.")
+    report = "\n".join(lines) + "\n"
+    print("\n" + report)
+
+    output_path = args.output or os.path.join(base_run_dir, REPORT_FILENAME)
+    try:
+        with open(output_path, 'w', encoding='utf-8') as f_out:
+            f_out.write(report)
+        print(f"Change-point report saved to: {output_path}")
+    except OSError as e:
+        print(f"Error writing change-point report {output_path}: {e}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
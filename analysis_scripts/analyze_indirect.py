@@ -0,0 +1,144 @@
+# analyze_indirect.py
+# 直接排序 vs 间接排序 (--indirect，src/indirect_sort.hpp)：读取一个或多个运行目录的所有 RESULT 行，
+# 按 indirect= 字段分成两组，对每个 (算法, 生成器, 数据类型, 元素数, 线程数) 比较中位耗时 (milli)，
+# 给出间接排序三个阶段 (keymilli / keysortmilli / gathermilli) 的中位数、加速比与 Mann-Whitney 检验 (BH 校正)。
+# 直接与间接的结果可以来自同一个运行目录 (例如两次 --server 任务) 或不同的运行目录。
+import os
+import re
+import sys
+import glob
+import argparse
+from collections import defaultdict
+
+import numpy as np
+
+from wall_time_parser import parse_result_line
+from regression_detector import mann_whitney_u, cliffs_delta, benjamini_hochberg, effect_label
+
+STDOUT_FILE_PATTERN = re.compile(r'^(benchmark_.*?)_([^_]+)_([^_]+)_stdout\.txt$')
+PHASE_FIELDS = ("keymilli", "keysortmilli", "gathermilli")
+
+def collect_samples(run_dirs):
+    """
+    返回 {(algo, gen, type, size, threads): {"direct": {"milli": [...]}, "indirect": {"milli": [...], "keymilli": [...], ...}}}。
+    跳过 configwarning 行与预热运行 (run=0)；没有 indirect 字段的旧结果算作直接排序。
+    """
+    samples = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
+    for run_dir in run_dirs:
+        stdout_dir = os.path.join(run_dir, "results_stdout")
+        if not os.path.isdir(stdout_dir):
+            print(f"Warning: results_stdout directory not found: {stdout_dir}", file=sys.stderr)
+            continue
+        for filepath in sorted(glob.glob(os.path.join(stdout_dir, "benchmark_*_stdout.txt"))):
+            match = STDOUT_FILE_PATTERN.match(os.path.basename(filepath))
+            if not match:
+                continue
+            algo = match.group(1)
+            with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    if not line.startswith("RESULT"):
+                        continue
+                    fields = parse_result_line(line)
+                    if fields.get("configwarning") == "1" or fields.get("run", "0") == "0":
+                        continue
+                    try:
+                        key = (algo, fields["gen"], fields["datatype"], int(fields["size"]), int(fields["threads"]))
+                        values = {"milli": float(fields["milli"])}
+                        for phase in PHASE_FIELDS:
+                            if phase in fields:
+                                values[phase] = float(fields[phase])
+                    except (KeyError, ValueError):
+                        continue
+                    mode = "indirect" if fields.get("indirect") == "1" else "direct"
+                    for name, value in values.items():
+                        samples[key][mode][name].append(value)
+    return samples
+
+def compare_modes(samples, alpha=0.05):
+    """
+    只保留两种模式都有结果的配置。每项含 direct / indirect 中位数、各阶段中位数、
+    speedup (直接 / 间接，>1 表示间接更快)、p_adjusted、cliffs_delta 与 significant。
+    """
+    rows = []
+    for key, modes in samples.items():
+        direct, indirect = modes.get("direct"), modes.get("indirect")
+        if not direct or not indirect:
+            continue
+        row = {"key": key, "direct": float(np.median(direct["milli"])),
+               "indirect": float(np.median(indirect["milli"])), "p_value": np.nan, "cliffs_delta": np.nan}
+        for phase in PHASE_FIELDS:
+            row[phase] = float(np.median(indirect[phase])) if indirect.get(phase) else np.nan
+        row["speedup"] = row["direct"] / row["indirect"] if row["indirect"] > 0 else np.nan
+        if len(direct["milli"]) >= 2 and len(indirect["milli"]) >= 2:
+            _u, row["p_value"] = mann_whitney_u(indirect["milli"], direct["milli"])
+            row["cliffs_delta"] = cliffs_delta(indirect["milli"], direct["milli"])
+        rows.append(row)
+    tested = [row for row in rows if not np.isnan(row["p_value"])]
+    for row, adjusted in zip(tested, benjamini_hochberg([row["p_value"] for row in tested])):
+        row["p_adjusted"] = adjusted
+    for row in rows:
+        p = row.get("p_adjusted", np.nan)
+        row["significant"] = bool(not np.isnan(p) and p < alpha)
+    return sorted(rows, key=lambda row: row["key"])
+
+def format_report(rows, unmatched):
+    lines = ["Direct vs indirect (key+index sort + gather) sorting",
+             "Median wall time (ms); speedup = direct / indirect (> 1: indirect is faster), * = significant "
+             "(Mann-Whitney, BH-corrected).",
+             "===================================================="]
+    header = (f"{'algorithm':<20}{'gen/type':<20}{'elements':>12}{'thr':>5}{'direct':>11}{'indirect':>11}"
+              f"{'key':>9}{'keysort':>10}{'gather':>10}{'speedup':>10}")
+    lines.append(header)
+    for row in rows:
+        algo, gen, data_type, size, threads = row["key"]
+        mark = "*" if row["significant"] else " "
+        lines.append(f"{algo.replace('benchmark_', '')[:19]:<20}{(gen + '/' + data_type)[:19]:<20}{size:>12}"
+                     f"{threads:>5}{row['direct']:>11.2f}{row['indirect']:>11.2f}{row['keymilli']:>9.2f}"
+                     f"{row['keysortmilli']:>10.2f}{row['gathermilli']:>10.2f}{row['speedup']:>9.2f}{mark}")
+
+    wins = [row for row in rows if row["significant"] and row["speedup"] > 1]
+    if wins:
+        lines.append("\nIndirect sorting is significantly faster for:")
+        for row in sorted(wins, key=lambda r: -r["speedup"]):
+            algo, gen, data_type, size, threads = row["key"]
+            lines.append(f"  {algo.replace('benchmark_', '')} {gen}/{data_type} n={size} t={threads}: "
+                         f"x{row['speedup']:.2f} (gather {row['gathermilli'] / row['indirect'] * 100:.0f}% of the "
+                         f"indirect time, effect {effect_label(row['cliffs_delta'])})")
+    if unmatched:
+        lines.append(f"\n{len(unmatched)} configuration(s) have only one mode and are not compared "
+                     f"(e.g. {' '.join(str(part) for part in unmatched[0])}).")
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare direct sorting with --indirect (sort key+index pairs, then gather) per algorithm, "
+                    "datatype, size and thread count.")
+    parser.add_argument("run_dirs", nargs="+",
+                        help="Run directories containing results_stdout/ with direct and/or --indirect results.")
+    parser.add_argument("--alpha", type=float, default=0.05, help="False discovery rate (default: %(default)s).")
+    parser.add_argument("--output", default=None,
+                        help="Report file (default: indirect_comparison.txt in the first run directory).")
+    args = parser.parse_args()
+
+    samples = collect_samples(args.run_dirs)
+    rows = compare_modes(samples, args.alpha)
+    if not rows:
+        print("Error: No configuration has both direct and indirect results in " + ", ".join(args.run_dirs),
+              file=sys.stderr)
+        return 1
+    compared = {row["key"] for row in rows}
+    unmatched = sorted(key for key in samples if key not in compared)
+
+    report = "\n".join(format_report(rows, unmatched)) + "\n"
+    print("\n" + report)
+    output_path = args.output or os.path.join(args.run_dirs[0], "indirect_comparison.txt")
+    try:
+        with open(output_path, 'w', encoding='utf-8') as f_out:
+            f_out.write(report)
+        print(f"Indirect comparison saved to: {output_path}")
+    except OSError as e:
+        print(f"Error writing report {output_path}: {e}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
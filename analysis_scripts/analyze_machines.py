@@ -0,0 +1,135 @@
+# analyze_machines.py
+# 跨机器对比：读取 run_scripts/shard_orchestrator.py 生成的运行仓库 (machines/<machine>/ 每台机器一个运行目录)，
+# 对每个 (生成器, 类型, 算法) 列出各机器的中位耗时、相对参考机器的比值，以及 Mann-Whitney 检验 (BH 校正)。
+import os
+import argparse
+import sys
+
+import numpy as np
+
+from run_loader import load_run
+from run_provenance import FINGERPRINT_KEYS
+from regression_detector import mann_whitney_u, cliffs_delta, benjamini_hochberg, effect_label
+
+def machine_run_dirs(store):
+    """返回 {machine: 运行目录}，按机器名排序。"""
+    machines_dir = os.path.join(store, "machines")
+    if not os.path.isdir(machines_dir):
+        return {}
+    return {name: os.path.join(machines_dir, name) for name in sorted(os.listdir(machines_dir))
+            if os.path.isdir(os.path.join(machines_dir, name, "results_stdout"))}
+
+def compare_machines(runs, reference, alpha=0.05):
+    """
+    runs: {machine: load_run()}。返回 {(gen, type, algo): {machine: {...}}}，每项含 median、ratio (相对 reference
+    的中位耗时比值，>1 表示比参考机器慢)、p_value / p_adjusted (BH 校正，所有非参考机器的比较一起校正)、
+    cliffs_delta 与 significant。参考机器没有该配置时 ratio 等为 None。
+    """
+    table = {}
+    for machine, run in runs.items():
+        for (gen, data_type), algos in run["wall_samples"].items():
+            for algo, info in algos.items():
+                table.setdefault((gen, data_type, algo), {})[machine] = {
+                    "values": info["milli"], "median": float(np.median(info["milli"])), "threads": info["threads"],
+                    "size": info["size"], "ratio": None, "p_value": np.nan, "cliffs_delta": np.nan,
+                }
+
+    tested = []
+    for key, machines in table.items():
+        base = machines.get(reference)
+        if base is None:
+            continue
+        for machine, entry in machines.items():
+            if machine == reference or base["median"] == 0:
+                continue
+            entry["ratio"] = entry["median"] / base["median"]
+            if len(entry["values"]) >= 2 and len(base["values"]) >= 2:
+                _u, entry["p_value"] = mann_whitney_u(entry["values"], base["values"])
+                entry["cliffs_delta"] = cliffs_delta(entry["values"], base["values"])
+                tested.append(entry)
+    for entry, adjusted in zip(tested, benjamini_hochberg([e["p_value"] for e in tested])):
+        entry["p_adjusted"] = adjusted
+    for machines in table.values():
+        for entry in machines.values():
+            p = entry.get("p_adjusted", np.nan)
+            entry["significant"] = bool(not np.isnan(p) and p < alpha)
+    return table
+
+def format_report(table, runs, reference):
+    machines = list(runs)
+    lines = [f"Cross-machine comparison ({len(machines)} machines, reference: {reference})",
+             "Median wall time (ms) per machine; 'x1.23*' = 1.23 times the reference median, * = significant "
+             "(Mann-Whitney, BH-corrected).",
+             "===================================================="]
+    for machine, run in runs.items():
+        metadata = run["metadata"]
+        shown = [f"{key}={metadata[key]}" for key in ["host"] + FINGERPRINT_KEYS if metadata.get(key)]
+        lines.append(f"{machine}: " + ("; ".join(shown) if shown else "no environment fingerprint"))
+
+    width = max(14, max(len(m) for m in machines) + 2)
+    header = f"\n{'generator/type':<22}{'algorithm':<22}" + "".join(f"{m[:width - 2]:>{width}}" for m in machines)
+    current = None
+    for (gen, data_type, algo), entries in sorted(table.items()):
+        if (gen, data_type) != current:
+            current = (gen, data_type)
+            lines.append(header)
+        cells = []
+        for machine in machines:
+            entry = entries.get(machine)
+            if entry is None:
+                cells.append(f"{'-':>{width}}")
+                continue
+            text = f"{entry['median']:.2f}"
+            if entry["ratio"] is not None:
+                text += f" x{entry['ratio']:.2f}" + ("*" if entry["significant"] else " ")
+            cells.append(f"{text:>{width}}")
+        lines.append(f"{(gen + '/' + data_type)[:21]:<22}{algo.replace('benchmark_', '')[:21]:<22}" + "".join(cells))
+
+    differing = [key for key, entries in table.items() if len({e["threads"] for e in entries.values()}) > 1]
+    if differing:
+        lines.append(f"\nNote: {len(differing)} configuration(s) ran with different thread counts on different "
+                     "machines (-t defaults to each host's nproc).")
+    significant = [(key, m, e) for key, entries in table.items() for m, e in entries.items() if e["significant"]]
+    if significant:
+        lines.append("\nLargest significant differences:")
+        for (gen, data_type, algo), machine, entry in sorted(significant, key=lambda s: -abs(np.log(s[2]["ratio"])))[:10]:
+            lines.append(f"  {machine} vs {reference}: {algo.replace('benchmark_', '')} {gen}/{data_type} "
+                         f"x{entry['ratio']:.2f} (p_adj={entry['p_adjusted']:.3g}, "
+                         f"effect {effect_label(entry['cliffs_delta'])})")
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare wall times of the same configurations across machines in a run store written by "
+                    "run_scripts/shard_orchestrator.py (machines/<machine>/results_stdout).")
+    parser.add_argument("store", help="Run store directory (shard_run_*).")
+    parser.add_argument("--reference", default=None, help="Reference machine (default: the first machine by name).")
+    parser.add_argument("--alpha", type=float, default=0.05, help="False discovery rate (default: %(default)s).")
+    parser.add_argument("--output", default=None, help="Report file (default: machine_comparison.txt in the store).")
+    args = parser.parse_args()
+
+    run_dirs = machine_run_dirs(args.store)
+    if not run_dirs:
+        print(f"Error: No machines/<machine>/results_stdout directories found in {args.store}", file=sys.stderr)
+        return 1
+    reference = args.reference or next(iter(run_dirs))
+    if reference not in run_dirs:
+        print(f"Error: Unknown reference machine '{reference}' (have: {', '.join(run_dirs)})", file=sys.stderr)
+        return 1
+
+    runs = {machine: load_run(path, with_perf=False) for machine, path in run_dirs.items()}
+    table = compare_machines(runs, reference, args.alpha)
+    report = "\n".join(format_report(table, runs, reference)) + "\n"
+    print("\n" + report)
+
+    output_path = args.output or os.path.join(args.store, "machine_comparison.txt")
+    try:
+        with open(output_path, 'w', encoding='utf-8') as f_out:
+            f_out.write(report)
+        print(f"Machine comparison saved to: {output_path}")
+    except OSError as e:
+        print(f"Error writing report {output_path}: {e}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
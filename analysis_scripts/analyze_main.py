@@ -1,6 +1,5 @@
 # analyze_main.py
 import os
-import re
 import argparse
 from collections import defaultdict
 import sys
@@ -26,9 +25,11 @@ except ImportError:
 
 
 # 从其他模块导入函数和数据
-from perf_parser import parse_perf_file, KEY_EVENT_MAPPINGS # 导入 KEY_EVENT_MAPPINGS 以便进行映射
+from perf_parser import load_grouped_perf_stats # 解析并按组合并 perf stat 文件
 from perf_analyzer import calculate_metrics, METRIC_PRINT_ORDER # calculate_metrics 现在只接收一个参数
 from wall_time_parser import calculate_average_wall_time
+from energy_metrics import calculate_energy_metrics, ENERGY_METRIC_KEYS
+from plot_renderer import add_plot_arguments, parse_plot_formats
 
 # 为了准备ML数据，我们需要 FEATURE_KEYS_FOR_MODEL 和 TARGET_KEY
 # 理想情况下，这些应该从 feature_analyzer.py 导入，或者在一个共享的配置文件中定义
@@ -37,7 +38,7 @@ from wall_time_parser import calculate_average_wall_time
 
 # 导入绘图和特征重要性函数（如果可用）
 if MATPLOTLIB_AVAILABLE:
-    from perf_visualizer import generate_comparison_plots
+    from perf_visualizer import generate_all_comparison_plots
 
 # FEATURE_ANALYSIS_AVAILABLE 的设置逻辑保持不变
 if ML_LIBS_AVAILABLE and MATPLOTLIB_AVAILABLE: 
@@ -57,7 +58,7 @@ else:
     if 'TARGET_KEY' not in globals(): TARGET_KEY = "Average Wall Time (ms)"
 
 
-# --- find_latest_run_dir 和 merge_group_stats 函数保持不变 ---
+# --- find_latest_run_dir 保持不变 (merge_group_stats 已移至 perf_parser.py) ---
 def find_latest_run_dir(base_run_dir="/home/xwang605/parallel-bench-suite/run/"):
     latest_run_dir = None
     try:
@@ -69,28 +70,6 @@ def find_latest_run_dir(base_run_dir="/home/xwang605/parallel-bench-suite/run/")
     except Exception as e: print(f"Error during auto-detection of latest run directory: {e}", file=sys.stderr); return None
     return latest_run_dir
 
-def merge_group_stats(group_stats_map):
-    merged_stats = defaultdict(int)
-    group_order = ["GROUP1", "GROUP2", "GROUP3", "GROUP4"]
-    processed_events = set() # 用于确保每个事件只从其在group_order中首次出现的组获取
-    for group_id in group_order:
-        if group_id in group_stats_map:
-            current_group_stats = group_stats_map[group_id]
-            for event, count in current_group_stats.items():
-                if event not in processed_events:
-                    merged_stats[event] = count
-                    processed_events.add(event)
-    # 确保核心事件（如果GROUP1存在）的值被使用
-    if "GROUP1" in group_stats_map:
-        g1_stats = group_stats_map["GROUP1"]
-        # 这些是 perf_parser.get_event_value 使用的通用键对应的原始事件名变体
-        # merge_group_stats 返回的键应该是原始事件名
-        core_event_variants_to_check = KEY_EVENT_MAPPINGS.get("CYCLES", []) + KEY_EVENT_MAPPINGS.get("IC", [])
-        for core_event_variant in core_event_variants_to_check:
-            if core_event_variant in g1_stats:
-                merged_stats[core_event_variant] = g1_stats[core_event_variant] # 确保来自GROUP1
-    return merged_stats
-
 # --- Main Function ---
 def main():
     parser = argparse.ArgumentParser(description="Analyze grouped perf stat and benchmark stdout files, generate reports and plots.")
@@ -109,6 +88,7 @@ def main():
     
     parser.add_argument("--no-plots", action="store_true", help="Skip plot generation.")
     parser.add_argument("--no-feature-analysis", action="store_true", help="Skip feature importance analysis.")
+    add_plot_arguments(parser)
 
     args = parser.parse_args()
 
@@ -146,38 +126,20 @@ def main():
     if not average_wall_times:
         print("Warning: No average wall times were calculated. Subsequent analyses might be affected.", file=sys.stderr)
         # 不一定退出，但后续步骤中依赖 wall time 的部分会受影响
+    # 能耗只在 MEASURE_ENERGY=true 的 no perf round 中记录，没有时为空字典
+    energy_metrics_by_config = calculate_energy_metrics(results_stdout_dir)
+    if energy_metrics_by_config:
+        print(f"Energy data found for {sum(len(a) for a in energy_metrics_by_config.values())} configurations.")
 
     # --- 2. 加载并合并 Perf 数据 ---
-    raw_grouped_data = defaultdict(lambda: defaultdict(dict))
-    filename_pattern = re.compile(r'^(.*?)_([^_]+)_([^_]+)_(GROUP\d+)_perf_stat\.txt$')
     print(f"\nScanning perf stats directory: {perf_stats_dir}")
-    file_count = 0
-    for filename in sorted(os.listdir(perf_stats_dir)):
-        match = filename_pattern.match(filename)
-        if match:
-            file_count += 1
-            algo_name, generator, data_type, group_id = match.groups()
-            run_key = (generator, data_type, algo_name) # (gen, type, algo)
-            filepath = os.path.join(perf_stats_dir, filename)
-            stats = parse_perf_file(filepath) # 从 perf_parser.py
-            if stats is not None: # parse_perf_file 返回 None 表示文件读取或解析错误
-                raw_grouped_data[run_key][group_id] = stats
-            else:
-                print(f"Warning: Could not parse {filepath}, data for this group will be missing.", file=sys.stderr)
+    print("Merging perf data from groups for each run...")
+    all_perf_data, file_count = load_grouped_perf_stats(perf_stats_dir)
     
     if file_count == 0:
         print(f"Error: No perf_stat files found in {perf_stats_dir}. Exiting.", file=sys.stderr)
         return 1
 
-    all_perf_data = defaultdict(lambda: defaultdict(dict)) # {(gen, type): {algo: {merged_raw_event: count}}}
-    print("Merging perf data from groups for each run...")
-    for run_key, group_stats_map in raw_grouped_data.items():
-        generator, data_type, algo_name = run_key
-        merged_stats = merge_group_stats(group_stats_map) # merged_stats 的键是原始事件名
-        if merged_stats: # 确保合并后有数据
-            all_perf_data[(generator, data_type)][algo_name] = merged_stats
-        else:
-            print(f"Warning: No perf data merged for run {run_key}. This usually means no group files were parsed successfully.", file=sys.stderr)
     print("Merging complete.")
 
     # --- 3. 生成分析文件和准备绘图/特征分析数据 ---
@@ -199,6 +161,7 @@ def main():
         output_filename = os.path.join(analysis_output_dir, f"analysis_{gen}_{data_type}.txt")
         print(f"  Generating Text Report: {output_filename}")
         current_config_wall_times = average_wall_times.get((gen, data_type), {})
+        current_config_energy = energy_metrics_by_config.get((gen, data_type), {})
 
         try:
             with open(output_filename, 'w', encoding='utf-8') as f_out:
@@ -225,6 +188,8 @@ def main():
                     
                     # 将 calculate_metrics 的所有输出（描述性键和值）添加到 metrics_to_store
                     metrics_to_store.update(calculated_metrics) 
+                    energy = current_config_energy.get(algo_name, {})
+                    metrics_to_store.update(energy)
                     
                     if metrics_to_store.get(TARGET_KEY) is not None: # 仅当有墙上时间（目标变量）时才存储
                         all_metrics_for_ml_and_plots[(gen, data_type)][algo_name] = metrics_to_store
@@ -237,6 +202,9 @@ def main():
                         f_out.write(f"    {'Average Wall Time (ms)':<50}: {avg_wall_time:>20.3f}\n")
                     else:
                         f_out.write(f"    {'Average Wall Time (ms)':<50}: {' ':>20} (Not Found)\n")
+                    for metric_name in ENERGY_METRIC_KEYS:
+                        if metric_name in energy:
+                            f_out.write(f"    {metric_name:<50}: {energy[metric_name]:>20.4f}\n")
                     
                     # 报告标题不再提及 "Baseline Adjusted"
                     f_out.write(  "    {:<50}: {:>20}\n".format("---- Perf Metrics (Raw Counts / Derived) ----", "----"))
@@ -277,11 +245,10 @@ def main():
         if not all_metrics_for_ml_and_plots:
             print("  No data available for plotting.")
         else:
-            for config_key, config_plot_data in sorted(all_metrics_for_ml_and_plots.items()):
-                print(f"  Generating plot for config: {config_key}")
-                # generate_comparison_plots 期望的数据结构是 {algo: {metric_key: value}}
-                # config_plot_data 就是这个结构
-                generate_comparison_plots(config_plot_data, config_key, analysis_output_dir, args.baseline_algo) # baseline_algo 用于排除
+            # 所有配置一起交给进程池渲染，数据未变的配置会被跳过
+            generate_all_comparison_plots(all_metrics_for_ml_and_plots, analysis_output_dir, args.baseline_algo, # baseline_algo 用于排除
+                                          formats=parse_plot_formats(args.plot_format), workers=args.plot_workers,
+                                          dpi=args.plot_dpi, force=args.force_plots)
     elif args.no_plots:
         print("\nPlot generation skipped due to --no-plots flag.")
     else: # MATPLOTLIB_AVAILABLE is False
@@ -0,0 +1,224 @@
+# analyze_mem_access.py
+import os
+import argparse
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from mem_access_parser import (MEM_RECORD_FILENAME_PATTERN, MEM_SCRIPT_FIELDS, MEM_SCRIPT_EXTRA_ARGS, MEMORY_LEVELS,
+                               parse_mem_recording, read_buffer_windows)
+from mem_access_analyzer import (MAPPING_CLASSES, MAPPING_CLASS_TITLES, LATENCY_BIN_EDGES, analyze_mem_samples,
+                                 format_bytes, stdout_for_recording)
+from plot_renderer import (MATPLOTLIB_AVAILABLE, make_plot_job, render_plot_jobs, add_plot_arguments,
+                           parse_plot_formats)
+
+def find_mem_recordings(record_dir):
+    """
+    递归查找 record_mem_access.sh 的 *_mem_access.data；同一配置已有导出的文本时优先使用文本。
+    返回 {(algo, gen, type): path}。
+    """
+    found = {}
+    for root, _dirs, files in os.walk(record_dir):
+        for filename in sorted(files):
+            match = MEM_RECORD_FILENAME_PATTERN.match(filename)
+            if not match:
+                continue
+            algo, generator, data_type, extension = match.groups()
+            key = (algo, generator, data_type)
+            if key in found and extension == "data":
+                continue
+            found[key] = os.path.join(root, filename)
+    return found
+
+def draw_heatmaps(fig, axes, spec):
+    """
+    左：输入数组 (页偏移 x 排序进度)；右：其余被采样到的页 (按类别分段压缩)。颜色为对数刻度的样本数。
+    """
+    from matplotlib.colors import LogNorm
+    panels = [(spec["input_heatmap"], "Input array", "Offset in input array (page groups)", None),
+              (spec["other_heatmap"], "Other mappings (sampled pages only)", "Sampled pages, grouped by mapping", spec["bands"])]
+    for ax, (matrix, title, ylabel, bands) in zip(axes, panels):
+        data = np.asarray(matrix, dtype=float)
+        ax.set_title(title, fontsize=10)
+        ax.set_xlabel("Progress through the sort (%)")
+        ax.set_ylabel(ylabel)
+        if data.sum() == 0:
+            ax.text(0.5, 0.5, "no samples", ha="center", va="center", transform=ax.transAxes)
+            continue
+        data[data == 0] = np.nan
+        image = ax.imshow(data, aspect="auto", origin="lower", interpolation="nearest", cmap="viridis",
+                          norm=LogNorm(vmin=1, vmax=np.nanmax(data)), extent=(0, 100, 0, data.shape[0]))
+        # 颜色条放在子图内部的 inset 中，复用模板时会随 ax.cla() 一起清除
+        fig.colorbar(image, cax=ax.inset_axes([1.02, 0.0, 0.025, 1.0]), label="samples")
+        for name, (low, high) in (bands or {}).items():
+            ax.axhline(low * data.shape[0], color="white", linewidth=0.6)
+            ax.text(1, (low + high) / 2 * data.shape[0], name, color="white", fontsize=8, va="center")
+    fig.suptitle(spec["title"], fontsize=11)
+    fig.tight_layout()
+
+def draw_latency_histograms(fig, axes, spec):
+    """
+    每个类别一张子图，每个算法一条曲线 (样本占比，对数延迟轴)。
+    """
+    edges = np.asarray(spec["edges"])
+    centers = np.sqrt(edges[:-1] * edges[1:])
+    for ax, (panel_title, curves) in zip(axes, spec["panels"]):
+        ax.set_title(panel_title, fontsize=9)
+        for algo, counts in curves.items():
+            counts = np.asarray(counts, dtype=float)
+            if counts.sum() > 0:
+                ax.plot(centers, counts / counts.sum(), label=algo, linewidth=1.2)
+        ax.set_xscale("log")
+        ax.set_xlabel("Load latency (cycles)")
+        ax.set_ylabel("Share of sampled loads")
+        ax.grid(True, which="both", alpha=0.3)
+    for ax in axes[len(spec["panels"]):]:
+        ax.set_visible(False)
+    if spec["panels"] and axes[0].get_legend_handles_labels()[0]:
+        axes[0].legend(fontsize=7)
+    fig.suptitle(spec["title"], fontsize=11)
+    fig.tight_layout()
+
+def format_config_report(generator, data_type, results_by_algo):
+    lines = [f"\nGenerator={generator}, DataType={data_type}"]
+    for algo, result in sorted(results_by_algo.items()):
+        label = algo.replace("benchmark_", "")
+        lines.append(f"  {label}: {result['total']:,} samples over {result['runs']} run(s), "
+                     f"input array {format_bytes(result['input_bytes'])}"
+                     + (f", {result['outside_windows']:,} outside the sort windows" if result["outside_windows"] else ""))
+        lines.append(f"    {'mapping':<44}{'samples':>9}{'latency':>9}{'p50':>7}{'p90':>7}{'p99':>7}"
+                     f"{'DRAM':>8}{'pages':>10}{'top1%pg':>9}")
+        for name in MAPPING_CLASSES:
+            summary = result["classes"].get(name)
+            if summary is None:
+                continue
+            def fmt(value):
+                return f"{value:7.0f}" if value is not None else f"{'-':>7}"
+            lines.append(f"    {MAPPING_CLASS_TITLES[name][:43]:<44}{summary['share'] * 100:8.1f}%"
+                         f"{summary['latency_share'] * 100:8.1f}%{fmt(summary['latency_p50'])}{fmt(summary['latency_p90'])}"
+                         f"{fmt(summary['latency_p99'])}{summary['dram_share'] * 100:7.1f}%{summary['pages']:>10,}"
+                         f"{summary['hot_page_share'] * 100:8.1f}%")
+            levels = ", ".join(f"{level} {count / summary['samples'] * 100:.1f}%"
+                               for level, count in sorted(summary["levels"].items(), key=lambda kv: -kv[1]))
+            lines.append(f"      data source: {levels}")
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Analyze precise memory access samples (perf mem / PEBS load latency / IBS) recorded by "
+                    "record_mem_access.sh: attribute data addresses to the input array, scratch buffers and allocator "
+                    "arenas, and draw page-level access heatmaps and load latency histograms per algorithm.")
+    parser.add_argument("record_dir",
+                        help="A mem_record_run_* directory (searched recursively for *_mem_access.data). Text dumps from "
+                             f"'perf script -F {MEM_SCRIPT_FIELDS} {' '.join(MEM_SCRIPT_EXTRA_ARGS)}' with the same base "
+                             "name and a .script extension are also accepted.")
+    parser.add_argument("--output-dir", default=None,
+                        help="Where to write the report and plots (default: <record_dir>/analysis_result).")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes per recording (default: number of CPUs).")
+    parser.add_argument("--chunks", type=int, default=None,
+                        help="Number of time slices (perf.data) or byte ranges (text) per recording (default: --jobs).")
+    parser.add_argument("--perf", default="perf", help="perf binary used to read perf.data files.")
+    parser.add_argument("--page-size", type=int, default=4096,
+                        help="Page size used for binning addresses (e.g. 2097152 when the buffers are on huge pages).")
+    parser.add_argument("--page-rows", type=int, default=256, help="Rows (page groups) of the heatmaps (default: 256).")
+    parser.add_argument("--time-bins", type=int, default=100, help="Columns (time bins) of the heatmaps (default: 100).")
+    parser.add_argument("--scratch-threshold-mb", type=float, default=64,
+                        help="Anonymous mappings larger than this are counted as scratch buffers, smaller ones as "
+                             "allocator arenas (default: 64, the size of a glibc thread arena).")
+    add_plot_arguments(parser)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.record_dir):
+        print(f"Error: Record directory does not exist: {args.record_dir}", file=sys.stderr)
+        return 1
+    recordings = find_mem_recordings(args.record_dir)
+    if not recordings:
+        print(f"Error: No *_mem_access recordings found in {args.record_dir}", file=sys.stderr)
+        return 1
+
+    output_dir = args.output_dir or os.path.join(args.record_dir, "analysis_result")
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+    except OSError as e:
+        print(f"Error creating output directory {output_dir}: {e}", file=sys.stderr)
+        return 1
+
+    grouped = defaultdict(dict) # {(gen, type): {algo: result}}
+    for (algo, generator, data_type), path in sorted(recordings.items()):
+        print(f"Parsing {os.path.basename(path)} ...")
+        started = time.time()
+        try:
+            samples = parse_mem_recording(path, chunks=args.chunks, workers=args.jobs, perf_binary=args.perf)
+        except (OSError, RuntimeError) as e:
+            print(f"Error parsing {path}: {e}", file=sys.stderr)
+            continue
+        if len(samples["addr"]) == 0:
+            print(f"Warning: No memory samples in {path}", file=sys.stderr)
+            continue
+
+        stdout_path = stdout_for_recording(path, algo, generator, data_type)
+        windows = read_buffer_windows(stdout_path)
+        if len(windows["run"]) == 0:
+            print(f"Warning: No BUFFER lines for {algo}_{generator}_{data_type}; input array samples cannot be "
+                  "separated from other anonymous memory.", file=sys.stderr)
+        result = analyze_mem_samples(samples, windows, page_size=args.page_size, page_rows=args.page_rows,
+                                     time_bins=args.time_bins,
+                                     scratch_threshold=int(args.scratch_threshold_mb * (1 << 20)))
+        grouped[(generator, data_type)][algo] = result
+        print(f"  {result['total']:,} samples, {len(samples['mappings']):,} mappings, events "
+              f"{', '.join(samples['events'])} in {time.time() - started:.1f}s")
+
+    if not grouped:
+        print("Error: No samples could be parsed.", file=sys.stderr)
+        return 1
+
+    lines = [f"Memory access analysis of {os.path.abspath(args.record_dir)}",
+             f"Page size {format_bytes(args.page_size)}; 'latency' = share of the summed load latency, "
+             "'DRAM' = share of samples served from DRAM/remote, 'top1%pg' = share of samples on the hottest 1% pages.",
+             f"Data source levels: {', '.join(MEMORY_LEVELS)}",
+             "===================================================="]
+    for (generator, data_type), results_by_algo in sorted(grouped.items()):
+        lines.extend(format_config_report(generator, data_type, results_by_algo))
+    report = "\n".join(lines) + "\n"
+    print("\n" + report)
+    report_path = os.path.join(output_dir, "mem_access_report.txt")
+    try:
+        with open(report_path, 'w', encoding='utf-8') as f_out:
+            f_out.write(report)
+        print(f"Memory access report saved to: {report_path}")
+    except OSError as e:
+        print(f"Error writing report {report_path}: {e}", file=sys.stderr)
+
+    if not MATPLOTLIB_AVAILABLE:
+        print("\nPlot generation skipped as matplotlib is not available.")
+        return 0
+    jobs = []
+    for (generator, data_type), results_by_algo in sorted(grouped.items()):
+        for algo, result in sorted(results_by_algo.items()):
+            label = algo.replace("benchmark_", "")
+            jobs.append(make_plot_job(
+                f"mem_heatmap_{label}_{generator}_{data_type}", draw_heatmaps, (1, 2, (15, 6)),
+                {"title": f"Sampled memory accesses: {label}, {generator}, {data_type}",
+                 "input_heatmap": result["input_heatmap"].tolist(), "other_heatmap": result["other_heatmap"].tolist(),
+                 "bands": {name: list(band) for name, band in result["other_bands"].items()}}))
+        panels = [("All loads", {algo.replace("benchmark_", ""): r["all_histogram"].tolist()
+                                 for algo, r in sorted(results_by_algo.items())})]
+        for name in MAPPING_CLASSES:
+            curves = {algo.replace("benchmark_", ""): r["classes"][name]["histogram"].tolist()
+                      for algo, r in sorted(results_by_algo.items())
+                      if name in r["classes"] and r["classes"][name]["loads"]}
+            if curves:
+                panels.append((MAPPING_CLASS_TITLES[name], curves))
+        jobs.append(make_plot_job(
+            f"mem_latency_{generator}_{data_type}", draw_latency_histograms, (2, 3, (18, 9)),
+            {"title": f"Load latency distribution: {generator}, {data_type}", "edges": LATENCY_BIN_EDGES.tolist(),
+             "panels": panels}))
+    rendered, skipped, failed = render_plot_jobs(jobs, output_dir, formats=parse_plot_formats(args.plot_format),
+                                                 workers=args.plot_workers, dpi=args.plot_dpi, force=args.force_plots)
+    print(f"Memory access plots: {rendered} rendered, {skipped} unchanged, {failed} failed.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
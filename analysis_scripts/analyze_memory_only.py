@@ -6,17 +6,18 @@ from collections import defaultdict
 import sys
 import numpy as np 
 
-# 检查 matplotlib 是否可用
-try:
+# 检查 matplotlib 是否可用 (plot_renderer 负责选择 Agg 后端)
+from plot_renderer import (MATPLOTLIB_AVAILABLE, DEFAULT_DPI, make_plot_job, render_plot_jobs,
+                           add_plot_arguments, parse_plot_formats)
+if MATPLOTLIB_AVAILABLE:
     import matplotlib.pyplot as plt
-    MATPLOTLIB_AVAILABLE = True
-except ImportError:
-    MATPLOTLIB_AVAILABLE = False
+else:
     print("Warning: matplotlib not found. Plot generation will be skipped. "
           "Install it using: pip install matplotlib", file=sys.stderr)
 
 # 从你的模块导入解析函数
 from memory_report_parser import parse_time_mem_report # 确保 memory_report_parser.py 在同一目录或 PYTHONPATH 中
+from memory_report_parser import load_memory_timeline, summarize_timeline_runs, downsample_timeline
 
 # 定义我们从 memory_report_parser.py 的输出中提取并用于绘图的指标及其属性
 MEMORY_METRICS_TO_PLOT = {
@@ -55,47 +56,37 @@ def find_latest_run_dir(base_run_dir="/home/xwang605/parallel-bench-suite/run/")
         return None
     return latest_run_dir
 
-def generate_memory_plots_for_config(config_specific_data, generator, data_type, output_dir, 
-                                     title_threads="N/A", title_runs="N/A", title_log_size="N/A"): # 新增参数用于标题
+def prepare_memory_plot(config_specific_data, generator, data_type,
+                        title_threads="N/A", title_runs="N/A", title_log_size="N/A"):
     """
-    为单个 (generator, data_type) 配置生成内存指标对比图。
+    把单个 (generator, data_type) 配置的内存指标整理成绘图任务 (plot_renderer.make_plot_job)。
     config_specific_data 的结构是: {algo_name: {mem_metric_name: value}}
+    没有数据时返回 None。
     """
-    if not MATPLOTLIB_AVAILABLE:
-        print("Info: Matplotlib not available. Skipping memory plot generation.", file=sys.stderr)
-        return
-
     plot_data = {
         algo: metrics for algo, metrics in config_specific_data.items()
         if metrics and isinstance(metrics, dict)
     }
-    
+
     algos_to_plot = sorted(plot_data.keys())
     num_algos = len(algos_to_plot)
 
     if num_algos == 0:
-        return
+        return None
 
     metrics_to_plot_ordered = list(MEMORY_METRICS_TO_PLOT.keys())
     num_metrics = len(metrics_to_plot_ordered)
-    if num_metrics == 0: return
+    if num_metrics == 0: return None
 
     ncols = 2 if num_metrics > 2 else 1
     if num_metrics == 1: ncols = 1
     elif num_metrics > 4 : ncols = 3
-    
+
     nrows = (num_metrics + ncols - 1) // ncols
-    
-    fig, axes = plt.subplots(nrows=nrows, ncols=ncols, figsize=(ncols * 6.2, nrows * 4.2), squeeze=False) #微调figsize
-    axes = axes.flatten()
 
-    plot_idx = 0
+    panels = []
     for metric_key in metrics_to_plot_ordered:
-        if plot_idx >= len(axes): break
-
-        ax = axes[plot_idx]
         props = MEMORY_METRICS_TO_PLOT.get(metric_key, {})
-
         plot_labels = []
         plot_values = []
 
@@ -108,12 +99,36 @@ def generate_memory_plots_for_config(config_specific_data, generator, data_type,
             if generator == "graph" and display_algo_name.endswith("_gen"): # 与你之前的讨论一致
                  display_algo_name = display_algo_name[:-4]
 
-
             value = plot_data.get(raw_algo_name, {}).get(metric_key)
             if value is not None and isinstance(value, (int, float)) and not np.isnan(value):
                 plot_labels.append(display_algo_name)
-                plot_values.append(value)
-        
+                plot_values.append(float(value))
+
+        panels.append({"metric": metric_key, "labels": plot_labels, "values": plot_values,
+                       "unit": props.get("unit", ""), "lower_is_better": props.get("lower_is_better", True)})
+
+    fig_title = (f'Memory & Context Switch Metrics ("No Perf Round")\n'
+                 f'Generator: {generator}, DataType: {data_type} '
+                 f'(Threads: {title_threads}, IntRuns: {title_runs}, SizeLog: {title_log_size})')
+
+    spec = {"title": fig_title, "num_algos": num_algos, "panels": panels}
+    return make_plot_job(f"memory_analysis_{generator}_{data_type}", draw_memory_plot,
+                         (nrows, ncols, (ncols * 6.2, nrows * 4.2)), spec) #微调figsize
+
+def draw_memory_plot(fig, axes, spec):
+    """
+    在 (可能被复用的) Figure 上绘制 prepare_memory_plot 生成的数据。axes 为展平后的一维数组。
+    """
+    num_algos = spec["num_algos"]
+    plot_idx = 0
+    for panel in spec["panels"]:
+        if plot_idx >= len(axes): break
+
+        ax = axes[plot_idx]
+        metric_key = panel["metric"]
+        plot_labels = panel["labels"]
+        plot_values = panel["values"]
+
         if not plot_labels:
             ax.set_title(f"{metric_key}\n(No Valid Data)", fontsize=9)
             ax.axis('off')
@@ -122,77 +137,170 @@ def generate_memory_plots_for_config(config_specific_data, generator, data_type,
 
         try:
             if num_algos == 1:
-                colors = [plt.get_cmap('Pastel1')(0.1)] 
+                colors = [plt.get_cmap('Pastel1')(0.1)]
             else:
                 colors = plt.get_cmap('Pastel1')(np.linspace(0, 1, num_algos))
         except:
             colors = 'skyblue'
-        
+
         ax.bar(plot_labels, plot_values, color=colors)
 
-        unit = props.get("unit", "")
+        unit = panel["unit"]
         title = metric_key
         ax.set_title(title, fontsize=10, wrap=True)
         ax.set_ylabel(unit, fontsize=9)
-        
+
         # --- MODIFIED: Removed ha='right' ---
-        ax.tick_params(axis='x', rotation=45, labelsize=8) 
+        ax.tick_params(axis='x', rotation=45, labelsize=8)
         ax.tick_params(axis='y', labelsize=8)
         ax.grid(axis='y', linestyle='--', alpha=0.7)
 
-        if any(abs(v) >= 1e6 for v in plot_values if isinstance(v, (int,float))):
+        if any(abs(v) >= 1e6 for v in plot_values):
             ax.ticklabel_format(style='sci', axis='y', scilimits=(0,0), useMathText=True)
 
-        lower_is_better = props.get("lower_is_better", True)
-        performance_arrow = "↓ Better" if lower_is_better else "↑ Better"
+        performance_arrow = "↓ Better" if panel["lower_is_better"] else "↑ Better"
         ax.text(0.98, 0.98, performance_arrow, transform=ax.transAxes, fontsize=8,
                 verticalalignment='top', horizontalalignment='right',
                 bbox=dict(boxstyle='round,pad=0.2', fc='#E0F2F1', alpha=0.9))
-        
-        if plot_values:
-            numeric_plot_values = [v for v in plot_values if isinstance(v, (int, float))]
-            if numeric_plot_values:
-                min_val = min(numeric_plot_values)
-                max_val = max(numeric_plot_values)
-                
-                padding_factor = 0.10 # 10% padding
-                range_val = max_val - min_val
-                if abs(range_val) < 1e-9 : # Avoid issues if all values are the same
-                    range_val = abs(max_val) if abs(max_val) > 1e-9 else 1.0 # Ensure range_val is not zero for padding
-
-                y_bottom = min_val - padding_factor * range_val
-                y_top = max_val + padding_factor * range_val
-
-                if min_val >= 0: # If all values are non-negative, ensure y_bottom is at most 0
-                    y_bottom = max(0, y_bottom) if min_val > 0 else 0
-                    if abs(max_val) < 1e-9 : y_top = 0.1 # if max is 0, give a little space
-
-                # Ensure y_top is slightly larger than y_bottom if they become equal
-                if abs(y_top - y_bottom) < 1e-9:
-                    y_top = y_bottom + 0.1 * abs(y_bottom) if abs(y_bottom) > 1e-9 else y_bottom + 0.1
-
-
-                ax.set_ylim(bottom=y_bottom, top=y_top)
-        
+
+        min_val = min(plot_values)
+        max_val = max(plot_values)
+
+        padding_factor = 0.10 # 10% padding
+        range_val = max_val - min_val
+        if abs(range_val) < 1e-9 : # Avoid issues if all values are the same
+            range_val = abs(max_val) if abs(max_val) > 1e-9 else 1.0 # Ensure range_val is not zero for padding
+
+        y_bottom = min_val - padding_factor * range_val
+        y_top = max_val + padding_factor * range_val
+
+        if min_val >= 0: # If all values are non-negative, ensure y_bottom is at most 0
+            y_bottom = max(0, y_bottom) if min_val > 0 else 0
+            if abs(max_val) < 1e-9 : y_top = 0.1 # if max is 0, give a little space
+
+        # Ensure y_top is slightly larger than y_bottom if they become equal
+        if abs(y_top - y_bottom) < 1e-9:
+            y_top = y_bottom + 0.1 * abs(y_bottom) if abs(y_bottom) > 1e-9 else y_bottom + 0.1
+
+        ax.set_ylim(bottom=y_bottom, top=y_top)
+
         plot_idx += 1
 
     for i in range(plot_idx, len(axes)):
         axes[i].set_visible(False)
-    
-    fig_title = (f'Memory & Context Switch Metrics ("No Perf Round")\n'
-                 f'Generator: {generator}, DataType: {data_type} '
-                 f'(Threads: {title_threads}, IntRuns: {title_runs}, SizeLog: {title_log_size})')
 
-    fig.suptitle(fig_title, fontsize=15, y=1.0) 
-    plt.tight_layout(rect=[0, 0.03, 1, 0.93]) # Adjust rect for suptitle
+    fig.suptitle(spec["title"], fontsize=15, y=1.0)
+    fig.tight_layout(rect=[0, 0.03, 1, 0.93]) # Adjust rect for suptitle
 
-    plot_filename = os.path.join(output_dir, f"memory_analysis_{generator}_{data_type}.png")
-    try:
-        fig.savefig(plot_filename, dpi=150)
-        print(f"  Memory plot saved: {plot_filename}")
-    except Exception as e:
-        print(f"Error saving memory plot {plot_filename}: {e}", file=sys.stderr)
-    plt.close(fig)
+def generate_memory_plots_for_config(config_specific_data, generator, data_type, output_dir,
+                                     title_threads="N/A", title_runs="N/A", title_log_size="N/A", # 新增参数用于标题
+                                     formats=("png",), dpi=DEFAULT_DPI):
+    """
+    为单个 (generator, data_type) 配置生成内存指标对比图 (在当前进程中渲染)。
+    config_specific_data 的结构是: {algo_name: {mem_metric_name: value}}
+    """
+    if not MATPLOTLIB_AVAILABLE:
+        print("Info: Matplotlib not available. Skipping memory plot generation.", file=sys.stderr)
+        return
+
+    job = prepare_memory_plot(config_specific_data, generator, data_type,
+                              title_threads=title_threads, title_runs=title_runs, title_log_size=title_log_size)
+    if job is not None:
+        render_plot_jobs([job], output_dir, formats=formats, workers=1, dpi=dpi, force=True)
+
+def prepare_timeline_plot(timelines, generator, data_type, max_points=2000):
+    """
+    把 proc_sampler.py 的时间序列整理成绘图任务：内存随时间变化、缺页率随时间变化、每次运行的缺页率、
+    每个元素的峰值额外内存。timelines: {algo_name: load_memory_timeline 的结果}。
+    """
+    series = {}
+    per_run = {}
+    for algo, timeline in sorted(timelines.items()):
+        label = algo.replace('benchmark_', '')
+        time_s, rss, anon, rate = downsample_timeline(timeline, max_points)
+        if not time_s:
+            continue
+        series[label] = {"time": time_s, "rss": rss, "anon": anon, "rate": rate}
+        per_run[label] = [{"run": r["run"], "fault_rate": r["fault_rate"], "extra": r["peak_extra_bytes_per_element"]}
+                          for r in summarize_timeline_runs(timeline)]
+    if not series:
+        return None
+    spec = {"title": f"Memory Timeline (proc sampler, \"No Perf Round\")\nGenerator: {generator}, DataType: {data_type}",
+            "series": series, "per_run": per_run}
+    return make_plot_job(f"memory_timeline_{generator}_{data_type}", draw_timeline_plot, (2, 2, (15, 10)), spec)
+
+def draw_timeline_plot(fig, axes, spec):
+    """
+    2x2: RSS (实线) 与匿名内存 (虚线) 随时间变化；缺页率随时间变化；每次运行的缺页率；每个元素的峰值额外内存 (运行中位数)。
+    """
+    ax_rss, ax_rate, ax_runs, ax_extra = axes
+    colors = plt.get_cmap('tab10')
+    for i, (label, data) in enumerate(spec["series"].items()):
+        color = colors(i % 10)
+        ax_rss.plot(data["time"], data["rss"], color=color, linewidth=1.0, label=label)
+        ax_rss.plot(data["time"], data["anon"], color=color, linewidth=0.8, linestyle='--')
+        ax_rate.plot(data["time"], data["rate"], color=color, linewidth=0.8, label=label)
+        runs = spec["per_run"].get(label, [])
+        if runs:
+            ax_runs.plot([r["run"] for r in runs], [r["fault_rate"] for r in runs], marker='o', color=color, label=label)
+    ax_rss.set_title("Resident memory over time (dashed: anonymous)", fontsize=10)
+    ax_rss.set_xlabel("Time (s)")
+    ax_rss.set_ylabel("GiB")
+    ax_rate.set_title("Page fault rate over time", fontsize=10)
+    ax_rate.set_xlabel("Time (s)")
+    ax_rate.set_ylabel("Faults / s")
+    ax_runs.set_title("Page fault rate per run (generation + sort)", fontsize=10)
+    ax_runs.set_xlabel("Run")
+    ax_runs.xaxis.get_major_locator().set_params(integer=True)
+    ax_runs.set_ylabel("Faults / s")
+
+    labels, extras = [], []
+    for label, runs in spec["per_run"].items():
+        values = [r["extra"] for r in runs if r["extra"] is not None and np.isfinite(r["extra"])]
+        if values:
+            labels.append(label)
+            extras.append(float(np.median(values)))
+    if labels:
+        ax_extra.bar(labels, extras, color=[colors(list(spec["series"]).index(l) % 10) for l in labels])
+        ax_extra.tick_params(axis='x', rotation=45, labelsize=8)
+        ax_extra.text(0.98, 0.98, "↓ Better", transform=ax_extra.transAxes, fontsize=8, va='top', ha='right',
+                      bbox=dict(boxstyle='round,pad=0.2', fc='#E0F2F1', alpha=0.9))
+    ax_extra.set_title("Peak extra memory per element (median over runs)", fontsize=10)
+    ax_extra.set_ylabel("Bytes / element")
+    for ax in (ax_rss, ax_rate, ax_runs):
+        ax.grid(True, linestyle='--', alpha=0.5)
+        if ax.get_legend_handles_labels()[0]:
+            ax.legend(fontsize=7)
+    ax_extra.grid(axis='y', linestyle='--', alpha=0.7)
+    fig.suptitle(spec["title"], fontsize=13)
+    fig.tight_layout(rect=[0, 0.02, 1, 0.94])
+
+def load_timelines(mem_reports_dir):
+    """
+    读取 mem_reports 中 proc_sampler.py 写出的 *_no_perf_round_mem_timeline.npz。返回 {(gen, type): {algo: timeline}}。
+    """
+    timelines = defaultdict(dict)
+    pattern = re.compile(r'^(benchmark_.*?)_([^_]+)_([^_]+)_no_perf_round_mem_timeline\.npz$')
+    for filename in sorted(os.listdir(mem_reports_dir)):
+        match = pattern.match(filename)
+        if not match:
+            continue
+        timeline = load_memory_timeline(os.path.join(mem_reports_dir, filename))
+        if timeline is not None:
+            timelines[(match.group(2), match.group(3))][match.group(1)] = timeline
+    return timelines
+
+def print_timeline_summary(timelines):
+    for (gen, dtype), by_algo in sorted(timelines.items()):
+        print(f"\nMemory timeline summary: Generator={gen}, DataType={dtype} (runs > 0)")
+        print(f"  {'algo':<28}{'samples':>9}{'peak RSS':>12}{'faults/s':>14}{'extra B/elem':>14}")
+        for algo, timeline in sorted(by_algo.items()):
+            runs = summarize_timeline_runs(timeline)
+            rate = np.median([r["fault_rate"] for r in runs]) if runs else np.nan
+            extra = np.median([r["peak_extra_bytes_per_element"] for r in runs]) if runs else np.nan
+            peak_gib = timeline["rss_kb"].max() / (1 << 20) if len(timeline["rss_kb"]) else np.nan
+            print(f"  {algo.replace('benchmark_', ''):<28}{len(timeline['t_us']):>9}{peak_gib:>9.2f} GiB"
+                  f"{rate:>14,.0f}{extra:>14.2f}")
 
 def main():
     parser = argparse.ArgumentParser(description="Analyze memory report files from benchmark 'no perf' rounds and generate plots.")
@@ -206,6 +314,7 @@ def main():
     parser.add_argument("--threads", type=int, default=64, help="Number of threads used for title (e.g., TOTAL_CORES from bash).")
     parser.add_argument("--num_runs", type=int, default=5, help="Number of internal C++ runs (e.g., NUM_RUNS from bash).")
     parser.add_argument("--min_log", type=int, default=32, help="Log of input size (e.g., MIN_LOG from bash).")
+    add_plot_arguments(parser)
 
 
     args = parser.parse_args()
@@ -267,20 +376,34 @@ def main():
     if found_files_count == 0: print(f"Warning: No memory report files found matching pattern in {mem_reports_dir_abs}.", file=sys.stderr)
     elif parsed_successfully_count == 0 and found_files_count > 0 : print(f"Warning: Found {found_files_count} memory report files, but none parsed successfully.", file=sys.stderr)
 
-    if not all_extracted_memory_data:
+    timelines = load_timelines(mem_reports_dir_abs)
+    if timelines:
+        print_timeline_summary(timelines)
+
+    if not all_extracted_memory_data and not timelines:
         print("No memory data loaded. Skipping plot generation.", file=sys.stderr)
         return 1
     
     if MATPLOTLIB_AVAILABLE:
         print("\n--- Generating Memory Comparison Plots ---")
+        jobs = []
         for config_key_to_plot, data_for_this_config in sorted(all_extracted_memory_data.items()):
             gen, dtype = config_key_to_plot
-            print(f"  Generating memory plot for config: Generator={gen}, DataType={dtype}")
             # 传递从命令行参数获取的配置值用于标题
-            generate_memory_plots_for_config(data_for_this_config, gen, dtype, analysis_plot_dir,
-                                             title_threads=args.threads, 
-                                             title_runs=args.num_runs, 
-                                             title_log_size=args.min_log)
+            job = prepare_memory_plot(data_for_this_config, gen, dtype,
+                                      title_threads=args.threads,
+                                      title_runs=args.num_runs,
+                                      title_log_size=args.min_log)
+            if job is not None:
+                jobs.append(job)
+        for (gen, dtype), by_algo in sorted(timelines.items()):
+            job = prepare_timeline_plot(by_algo, gen, dtype)
+            if job is not None:
+                jobs.append(job)
+        # 所有配置一起交给进程池渲染，数据未变的配置会被跳过
+        rendered, skipped, failed = render_plot_jobs(jobs, analysis_plot_dir, formats=parse_plot_formats(args.plot_format),
+                                                     workers=args.plot_workers, dpi=args.plot_dpi, force=args.force_plots)
+        print(f"  Memory plots: {rendered} rendered, {skipped} unchanged, {failed} failed.")
     else:
         print("\nPlot generation skipped as matplotlib is not available.")
 
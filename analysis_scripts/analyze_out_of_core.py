@@ -0,0 +1,190 @@
+# analyze_out_of_core.py
+# 核外 (out-of-core) 排序分析：读取一个或多个运行目录中的 RESULT 行 (通常是 -v mmapfile 与 benchmark_externalsort，
+# 也可以混合内存中的 -v vector 结果)，对每个 (算法, 生成器, 类型, 数组类型, 线程数, 元素数) 计算
+# 有效吞吐量 (输入字节 / 中位耗时)、每次排序的读写 I/O 量与 I/O 放大 ((读 + 写) / 输入)、major page faults，
+# 以及 输入 / 内存上限 比例 (src/io_counter.hpp 的 inputbytes / memlimitbytes，需要 MEASURE_IO=true)。
+# 报告按比例排序，并为每个 (生成器, 类型) 画出吞吐量与 I/O 放大随 输入/内存 比例的变化。
+import os
+import re
+import sys
+import glob
+import argparse
+from collections import defaultdict
+
+import numpy as np
+
+from wall_time_parser import parse_result_line
+from plot_renderer import (MATPLOTLIB_AVAILABLE, make_plot_job, render_plot_jobs, add_plot_arguments,
+                           parse_plot_formats)
+
+STDOUT_FILE_PATTERN = re.compile(r'^(benchmark_.*?)_([^_]+)_([^_]+)_stdout\.txt$')
+IO_FIELDS = ("ioreadbytes", "iowritebytes", "majfaults", "minfaults", "inputbytes", "memlimitbytes", "writebackmilli")
+
+def collect_samples(run_dirs):
+    """
+    返回 {(algo, gen, type, vector, threads, size): {"milli": [...], "ioreadbytes": [...], ...}}。
+    跳过 configwarning 行与预热运行 (run=0)；没有 I/O 字段的行只贡献 milli。
+    """
+    samples = defaultdict(lambda: defaultdict(list))
+    for run_dir in run_dirs:
+        stdout_dir = os.path.join(run_dir, "results_stdout")
+        if not os.path.isdir(stdout_dir):
+            print(f"Warning: results_stdout directory not found: {stdout_dir}", file=sys.stderr)
+            continue
+        for filepath in sorted(glob.glob(os.path.join(stdout_dir, "benchmark_*_stdout.txt"))):
+            match = STDOUT_FILE_PATTERN.match(os.path.basename(filepath))
+            if not match:
+                continue
+            algo = match.group(1)
+            with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    if not line.startswith("RESULT"):
+                        continue
+                    fields = parse_result_line(line)
+                    if fields.get("configwarning") == "1" or fields.get("run", "0") == "0":
+                        continue
+                    try:
+                        key = (algo, fields["gen"], fields["datatype"], fields.get("vector", "?"),
+                               int(fields["threads"]), int(fields["size"]))
+                        values = {"milli": float(fields["milli"])}
+                        for name in IO_FIELDS:
+                            if name in fields:
+                                values[name] = float(fields[name])
+                    except (KeyError, ValueError):
+                        continue
+                    for name, value in values.items():
+                        samples[key][name].append(value)
+    return samples
+
+def median_of(values, name):
+    return float(np.median(values[name])) if values.get(name) else np.nan
+
+def summarize(samples, mem_bytes_override=None):
+    """
+    每个配置一行：median_ms、input_bytes、ratio (输入 / 内存上限，未知时为 nan)、gbps、
+    read_bytes、write_bytes、amplification、majfaults (都是各次运行的中位数)。
+    """
+    rows = []
+    for key, values in samples.items():
+        median_ms = float(np.median(values["milli"]))
+        input_bytes = median_of(values, "inputbytes")
+        mem_bytes = mem_bytes_override if mem_bytes_override else median_of(values, "memlimitbytes")
+        read_bytes, write_bytes = median_of(values, "ioreadbytes"), median_of(values, "iowritebytes")
+        seconds = median_ms / 1000.0
+        rows.append({
+            "key": key, "median_ms": median_ms, "input_bytes": input_bytes,
+            "ratio": input_bytes / mem_bytes if mem_bytes and not np.isnan(mem_bytes) else np.nan,
+            "gbps": input_bytes / seconds / 1e9 if seconds > 0 else np.nan,
+            "read_bytes": read_bytes, "write_bytes": write_bytes,
+            "amplification": (read_bytes + write_bytes) / input_bytes if input_bytes > 0 else np.nan,
+            "majfaults": median_of(values, "majfaults"), "writeback_ms": median_of(values, "writebackmilli"),
+        })
+    return sorted(rows, key=lambda r: (r["key"][1], r["key"][2], r["key"][0], r["key"][3], r["key"][4], r["key"][5]))
+
+def format_gb(value):
+    return "-" if np.isnan(value) else f"{value / 1e9:.2f}"
+
+def format_report(rows):
+    lines = ["Out-of-core sorting",
+             "ratio = input bytes / memory limit (MemTotal or cgroup memory.max); GB/s = input bytes / median time; "
+             "amp = (bytes read + written) / input bytes; I/O and faults are medians per sort.",
+             "===================================================="]
+    current = None
+    for row in rows:
+        algo, gen, data_type, vector, threads, size = row["key"]
+        if (gen, data_type) != current:
+            current = (gen, data_type)
+            lines.append(f"\n{gen}/{data_type}")
+            lines.append(f"  {'algorithm':<20}{'vector':<10}{'thr':>5}{'input GB':>10}{'ratio':>8}{'median ms':>12}"
+                         f"{'GB/s':>8}{'read GB':>9}{'write GB':>10}{'amp':>7}{'majfaults':>11}")
+        ratio_text = "-" if np.isnan(row["ratio"]) else f"{row['ratio']:.2f}"
+        amp_text = "-" if np.isnan(row["amplification"]) else f"{row['amplification']:.2f}"
+        faults_text = "-" if np.isnan(row["majfaults"]) else f"{row['majfaults']:.0f}"
+        lines.append(f"  {algo.replace('benchmark_', '')[:19]:<20}{vector[:9]:<10}{threads:>5}"
+                     f"{format_gb(row['input_bytes']):>10}{ratio_text:>8}{row['median_ms']:>12.1f}"
+                     f"{row['gbps']:>8.3f}{format_gb(row['read_bytes']):>9}{format_gb(row['write_bytes']):>10}"
+                     f"{amp_text:>7}{faults_text:>11}")
+    if all(np.isnan(row["ratio"]) for row in rows):
+        lines.append("\nNo inputbytes/memlimitbytes fields (run with MEASURE_IO=true, or pass --mem-gb); "
+                     "the input/memory ratio is unknown.")
+    return lines
+
+def draw_throughput_vs_ratio(fig, axes, spec):
+    """左：有效吞吐量 (GB/s) 随 输入/内存 比例的变化；右：I/O 放大。x = 1 处的竖线是内存上限。"""
+    throughput_ax, amp_ax = axes[0], axes[1]
+    for label, points in spec["series"]:
+        ratios = [p[0] for p in points]
+        throughput_ax.plot(ratios, [p[1] for p in points], marker="o", label=label, linewidth=1.2)
+        amps = [(p[0], p[2]) for p in points if not np.isnan(p[2])]
+        if amps:
+            amp_ax.plot([a[0] for a in amps], [a[1] for a in amps], marker="o", label=label, linewidth=1.2)
+    for ax, ylabel in ((throughput_ax, "Effective throughput (GB/s)"), (amp_ax, "I/O amplification (bytes / input)")):
+        ax.set_xscale("log")
+        ax.axvline(1.0, color="grey", linewidth=0.8, linestyle="--")
+        ax.set_xlabel("Input size / memory limit")
+        ax.set_ylabel(ylabel)
+        ax.grid(True, alpha=0.3)
+        if ax.get_legend_handles_labels()[0]:
+            ax.legend(fontsize=7)
+    fig.suptitle(spec["title"], fontsize=11)
+    fig.tight_layout()
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Effective throughput, I/O volume, I/O amplification and major faults versus input/RAM ratio "
+                    "for out-of-core runs (-v mmapfile, benchmark_externalsort).")
+    parser.add_argument("run_dirs", nargs="+", help="Run directories containing results_stdout/.")
+    parser.add_argument("--mem-gb", type=float, default=None,
+                        help="Memory limit in GB for the ratio, instead of the memlimitbytes field of the results.")
+    parser.add_argument("--output-dir", default=None,
+                        help="Where to write the report and plots (default: <first run_dir>/analysis_result).")
+    add_plot_arguments(parser)
+    args = parser.parse_args()
+
+    if args.mem_gb is not None and args.mem_gb <= 0:
+        print("Error: --mem-gb must be positive", file=sys.stderr)
+        return 1
+    samples = collect_samples(args.run_dirs)
+    if not samples:
+        print("Error: No RESULT lines found in " + ", ".join(args.run_dirs), file=sys.stderr)
+        return 1
+    rows = summarize(samples, args.mem_gb * 1e9 if args.mem_gb else None)
+    output_dir = args.output_dir or os.path.join(args.run_dirs[0], "analysis_result")
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+    except OSError as e:
+        print(f"Error creating output directory {output_dir}: {e}", file=sys.stderr)
+        return 1
+
+    report = "\n".join(format_report(rows)) + "\n"
+    print("\n" + report)
+    report_path = os.path.join(output_dir, "out_of_core_report.txt")
+    try:
+        with open(report_path, 'w', encoding='utf-8') as f_out:
+            f_out.write(report)
+        print(f"Out-of-core report saved to: {report_path}")
+    except OSError as e:
+        print(f"Error writing report {report_path}: {e}", file=sys.stderr)
+
+    if not MATPLOTLIB_AVAILABLE:
+        print("\nPlot generation skipped as matplotlib is not available.")
+        return 0
+    by_config = defaultdict(lambda: defaultdict(list))
+    for row in rows:
+        algo, gen, data_type, vector, threads, _size = row["key"]
+        if np.isnan(row["ratio"]):
+            continue
+        label = f"{algo.replace('benchmark_', '')} ({vector}, t={threads})"
+        by_config[(gen, data_type)][label].append((row["ratio"], row["gbps"], row["amplification"]))
+    jobs = []
+    for (gen, data_type), series in sorted(by_config.items()):
+        jobs.append(make_plot_job(f"out_of_core_{gen}_{data_type}", draw_throughput_vs_ratio, (1, 2, (14, 5.5)),
+                                  {"title": f"Out-of-core sorting: {gen}, {data_type}",
+                                   "series": [(label, sorted(points)) for label, points in sorted(series.items())]}))
+    rendered, skipped, failed = render_plot_jobs(jobs, output_dir, formats=parse_plot_formats(args.plot_format),
+                                                 workers=args.plot_workers, dpi=args.plot_dpi, force=args.force_plots)
+    print(f"Out-of-core plots: {rendered} rendered, {skipped} unchanged, {failed} failed.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+# analyze_perf_record.py
+import os
+import argparse
+import sys
+import time
+from collections import defaultdict
+
+from perf_record_parser import (RECORD_FILENAME_PATTERN, PERF_SCRIPT_FIELDS, parse_recording, write_folded,
+                                symbol_shares, top_call_paths, short_symbol)
+
+KIND_TITLES = {"page_faults": "Page Faults", "dtlb_misses": "dTLB Misses"}
+
+def find_recordings(record_dir):
+    """
+    递归查找 record_page_fault.sh / record_dTLB_miss.sh 的输出。同一个配置既有 .data 又有已导出的
+    perf script 文本 (.script/.txt) 时优先使用文本，省去重新运行 perf script。
+    返回 {(algo, gen, type, kind): path}。
+    """
+    found = {}
+    for root, _dirs, files in os.walk(record_dir):
+        for filename in sorted(files):
+            match = RECORD_FILENAME_PATTERN.match(filename)
+            if not match:
+                continue
+            algo, generator, data_type, kind, extension = match.groups()
+            key = (algo, generator, data_type, kind)
+            if key in found and extension == "data":
+                continue
+            found[key] = os.path.join(root, filename)
+    return found
+
+def format_comparison(event, results_by_algo, top):
+    """
+    生成一个事件在各算法之间的对比表：行为符号 (按 self 占比)，列为算法。
+    """
+    algos = sorted(results_by_algo)
+    shares = {algo: symbol_shares(stacks) for algo, stacks in results_by_algo.items()}
+    symbols = []
+    for algo in algos:
+        self_share = shares[algo][0]
+        for symbol, _ in sorted(self_share.items(), key=lambda kv: -kv[1])[:top]:
+            if symbol not in symbols:
+                symbols.append(symbol)
+    symbols.sort(key=lambda s: -max(shares[a][0].get(s, 0.0) for a in algos))
+
+    algo_labels = [a.replace("benchmark_", "") for a in algos]
+    lines = [f"  Event: {event}",
+             "  Total (sum of periods): " + ", ".join(f"{label}={shares[a][2]:,}" for a, label in zip(algos, algo_labels)),
+             "  Self share of samples (leaf frame), inclusive share in brackets:",
+             "    " + f"{'symbol':<60}" + "".join(f"{label[:18]:>24}" for label in algo_labels)]
+    for symbol in symbols:
+        cells = []
+        for algo in algos:
+            self_share, inclusive_share, _ = shares[algo]
+            if symbol in inclusive_share:
+                cells.append(f"{self_share.get(symbol, 0.0) * 100:6.2f}% [{inclusive_share[symbol] * 100:6.2f}%]")
+            else:
+                cells.append("-")
+        lines.append("    " + f"{short_symbol(symbol)[:60]:<60}" + "".join(f"{c:>24}" for c in cells))
+
+    for algo, label in zip(algos, algo_labels):
+        lines.append(f"  Top call paths for {label} (leaf <- caller <- caller):")
+        for path, share in top_call_paths(results_by_algo[algo], depth=3, limit=5):
+            lines.append(f"    {share * 100:6.2f}%  " + " <- ".join(short_symbol(s) for s in path))
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Parse perf record data from record_page_fault.sh / record_dTLB_miss.sh, write folded stacks "
+                    "for flame graphs and compare where page faults and dTLB misses originate per algorithm.")
+    parser.add_argument("record_dir",
+                        help="Directory containing *_page_faults.data / *_dtlb_misses.data (searched recursively), e.g. "
+                             "run_stat_then_record/stat_record_run_*. Text dumps from "
+                             f"'perf script -F {PERF_SCRIPT_FIELDS}' with the same base name and a .script extension are also accepted.")
+    parser.add_argument("--output-dir", default=None,
+                        help="Where to write the report and folded stacks (default: <record_dir>/analysis_result).")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes per recording (default: number of CPUs).")
+    parser.add_argument("--chunks", type=int, default=None,
+                        help="Number of time slices (perf.data) or byte ranges (text) per recording (default: --jobs).")
+    parser.add_argument("--perf", default="perf", help="perf binary used to read perf.data files.")
+    parser.add_argument("--top", type=int, default=10, help="Symbols per algorithm in the comparison tables (default: 10).")
+    parser.add_argument("--weight", choices=["period", "samples"], default="period",
+                        help="Weight of the folded stacks: sum of sample periods (estimated events) or sample count.")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.record_dir):
+        print(f"Error: Record directory does not exist: {args.record_dir}", file=sys.stderr)
+        return 1
+    recordings = find_recordings(args.record_dir)
+    if not recordings:
+        print(f"Error: No *_page_faults / *_dtlb_misses recordings found in {args.record_dir}", file=sys.stderr)
+        return 1
+
+    output_dir = args.output_dir or os.path.join(args.record_dir, "analysis_result")
+    folded_dir = os.path.join(output_dir, "folded")
+    try:
+        os.makedirs(folded_dir, exist_ok=True)
+    except OSError as e:
+        print(f"Error creating output directory {folded_dir}: {e}", file=sys.stderr)
+        return 1
+
+    # {(gen, type, kind): {event: {algo: stacks}}}
+    grouped = defaultdict(lambda: defaultdict(dict))
+    for (algo, generator, data_type, kind), path in sorted(recordings.items()):
+        print(f"Parsing {os.path.basename(path)} ...")
+        started = time.time()
+        try:
+            events = parse_recording(path, chunks=args.chunks, workers=args.jobs, perf_binary=args.perf)
+        except (OSError, RuntimeError) as e:
+            print(f"Error parsing {path}: {e}", file=sys.stderr)
+            continue
+        total_samples = sum(count for stacks in events.values() for count, _ in stacks.values())
+        print(f"  {total_samples:,} samples, {sum(len(s) for s in events.values()):,} unique stacks "
+              f"in {time.time() - started:.1f}s")
+        for event, stacks in events.items():
+            grouped[(generator, data_type, kind)][event][algo] = stacks
+            event_tag = event.replace("/", "_").replace(":", "_")
+            folded_path = os.path.join(folded_dir, f"{algo}_{generator}_{data_type}_{event_tag}.folded")
+            write_folded(stacks, folded_path, include_period=(args.weight == "period"))
+
+    if not grouped:
+        print("Error: No samples could be parsed.", file=sys.stderr)
+        return 1
+
+    lines = [f"Perf record analysis of {os.path.abspath(args.record_dir)}",
+             f"Folded stacks (flamegraph.pl / speedscope input): {folded_dir}",
+             "===================================================="]
+    for (generator, data_type, kind), events in sorted(grouped.items()):
+        lines.append(f"\n{KIND_TITLES.get(kind, kind)}: Generator={generator}, DataType={data_type}")
+        for event, results_by_algo in sorted(events.items()):
+            lines.extend(format_comparison(event, results_by_algo, args.top))
+    report = "\n".join(lines) + "\n"
+    print("\n" + report)
+
+    report_path = os.path.join(output_dir, "perf_record_report.txt")
+    try:
+        with open(report_path, 'w', encoding='utf-8') as f_out:
+            f_out.write(report)
+        print(f"Perf record report saved to: {report_path}")
+    except OSError as e:
+        print(f"Error writing report {report_path}: {e}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
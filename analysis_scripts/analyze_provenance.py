@@ -0,0 +1,88 @@
+# analyze_provenance.py
+import os
+import argparse
+import sys
+
+from run_loader import load_run, list_run_dirs
+from run_provenance import (FINGERPRINT_KEYS, DEFAULT_THRESHOLDS, parse_where, filter_run_dirs,
+                            summarize_provenance)
+
+def format_run_report(run, summary):
+    metadata = run["metadata"]
+    lines = [f"\n{run['name']}"]
+    shown = [f"{key}={metadata[key]}" for key in FINGERPRINT_KEYS if metadata.get(key)]
+    lines.append("  " + ("; ".join(shown) if shown else "no environment fingerprint (run predates env_fingerprint.py)"))
+    lines.append(f"  {'generator/type':<22}{'algorithm':<22}{'median ms':>11}{'@nominal ms':>13}{'freq':>7}  flags")
+    for (generator, data_type), algos in sorted(summary.items()):
+        for algo, info in sorted(algos.items()):
+            normalized = f"{info['normalized_median_milli']:13.3f}" if info["normalized_median_milli"] is not None else f"{'-':>13}"
+            ratio = f"{info['median_freqratio']:7.3f}" if info["median_freqratio"] is not None else f"{'-':>7}"
+            flags = ", ".join(info["flags"]) if info["flags"] else "ok"
+            lines.append(f"  {(generator + '/' + data_type)[:21]:<22}{algo.replace('benchmark_', '')[:21]:<22}"
+                         f"{info['median_milli']:11.3f}{normalized}{ratio}  {flags}")
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Show the environment fingerprint of benchmark runs (governor, turbo, SMT, THP, load, kernel, ...), "
+                    "wall times normalized to the nominal frequency (freqratio from APERF/MPERF or ref-cycles) and "
+                    "flag noisy configurations.")
+    parser.add_argument("paths", nargs='+',
+                        help="Run directories (perf_benchmark_run_*) or directories holding them.")
+    parser.add_argument("--where", action="append", default=[],
+                        help="Only runs whose fingerprint matches, e.g. --where governor=performance --where turbo!=on "
+                             "--where cpu_model~EPYC (repeatable).")
+    parser.add_argument("--max-loaded-cores", type=int, default=DEFAULT_THRESHOLDS["max_loaded_cores"],
+                        help="Flag configurations with more busy cores before the run (default: %(default)s).")
+    parser.add_argument("--max-freq-spread", type=float, default=DEFAULT_THRESHOLDS["max_freq_spread"],
+                        help="Flag configurations whose freqratio varies more than this across runs (default: %(default)s).")
+    parser.add_argument("--max-cv", type=float, default=DEFAULT_THRESHOLDS["max_cv"],
+                        help="Flag configurations whose wall time CV exceeds this (default: %(default)s).")
+    parser.add_argument("--output", default=None, help="Report file (default: provenance_report.txt in the first path).")
+    args = parser.parse_args()
+
+    try:
+        conditions = parse_where(args.where)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    run_dirs = []
+    for path in args.paths:
+        if not os.path.isdir(path):
+            print(f"Error: Directory does not exist: {path}", file=sys.stderr)
+            return 1
+        nested = list_run_dirs(path)
+        run_dirs.extend(nested if nested else [path])
+    selected = filter_run_dirs(run_dirs, conditions)
+    if not selected:
+        print(f"Error: None of the {len(run_dirs)} run(s) match {' '.join(args.where)}", file=sys.stderr)
+        return 1
+
+    thresholds = {"max_loaded_cores": args.max_loaded_cores, "max_freq_spread": args.max_freq_spread,
+                  "max_cv": args.max_cv}
+    lines = [f"Run provenance: {len(selected)} of {len(run_dirs)} run(s)"
+             + (f" matching {' '.join(args.where)}" if conditions else ""),
+             "'@nominal ms' = median of milli * freqratio (time at the nominal frequency); 'freq' = median "
+             "actual / nominal frequency during the sorts.",
+             "===================================================="]
+    noisy = 0
+    for run_dir in selected:
+        run = load_run(run_dir, with_perf=False)
+        summary = summarize_provenance(run, thresholds)
+        noisy += sum(1 for algos in summary.values() for info in algos.values() if info["flags"])
+        lines.extend(format_run_report(run, summary))
+    lines.append(f"\n{noisy} configuration(s) flagged as noisy.")
+    report = "\n".join(lines) + "\n"
+    print("\n" + report)
+
+    output_path = args.output or os.path.join(args.paths[0], "provenance_report.txt")
+    try:
+        with open(output_path, 'w', encoding='utf-8') as f_out:
+            f_out.write(report)
+        print(f"Provenance report saved to: {output_path}")
+    except OSError as e:
+        print(f"Error writing report {output_path}: {e}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+# analyze_record_width.py
+# 记录宽度扫描：读取一个或多个运行目录中 uint64 (8 字节) 与 rec16 ... rec256 (8 字节键 + 载荷，src/datatypes.hpp) 的结果，
+# 对每个 (生成器, 算法) 按记录宽度列出中位耗时、GB/s 与 元素/s，
+# 并与"排序索引"的估计耗时比较：对 (键, 索引) 的 pair 排序 (同一算法、同一生成器的 pair 结果按 n log n 换算到相同元素数)
+# 加上按排序结果搬运整条记录的 gather (n * 2 * 宽度 字节，按 --gather-gbps 估计)。
+# 直接移动记录比排序索引更慢的宽度会被标出。
+import os
+import re
+import sys
+import math
+import argparse
+
+import numpy as np
+
+from wall_time_parser import collect_wall_time_samples
+
+RECORD_TYPE_PATTERN = re.compile(r'^rec(\d+)$')
+# uint64 就是没有载荷的 8 字节记录
+PLAIN_KEY_WIDTHS = {"uint64": 8}
+INDEX_SORT_TYPE = "pair"
+
+def record_width(data_type):
+    """类型名 -> 记录宽度 (字节)；不属于宽度扫描的类型返回 None。"""
+    match = RECORD_TYPE_PATTERN.match(data_type)
+    if match:
+        return int(match.group(1))
+    return PLAIN_KEY_WIDTHS.get(data_type)
+
+def collect_width_table(run_dirs):
+    """
+    返回 ({(gen, algo): {width: {"median": ms, "size": 元素数, "threads": int}}},
+          {(gen, algo): pair 的 {"median": ms, "size": 元素数}})。
+    多个运行目录中出现同一配置时合并样本。
+    """
+    merged = {}
+    for run_dir in run_dirs:
+        samples = collect_wall_time_samples(os.path.join(run_dir, "results_stdout"))
+        for (gen, data_type), algos in samples.items():
+            if data_type != INDEX_SORT_TYPE and record_width(data_type) is None:
+                continue
+            for algo, info in algos.items():
+                entry = merged.setdefault((gen, algo, data_type),
+                                          {"values": [], "size": info["size"], "threads": info["threads"]})
+                if entry["size"] != info["size"]:
+                    print(f"Warning: {algo} {gen}/{data_type} has different sizes across runs "
+                          f"({entry['size']} vs {info['size']}); keeping the first.", file=sys.stderr)
+                    continue
+                entry["values"].extend(info["milli"])
+
+    widths, index_baseline = {}, {}
+    for (gen, algo, data_type), entry in merged.items():
+        summary = {"median": float(np.median(entry["values"])), "size": entry["size"], "threads": entry["threads"]}
+        if data_type == INDEX_SORT_TYPE:
+            index_baseline[(gen, algo)] = summary
+        else:
+            widths.setdefault((gen, algo), {})[record_width(data_type)] = summary
+    return widths, index_baseline
+
+def estimate_index_sort_ms(baseline, size, width, gather_gbps):
+    """
+    排序索引的估计耗时 (ms)：pair 排序按 n log n 换算到 size 个元素，加上按索引搬运记录
+    (随机读一条记录 + 顺序写一条记录) 的时间。没有 pair 结果时返回 None。
+    """
+    if baseline is None or baseline["size"] < 2 or size < 2:
+        return None
+    n0, n = baseline["size"], size
+    sort_ms = baseline["median"] * (n * math.log2(n)) / (n0 * math.log2(n0))
+    gather_ms = n * 2 * width / (gather_gbps * 1e9) * 1000.0
+    return sort_ms + gather_ms
+
+def analyze_widths(widths, index_baseline, gather_gbps):
+    """
+    为每个 (gen, algo) 的每个宽度计算 gbps、melems (百万元素/s)、index_ms 与 index_wins，
+    并给出 crossover：从该宽度起 (直到最大宽度) 排序索引的估计耗时都更短；没有则为 None。
+    """
+    report = {}
+    for key, by_width in widths.items():
+        rows = []
+        for width in sorted(by_width):
+            entry = by_width[width]
+            seconds = entry["median"] / 1000.0
+            index_ms = (estimate_index_sort_ms(index_baseline.get(key), entry["size"], width, gather_gbps)
+                        if width > 8 else None)
+            rows.append({
+                "width": width, "size": entry["size"], "median": entry["median"], "threads": entry["threads"],
+                "gbps": entry["size"] * width / seconds / 1e9 if seconds > 0 else np.nan,
+                "melems": entry["size"] / seconds / 1e6 if seconds > 0 else np.nan,
+                "index_ms": index_ms,
+                "index_wins": index_ms is not None and index_ms < entry["median"],
+            })
+        crossover = None
+        for row in reversed(rows):
+            if not row["index_wins"]:
+                break
+            crossover = row["width"]
+        report[key] = {"rows": rows, "crossover": crossover}
+    return report
+
+def format_report(report, gather_gbps):
+    lines = ["Record-width sweep (uint64 = 8 bytes, recN = 8 byte key + N-8 bytes payload)",
+             f"index sort estimate = pair sort scaled to the same n (n log n) + gather of 2 * width bytes per "
+             f"element at {gather_gbps:g} GB/s; '<' marks widths where moving records loses to sorting indices.",
+             "===================================================="]
+    for (gen, algo), entry in sorted(report.items()):
+        lines.append(f"\n{algo.replace('benchmark_', '')} / {gen}")
+        lines.append(f"  {'width':>6}{'elements':>14}{'median ms':>12}{'GB/s':>9}{'Melem/s':>10}{'index ms':>11}")
+        for row in entry["rows"]:
+            index_text = f"{row['index_ms']:.2f}" if row["index_ms"] is not None else "-"
+            marker = " <" if row["index_wins"] else ""
+            lines.append(f"  {row['width']:>6}{row['size']:>14}{row['median']:>12.2f}{row['gbps']:>9.2f}"
+                         f"{row['melems']:>10.1f}{index_text:>11}{marker}")
+        if entry["crossover"] is not None:
+            lines.append(f"  -> sorting indices + gather is estimated to win from {entry['crossover']} bytes per record")
+        elif all(row["index_ms"] is None for row in entry["rows"]):
+            lines.append(f"  -> no {INDEX_SORT_TYPE} result for this algorithm/generator, no index sort estimate")
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Throughput (GB/s, elements/s) versus record width for the uint64 / rec16 ... rec256 "
+                    "datatypes, and where moving whole records loses to sorting (key, index) pairs.")
+    parser.add_argument("run_dirs", nargs="+", help="Run directories containing results_stdout/.")
+    parser.add_argument("--gather-gbps", type=float, default=4.0,
+                        help="Assumed bandwidth of the random gather after an index sort (default: %(default)s).")
+    parser.add_argument("--output", default=None,
+                        help="Report file (default: record_width_report.txt in the first run directory).")
+    args = parser.parse_args()
+
+    if args.gather_gbps <= 0:
+        print("Error: --gather-gbps must be positive", file=sys.stderr)
+        return 1
+    widths, index_baseline = collect_width_table(args.run_dirs)
+    if not widths:
+        print("Error: No uint64 / rec<N> results found in " + ", ".join(args.run_dirs), file=sys.stderr)
+        return 1
+
+    report = analyze_widths(widths, index_baseline, args.gather_gbps)
+    text = "\n".join(format_report(report, args.gather_gbps)) + "\n"
+    print("\n" + text)
+
+    output_path = args.output or os.path.join(args.run_dirs[0], "record_width_report.txt")
+    try:
+        with open(output_path, 'w', encoding='utf-8') as f_out:
+            f_out.write(text)
+        print(f"Record-width report saved to: {output_path}")
+    except OSError as e:
+        print(f"Error writing report {output_path}: {e}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
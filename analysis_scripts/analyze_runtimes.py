@@ -0,0 +1,246 @@
+# analyze_runtimes.py
+# 并行运行时比较：同一个算法 (RESULT 行的 algo=) 用不同的调度器编译 (CMake 的 BENCHMARK_RUNTIME_VARIANTS：
+# benchmark_plss = ParlayLib 自带调度器, benchmark_plss_omp / _tbb / _cilk = OpenMP / oneTBB / OpenCilk)，
+# RESULT 行的 runtime= 区分它们。对每个 (算法, 生成器, 类型, 线程数, 元素数) 比较各运行时的
+#   - wall time 中位数与相对最快运行时的倍数 (Mann-Whitney + Cliff's delta)；
+#   - 调度开销：CPU 利用率 (usermilli + sysmilli) / (milli * 线程数)，以及比 CPU 时间最少的运行时多用的 CPU 时间，
+#     再加上自愿 / 非自愿上下文切换 (MEASURE_SCHEDULING=true，src/runtime_info.hpp)。这些运行时都不公开窃取次数，
+#     多出来的 CPU 时间 (空转窃取、yield) 与切换次数 (睡眠 / 唤醒) 是它们的可观测代价；
+#   - 每个元素的 perf 计数器 (有 perf_stats/ 时，经 run_loader)。
+# 同一目录中也可以混入只有一个运行时的算法，它们只出现在表中，不参与比较。
+import os
+import re
+import sys
+import glob
+import argparse
+from collections import defaultdict
+
+import numpy as np
+
+from run_loader import load_run
+from regression_detector import mann_whitney_u, cliffs_delta, effect_label
+from wall_time_parser import parse_result_line
+from plot_renderer import (MATPLOTLIB_AVAILABLE, make_plot_job, render_plot_jobs, add_plot_arguments,
+                           parse_plot_formats)
+
+STDOUT_FILE_PATTERN = re.compile(r'^(benchmark_.*?)_([^_]+)_([^_]+)_stdout\.txt$')
+SCHED_FIELDS = ("usermilli", "sysmilli", "vcsw", "ivcsw")
+
+# 报告中按运行时比较的计数器 (每个元素)，与 run_loader.PER_ELEMENT_COUNTERS 的键名一致
+RUNTIME_COUNTERS = [
+    ("Cycles", "cycles"),
+    ("Total Instructions (IC)", "instr"),
+    ("L3 Load Misses (Loads hitting DRAM)", "L3 ld miss"),
+    ("Branch Misses", "br miss"),
+    ("Page Faults", "faults"),
+]
+
+def collect_samples(run_dirs):
+    """
+    读取每个 stdout 文件的所有 RESULT 行 (所有大小)，跳过 configwarning 行与预热运行 (run=0)；
+    调度计数器只在 no perf round 打开，perf 轮次的行只贡献 milli。
+    返回 ({(algo, gen, type, threads, size): {runtime: {"binary", "run_dir", "milli": [...], "usermilli": [...], ...}}},
+          {run_dir: load_run 的 per_element})。
+    """
+    samples = defaultdict(dict)
+    per_element = {}
+    for run_dir in run_dirs:
+        stdout_dir = os.path.join(run_dir, "results_stdout")
+        if not os.path.isdir(stdout_dir):
+            print(f"Warning: results_stdout directory not found: {stdout_dir}", file=sys.stderr)
+            continue
+        per_element[run_dir] = load_run(run_dir)["per_element"]
+        for filepath in sorted(glob.glob(os.path.join(stdout_dir, "benchmark_*_stdout.txt"))):
+            match = STDOUT_FILE_PATTERN.match(os.path.basename(filepath))
+            if not match:
+                continue
+            binary = match.group(1)
+            with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
+                records = [parse_result_line(line) for line in f if line.startswith("RESULT")]
+            for fields in records:
+                if fields.get("configwarning") == "1" or fields.get("run", "0") == "0":
+                    continue
+                try:
+                    key = (fields["algo"], fields["gen"], fields["datatype"], int(fields["threads"]),
+                           int(fields["size"]))
+                    milli = float(fields["milli"])
+                except (KeyError, ValueError):
+                    continue
+                runtime = fields.get("runtime", "native")
+                entry = samples[key].setdefault(runtime, {"binary": binary, "run_dir": run_dir, "milli": [],
+                                                          **{name: [] for name in SCHED_FIELDS}})
+                if entry["binary"] != binary:
+                    print(f"Warning: {binary} and {entry['binary']} both report algo={key[0]} runtime={runtime}; "
+                          f"pooling their samples", file=sys.stderr)
+                entry["milli"].append(milli)
+                for name in SCHED_FIELDS:
+                    try:
+                        entry[name].append(float(fields[name]))
+                    except (KeyError, ValueError):
+                        pass
+    return samples, per_element
+
+def median_or_nan(values):
+    return float(np.median(values)) if values else np.nan
+
+def summarize(samples, per_element):
+    """
+    每个配置一个字典 {"key", "rows": [...]}，rows 每个运行时一行：median_ms、slowdown (相对最快的运行时)、
+    p_value / effect (与最快的运行时比较)、cpu_ms、utilization、extra_cpu_ms (比 CPU 时间最少的运行时多)、
+    vcsw、ivcsw 与 counters ({计数器: 每个元素的值})。
+    """
+    groups = []
+    for key, runtimes in samples.items():
+        algo, gen, data_type, threads, size = key
+        rows = []
+        for runtime, entry in runtimes.items():
+            cpu = [u + s for u, s in zip(entry["usermilli"], entry["sysmilli"])]
+            median_ms = median_or_nan(entry["milli"])
+            cpu_ms = median_or_nan(cpu)
+            rows.append({
+                "runtime": runtime, "binary": entry["binary"], "milli": entry["milli"], "median_ms": median_ms,
+                "cpu_ms": cpu_ms,
+                "utilization": cpu_ms / (median_ms * threads) if median_ms > 0 and threads > 0 else np.nan,
+                "vcsw": median_or_nan(entry["vcsw"]), "ivcsw": median_or_nan(entry["ivcsw"]),
+                "counters": per_element.get(entry["run_dir"], {}).get((gen, data_type), {}).get(entry["binary"], {}),
+            })
+        rows.sort(key=lambda r: r["median_ms"])
+        fastest = rows[0]
+        leanest_cpu = min((r["cpu_ms"] for r in rows if not np.isnan(r["cpu_ms"])), default=np.nan)
+        for row in rows:
+            row["slowdown"] = row["median_ms"] / fastest["median_ms"] if fastest["median_ms"] > 0 else np.nan
+            row["extra_cpu_ms"] = row["cpu_ms"] - leanest_cpu
+            row["p_value"], row["effect"] = np.nan, "n/a"
+            if row is not fastest and len(row["milli"]) >= 2 and len(fastest["milli"]) >= 2:
+                _u, row["p_value"] = mann_whitney_u(row["milli"], fastest["milli"])
+                row["effect"] = effect_label(cliffs_delta(row["milli"], fastest["milli"]))
+        groups.append({"key": key, "rows": rows})
+    return sorted(groups, key=lambda g: (g["key"][1], g["key"][2], g["key"][0], g["key"][3], g["key"][4]))
+
+def format_value(value, fmt):
+    return "-" if value is None or np.isnan(value) else format(value, fmt)
+
+def format_report(groups, alpha):
+    lines = ["Parallel runtime comparison",
+             "x fastest = median wall time / median of the fastest runtime (* = significant, Mann-Whitney p < alpha); "
+             "util = (user + sys CPU ms) / (wall ms * threads); +cpu ms = CPU time beyond the leanest runtime; "
+             "vcsw/ivcsw = voluntary/involuntary context switches per sort (medians). Counters are per element.",
+             "===================================================="]
+    compared = [g for g in groups if len(g["rows"]) > 1]
+    single = [g for g in groups if len(g["rows"]) == 1]
+    counter_header = "".join(f"{label:>12}" for _counter, label in RUNTIME_COUNTERS)
+    for group in compared:
+        algo, gen, data_type, threads, size = group["key"]
+        lines.append(f"\n{algo} {gen}/{data_type}, {threads} threads, n={size}")
+        lines.append(f"  {'runtime':<12}{'binary':<26}{'median ms':>11}{'x fastest':>11}{'effect':>12}{'util':>7}"
+                     f"{'+cpu ms':>10}{'vcsw':>9}{'ivcsw':>9}{counter_header}")
+        for row in group["rows"]:
+            mark = "*" if not np.isnan(row["p_value"]) and row["p_value"] < alpha else " "
+            cells = "".join(f"{format_value(row['counters'].get(counter, np.nan), '.3g'):>12}"
+                            for counter, _label in RUNTIME_COUNTERS)
+            lines.append(f"  {row['runtime'][:11]:<12}{row['binary'].replace('benchmark_', '')[:25]:<26}"
+                         f"{row['median_ms']:>11.2f}{row['slowdown']:>10.2f}{mark}{row['effect']:>12}"
+                         f"{format_value(row['utilization'], '.2f'):>7}{format_value(row['extra_cpu_ms'], '.1f'):>10}"
+                         f"{format_value(row['vcsw'], '.0f'):>9}{format_value(row['ivcsw'], '.0f'):>9}{cells}")
+    if not compared:
+        lines.append("\nNo algorithm was measured with more than one runtime (build with -DBENCHMARK_RUNTIME_VARIANTS=ON "
+                     "and add benchmark_<x>_omp / _tbb / _cilk to ALGOS).")
+    if compared and all(np.isnan(row["cpu_ms"]) for g in compared for row in g["rows"]):
+        lines.append("\nNo usermilli/sysmilli fields (run with MEASURE_SCHEDULING=true); only wall times are compared.")
+
+    wins = defaultdict(int)
+    for group in compared:
+        wins[group["rows"][0]["runtime"]] += 1
+    if wins:
+        lines.append("\nFastest runtime per configuration: "
+                     + ", ".join(f"{runtime} {count}" for runtime, count in sorted(wins.items(), key=lambda w: -w[1])))
+    if single:
+        lines.append(f"\n{len(single)} configuration(s) with a single runtime (not compared):")
+        for group in single:
+            algo, gen, data_type, threads, size = group["key"]
+            row = group["rows"][0]
+            lines.append(f"  {algo} {gen}/{data_type} t={threads} n={size}: {row['runtime']} {row['median_ms']:.2f} ms")
+    return lines
+
+def draw_runtime_bars(fig, axes, spec):
+    """左：每个算法各运行时的 wall time 中位数；右：CPU 利用率 (1.0 = 所有线程一直在运行)。"""
+    time_ax, util_ax = axes[0], axes[1]
+    algos, series = spec["algos"], spec["series"]
+    width = 0.8 / max(1, len(series))
+    positions = np.arange(len(algos))
+    for i, (runtime, times, utils) in enumerate(series):
+        offsets = positions - 0.4 + width * (i + 0.5)
+        time_ax.bar(offsets, times, width, label=runtime)
+        util_ax.bar(offsets, utils, width, label=runtime)
+    for ax, ylabel in ((time_ax, "Median wall time (ms)"), (util_ax, "CPU utilization (cpu ms / (wall ms * threads))")):
+        ax.set_xticks(positions)
+        ax.set_xticklabels(algos, rotation=20, fontsize=8)
+        ax.set_ylabel(ylabel)
+        ax.grid(True, axis="y", alpha=0.3)
+        ax.legend(fontsize=7)
+    util_ax.axhline(1.0, color="grey", linewidth=0.8, linestyle="--")
+    fig.suptitle(spec["title"], fontsize=11)
+    fig.tight_layout()
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the same algorithm built on different parallel runtimes (ParlayLib scheduler, OpenMP, "
+                    "oneTBB, OpenCilk): wall time, CPU utilization, extra CPU time, context switches and counters.")
+    parser.add_argument("run_dirs", nargs="+", help="Run directories containing results_stdout/ (and perf_stats/).")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Significance level (default: %(default)s).")
+    parser.add_argument("--output-dir", default=None,
+                        help="Where to write the report and plots (default: <first run_dir>/analysis_result).")
+    add_plot_arguments(parser)
+    args = parser.parse_args()
+
+    samples, per_element = collect_samples(args.run_dirs)
+    if not samples:
+        print("Error: No RESULT lines found in " + ", ".join(args.run_dirs), file=sys.stderr)
+        return 1
+    groups = summarize(samples, per_element)
+    output_dir = args.output_dir or os.path.join(args.run_dirs[0], "analysis_result")
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+    except OSError as e:
+        print(f"Error creating output directory {output_dir}: {e}", file=sys.stderr)
+        return 1
+
+    report = "\n".join(format_report(groups, args.alpha)) + "\n"
+    print("\n" + report)
+    report_path = os.path.join(output_dir, "runtime_comparison.txt")
+    try:
+        with open(report_path, 'w', encoding='utf-8') as f_out:
+            f_out.write(report)
+        print(f"Runtime comparison saved to: {report_path}")
+    except OSError as e:
+        print(f"Error writing report {report_path}: {e}", file=sys.stderr)
+
+    if not MATPLOTLIB_AVAILABLE:
+        print("\nPlot generation skipped as matplotlib is not available.")
+        return 0
+    # 每个 (生成器, 类型, 线程数, 元素数) 一张图，只画有多个运行时的算法
+    by_config = defaultdict(dict)
+    for group in groups:
+        if len(group["rows"]) < 2:
+            continue
+        algo, gen, data_type, threads, size = group["key"]
+        for row in group["rows"]:
+            by_config[(gen, data_type, threads, size)][(algo, row["runtime"])] = (row["median_ms"], row["utilization"])
+    jobs = []
+    for (gen, data_type, threads, size), values in sorted(by_config.items()):
+        algos = sorted({algo for algo, _runtime in values})
+        series = []
+        for runtime in sorted({runtime for _algo, runtime in values}):
+            points = [values.get((algo, runtime), (np.nan, np.nan)) for algo in algos]
+            series.append((runtime, [p[0] for p in points], [p[1] for p in points]))
+        jobs.append(make_plot_job(f"runtimes_{gen}_{data_type}_t{threads}_n{size}", draw_runtime_bars,
+                                  (1, 2, (14, 5.5)),
+                                  {"title": f"Parallel runtimes: {gen}, {data_type}, {threads} threads, n={size}",
+                                   "algos": algos, "series": series}))
+    rendered, skipped, failed = render_plot_jobs(jobs, output_dir, formats=parse_plot_formats(args.plot_format),
+                                                 workers=args.plot_workers, dpi=args.plot_dpi, force=args.force_plots)
+    print(f"Runtime plots: {rendered} rendered, {skipped} unchanged, {failed} failed.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+# changepoint_detector.py
+import json
+import math
+import os
+import sys
+
+import numpy as np
+
+from run_loader import load_run
+
+STATE_VERSION = 1
+
+# 这些元数据键的变化会被用来解释一个变点 (见 run_time_perfFIFO.sh 写入的 run_metadata.txt)
+ATTRIBUTION_KEYS = ["machine", "hostname", "commit", "compiler", "build_type", "cxx_flags", "kernel", "threads",
+                    "governor", "turbo", "smt_active", "thp_enabled", "numa_balancing"]
+
+def series_key(machine, generator, data_type, algo, size, threads):
+    return f"{machine}|{generator}|{data_type}|{algo}|{size}|{threads}"
+
+def split_series_key(key):
+    machine, generator, data_type, algo, size, threads = key.split("|")
+    return machine, generator, data_type, algo, size, threads
+
+def run_summary(milli_values):
+    """
+    把一个运行的 milli 样本压缩成 (log 中位数, 中位数的标准误估计)。
+    标准误用 MAD 估计并按 1.2533/sqrt(k) 缩放 (中位数相对均值的效率)。
+    """
+    logs = np.log(np.asarray(milli_values, dtype=np.float64))
+    center = float(np.median(logs))
+    if len(logs) < 2:
+        return center, np.nan
+    mad_sigma = 1.4826 * float(np.median(np.abs(logs - center)))
+    return center, mad_sigma * 1.2533 / math.sqrt(len(logs))
+
+def noise_sigma(values, within_run_errors):
+    """
+    段内噪声估计：取运行内误差的中位数与一阶差分的 MAD 估计 (含日间波动) 中较大者。
+    """
+    estimates = []
+    within = [e for e in within_run_errors if e is not None and not np.isnan(e) and e > 0]
+    if within:
+        estimates.append(float(np.median(within)))
+    if len(values) >= 3:
+        diffs = np.diff(np.asarray(values, dtype=np.float64))
+        estimates.append(1.4826 * float(np.median(np.abs(diffs - np.median(diffs)))) / math.sqrt(2.0))
+    sigma = max(estimates) if estimates else 0.0
+    return max(sigma, 1e-3) # 下限 0.1% 防止无噪声时任何抖动都被当作变点
+
+def pelt(values, penalty, min_segment=2):
+    """
+    PELT (Pruned Exact Linear Time) 检测均值变化。values 应已按噪声标准差归一化，
+    代价函数为段内平方误差。返回变点下标列表 (每个下标是新段的第一个元素)。
+    """
+    x = np.asarray(values, dtype=np.float64)
+    n = len(x)
+    if n < 2 * min_segment:
+        return []
+    cumsum = np.concatenate([[0.0], np.cumsum(x)])
+    cumsum_sq = np.concatenate([[0.0], np.cumsum(x * x)])
+
+    def cost(start, end): # 段 x[start:end]
+        length = end - start
+        total = cumsum[end] - cumsum[start]
+        return (cumsum_sq[end] - cumsum_sq[start]) - total * total / length
+
+    best = np.full(n + 1, np.inf)
+    best[0] = -penalty
+    last_change = np.zeros(n + 1, dtype=np.int64)
+    candidates = [0]
+    for end in range(1, n + 1):
+        admissible = [s for s in candidates if end - s >= min_segment and np.isfinite(best[s])]
+        totals = {s: best[s] + cost(s, end) for s in admissible}
+        if totals:
+            arg = min(totals, key=totals.get)
+            best[end] = totals[arg] + penalty
+            last_change[end] = arg
+        # 剪枝：F(s) + C(s, end) > F(end) 的起点以后也不可能是最优的
+        candidates = [s for s in candidates if s not in totals or totals[s] <= best[end]]
+        candidates.append(end)
+
+    change_points = []
+    end = n
+    while end > 0:
+        start = int(last_change[end])
+        if start > 0:
+            change_points.append(start)
+        end = start
+    return sorted(change_points)
+
+def attribute_change(metadata_before, metadata_after):
+    """
+    返回在变点前后两个运行之间发生变化的元数据 {key: (before, after)}。
+    """
+    changes = {}
+    for key in ATTRIBUTION_KEYS:
+        before = metadata_before.get(key, "")
+        after = metadata_after.get(key, "")
+        if before != after:
+            changes[key] = (before, after)
+    return changes
+
+def empty_state():
+    return {"version": STATE_VERSION, "ingested_runs": [], "series": {}, "run_metadata": {}}
+
+def load_state(state_path):
+    if not os.path.isfile(state_path):
+        return empty_state()
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not read change-point state {state_path} ({e}); rebuilding from scratch.", file=sys.stderr)
+        return empty_state()
+    if state.get("version") != STATE_VERSION:
+        print(f"Warning: Change-point state {state_path} has an unknown version; rebuilding from scratch.", file=sys.stderr)
+        return empty_state()
+    return state
+
+def save_state(state, state_path):
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path) # 原子替换，中途崩溃不会留下损坏的状态
+
+def ingest_runs(state, run_dirs):
+    """
+    把尚未处理过的运行追加到各个时间序列。返回新追加的运行名列表。
+    运行必须按时间顺序给出，早于最后一个已处理运行的目录会被跳过。
+    """
+    ingested = set(state["ingested_runs"])
+    last_name = state["ingested_runs"][-1] if state["ingested_runs"] else ""
+    new_names = []
+    for run_dir in run_dirs:
+        name = os.path.basename(os.path.normpath(run_dir))
+        if name in ingested:
+            continue
+        if name < last_name:
+            print(f"Warning: Run {name} is older than the last ingested run {last_name}; skipping "
+                  f"(use --rebuild to re-ingest the whole history).", file=sys.stderr)
+            continue
+        run = load_run(run_dir, with_perf=False)
+        state["run_metadata"][name] = run["metadata"]
+        for (generator, data_type), algos in run["wall_samples"].items():
+            for algo, info in algos.items():
+                machine = info["machine"] or run["metadata"].get("machine", "")
+                key = series_key(machine, generator, data_type, algo, info["size"], info["threads"])
+                series = state["series"].setdefault(key, {
+                    "runs": [], "values": [], "errors": [], "change_points": [], "segment_start": 0})
+                center, error = run_summary(info["milli"])
+                series["runs"].append(name)
+                series["values"].append(center)
+                series["errors"].append(None if np.isnan(error) else error)
+        state["ingested_runs"].append(name)
+        new_names.append(name)
+        last_name = name
+    return new_names
+
+def update_change_points(state, penalty_factor=2.0, min_shift=0.05, min_segment=2):
+    """
+    只在每个序列最后一个已确认变点之后的尾段上重新运行 PELT，因此新运行的代价与历史长度无关。
+    一个变点在其后至少有 min_segment 个运行时才被确认，之后尾段从该变点开始。
+    返回本次新确认的变点列表 [(series_key, index)]。
+    """
+    newly_confirmed = []
+    for key, series in state["series"].items():
+        start = series["segment_start"]
+        tail = series["values"][start:]
+        if len(tail) < 2 * min_segment:
+            continue
+        sigma = noise_sigma(tail, series["errors"][start:])
+        normalized = np.asarray(tail) / sigma
+        penalty = penalty_factor * math.log(len(tail)) + 1.0
+        for relative_cp in pelt(normalized, penalty, min_segment=min_segment):
+            absolute_cp = start + relative_cp
+            before = float(np.median(series["values"][series["segment_start"]:absolute_cp]))
+            after_values = series["values"][absolute_cp:]
+            after = float(np.median(after_values[:max(min_segment, 1)]))
+            if abs(math.exp(after - before) - 1.0) < min_shift:
+                continue # 统计上显著但幅度太小，不值得报告
+            series["change_points"].append(absolute_cp)
+            series["segment_start"] = absolute_cp
+            newly_confirmed.append((key, absolute_cp))
+    return newly_confirmed
+
+def describe_change_point(state, key, index):
+    """
+    返回一个变点的描述字典：所在运行、前后中位时间、相对变化以及元数据归因。
+    """
+    series = state["series"][key]
+    previous_cps = [cp for cp in series["change_points"] if cp < index]
+    segment_begin = previous_cps[-1] if previous_cps else 0
+    next_cps = [cp for cp in series["change_points"] if cp > index]
+    segment_end = next_cps[0] if next_cps else len(series["values"])
+    before = math.exp(float(np.median(series["values"][segment_begin:index])))
+    after = math.exp(float(np.median(series["values"][index:segment_end])))
+    run_before = series["runs"][index - 1]
+    run_after = series["runs"][index]
+    changes = attribute_change(state["run_metadata"].get(run_before, {}),
+                               state["run_metadata"].get(run_after, {}))
+    return {
+        "series": key, "run": run_after, "previous_run": run_before,
+        "before_ms": before, "after_ms": after, "rel_change": after / before - 1.0,
+        "attribution": changes,
+    }
@@ -0,0 +1,171 @@
+# dashboard_builder.py
+import base64
+import gzip
+import json
+import os
+import time
+
+import numpy as np
+
+from run_loader import PER_ELEMENT_COUNTERS, read_run_metadata
+from perf_parser import load_grouped_perf_stats
+from perf_analyzer import calculate_metrics, METRIC_PRINT_ORDER
+from wall_time_parser import collect_wall_time_samples
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dashboard_template.html")
+DATA_PLACEHOLDER = "/*__DASHBOARD_DATA__*/"
+
+# 过滤维度 (顺序即页面中的顺序)
+DIMENSIONS = ["run", "machine", "generator", "datatype", "algo", "size", "threads"]
+
+# 每个配置的 wall time 聚合指标 (排在指标列表最前面)
+WALL_METRICS = ["Wall Time Median (ms)", "Wall Time Mean (ms)", "Wall Time Min (ms)", "Wall Time Max (ms)",
+                "Wall Time CV (%)"]
+# 越高越好的 perf 指标，其余默认越低越好
+HIGHER_IS_BETTER = {"IPC (Instructions Per Cycle)", "L1 Load Hit Rate", "L2 Load Hit Rate (for loads reaching L2)",
+                    "L3 Load Hit Rate (for loads reaching L3)"}
+# 页面默认勾选的指标
+DEFAULT_METRICS = ["Wall Time Median (ms)", "IPC (Instructions Per Cycle)", "Page Faults / element",
+                   "dTLB Load Misses / element"]
+
+def _round_sig(value, digits=6):
+    """
+    保留有效数字以便压缩 (JSON 中的长尾小数几乎不可压缩)。
+    """
+    if value is None or not np.isfinite(value):
+        return None
+    if value == 0:
+        return 0
+    return float(f"{value:.{digits}g}")
+
+def _numeric(value):
+    if isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool):
+        value = float(value)
+        return value if np.isfinite(value) else None
+    return None
+
+def collect_run_rows(run_dir, max_samples_per_row=0):
+    """
+    读取一个运行目录，返回 (rows, samples)。
+    rows: [{"dims": {dim: value}, "metrics": {name: value}}]，每个 (gen, type, algo) 一行；
+    samples: [(row 在本运行中的下标, milli)]。
+    max_samples_per_row > 0 时按等间隔抽取，限制每行嵌入的原始样本数量。
+    """
+    run_name = os.path.basename(os.path.normpath(run_dir))
+    metadata = read_run_metadata(run_dir)
+    wall_samples = collect_wall_time_samples(os.path.join(run_dir, "results_stdout"))
+
+    perf_data = {}
+    perf_stats_dir = os.path.join(run_dir, "perf_stats")
+    if os.path.isdir(perf_stats_dir):
+        perf_data, _ = load_grouped_perf_stats(perf_stats_dir)
+
+    rows = []
+    samples = []
+    for (generator, data_type), algos in sorted(wall_samples.items()):
+        for algo, info in sorted(algos.items()):
+            milli = np.asarray(info["milli"], dtype=np.float64)
+            mean = float(np.mean(milli))
+            metrics = {
+                "Wall Time Median (ms)": float(np.median(milli)),
+                "Wall Time Mean (ms)": mean,
+                "Wall Time Min (ms)": float(np.min(milli)),
+                "Wall Time Max (ms)": float(np.max(milli)),
+                "Wall Time CV (%)": float(np.std(milli) / mean * 100) if len(milli) > 1 and mean > 0 else None,
+            }
+            merged_stats = perf_data.get((generator, data_type), {}).get(algo)
+            if merged_stats:
+                perf_metrics = calculate_metrics(merged_stats)
+                for name in METRIC_PRINT_ORDER:
+                    metrics[name] = _numeric(perf_metrics.get(name))
+                # 按 (size * 被 perf 记录的运行次数) 归一化，便于比较不同大小的配置
+                elements = float(info["size"]) * max(1, len(milli))
+                for name in PER_ELEMENT_COUNTERS:
+                    value = _numeric(perf_metrics.get(name))
+                    if value is not None and elements > 0:
+                        metrics[f"{name} / element"] = value / elements
+
+            row_index = len(rows)
+            rows.append({
+                "dims": {
+                    "run": run_name,
+                    "machine": info["machine"] or metadata.get("machine", ""),
+                    "generator": generator, "datatype": data_type,
+                    "algo": algo.replace("benchmark_", ""),
+                    "size": str(info["size"]), "threads": str(info["threads"]),
+                },
+                "metrics": metrics,
+            })
+            indices = np.arange(len(milli))
+            if max_samples_per_row > 0 and len(milli) > max_samples_per_row:
+                indices = np.unique(np.linspace(0, len(milli) - 1, max_samples_per_row).astype(np.int64))
+            samples.extend((row_index, float(milli[i])) for i in indices)
+    return rows, samples
+
+def _sort_dim_values(dim, values):
+    if dim in ("size", "threads"):
+        return sorted(values, key=lambda v: (int(v) if v.isdigit() else float("inf"), v))
+    return sorted(values)
+
+def build_dashboard_data(run_dirs, max_samples_per_row=0):
+    """
+    把多个运行目录整合为列式、字典编码的数据结构 (字符串维度只存一次，行里只存下标)。
+    """
+    all_rows = []
+    all_samples = []
+    for run_dir in run_dirs:
+        rows, samples = collect_run_rows(run_dir, max_samples_per_row)
+        offset = len(all_rows)
+        all_rows.extend(rows)
+        all_samples.extend((row + offset, milli) for row, milli in samples)
+        print(f"  {os.path.basename(os.path.normpath(run_dir))}: {len(rows)} configuration(s), {len(samples)} sample(s)")
+
+    dims = {}
+    row_columns = {}
+    for dim in DIMENSIONS:
+        values = _sort_dim_values(dim, {row["dims"][dim] for row in all_rows})
+        index = {value: i for i, value in enumerate(values)}
+        dims[dim] = values
+        row_columns[dim] = [index[row["dims"][dim]] for row in all_rows]
+
+    present = {name for row in all_rows for name, value in row["metrics"].items() if value is not None}
+    metric_names = [name for name in WALL_METRICS if name in present]
+    metric_names += [name for name in METRIC_PRINT_ORDER if name in present and name not in metric_names]
+    metric_names += sorted(name for name in present if name not in metric_names)
+
+    metrics = {
+        "names": metric_names,
+        "lower_is_better": [name not in HIGHER_IS_BETTER for name in metric_names],
+        "default": [name for name in DEFAULT_METRICS if name in present],
+        "values": [[_round_sig(row["metrics"].get(name)) for row in all_rows] for name in metric_names],
+    }
+    samples = {
+        "row": [s[0] for s in all_samples],
+        "milli": [_round_sig(s[1]) for s in all_samples],
+    }
+    return {
+        "generated": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "dims": dims, "rows": row_columns, "metrics": metrics, "samples": samples,
+    }
+
+def encode_dashboard_data(data):
+    """
+    JSON -> gzip -> base64。页面中用浏览器自带的 DecompressionStream 解压，不依赖任何外部库。
+    """
+    raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    compressed = gzip.compress(raw, compresslevel=9, mtime=0) # mtime=0 使相同数据得到相同输出
+    return base64.b64encode(compressed).decode("ascii"), len(raw), len(compressed)
+
+def write_dashboard(data, output_path):
+    """
+    把编码后的数据嵌入 HTML 模板并写出单个自包含文件。返回 (原始字节数, 压缩后字节数)。
+    """
+    with open(TEMPLATE_PATH, 'r', encoding='utf-8') as f:
+        template = f.read()
+    if DATA_PLACEHOLDER not in template:
+        raise ValueError(f"Dashboard template {TEMPLATE_PATH} does not contain the data placeholder.")
+    encoded, raw_size, compressed_size = encode_dashboard_data(data)
+    html = template.replace(DATA_PLACEHOLDER, json.dumps(encoded))
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    return raw_size, compressed_size
@@ -0,0 +1,64 @@
+# energy_metrics.py
+# 由 RESULT 行中的 pkgjoules / dramjoules (src/energy_counter.hpp, MEASURE_ENERGY=true) 计算每个算法的能耗指标，
+# 指标名与 analyze_main.py 中 "Average Wall Time (ms)" 等指标并列，直接放进报告和对比图。
+import statistics
+
+from wall_time_parser import collect_wall_time_samples
+
+PACKAGE_ENERGY_KEY = "Package Energy (J)"
+DRAM_ENERGY_KEY = "DRAM Energy (J)"
+ENERGY_PER_ELEMENT_KEY = "Energy per Element (nJ)"
+AVERAGE_POWER_KEY = "Average Power (W)"
+EDP_KEY = "Energy-Delay Product (J*s)"
+
+# 报告中的打印顺序
+ENERGY_METRIC_KEYS = [PACKAGE_ENERGY_KEY, DRAM_ENERGY_KEY, ENERGY_PER_ELEMENT_KEY, AVERAGE_POWER_KEY, EDP_KEY]
+
+def run_energies(info):
+    """
+    每次运行的总能耗 (package + DRAM，单位 J) 与对应的 milli。没有 pkgjoules 的运行被跳过；
+    没有 DRAM 域的机器只计 package。
+    """
+    pairs = []
+    for milli, package, dram in zip(info["milli"], info.get("pkgjoules") or [], info.get("dramjoules") or []):
+        if package is None:
+            continue
+        pairs.append((package + (dram or 0.0), milli))
+    return pairs
+
+def energy_metrics(info):
+    """
+    对一个配置的样本 (collect_wall_time_samples 的一项) 计算能耗指标，没有能耗数据时返回空字典。
+    与 Average Wall Time (ms) 一样对去掉 run=0 之后的运行取平均。EDP 取每次运行 能耗 * 耗时 的平均值，
+    越小说明这个算法在 "又快又省" 上越好；它比单独的焦耳数更偏向快的算法。
+    """
+    pairs = run_energies(info)
+    if not pairs:
+        return {}
+    packages = [p for p in info.get("pkgjoules") or [] if p is not None]
+    drams = [d for d in info.get("dramjoules") or [] if d is not None]
+    energy = statistics.mean(e for e, _ in pairs)
+    seconds = statistics.mean(m for _, m in pairs) / 1000.0
+    metrics = {
+        PACKAGE_ENERGY_KEY: statistics.mean(packages),
+        EDP_KEY: statistics.mean(e * m / 1000.0 for e, m in pairs),
+    }
+    if drams:
+        metrics[DRAM_ENERGY_KEY] = statistics.mean(drams)
+    if info.get("size"):
+        metrics[ENERGY_PER_ELEMENT_KEY] = energy / info["size"] * 1e9
+    if seconds > 0:
+        metrics[AVERAGE_POWER_KEY] = energy / seconds
+    return metrics
+
+def calculate_energy_metrics(results_stdout_dir):
+    """
+    返回字典: {(gen, type): {algo_name: {指标名: 值}}}，只包含有能耗数据的配置。
+    """
+    results = {}
+    for config_key, algos in collect_wall_time_samples(results_stdout_dir).items():
+        for algo_name, info in algos.items():
+            metrics = energy_metrics(info)
+            if metrics:
+                results.setdefault(config_key, {})[algo_name] = metrics
+    return results
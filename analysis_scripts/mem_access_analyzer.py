@@ -0,0 +1,223 @@
+# mem_access_analyzer.py
+import os
+
+import numpy as np
+
+from mem_access_parser import MEMORY_LEVELS
+
+# 地址归属的类别，下标即 classify_samples 返回的编码
+MAPPING_CLASSES = ["input", "scratch", "arena", "file", "other"]
+MAPPING_CLASS_TITLES = {
+    "input": "Input array",
+    "scratch": "Scratch (large anonymous mmaps)",
+    "arena": "Allocator arenas (small anonymous mmaps)",
+    "file": "Binaries / libraries / files",
+    "other": "Other (brk heap, stacks, unmapped)",
+}
+CLASS_INPUT = MAPPING_CLASSES.index("input")
+CLASS_OTHER = MAPPING_CLASSES.index("other")
+
+# 延迟直方图的公共分箱 (周期，对数刻度)，所有算法使用同一组边界以便直接对比
+LATENCY_BIN_EDGES = np.geomspace(1, 1 << 16, 65)
+
+DRAM_LEVELS = [MEMORY_LEVELS.index(name) for name in ("Local DRAM", "Remote DRAM", "Remote Cache", "PMEM")]
+
+def mapping_class(path, size, scratch_threshold):
+    """
+    按 perf 记录的映射路径和大小分类：匿名映射中超过 scratch_threshold 字节的视为算法的临时缓冲区，
+    其余 (例如 glibc 每个线程 64 MiB 的 arena) 视为分配器 arena。
+    """
+    if path.startswith("//anon") or path.startswith("[anon") or not path:
+        return MAPPING_CLASSES.index("scratch" if size > scratch_threshold else "arena")
+    if path.startswith("["): # [heap] / [stack] / [vdso] 等伪映射
+        return CLASS_OTHER
+    return MAPPING_CLASSES.index("file")
+
+def assign_sort_windows(time_ns, windows):
+    """
+    把每个样本归到包含它的那次排序 (BUFFER 行中的 [sortbeginns, sortendns])。
+    返回 (window_index, progress)：不在任何排序窗口内的样本 window_index 为 -1，progress 为 NaN；
+    progress 是样本在这次排序中的相对时间 (0..1)。
+    """
+    window_index = np.full(len(time_ns), -1, dtype=np.int64)
+    progress = np.full(len(time_ns), np.nan)
+    if len(windows["sort_begin_ns"]) == 0 or len(time_ns) == 0:
+        return window_index, progress
+    candidate = np.searchsorted(windows["sort_begin_ns"], time_ns, side="right") - 1
+    valid = candidate >= 0
+    candidate_clipped = np.clip(candidate, 0, None)
+    valid &= time_ns <= windows["sort_end_ns"][candidate_clipped]
+    window_index[valid] = candidate[valid]
+    begin = windows["sort_begin_ns"][candidate_clipped]
+    duration = np.maximum(windows["sort_end_ns"][candidate_clipped] - begin, 1)
+    progress[valid] = ((time_ns - begin) / duration)[valid]
+    return window_index, progress
+
+def classify_samples(samples, windows, window_index, scratch_threshold):
+    """
+    向量化地把每个样本的数据地址归到 MAPPING_CLASSES：
+    先按 perf 的 MMAP 事件 (时间顺序，后出现的映射覆盖先前的同一地址范围)，
+    再用 BUFFER 行把落在当次排序输入数组内的地址标为 input。
+    样本按地址排序一次，每个映射只用 searchsorted 取出自己地址范围内的样本，避免 样本数 x 映射数 的比较。
+    """
+    addr = samples["addr"]
+    time_ns = samples["time_ns"]
+    classes = np.full(len(addr), CLASS_OTHER, dtype=np.int8)
+    if len(addr) == 0:
+        return classes
+
+    order = np.argsort(addr, kind="stable")
+    sorted_addr = addr[order]
+    for map_time, start, size, path in sorted(samples["mappings"]):
+        lo = np.searchsorted(sorted_addr, np.uint64(start), side="left")
+        hi = np.searchsorted(sorted_addr, np.uint64(start + size), side="left")
+        if lo == hi:
+            continue
+        indices = order[lo:hi]
+        if map_time >= 0:
+            indices = indices[time_ns[indices] >= map_time]
+        classes[indices] = mapping_class(path, size, scratch_threshold)
+
+    in_window = window_index >= 0
+    if np.any(in_window):
+        begin = windows["begin"][window_index[in_window]]
+        end = begin + windows["bytes"][window_index[in_window]]
+        sample_addr = addr[in_window]
+        is_input = (sample_addr >= begin) & (sample_addr < end)
+        subset = classes[in_window]
+        subset[is_input] = CLASS_INPUT
+        classes[in_window] = subset
+    return classes
+
+def input_heatmap(samples, windows, window_index, progress, classes, page_size, page_rows, time_bins):
+    """
+    输入数组的访问热图：行 = 输入数组内的页 (按偏移等分为 page_rows 组)，列 = 排序进度 (time_bins 等分)。
+    同时返回每页的样本数，用于统计热点页。
+    """
+    mask = (classes == CLASS_INPUT) & (window_index >= 0)
+    if not np.any(mask):
+        return np.zeros((page_rows, time_bins), dtype=np.int64), np.zeros(0, dtype=np.int64)
+    windows_of_samples = window_index[mask]
+    offset = samples["addr"][mask] - windows["begin"][windows_of_samples]
+    pages = (offset // np.uint64(page_size)).astype(np.int64)
+    num_pages = int((int(windows["bytes"].max()) + page_size - 1) // page_size)
+    rows = np.minimum(pages * page_rows // max(num_pages, 1), page_rows - 1)
+    cols = np.minimum((progress[mask] * time_bins).astype(np.int64), time_bins - 1)
+    heatmap = np.bincount(rows * time_bins + cols, minlength=page_rows * time_bins).reshape(page_rows, time_bins)
+    page_counts = np.bincount(pages, minlength=num_pages)
+    return heatmap, page_counts
+
+def other_heatmap(samples, progress, classes, page_size, page_rows, time_bins):
+    """
+    输入数组以外的访问热图。地址空间非常稀疏，所以只保留被采样到的页，按 (类别, 地址) 排序后压缩编号，
+    同一类别的页在图中是连续的一段。返回 (heatmap, 每个类别在行方向上的 [起始, 结束) 比例)。
+    """
+    mask = (classes != CLASS_INPUT) & ~np.isnan(progress)
+    if not np.any(mask):
+        return np.zeros((page_rows, time_bins), dtype=np.int64), {}
+    page = samples["addr"][mask] // np.uint64(page_size)
+    sample_class = classes[mask].astype(np.uint64)
+    # 类别放在高位，排序后同一类别的页连续
+    key = (sample_class << np.uint64(56)) | (page & np.uint64((1 << 56) - 1))
+    unique_keys, rank = np.unique(key, return_inverse=True)
+    num_pages = len(unique_keys)
+    rows = np.minimum(rank.astype(np.int64) * page_rows // num_pages, page_rows - 1)
+    cols = np.minimum((progress[mask] * time_bins).astype(np.int64), time_bins - 1)
+    heatmap = np.bincount(rows * time_bins + cols, minlength=page_rows * time_bins).reshape(page_rows, time_bins)
+
+    page_class = (unique_keys >> np.uint64(56)).astype(np.int64)
+    bands = {}
+    for class_id in np.unique(page_class):
+        positions = np.nonzero(page_class == class_id)[0]
+        bands[MAPPING_CLASSES[class_id]] = (positions[0] / num_pages, (positions[-1] + 1) / num_pages)
+    return heatmap, bands
+
+def latency_histogram(weights):
+    """
+    在 LATENCY_BIN_EDGES 上统计加载延迟 (周期)，超出范围的并入两端。
+    """
+    if len(weights) == 0:
+        return np.zeros(len(LATENCY_BIN_EDGES) - 1, dtype=np.int64)
+    clipped = np.clip(weights, LATENCY_BIN_EDGES[0], LATENCY_BIN_EDGES[-1] - 1)
+    return np.histogram(clipped, bins=LATENCY_BIN_EDGES)[0]
+
+def class_summaries(samples, classes, page_size, page_counts=None):
+    """
+    每个类别的汇总：样本数、占比、加载延迟之和的占比 (近似该类别造成的内存停顿)、延迟分位数、
+    来自 DRAM 的比例、各层级占比、被采样到的不同页数和最热 1% 页的样本占比。
+    """
+    total = len(classes)
+    weights = samples["weight"]
+    is_load = weights > 0
+    total_latency = float(weights[is_load].sum()) if np.any(is_load) else 0.0
+    summaries = {}
+    for class_id, name in enumerate(MAPPING_CLASSES):
+        mask = classes == class_id
+        count = int(mask.sum())
+        if count == 0:
+            continue
+        loads = mask & is_load
+        load_weights = weights[loads]
+        levels = np.bincount(samples["level"][mask].astype(np.int64), minlength=len(MEMORY_LEVELS))
+        if name == "input" and page_counts is not None and len(page_counts):
+            per_page = page_counts[page_counts > 0]
+        else:
+            per_page = np.unique(samples["addr"][mask] // np.uint64(page_size), return_counts=True)[1]
+        per_page = np.sort(per_page)[::-1]
+        hot = max(1, len(per_page) // 100)
+        summaries[name] = {
+            "samples": count,
+            "share": count / total if total else 0.0,
+            "loads": int(loads.sum()),
+            "latency_share": float(load_weights.sum()) / total_latency if total_latency > 0 else 0.0,
+            "latency_p50": float(np.percentile(load_weights, 50)) if len(load_weights) else None,
+            "latency_p90": float(np.percentile(load_weights, 90)) if len(load_weights) else None,
+            "latency_p99": float(np.percentile(load_weights, 99)) if len(load_weights) else None,
+            "dram_share": float(levels[DRAM_LEVELS].sum()) / count,
+            "levels": {MEMORY_LEVELS[i]: int(c) for i, c in enumerate(levels) if c},
+            "pages": int(len(per_page)),
+            "hot_page_share": float(per_page[:hot].sum()) / count,
+            "histogram": latency_histogram(load_weights),
+        }
+    return summaries
+
+def analyze_mem_samples(samples, windows, page_size=4096, page_rows=256, time_bins=100,
+                        scratch_threshold=64 << 20):
+    """
+    对一个配置的全部样本做分类、热图与汇总。没有 BUFFER 行时退化为按整个采样时间归一化的进度，且没有 input 类别。
+    """
+    window_index, progress = assign_sort_windows(samples["time_ns"], windows)
+    if len(windows["sort_begin_ns"]) == 0 and len(samples["time_ns"]):
+        start, end = samples["time_ns"].min(), samples["time_ns"].max()
+        progress = (samples["time_ns"] - start) / max(end - start, 1)
+    classes = classify_samples(samples, windows, window_index, scratch_threshold)
+    input_map, page_counts = input_heatmap(samples, windows, window_index, progress, classes,
+                                           page_size, page_rows, time_bins)
+    other_map, bands = other_heatmap(samples, progress, classes, page_size, page_rows, time_bins)
+    return {
+        "total": int(len(classes)),
+        "outside_windows": int(np.sum(window_index < 0)) if len(windows["sort_begin_ns"]) else 0,
+        "runs": int(len(np.unique(windows["run"]))),
+        "input_bytes": int(windows["bytes"].max()) if len(windows["bytes"]) else 0,
+        "classes": class_summaries(samples, classes, page_size, page_counts),
+        "all_histogram": latency_histogram(samples["weight"][samples["weight"] > 0]),
+        "input_heatmap": input_map,
+        "other_heatmap": other_map,
+        "other_bands": bands,
+    }
+
+def format_bytes(value):
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if abs(value) < 1024 or unit == "TiB":
+            return f"{value:.1f} {unit}" if unit != "B" else f"{int(value)} B"
+        value /= 1024.0
+    return f"{value} B"
+
+def stdout_for_recording(record_path, algo, generator, data_type):
+    """
+    record_mem_access.sh 把 C++ stdout 写到 <run>/results_stdout/<config>_record_mem_stdout.txt，
+    perf.data 在 <run>/perf_record_data/ 下。找不到时返回 None。
+    """
+    run_dir = os.path.dirname(os.path.dirname(os.path.abspath(record_path)))
+    candidate = os.path.join(run_dir, "results_stdout", f"{algo}_{generator}_{data_type}_record_mem_stdout.txt")
+    return candidate if os.path.isfile(candidate) else None
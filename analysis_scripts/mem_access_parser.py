@@ -0,0 +1,248 @@
+# mem_access_parser.py
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# record_mem_access.sh 的输出用下面的命令导出；每个样本一行，没有调用栈:
+#   "  <tid> <time>: <event>: <addr> <data_src> |OP LOAD|LVL L3 hit|...| <weight>"
+# --show-mmap-events 额外输出 PERF_RECORD_MMAP/MMAP2 行 (-d 时也包括匿名映射)，用于把地址归属到映射
+MEM_SCRIPT_FIELDS = "tid,time,event,addr,data_src,weight"
+MEM_SCRIPT_EXTRA_ARGS = ["--ns", "--show-mmap-events"]
+
+# {algo}_{gen}_{type}_mem_access.{data|script|txt}
+MEM_RECORD_FILENAME_PATTERN = re.compile(r'^(benchmark_.*?)_([^_]+(?:_[^_]+)?)_([^_]+)_mem_access\.(data|script|txt)$')
+
+# "PERF_RECORD_MMAP2 1234/1234: [0x7f0000000000(0x40000000) @ 0 00:00 0 0]: rw-p //anon"
+MMAP_PATTERN = re.compile(r'PERF_RECORD_MMAP2?\s+\d+/\d+:\s+\[0x([0-9a-fA-F]+)\(0x([0-9a-fA-F]+)\)[^\]]*\]:\s+\S+\s+(.*?)\s*$')
+TIME_PATTERN = re.compile(r'^(\d+)\.(\d+):$')
+LEVEL_FIELD_PATTERN = re.compile(r'\|LVL(?:NUM)?\s+([^|]*)')
+
+# 数据来源 (data_src 的 LVL 字段) 归并后的层级，下标即样本中保存的编码
+MEMORY_LEVELS = ["L1", "LFB", "L2", "L3", "Local DRAM", "Remote Cache", "Remote DRAM", "PMEM", "Other"]
+LEVEL_OTHER = MEMORY_LEVELS.index("Other")
+
+# BUFFER 行 (REPORT_BUFFER_ADDRESSES=true 时由 benchmark.hpp 在每个 RESULT 行之后输出)
+BUFFER_LINE_PREFIX = "BUFFER"
+
+def memory_level(decoded):
+    """
+    把 perf 解码后的 data_src 文本 ("|OP LOAD|LVL Local RAM hit|SNP ...") 归并为 MEMORY_LEVELS 中的编码。
+    不同内核版本的写法略有不同 (LVL / LVLNUM)，按从远到近的顺序匹配关键字。
+    """
+    text = " ".join(LEVEL_FIELD_PATTERN.findall(decoded))
+    if not text:
+        return LEVEL_OTHER
+    rules = [("Remote RAM", "Remote DRAM"), ("Remote DRAM", "Remote DRAM"), ("Remote Cache", "Remote Cache"),
+             ("PMEM", "PMEM"), ("RAM", "Local DRAM"), ("LFB", "LFB"), ("MAB", "LFB"),
+             ("L3", "L3"), ("L2", "L2"), ("L1", "L1")]
+    for keyword, level in rules:
+        if keyword in text:
+            return MEMORY_LEVELS.index(level)
+    return LEVEL_OTHER
+
+def parse_time_ns(token):
+    """
+    "12345.678901234:" -> 纳秒整数 (小数位不足 9 位时补零，兼容不带 --ns 导出的文本)。
+    """
+    match = TIME_PATTERN.match(token)
+    if not match:
+        return None
+    return int(match.group(1)) * 1_000_000_000 + int(match.group(2)[:9].ljust(9, "0"))
+
+class MemSampleTable:
+    """
+    用 array 累积样本 (每个样本只占几十个字节)，最后一次性转成 NumPy 数组。
+    """
+    def __init__(self):
+        self.time_ns = array('q')
+        self.addr = array('Q')
+        self.weight = array('q')
+        self.level = array('b')
+        self.event = array('h')
+        self.events = []
+        self.event_ids = {}
+        self.mappings = [] # [(time_ns, start, size, path)]
+        self._level_cache = {}
+
+    def add_line(self, line):
+        if "PERF_RECORD_MMAP" in line:
+            match = MMAP_PATTERN.search(line)
+            if match:
+                time_ns = -1
+                for token in line.split():
+                    value = parse_time_ns(token)
+                    if value is not None:
+                        time_ns = value
+                        break
+                self.mappings.append((time_ns, int(match.group(1), 16), int(match.group(2), 16), match.group(3)))
+            return
+        if "PERF_RECORD_" in line:
+            return
+        head, bar, rest = line.partition("|")
+        tokens = head.split()
+        # tid time: event: addr [data_src]
+        time_index = next((i for i, token in enumerate(tokens) if token.endswith(":")), None)
+        if time_index is None or time_index + 2 >= len(tokens):
+            return
+        time_ns = parse_time_ns(tokens[time_index])
+        event = tokens[time_index + 1]
+        if time_ns is None or not event.endswith(":"):
+            return
+        try:
+            addr = int(tokens[time_index + 2], 16)
+        except ValueError:
+            return
+        # 权重 (延迟) 是行尾的最后一个整数；data_src 的解码文本 ("|OP LOAD|...|BLK  N/A") 在它之前
+        tail = rest if bar else " ".join(tokens[time_index + 3:])
+        decoded, _, last = tail.rstrip().rpartition(" ")
+        weight = int(last) if last.isdigit() else 0
+        level = LEVEL_OTHER
+        if bar:
+            decoded = decoded if last.isdigit() else tail
+            level = self._level_cache.get(decoded)
+            if level is None:
+                level = self._level_cache.setdefault(decoded, memory_level("|" + decoded))
+        event_id = self.event_ids.get(event)
+        if event_id is None:
+            event_id = self.event_ids.setdefault(event, len(self.events))
+            self.events.append(event[:-1])
+        self.time_ns.append(time_ns)
+        self.addr.append(addr)
+        self.weight.append(weight)
+        self.level.append(level)
+        self.event.append(event_id)
+
+    def finish(self):
+        return {
+            "time_ns": np.frombuffer(self.time_ns, dtype=np.int64).copy(),
+            "addr": np.frombuffer(self.addr, dtype=np.uint64).copy(),
+            "weight": np.frombuffer(self.weight, dtype=np.int64).copy(),
+            "level": np.frombuffer(self.level, dtype=np.int8).copy(),
+            "event": np.frombuffer(self.event, dtype=np.int16).copy(),
+            "events": self.events,
+            "mappings": self.mappings,
+        }
+
+def _text_lines(path, start, end):
+    """
+    返回起始于 [start, end) 字节区间内的所有行 (每行一个样本，所以按行对齐即可)。
+    """
+    with open(path, 'rb') as f:
+        position = start
+        if start > 0:
+            f.seek(start - 1)
+            if f.read(1) != b"\n":
+                position += len(f.readline())
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            yield line.decode('utf-8', errors='replace')
+
+def _parse_text_chunk(path, start, end):
+    table = MemSampleTable()
+    for line in _text_lines(path, start, end):
+        table.add_line(line)
+    return table.finish()
+
+def _parse_perf_data_chunk(perf_binary, path, chunk_index, num_chunks):
+    command = [perf_binary, "script", "-i", path, "-F", MEM_SCRIPT_FIELDS] + MEM_SCRIPT_EXTRA_ARGS
+    if num_chunks > 1:
+        command += ["--time", f"{100.0 / num_chunks:g}%/{chunk_index + 1}"]
+    table = MemSampleTable()
+    with tempfile.TemporaryFile(mode='w+') as stderr_file: # stderr 不能用管道，否则写满后 perf 会阻塞
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr_file,
+                                   text=True, errors="replace", bufsize=1 << 20)
+        for line in process.stdout:
+            table.add_line(line)
+        process.wait()
+        if process.returncode != 0:
+            stderr_file.seek(0)
+            raise RuntimeError(f"'{' '.join(command)}' failed with exit code {process.returncode}: "
+                               f"{stderr_file.read().strip()[:500]}")
+    return table.finish()
+
+def merge_sample_parts(parts):
+    """
+    合并各分块的结果：事件重新编号，样本按时间排序，映射去重 (perf script 的 --time 不一定过滤映射事件)。
+    """
+    event_ids = {}
+    columns = {name: [] for name in ("time_ns", "addr", "weight", "level", "event")}
+    mappings = set()
+    for part in parts:
+        remap = np.array([event_ids.setdefault(name, len(event_ids)) for name in part["events"]] or [0], dtype=np.int16)
+        for name in ("time_ns", "addr", "weight", "level"):
+            columns[name].append(part[name])
+        columns["event"].append(remap[part["event"]] if len(part["event"]) else part["event"])
+        mappings.update(part["mappings"])
+    samples = {name: np.concatenate(values) if values else np.zeros(0) for name, values in columns.items()}
+    order = np.argsort(samples["time_ns"], kind="stable")
+    samples = {name: values[order] for name, values in samples.items()}
+    samples["events"] = list(event_ids)
+    samples["mappings"] = sorted(mappings)
+    return samples
+
+def _call(task):
+    fn, args = task
+    return fn(*args)
+
+def parse_mem_recording(path, chunks=None, workers=None, perf_binary="perf"):
+    """
+    解析 record_mem_access.sh 的 perf.data (通过 perf script，按时间片) 或导出的文本 (按字节区间)，分块并行处理。
+    返回 merge_sample_parts 的结果: 各列为 NumPy 数组，另有 events 与 mappings。
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = chunks or workers
+    if not path.endswith(".data"):
+        size = os.path.getsize(path)
+        chunks = max(1, min(chunks, size // (1 << 20) + 1))
+        bounds = [size * i // chunks for i in range(chunks + 1)]
+        tasks = [(_parse_text_chunk, (path, bounds[i], bounds[i + 1])) for i in range(chunks)]
+    else:
+        if shutil.which(perf_binary) is None:
+            raise RuntimeError(f"'{perf_binary}' not found; cannot read {path}. Run 'perf script -F {MEM_SCRIPT_FIELDS} "
+                               f"{' '.join(MEM_SCRIPT_EXTRA_ARGS)} -i {path} > file.script' elsewhere and pass the text file.")
+        tasks = [(_parse_perf_data_chunk, (perf_binary, path, i, chunks)) for i in range(chunks)]
+
+    if len(tasks) == 1 or workers <= 1:
+        parts = [fn(*args) for fn, args in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            parts = list(pool.map(_call, tasks))
+    return merge_sample_parts(parts)
+
+def read_buffer_windows(stdout_path):
+    """
+    读取 C++ stdout 中的 BUFFER 行，返回按排序开始时间排好的数组字典:
+    run, begin, bytes, sort_begin_ns, sort_end_ns。stdout_path 为 None 或没有 BUFFER 行时各数组为空。
+    """
+    rows = []
+    if stdout_path is not None:
+        with open(stdout_path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                if not line.startswith(BUFFER_LINE_PREFIX):
+                    continue
+                fields = dict(token.split("=", 1) for token in line.rstrip("\n").split("\t") if "=" in token)
+                if fields.get("name", "input") != "input":
+                    continue
+                try:
+                    rows.append((int(fields["run"]), int(fields["begin"], 16), int(fields["bytes"]),
+                                 int(fields["sortbeginns"]), int(fields["sortendns"])))
+                except (KeyError, ValueError):
+                    continue
+    rows.sort(key=lambda row: row[3])
+    columns = list(zip(*rows)) if rows else [()] * 5
+    return {
+        "run": np.asarray(columns[0], dtype=np.int64),
+        "begin": np.asarray(columns[1], dtype=np.uint64),
+        "bytes": np.asarray(columns[2], dtype=np.uint64),
+        "sort_begin_ns": np.asarray(columns[3], dtype=np.int64),
+        "sort_end_ns": np.asarray(columns[4], dtype=np.int64),
+    }
@@ -72,6 +72,82 @@ def parse_time_mem_report(filepath):
 
     return metrics
 
+# run_scripts/proc_sampler.py 写出的时间序列 (*_mem_timeline.npz) 中的列
+TIMELINE_COLUMNS = ["t_us", "rss_kb", "anon_kb", "file_kb", "hwm_kb", "pss_kb", "anon_huge_kb",
+                    "minflt", "majflt", "utime_ticks", "stime_ticks", "threads"]
+
+def load_memory_timeline(filepath):
+    """
+    读取 proc_sampler.py 的 .npz 输出，返回 {列名: numpy 数组}，另含 run_id / run_size / run_end_us (每个 RESULT 行
+    被看到的时间)。文件不存在或格式不对时返回 None。
+    """
+    try:
+        with np.load(filepath) as data:
+            timeline = {name: data[name] for name in data.files}
+    except (OSError, ValueError) as e:
+        print(f"Error reading memory timeline {filepath}: {e}", file=sys.stderr)
+        return None
+    missing = [name for name in TIMELINE_COLUMNS + ["run_id", "run_end_us"] if name not in timeline]
+    if missing:
+        print(f"Warning: Memory timeline {filepath} lacks columns {missing}, skipped.", file=sys.stderr)
+        return None
+    return timeline
+
+def summarize_timeline_runs(timeline):
+    """
+    按 RESULT 行的时间把时间序列切成内部运行 (第 r 次运行 = 上一个 RESULT 到本次 RESULT 之间，包含数据生成)。
+    与其他分析一致，run=0 (预热) 不计入。返回每次运行一行的字典列表:
+    run, duration_s, minor_faults, major_faults, fault_rate (次/秒), start_rss_kb, peak_rss_kb,
+    peak_extra_bytes_per_element (峰值 RSS 相对运行开始时 RSS 的增量 / 元素数)。
+    """
+    t_us = timeline["t_us"]
+    if len(t_us) == 0:
+        return []
+    rows = []
+    previous_end = 0
+    for run_id, end_us, size in zip(timeline["run_id"], timeline["run_end_us"],
+                                    timeline.get("run_size", np.zeros(len(timeline["run_id"]), np.int64))):
+        lo = np.searchsorted(t_us, previous_end, side="left")
+        hi = np.searchsorted(t_us, end_us, side="right")
+        previous_end = end_us
+        if int(run_id) == 0 or hi - lo < 2:
+            continue
+        duration_s = (t_us[hi - 1] - t_us[lo]) / 1e6
+        minor = int(timeline["minflt"][hi - 1] - timeline["minflt"][lo])
+        major = int(timeline["majflt"][hi - 1] - timeline["majflt"][lo])
+        start_rss = int(timeline["rss_kb"][lo])
+        peak_rss = int(timeline["rss_kb"][lo:hi].max())
+        extra_bytes = (peak_rss - start_rss) * 1024
+        rows.append({
+            "run": int(run_id),
+            "duration_s": duration_s,
+            "minor_faults": minor,
+            "major_faults": major,
+            "fault_rate": (minor + major) / duration_s if duration_s > 0 else np.nan,
+            "start_rss_kb": start_rss,
+            "peak_rss_kb": peak_rss,
+            "peak_extra_bytes_per_element": extra_bytes / int(size) if int(size) > 0 else np.nan,
+        })
+    return rows
+
+def downsample_timeline(timeline, max_points=2000):
+    """
+    把时间序列压缩到最多 max_points 个桶用于绘图：RSS 取桶内最大值 (不丢峰值)，缺页率按桶内增量 / 桶时长计算。
+    返回 (time_s, rss_gib, anon_gib, fault_rate)。
+    """
+    t_us = timeline["t_us"]
+    if len(t_us) < 2:
+        return [], [], [], []
+    buckets = min(max_points, len(t_us) - 1)
+    edges = np.linspace(0, len(t_us) - 1, buckets + 1).astype(np.int64)
+    starts, ends = edges[:-1], np.maximum(edges[1:], edges[:-1] + 1)
+    rss = np.maximum.reduceat(timeline["rss_kb"], starts) / (1 << 20)
+    anon = np.maximum.reduceat(timeline["anon_kb"], starts) / (1 << 20)
+    faults = timeline["minflt"] + timeline["majflt"]
+    span_s = np.maximum((t_us[ends] - t_us[starts]) / 1e6, 1e-6)
+    rate = (faults[ends] - faults[starts]) / span_s
+    return (t_us[starts] / 1e6).tolist(), rss.tolist(), anon.tolist(), rate.tolist()
+
 if __name__ == '__main__':
     # ... (你的测试代码可以保持不变，它现在会额外显示 "kB per Total Page Fault") ...
     if len(sys.argv) > 1:
@@ -1,4 +1,5 @@
 # perf_parser.py
+import os
 import re
 from collections import defaultdict
 import sys # Import sys for stderr
@@ -121,4 +122,59 @@ def parse_perf_file(filepath):
         print(f"Warning: No parsable perf events found in {filepath}. The file might be empty or in an unexpected format.", file=sys.stderr)
         # No change needed here, returning empty defaultdict is fine.
 
-    return stats
\ No newline at end of file
+    return stats
+
+def merge_group_stats(group_stats_map):
+    merged_stats = defaultdict(int)
+    group_order = ["GROUP1", "GROUP2", "GROUP3", "GROUP4"]
+    processed_events = set() # 用于确保每个事件只从其在group_order中首次出现的组获取
+    for group_id in group_order:
+        if group_id in group_stats_map:
+            current_group_stats = group_stats_map[group_id]
+            for event, count in current_group_stats.items():
+                if event not in processed_events:
+                    merged_stats[event] = count
+                    processed_events.add(event)
+    # 确保核心事件（如果GROUP1存在）的值被使用
+    if "GROUP1" in group_stats_map:
+        g1_stats = group_stats_map["GROUP1"]
+        # 这些是 get_event_value 使用的通用键对应的原始事件名变体
+        # merge_group_stats 返回的键应该是原始事件名
+        core_event_variants_to_check = KEY_EVENT_MAPPINGS.get("CYCLES", []) + KEY_EVENT_MAPPINGS.get("IC", [])
+        for core_event_variant in core_event_variants_to_check:
+            if core_event_variant in g1_stats:
+                merged_stats[core_event_variant] = g1_stats[core_event_variant] # 确保来自GROUP1
+    return merged_stats
+
+PERF_STAT_FILENAME_PATTERN = re.compile(r'^(.*?)_([^_]+)_([^_]+)_(GROUP\d+)_perf_stat\.txt$')
+
+def load_grouped_perf_stats(perf_stats_dir):
+    """
+    扫描 perf_stats 目录，解析所有 *_GROUPn_perf_stat.txt 文件并按运行合并。
+    返回 (all_perf_data, file_count)，其中 all_perf_data 的结构是
+    {(gen, type): {algo: {merged_raw_event: count}}}。
+    """
+    raw_grouped_data = defaultdict(lambda: defaultdict(dict))
+    file_count = 0
+    for filename in sorted(os.listdir(perf_stats_dir)):
+        match = PERF_STAT_FILENAME_PATTERN.match(filename)
+        if match:
+            file_count += 1
+            algo_name, generator, data_type, group_id = match.groups()
+            run_key = (generator, data_type, algo_name) # (gen, type, algo)
+            filepath = os.path.join(perf_stats_dir, filename)
+            stats = parse_perf_file(filepath)
+            if stats is not None: # parse_perf_file 返回 None 表示文件读取或解析错误
+                raw_grouped_data[run_key][group_id] = stats
+            else:
+                print(f"Warning: Could not parse {filepath}, data for this group will be missing.", file=sys.stderr)
+
+    all_perf_data = defaultdict(lambda: defaultdict(dict))
+    for run_key, group_stats_map in raw_grouped_data.items():
+        generator, data_type, algo_name = run_key
+        merged_stats = merge_group_stats(group_stats_map) # merged_stats 的键是原始事件名
+        if merged_stats: # 确保合并后有数据
+            all_perf_data[(generator, data_type)][algo_name] = merged_stats
+        else:
+            print(f"Warning: No perf data merged for run {run_key}. This usually means no group files were parsed successfully.", file=sys.stderr)
+    return all_perf_data, file_count
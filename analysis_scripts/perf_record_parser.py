@@ -0,0 +1,280 @@
+# perf_record_parser.py
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# perf script 输出的字段：头部一行 "comm tid period event:"，随后每个调用栈帧一行 (缩进)，样本之间空行分隔
+PERF_SCRIPT_FIELDS = "comm,tid,period,event,ip,sym,dso"
+
+# 栈帧行: "\t    7f12ab34 parlay::internal::seq_write_<...>+0x45 (/path/to/binary)"
+FRAME_PATTERN = re.compile(r'^\s+([0-9a-fA-F]+)\s+(.*?)\s+\(([^()]*)\)\s*$')
+SYMBOL_OFFSET_PATTERN = re.compile(r'\+0x[0-9a-fA-F]+$')
+
+# record_page_fault.sh / record_dTLB_miss.sh 生成的文件名: {algo}_{gen}_{type}_{kind}.data
+RECORD_FILENAME_PATTERN = re.compile(r'^(benchmark_.*?)_([^_]+(?:_[^_]+)?)_([^_]+)_(page_faults|dtlb_misses)\.(data|script|txt)$')
+
+UNKNOWN_SYMBOL = "[unknown]"
+
+def frame_symbol(symbol, dso):
+    """
+    去掉 "+0x.." 偏移；符号未知时退回到 "[dso 文件名]"，这样至少能区分是哪个库。
+    """
+    symbol = SYMBOL_OFFSET_PATTERN.sub("", symbol.strip())
+    if not symbol or symbol == UNKNOWN_SYMBOL:
+        return f"[{os.path.basename(dso)}]" if dso and dso != UNKNOWN_SYMBOL else UNKNOWN_SYMBOL
+    return symbol
+
+def short_symbol(symbol):
+    """
+    去掉模板参数和函数参数，用于报告中显示 (折叠栈文件里保留完整名字)。
+    """
+    out = []
+    depth = 0
+    for ch in symbol:
+        if ch in "<(":
+            depth += 1
+        elif ch in ">)" and depth > 0:
+            depth -= 1
+        elif depth == 0:
+            out.append(ch)
+    text = "".join(out).strip()
+    return text or symbol
+
+def parse_header(line):
+    """
+    解析样本头部 "comm tid period event:"。comm 可能含空格，所以从右往左找以 ':' 结尾的事件字段。
+    返回 (comm, event, period) 或 None。
+    """
+    tokens = line.split()
+    event_index = None
+    for i in range(len(tokens) - 1, -1, -1):
+        if tokens[i].endswith(":"):
+            event_index = i
+            break
+    if event_index is None or event_index < 2:
+        return None
+    try:
+        period = int(tokens[event_index - 1])
+    except ValueError:
+        return None
+    comm = " ".join(tokens[:event_index - 2]) or tokens[0]
+    return comm, tokens[event_index][:-1], period
+
+class StackTable:
+    """
+    把样本压缩为整数数组：符号和调用栈各自去重编号，每个样本只存 (event_id, stack_id, period)。
+    调用栈以叶子在前的符号编号元组保存 (与 perf script 的输出顺序一致)。
+    """
+    def __init__(self):
+        self.symbols = []
+        self.symbol_ids = {}
+        self.stacks = []
+        self.stack_ids = {}
+        self.events = []
+        self.event_ids = {}
+        self.sample_event = []
+        self.sample_stack = []
+        self.sample_period = []
+
+    def _intern(self, table, ids, key):
+        index = ids.get(key)
+        if index is None:
+            index = len(table)
+            ids[key] = index
+            table.append(key)
+        return index
+
+    def add_sample(self, event, frames, period):
+        stack = tuple(self._intern(self.symbols, self.symbol_ids, sym) for sym in frames)
+        self.sample_event.append(self._intern(self.events, self.event_ids, event))
+        self.sample_stack.append(self._intern(self.stacks, self.stack_ids, stack))
+        self.sample_period.append(period)
+
+    def aggregate(self):
+        """
+        按 (event, stack) 汇总样本数与 period 之和，返回可以跨进程传递的紧凑结果。
+        """
+        if not self.sample_stack:
+            return {"symbols": self.symbols, "stacks": self.stacks, "events": self.events,
+                    "event": np.zeros(0, np.int32), "stack": np.zeros(0, np.int64),
+                    "count": np.zeros(0, np.int64), "period": np.zeros(0, np.int64)}
+        event = np.asarray(self.sample_event, dtype=np.int64)
+        stack = np.asarray(self.sample_stack, dtype=np.int64)
+        period = np.asarray(self.sample_period, dtype=np.int64)
+        key = event * len(self.stacks) + stack
+        unique_keys, inverse = np.unique(key, return_inverse=True)
+        return {
+            "symbols": self.symbols, "stacks": self.stacks, "events": self.events,
+            "event": (unique_keys // len(self.stacks)).astype(np.int32),
+            "stack": unique_keys % len(self.stacks),
+            "count": np.bincount(inverse).astype(np.int64),
+            "period": np.bincount(inverse, weights=period).astype(np.int64),
+        }
+
+def parse_perf_script_lines(lines, table=None):
+    """
+    流式解析 perf script 文本输出 (任意可迭代的行)，把样本写入 StackTable。
+    """
+    table = table if table is not None else StackTable()
+    header = None
+    frames = []
+    for line in lines:
+        if not line.strip():
+            if header is not None:
+                table.add_sample(header[1], frames or [UNKNOWN_SYMBOL], header[2])
+            header, frames = None, []
+            continue
+        if line[0] in " \t":
+            if header is None:
+                continue
+            match = FRAME_PATTERN.match(line)
+            if match:
+                frames.append(frame_symbol(match.group(2), match.group(3)))
+            continue
+        if header is not None: # 没有空行分隔的样本 (无调用栈时)
+            table.add_sample(header[1], frames or [UNKNOWN_SYMBOL], header[2])
+        header, frames = parse_header(line), []
+    if header is not None:
+        table.add_sample(header[1], frames or [UNKNOWN_SYMBOL], header[2])
+    return table
+
+def _text_chunk_lines(path, start, end):
+    """
+    读取文本文件中头部行起始于 [start, end) 字节区间的所有样本 (头部行是唯一不以空白开头的非空行)，
+    因此相邻区间之间的样本不会重复也不会丢失。
+    """
+    with open(path, 'rb') as f: # 二进制模式，字节偏移可以任意 seek
+        position = start
+        if start > 0:
+            f.seek(start - 1)
+            if f.read(1) != b"\n":
+                position += len(f.readline()) # 跳过当前行剩余部分
+        in_range = False
+        for line in iter(f.readline, b""):
+            if line.strip() and line[:1] not in b" \t":
+                if position >= end:
+                    return
+                in_range = True
+            if in_range:
+                yield line.decode('utf-8', errors='replace')
+            position += len(line)
+    yield "\n" # 确保最后一个样本被提交
+
+def _parse_text_chunk(path, start, end):
+    return parse_perf_script_lines(_text_chunk_lines(path, start, end)).aggregate()
+
+def _parse_perf_data_chunk(perf_binary, path, chunk_index, num_chunks, extra_args):
+    """
+    对 perf.data 的第 chunk_index 个时间片运行 perf script (--time N%/i)，并流式解析其输出。
+    """
+    command = [perf_binary, "script", "-i", path, "-F", PERF_SCRIPT_FIELDS, "--no-inline"] + list(extra_args)
+    if num_chunks > 1:
+        command += ["--time", f"{100.0 / num_chunks:g}%/{chunk_index + 1}"]
+    with tempfile.TemporaryFile(mode='w+') as stderr_file: # stderr 不能用管道，否则写满后 perf 会阻塞
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr_file,
+                                   text=True, errors="replace", bufsize=1 << 20)
+        table = parse_perf_script_lines(process.stdout)
+        process.wait()
+        if process.returncode != 0:
+            stderr_file.seek(0)
+            raise RuntimeError(f"'{' '.join(command)}' failed with exit code {process.returncode}: "
+                               f"{stderr_file.read().strip()[:500]}")
+    return table.aggregate()
+
+def merge_aggregates(parts):
+    """
+    合并多个分块的 aggregate() 结果，重新编号符号和调用栈。
+    返回 {event: {stack (叶子在前的符号名元组): [count, period]}}。
+    """
+    merged = defaultdict(lambda: defaultdict(lambda: [0, 0]))
+    for part in parts:
+        stacks = [tuple(part["symbols"][s] for s in stack) for stack in part["stacks"]]
+        for event_id, stack_id, count, period in zip(part["event"], part["stack"], part["count"], part["period"]):
+            entry = merged[part["events"][event_id]][stacks[stack_id]]
+            entry[0] += int(count)
+            entry[1] += int(period)
+    return {event: dict(stacks) for event, stacks in merged.items()}
+
+def _call(task):
+    fn, args = task
+    return fn(*args)
+
+def parse_recording(path, chunks=None, workers=None, perf_binary="perf", extra_args=()):
+    """
+    解析一个 perf.data 文件 (通过 perf script) 或已保存的 perf script 文本，分块并行处理。
+    perf.data 按时间片切分，文本文件按字节区间切分 (对齐到样本边界)。
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = chunks or workers
+    is_text = not path.endswith(".data")
+    if is_text:
+        size = os.path.getsize(path)
+        chunks = max(1, min(chunks, size // (1 << 20) + 1)) # 小文件不值得切分
+        bounds = [size * i // chunks for i in range(chunks + 1)]
+        tasks = [(_parse_text_chunk, (path, bounds[i], bounds[i + 1])) for i in range(chunks)]
+    else:
+        if shutil.which(perf_binary) is None:
+            raise RuntimeError(f"'{perf_binary}' not found; cannot read {path}. "
+                               f"Run 'perf script -F {PERF_SCRIPT_FIELDS} -i {path} > file.script' elsewhere and pass the text file.")
+        tasks = [(_parse_perf_data_chunk, (perf_binary, path, i, chunks, tuple(extra_args))) for i in range(chunks)]
+
+    if len(tasks) == 1 or workers <= 1:
+        parts = [fn(*args) for fn, args in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            parts = list(pool.map(_call, tasks))
+    return merge_aggregates(parts)
+
+def write_folded(stacks, output_path, include_period=False):
+    """
+    写出 flamegraph.pl / speedscope 可读的折叠栈 ("root;...;leaf count")。
+    include_period=True 时以 period 之和 (例如缺页次数) 作为权重，否则以样本数作为权重。
+    """
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for stack, (count, period) in sorted(stacks.items(), key=lambda kv: -kv[1][0]):
+            weight = period if include_period else count
+            if weight <= 0:
+                continue
+            frames = [frame.replace(";", ":") for frame in reversed(stack)]
+            f.write(f"{';'.join(frames)} {weight}\n")
+
+def symbol_shares(stacks):
+    """
+    返回 (self_share, inclusive_share, total)：按 period 计算每个符号作为叶子 (self) 以及
+    出现在栈中任意位置 (inclusive，同一栈中重复出现只计一次) 所占的比例。
+    """
+    self_weight = defaultdict(int)
+    inclusive_weight = defaultdict(int)
+    total = 0
+    for stack, (count, period) in stacks.items():
+        weight = period or count
+        total += weight
+        if stack:
+            self_weight[stack[0]] += weight
+        for symbol in set(stack):
+            inclusive_weight[symbol] += weight
+    if total == 0:
+        return {}, {}, 0
+    return ({s: w / total for s, w in self_weight.items()},
+            {s: w / total for s, w in inclusive_weight.items()}, total)
+
+def top_call_paths(stacks, depth=3, limit=10):
+    """
+    把调用栈截断为叶子及其上 depth-1 层调用者后汇总，返回权重最高的 limit 条 [(path, share)]。
+    """
+    weights = defaultdict(int)
+    total = 0
+    for stack, (count, period) in stacks.items():
+        weight = period or count
+        total += weight
+        weights[tuple(stack[:depth])] += weight
+    if total == 0:
+        return []
+    ranked = sorted(weights.items(), key=lambda kv: -kv[1])[:limit]
+    return [(path, weight / total) for path, weight in ranked]
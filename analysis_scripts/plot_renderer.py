@@ -0,0 +1,169 @@
+# plot_renderer.py
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import matplotlib
+    matplotlib.use("Agg") # 只写文件，不需要交互式后端
+    import matplotlib.pyplot as plt
+    MATPLOTLIB_AVAILABLE = True
+except ImportError:
+    MATPLOTLIB_AVAILABLE = False
+
+# 支持的输出格式：png/webp 为位图 (webp 体积更小)，svg/pdf 为矢量图
+SUPPORTED_PLOT_FORMATS = ["png", "webp", "svg", "pdf"]
+DEFAULT_DPI = 150
+CACHE_FILENAME = ".plot_cache.json"
+
+# 每个工作进程内按布局缓存的 Figure 模板: {(nrows, ncols, figsize): (fig, axes)}
+_FIGURE_TEMPLATES = {}
+
+def make_plot_job(name, draw_fn, layout, spec):
+    """
+    描述一张待渲染的图。
+    name: 输出文件名 (不含扩展名)；draw_fn(fig, axes, spec): 模块级绘图函数 (需可 pickle)；
+    layout: (nrows, ncols, (width, height))；spec: 只包含可 JSON 序列化数据的绘图输入，同时用于计算数据哈希。
+    """
+    return {"name": name, "draw": draw_fn, "layout": layout, "spec": spec}
+
+def _job_hash(job, formats, dpi):
+    payload = {
+        "draw": f"{job['draw'].__module__}.{job['draw'].__qualname__}",
+        "layout": job["layout"], "spec": job["spec"], "formats": formats, "dpi": dpi,
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+def _get_template(layout):
+    """
+    返回一个与 layout 匹配的 Figure，复用之前创建过的模板，避免每个配置都重新创建几十个子图。
+    """
+    nrows, ncols, figsize = layout
+    key = (nrows, ncols, tuple(figsize))
+    template = _FIGURE_TEMPLATES.get(key)
+    if template is None:
+        fig, axes = plt.subplots(nrows=nrows, ncols=ncols, figsize=tuple(figsize), squeeze=False)
+        template = (fig, axes.flatten())
+        _FIGURE_TEMPLATES[key] = template
+    else:
+        fig, axes = template
+        for ax in axes:
+            ax.cla()
+            ax.set_axis_on()
+            ax.set_visible(True)
+    return template
+
+def _render_job(job, output_dir, formats, dpi):
+    """
+    在当前进程中渲染一张图并保存为所有请求的格式。返回 (name, [saved paths], error 或 None)。
+    """
+    saved = []
+    try:
+        fig, axes = _get_template(job["layout"])
+        job["draw"](fig, axes, job["spec"])
+        for fmt in formats:
+            path = os.path.join(output_dir, f"{job['name']}.{fmt}")
+            fig.savefig(path, dpi=dpi, format=fmt)
+            saved.append(path)
+    except Exception as e:
+        return job["name"], saved, str(e)
+    return job["name"], saved, None
+
+def _load_cache(output_dir):
+    cache_path = os.path.join(output_dir, CACHE_FILENAME)
+    if not os.path.isfile(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_cache(output_dir, cache):
+    cache_path = os.path.join(output_dir, CACHE_FILENAME)
+    try:
+        with open(cache_path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(cache, f, indent=1, sort_keys=True)
+        os.replace(cache_path + ".tmp", cache_path)
+    except OSError as e:
+        print(f"Warning: Could not write plot cache {cache_path}: {e}", file=sys.stderr)
+
+def render_plot_jobs(jobs, output_dir, formats=("png",), workers=None, dpi=DEFAULT_DPI, force=False):
+    """
+    渲染一批图。数据哈希与上次渲染相同且输出文件仍存在的图会被跳过 (除非 force=True)；
+    其余的图在进程池 (Agg 后端) 中并行渲染，每个工作进程复用相同布局的 Figure。
+    workers=None 表示使用 os.cpu_count()，workers<=1 时在当前进程中串行渲染。
+    返回 (rendered, skipped, failed) 三个计数。
+    """
+    if not MATPLOTLIB_AVAILABLE:
+        print("Info: Matplotlib not available. Skipping plot generation.", file=sys.stderr)
+        return 0, 0, 0
+    formats = list(formats)
+    unknown = [fmt for fmt in formats if fmt not in SUPPORTED_PLOT_FORMATS]
+    if unknown:
+        print(f"Warning: Unsupported plot format(s) {unknown} ignored. Supported: {SUPPORTED_PLOT_FORMATS}", file=sys.stderr)
+        formats = [fmt for fmt in formats if fmt in SUPPORTED_PLOT_FORMATS]
+    if not formats or not jobs:
+        return 0, 0, 0
+
+    cache = _load_cache(output_dir)
+    pending = []
+    skipped = 0
+    for job in jobs:
+        job_hash = _job_hash(job, formats, dpi)
+        outputs_exist = all(os.path.isfile(os.path.join(output_dir, f"{job['name']}.{fmt}")) for fmt in formats)
+        if not force and cache.get(job["name"]) == job_hash and outputs_exist:
+            skipped += 1
+            continue
+        pending.append((job, job_hash))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(pending)))
+
+    rendered = failed = 0
+    def record(result, job_hash):
+        nonlocal rendered, failed
+        name, saved, error = result
+        if error is not None:
+            failed += 1
+            cache.pop(name, None)
+            print(f"Error rendering plot {name}: {error}", file=sys.stderr)
+            return
+        rendered += 1
+        cache[name] = job_hash
+        for path in saved:
+            print(f"  Plot saved: {path}")
+
+    if workers == 1:
+        for job, job_hash in pending:
+            record(_render_job(job, output_dir, formats, dpi), job_hash)
+    elif pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [(pool.submit(_render_job, job, output_dir, formats, dpi), job_hash) for job, job_hash in pending]
+            for future, job_hash in futures:
+                record(future.result(), job_hash)
+
+    if skipped:
+        print(f"  {skipped} plot(s) unchanged since the last render, skipped (use --force-plots to redraw).")
+    _save_cache(output_dir, cache)
+    return rendered, skipped, failed
+
+def add_plot_arguments(parser):
+    """
+    给 analyze_*.py 的 argparse 添加统一的绘图参数。
+    """
+    parser.add_argument("--plot-format", default="png",
+                        help=f"Comma-separated output formats for plots ({', '.join(SUPPORTED_PLOT_FORMATS)}). Default: png.")
+    parser.add_argument("--plot-dpi", type=int, default=DEFAULT_DPI,
+                        help=f"Resolution of bitmap plots (default: {DEFAULT_DPI}).")
+    parser.add_argument("--plot-workers", type=int, default=None,
+                        help="Number of processes used to render plots (default: number of CPUs, 1 = serial).")
+    parser.add_argument("--force-plots", action="store_true",
+                        help="Redraw all plots even if their data did not change since the last render.")
+
+def parse_plot_formats(text):
+    return [fmt.strip().lower().lstrip('.') for fmt in text.split(',') if fmt.strip()]
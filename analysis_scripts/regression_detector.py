@@ -0,0 +1,212 @@
+# regression_detector.py
+import math
+from collections import defaultdict
+
+import numpy as np
+
+from run_loader import PER_ELEMENT_COUNTERS
+
+WALL_TIME_METRIC = "Wall Time (ms)"
+
+# 精确分布只在样本较小且没有重复值时使用，否则退回到带 tie 修正的正态近似
+EXACT_MWU_MAX_PRODUCT = 2500
+
+def _mwu_exact_counts(n, m):
+    """
+    返回长度为 n*m+1 的数组 counts[u]：在 C(n+m, n) 种排列中统计量 U 等于 u 的排列个数。
+    使用递推 f(n, m, u) = f(n-1, m, u-m) + f(n, m-1, u)。
+    """
+    # table[j] 保存当前 i 下 f(i, j, ·)
+    table = [np.zeros(1, dtype=np.float64) for _ in range(m + 1)]
+    for j in range(m + 1):
+        table[j][0] = 1.0 # f(0, j, 0) = 1
+    for i in range(1, n + 1):
+        new_table = [np.array([1.0])] # f(i, 0, 0) = 1
+        for j in range(1, m + 1):
+            counts = np.zeros(i * j + 1, dtype=np.float64)
+            prev_i = table[j] # f(i-1, j, ·)，长度 (i-1)*j+1
+            counts[j:j + len(prev_i)] += prev_i
+            prev_j = new_table[j - 1] # f(i, j-1, ·)，长度 i*(j-1)+1
+            counts[:len(prev_j)] += prev_j
+            new_table.append(counts)
+        table = new_table
+    return table[m]
+
+def mann_whitney_u(x, y):
+    """
+    双侧 Mann-Whitney U 检验。返回 (U_x, p_value)，U_x 统计 x 中元素大于 y 中元素的次数 (相等记 0.5)。
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n, m = len(x), len(y)
+    if n == 0 or m == 0:
+        return np.nan, np.nan
+
+    combined = np.concatenate([x, y])
+    order = np.argsort(combined, kind="mergesort")
+    ranks = np.empty(n + m, dtype=np.float64)
+    sorted_vals = combined[order]
+    # 平均秩处理相同值
+    i = 0
+    tie_term = 0.0
+    while i < n + m:
+        j = i
+        while j + 1 < n + m and sorted_vals[j + 1] == sorted_vals[i]:
+            j += 1
+        ranks[order[i:j + 1]] = (i + j) / 2.0 + 1.0
+        t = j - i + 1
+        tie_term += t ** 3 - t
+        i = j + 1
+
+    u_x = ranks[:n].sum() - n * (n + 1) / 2.0
+    has_ties = tie_term > 0
+
+    if not has_ties and n * m <= EXACT_MWU_MAX_PRODUCT:
+        counts = _mwu_exact_counts(n, m)
+        total = counts.sum()
+        u_int = int(round(u_x))
+        u_small = min(u_int, n * m - u_int)
+        p_value = min(1.0, 2.0 * counts[:u_small + 1].sum() / total)
+        return u_x, p_value
+
+    mean_u = n * m / 2.0
+    var_u = n * m / 12.0 * ((n + m + 1) - tie_term / ((n + m) * (n + m - 1)))
+    if var_u <= 0:
+        return u_x, 1.0
+    z = (abs(u_x - mean_u) - 0.5) / math.sqrt(var_u) # 连续性修正
+    p_value = math.erfc(max(z, 0.0) / math.sqrt(2.0))
+    return u_x, min(1.0, p_value)
+
+def cliffs_delta(x, y):
+    """
+    Cliff's delta = P(x > y) - P(x < y)，取值 [-1, 1]。|d| >= 0.147/0.33/0.474 分别对应 small/medium/large。
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) == 0 or len(y) == 0:
+        return np.nan
+    diff = x[:, None] - y[None, :]
+    return (np.count_nonzero(diff > 0) - np.count_nonzero(diff < 0)) / float(diff.size)
+
+def benjamini_hochberg(p_values):
+    """
+    Benjamini-Hochberg FDR 校正。NaN 保持为 NaN。
+    """
+    p = np.asarray(p_values, dtype=np.float64)
+    adjusted = np.full_like(p, np.nan)
+    valid = ~np.isnan(p)
+    if not valid.any():
+        return adjusted
+    pv = p[valid]
+    order = np.argsort(pv)
+    ranked = pv[order] * len(pv) / (np.arange(len(pv)) + 1.0)
+    ranked = np.minimum.accumulate(ranked[::-1])[::-1]
+    result = np.empty_like(pv)
+    result[order] = np.minimum(ranked, 1.0)
+    adjusted[valid] = result
+    return adjusted
+
+def effect_label(delta):
+    if delta is None or np.isnan(delta):
+        return "n/a"
+    magnitude = abs(delta)
+    if magnitude < 0.147: return "negligible"
+    if magnitude < 0.33: return "small"
+    if magnitude < 0.474: return "medium"
+    return "large"
+
+def pool_samples(runs):
+    """
+    把多个 load_run() 结果合并为一个基线样本集合 (用于"与历史比较")。
+    wall time 样本直接拼接；每个元素的计数器每个运行贡献一个样本。
+    返回 {(gen, type, algo): {metric: {"values": [...], "size": int, "threads": int}}}
+    """
+    pooled = defaultdict(lambda: defaultdict(lambda: {"values": [], "size": None, "threads": None}))
+    for run in runs:
+        for (gen, dtype), algos in run["wall_samples"].items():
+            for algo, info in algos.items():
+                entry = pooled[(gen, dtype, algo)][WALL_TIME_METRIC]
+                entry["values"].extend(info["milli"])
+                entry["size"], entry["threads"] = info["size"], info["threads"]
+                for counter, value in run["per_element"].get((gen, dtype), {}).get(algo, {}).items():
+                    counter_entry = pooled[(gen, dtype, algo)][counter]
+                    counter_entry["values"].append(value)
+                    counter_entry["size"], counter_entry["threads"] = info["size"], info["threads"]
+    return pooled
+
+def compare_samples(baseline, candidate, alpha=0.05, min_rel_change=0.03, counter_threshold=0.10):
+    """
+    对两组已合并的样本 (pool_samples 的输出) 做逐配置、逐指标的比较。
+    所有指标都是"越低越好"：正的相对变化表示退化 (regression)。
+    返回 (findings, unmatched)，findings 为字典列表，已做 BH 校正。
+    """
+    findings = []
+    unmatched = []
+    for key in sorted(set(baseline) | set(candidate)):
+        if key not in baseline or key not in candidate:
+            unmatched.append((key, "missing in " + ("baseline" if key not in baseline else "candidate")))
+            continue
+        base_wall = baseline[key].get(WALL_TIME_METRIC)
+        cand_wall = candidate[key].get(WALL_TIME_METRIC)
+        if base_wall and cand_wall and (base_wall["size"], base_wall["threads"]) != (cand_wall["size"], cand_wall["threads"]):
+            unmatched.append((key, f"size/threads differ: baseline={base_wall['size']}/{base_wall['threads']}, "
+                                   f"candidate={cand_wall['size']}/{cand_wall['threads']}"))
+            continue
+
+        for metric in [WALL_TIME_METRIC] + PER_ELEMENT_COUNTERS:
+            if metric not in baseline[key] or metric not in candidate[key]:
+                continue
+            base_values = baseline[key][metric]["values"]
+            cand_values = candidate[key][metric]["values"]
+            if not base_values or not cand_values:
+                continue
+            base_median = float(np.median(base_values))
+            cand_median = float(np.median(cand_values))
+            if base_median == 0:
+                continue
+            rel_change = (cand_median - base_median) / abs(base_median)
+
+            finding = {
+                "generator": key[0], "datatype": key[1], "algo": key[2], "metric": metric,
+                "baseline_median": base_median, "candidate_median": cand_median,
+                "n_baseline": len(base_values), "n_candidate": len(cand_values),
+                "rel_change": rel_change, "p_value": np.nan, "cliffs_delta": np.nan,
+            }
+            if len(base_values) >= 2 and len(cand_values) >= 2:
+                finding["method"] = "mann-whitney"
+                _u, finding["p_value"] = mann_whitney_u(cand_values, base_values)
+                finding["cliffs_delta"] = cliffs_delta(cand_values, base_values)
+            else:
+                # 单样本的计数器 (两个运行目录之间比较) 无法做检验，只能用阈值
+                finding["method"] = "threshold"
+            findings.append(finding)
+
+    adjusted = benjamini_hochberg([f["p_value"] for f in findings])
+    for finding, p_adj in zip(findings, adjusted):
+        finding["p_adjusted"] = p_adj
+        if finding["method"] == "threshold":
+            significant = abs(finding["rel_change"]) >= counter_threshold
+        else:
+            significant = p_adj < alpha and abs(finding["rel_change"]) >= min_rel_change
+        if not significant:
+            finding["verdict"] = "unchanged"
+        else:
+            finding["verdict"] = "regression" if finding["rel_change"] > 0 else "improvement"
+    return findings, unmatched
+
+def rank_findings(findings):
+    """
+    返回 (regressions, improvements)，各自按相对变化的幅度从大到小排序。
+    """
+    regressions = sorted((f for f in findings if f["verdict"] == "regression"),
+                         key=lambda f: f["rel_change"], reverse=True)
+    improvements = sorted((f for f in findings if f["verdict"] == "improvement"),
+                          key=lambda f: f["rel_change"])
+    return regressions, improvements
+
+def format_finding(f):
+    p_text = "   -   " if np.isnan(f["p_adjusted"]) else f"{f['p_adjusted']:.4f}"
+    delta_text = "  -  " if np.isnan(f["cliffs_delta"]) else f"{f['cliffs_delta']:+.2f}"
+    return (f"{f['algo'].replace('benchmark_', ''):<28} {f['generator']:<14} {f['datatype']:<8} "
+            f"{f['metric']:<38} {f['baseline_median']:>14.6g} -> {f['candidate_median']:>14.6g} "
+            f"{f['rel_change'] * 100:>+8.2f}%  p_adj={p_text}  delta={delta_text} ({effect_label(f['cliffs_delta'])}, {f['method']})")
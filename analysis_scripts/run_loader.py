@@ -0,0 +1,94 @@
+# run_loader.py
+import os
+import sys
+from collections import defaultdict
+
+import numpy as np
+
+from perf_parser import load_grouped_perf_stats
+from perf_analyzer import calculate_metrics
+from wall_time_parser import collect_wall_time_samples
+
+RUN_DIR_PREFIX = "perf_benchmark_run_"
+
+# 做跨运行比较时按"每个元素"归一化的计数器 (键名与 calculate_metrics 的输出一致)
+PER_ELEMENT_COUNTERS = [
+    "Cycles",
+    "Total Instructions (IC)",
+    "Memory Loads Retired",
+    "Memory Stores Retired",
+    "L3 Load Misses (Loads hitting DRAM)",
+    "LLC Store Misses",
+    "Stalls L3 Miss (Cycles)",
+    "Branch Misses",
+    "dTLB Load Misses",
+    "dTLB Store Misses",
+    "Page Faults",
+]
+
+def list_run_dirs(base_run_dir):
+    """
+    返回 base_run_dir 下所有 perf_benchmark_run_* 目录的绝对路径，按名字 (即时间戳) 排序。
+    """
+    if not os.path.isdir(base_run_dir):
+        print(f"Error: Base run directory '{base_run_dir}' does not exist.", file=sys.stderr)
+        return []
+    return [os.path.join(base_run_dir, d) for d in sorted(os.listdir(base_run_dir))
+            if d.startswith(RUN_DIR_PREFIX) and os.path.isdir(os.path.join(base_run_dir, d))]
+
+def read_run_metadata(run_dir):
+    """
+    读取运行脚本写入的 run_metadata.txt (每行 key=value)。文件不存在时返回空字典。
+    """
+    metadata = {}
+    metadata_path = os.path.join(run_dir, "run_metadata.txt")
+    if not os.path.isfile(metadata_path):
+        return metadata
+    with open(metadata_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#') or '=' not in line:
+                continue
+            key, value = line.split('=', 1)
+            metadata[key.strip()] = value.strip()
+    return metadata
+
+def load_run(run_dir, with_perf=True):
+    """
+    加载一个运行目录，返回:
+    {
+      "name": 目录名, "path": run_dir, "metadata": {...},
+      "wall_samples": {(gen, type): {algo: {"milli": [...], "freqratio": [...], "pkgjoules": [...], "dramjoules": [...], "size", "threads", "machine"}}},
+      "per_element": {(gen, type): {algo: {counter: value_per_element}}},
+    }
+    per_element 中的计数器按 (size * 被 perf 记录的内部运行次数) 归一化；run=0 不被 perf 记录。
+    """
+    run = {
+        "name": os.path.basename(os.path.normpath(run_dir)),
+        "path": run_dir,
+        "metadata": read_run_metadata(run_dir),
+        "wall_samples": collect_wall_time_samples(os.path.join(run_dir, "results_stdout")),
+        "per_element": defaultdict(dict),
+    }
+
+    perf_stats_dir = os.path.join(run_dir, "perf_stats")
+    if not with_perf or not os.path.isdir(perf_stats_dir):
+        return run
+
+    all_perf_data, _ = load_grouped_perf_stats(perf_stats_dir)
+    for config_key, algo_perf_runs in all_perf_data.items():
+        for algo_name, merged_stats in algo_perf_runs.items():
+            sample_info = run["wall_samples"].get(config_key, {}).get(algo_name)
+            if not sample_info or sample_info["size"] <= 0:
+                continue # 没有 size 信息时无法归一化
+            profiled_runs = max(1, len(sample_info["milli"]))
+            elements = float(sample_info["size"]) * profiled_runs
+            metrics = calculate_metrics(merged_stats)
+            normalized = {}
+            for counter in PER_ELEMENT_COUNTERS:
+                value = metrics.get(counter)
+                if isinstance(value, (int, float, np.integer, np.floating)) and not np.isnan(value):
+                    normalized[counter] = float(value) / elements
+            if normalized:
+                run["per_element"][config_key][algo_name] = normalized
+    return run
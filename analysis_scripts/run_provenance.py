@@ -0,0 +1,142 @@
+# run_provenance.py
+# 运行的环境指纹 (run_metadata.txt 与 env_snapshots/，由 run_scripts/env_fingerprint.py 写入)、
+# 按标称频率归一化的耗时，以及噪声运行的标记。
+import os
+import re
+import statistics
+
+from run_loader import read_run_metadata
+
+# 在报告中展示、可以用 --where 过滤的指纹键
+FINGERPRINT_KEYS = ["machine", "hostname", "commit", "compiler", "kernel", "cpu_model", "nominal_mhz",
+                    "governor", "turbo", "epp", "smt_active", "thp_enabled", "thp_defrag", "numa_balancing",
+                    "loaded_cores", "loadavg_1m", "energy_source"]
+
+ENV_SNAPSHOT_PATTERN = re.compile(r'^(benchmark_.*?)_([^_]+)_([^_]+)_env\.txt$')
+WHERE_PATTERN = re.compile(r'^([A-Za-z0-9_]+)\s*(!=|=|~)\s*(.*)$')
+
+# 噪声判定的默认阈值
+DEFAULT_THRESHOLDS = {
+    "max_loaded_cores": 1,       # 运行前忙碌 (>10%) 的核心数
+    "max_background_busy": 0.05, # 运行前所有核心的平均忙碌比例
+    "max_freq_spread": 0.05,     # 同一配置各次运行的 freqratio (max - min) / median
+    "max_cv": 0.05,              # milli 的变异系数
+}
+
+def parse_where(conditions):
+    """
+    解析 --where 条件 ("governor=performance", "turbo!=on", "cpu_model~EPYC")。格式错误时抛出 ValueError。
+    """
+    parsed = []
+    for condition in conditions or []:
+        match = WHERE_PATTERN.match(condition.strip())
+        if not match:
+            raise ValueError(f"invalid condition '{condition}' (use key=value, key!=value or key~substring)")
+        parsed.append(match.groups())
+    return parsed
+
+def metadata_matches(metadata, conditions):
+    """所有条件都满足时返回 True；缺失的键按空字符串比较。"""
+    for key, op, value in conditions:
+        actual = metadata.get(key, "")
+        if op == "=" and actual != value:
+            return False
+        if op == "!=" and actual == value:
+            return False
+        if op == "~" and value not in actual:
+            return False
+    return True
+
+def filter_run_dirs(run_dirs, conditions):
+    """按 run_metadata.txt 过滤运行目录 (没有条件时原样返回)。"""
+    if not conditions:
+        return list(run_dirs)
+    return [d for d in run_dirs if metadata_matches(read_run_metadata(d), conditions)]
+
+def read_env_snapshots(run_dir):
+    """
+    读取 env_snapshots/<algo>_<gen>_<type>_env.txt (每个配置 no perf round 之前的快照)。
+    返回 {(gen, type): {algo: {key: value}}}。
+    """
+    snapshots = {}
+    snapshot_dir = os.path.join(run_dir, "env_snapshots")
+    if not os.path.isdir(snapshot_dir):
+        return snapshots
+    for filename in sorted(os.listdir(snapshot_dir)):
+        match = ENV_SNAPSHOT_PATTERN.match(filename)
+        if not match:
+            continue
+        algo, generator, data_type = match.groups()
+        values = {}
+        with open(os.path.join(snapshot_dir, filename), 'r', encoding='utf-8') as f:
+            for line in f:
+                if '=' in line:
+                    key, value = line.strip().split('=', 1)
+                    values[key] = value
+        snapshots.setdefault((generator, data_type), {})[algo] = values
+    return snapshots
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def normalized_milli(info):
+    """
+    把每次运行的 milli 乘以 freqratio (实际平均频率 / 标称频率)，得到标称频率下的等效耗时。
+    这对计算受限的阶段是准确的，对内存受限的阶段会高估频率的影响。没有 freqratio 时返回 None。
+    """
+    ratios = info.get("freqratio") or []
+    if not ratios or any(r is None for r in ratios):
+        return None
+    return [m * r for m, r in zip(info["milli"], ratios)]
+
+def noise_flags(metadata, snapshot, info, thresholds=None):
+    """
+    返回一个配置的噪声标记列表 (空列表表示没有发现问题)：非 performance 调速器、运行前的后台负载、
+    同一配置各次运行之间的频率波动和耗时波动。
+    """
+    limits = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+    flags = []
+    governor = (snapshot or {}).get("governor") or metadata.get("governor", "")
+    if governor and any(g != "performance" for g in governor.split(",")):
+        flags.append(f"governor={governor}")
+    loaded = _float((snapshot or {}).get("loaded_cores"))
+    if loaded is not None and loaded > limits["max_loaded_cores"]:
+        flags.append(f"{int(loaded)} cores busy before the run")
+    busy = _float((snapshot or {}).get("background_busy"))
+    if busy is not None and busy > limits["max_background_busy"]:
+        flags.append(f"background load {busy * 100:.0f}%")
+    ratios = [r for r in info.get("freqratio") or [] if r is not None]
+    if len(ratios) >= 2:
+        spread = (max(ratios) - min(ratios)) / statistics.median(ratios)
+        if spread > limits["max_freq_spread"]:
+            flags.append(f"frequency spread {spread * 100:.1f}%")
+    milli = info.get("milli") or []
+    if len(milli) >= 2:
+        cv = statistics.stdev(milli) / statistics.mean(milli)
+        if cv > limits["max_cv"]:
+            flags.append(f"cv {cv * 100:.1f}%")
+    return flags
+
+def summarize_provenance(run, thresholds=None):
+    """
+    对 load_run 的结果逐配置汇总：中位耗时、标称频率下的中位耗时、中位 freqratio 与噪声标记。
+    返回 {(gen, type): {algo: {...}}}。
+    """
+    snapshots = read_env_snapshots(run["path"])
+    summary = {}
+    for config_key, algos in run["wall_samples"].items():
+        for algo, info in algos.items():
+            normalized = normalized_milli(info)
+            ratios = [r for r in info.get("freqratio") or [] if r is not None]
+            snapshot = snapshots.get(config_key, {}).get(algo)
+            summary.setdefault(config_key, {})[algo] = {
+                "median_milli": statistics.median(info["milli"]),
+                "normalized_median_milli": statistics.median(normalized) if normalized else None,
+                "median_freqratio": statistics.median(ratios) if ratios else None,
+                "snapshot": snapshot or {},
+                "flags": noise_flags(run["metadata"], snapshot, info, thresholds),
+            }
+    return summary
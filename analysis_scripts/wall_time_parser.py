@@ -9,6 +9,9 @@ import sys # For sys.stderr
 # 它代表了 C++ 程序内部会进行多少次迭代 (run=0 to NUM_CPP_INTERNAL_ITERATIONS-1)
 NUM_CPP_INTERNAL_ITERATIONS = 5 # 从你的 bash 脚本中 NUM_RUNS=5
 
+# RESULT 行中可选的逐次运行字段 (src/freq_counter.hpp, src/energy_counter.hpp)
+OPTIONAL_SAMPLE_FIELDS = ["freqratio", "pkgjoules", "dramjoules"]
+
 def parse_result_line_for_time(line):
     """
     专门解析 RESULT 行以提取 run ID 和 milli 时间值。
@@ -33,6 +36,93 @@ def parse_result_line_for_time(line):
             pass 
     return run_id, milli_value
 
+def parse_result_line(line):
+    """
+    将一整行 RESULT 输出解析为 {key: value} 字典 (值保持为字符串)。
+    不含 '=' 的字段 (例如开头的 "RESULT") 会被忽略。
+    """
+    fields = {}
+    for token in line.rstrip("\n").split("\t"):
+        if "=" not in token:
+            continue
+        key, value = token.split("=", 1)
+        fields[key.strip()] = value.strip()
+    return fields
+
+def read_first_block_results(filepath):
+    """
+    读取一个 stdout 文件中第一个 C++ 执行块 (即 no perf round) 的所有 RESULT 行。
+    perf group 的运行会把后续执行块追加到同一个文件，因此当 run id 回到 0 时停止。
+    configwarning 行会被跳过。返回 parse_result_line 得到的字典列表。
+    """
+    records = []
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.startswith("RESULT"):
+                continue
+            fields = parse_result_line(line)
+            if fields.get("configwarning") == "1" or "run" not in fields:
+                continue
+            try:
+                run_id = int(fields["run"])
+            except ValueError:
+                continue
+            if run_id == 0 and records:
+                break # 下一个执行块开始了
+            records.append(fields)
+    return records
+
+def collect_wall_time_samples(results_stdout_dir):
+    """
+    与 calculate_average_wall_time 使用同样的文件和同样的取舍 (丢弃 run=0)，
+    但返回每次内部运行的 milli 样本，而不是平均值，供统计检验使用。
+    返回字典: {(gen, type): {algo_name: {"milli": [...], "freqratio": [...], "pkgjoules": [...], "dramjoules": [...],
+                                          "size": int, "threads": int, "machine": str}}}
+    """
+    samples = defaultdict(dict)
+    if not os.path.isdir(results_stdout_dir):
+        print(f"Error: results_stdout directory not found: {results_stdout_dir}", file=sys.stderr)
+        return samples
+
+    filename_pattern = re.compile(r'^(benchmark_.*?)_([^_]+)_([^_]+)_stdout\.txt$')
+    for filepath in sorted(glob.glob(os.path.join(results_stdout_dir, "benchmark_*_stdout.txt"))):
+        match = filename_pattern.match(os.path.basename(filepath))
+        if not match:
+            continue
+        algo_name, generator, data_type = match.groups()
+        try:
+            records = read_first_block_results(filepath)
+        except Exception as e:
+            print(f"Error processing file {filepath}: {e}", file=sys.stderr)
+            continue
+
+        timed = [r for r in records if r.get("run") != "0"] or records # 只有一次运行时保留它
+        milli_values = []
+        # 与 milli 一一对应的可选字段，没有该字段 (MEASURE_FREQUENCY / MEASURE_ENERGY 关闭) 时为 None
+        optional_values = {key: [] for key in OPTIONAL_SAMPLE_FIELDS}
+        for r in timed:
+            try:
+                milli_values.append(float(r["milli"]))
+            except (KeyError, ValueError):
+                continue
+            for key, values in optional_values.items():
+                try:
+                    values.append(float(r[key]))
+                except (KeyError, ValueError):
+                    values.append(None)
+        if not milli_values:
+            continue
+
+        first = timed[0]
+        samples[(generator, data_type)][algo_name] = {
+            "milli": milli_values,
+            **optional_values,
+            "size": int(first.get("size", 0) or 0),
+            "threads": int(first.get("threads", 0) or 0),
+            "machine": first.get("machine", ""),
+        }
+    return samples
+
 def calculate_average_wall_time(results_stdout_dir):
     """
     分析 results_stdout 目录下的所有 benchmark_*_stdout.txt 文件。
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# bench_server_driver.py
+# 驱动 benchmark_server (src/benchmark/benchmark_server.cpp) 的 --server 模式：只启动一个进程，通过 stdin 管道
+# 为每个 (生成器, 数据类型) 发送一个包含所有算法的任务，输入只生成一次，之后每次运行 / 每个算法都从常驻副本恢复。
+# RESULT 行按算法拆分写入 results_stdout/benchmark_<algo>_<gen>_<type>_stdout.txt，
+# 与 run_time_perfFIFO.sh 的目录结构相同，analysis_scripts/analyze_main.py 等可以直接使用。
+# perf stat 分组仍需每个算法一个进程，请继续使用 run_time_perfFIFO.sh。
+import os
+import sys
+import time
+import shutil
+import argparse
+import subprocess
+
+from env_fingerprint import fingerprint
+
+# RESULT 行中的 algo= (Algorithm::name()) -> 单算法可执行文件名，使结果文件名与原有运行一致
+RESULT_FILE_NAMES = {
+    "ips4oparallel": "benchmark_ips4oparallel",
+    "ips2raparallel": "benchmark_ips2raparallel",
+    "mcstlmwm": "benchmark_mcstlmwm",
+    "mcstlbq": "benchmark_mcstlbq",
+    "parlay_sample_sort": "benchmark_plss",
+    "parlay_integer_sort": "benchmark_plis",
+    "stdsort": "benchmark_stdsort",
+}
+
+class Logger:
+    """
+    同时输出到终端与日志文件 (与 bash runner 中的 '| tee -a "${LOG_FILE}"' 相同)。
+    """
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self, message, error=False):
+        print(message, file=sys.stderr if error else sys.stdout, flush=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(message + "\n")
+
+def result_fields(line):
+    return dict(token.split("=", 1) for token in line.rstrip("\n").split("\t") if "=" in token)
+
+class BenchmarkServer:
+    """
+    一个 --server 进程。submit() 发送一行任务并读取输出直到对应的 JOBDONE 行，RESULT / LATENCY 行交给 on_result，
+    其它行交给 on_other。
+    """
+    def __init__(self, command, stderr_file, env):
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=stderr_file,
+                                        text=True, bufsize=1, env=env)
+        ready = self.process.stdout.readline()
+        if not ready.startswith("SERVER\tready"):
+            self.process.kill()
+            raise RuntimeError(f"server did not start (first line: {ready.strip() or '<EOF>'})")
+        self.ready_line = ready.strip()
+
+    def submit(self, job, on_result, on_other):
+        self.process.stdin.write(" ".join(f"{key}={value}" for key, value in job.items()) + "\n")
+        self.process.stdin.flush()
+        for line in self.process.stdout:
+            if line.startswith("RESULT") or line.startswith("LATENCY"):
+                on_result(line)
+            elif line.startswith("JOBDONE"):
+                return result_fields(line)
+            else:
+                on_other(line.rstrip("\n"))
+        raise RuntimeError(f"server exited with code {self.process.wait()} during job {job.get('id')}")
+
+    def command(self, text):
+        self.process.stdin.write(text + "\n")
+        self.process.stdin.flush()
+        return self.process.stdout.readline().strip()
+
+    def close(self):
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.write("quit\n")
+                self.process.stdin.close()
+            except BrokenPipeError:
+                pass
+        return self.process.wait()
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a sweep through one benchmark_server process: every input is generated once and shared by "
+                    "all runs and algorithms; RESULT lines are split into the usual per-algorithm stdout files.")
+    parser.add_argument("--build-dir", default=os.path.expanduser("~/parallel-bench-suite/build"))
+    parser.add_argument("--binary", default="benchmark_server")
+    parser.add_argument("--algos", nargs="+", default=["ips4oparallel", "ips2raparallel", "mcstlmwm", "mcstlbq",
+                                                       "parlay_sample_sort", "parlay_integer_sort"],
+                        help="Algorithm names as printed in RESULT lines (must be linked into the server binary).")
+    parser.add_argument("--generators", nargs="+", default=["RNAcentral", "SDSS"])
+    parser.add_argument("--datatypes", nargs="+", default=["double"])
+    parser.add_argument("--min-log", type=int, default=32)
+    parser.add_argument("--max-log", type=int, default=32)
+    parser.add_argument("--runs", type=int, default=6, help="Internal runs per algorithm (-r), run 0 is the warm-up.")
+    parser.add_argument("--threads", type=int, default=None, help="Default: all cores.")
+    parser.add_argument("--machine", default="142")
+    parser.add_argument("--numactl", default="-i all", help="numactl arguments, empty to run without numactl.")
+    parser.add_argument("--cache-bytes", type=int, default=None,
+                        help="INPUT_CACHE_BYTES for the server (default 16 GiB, LRU eviction beyond that).")
+    parser.add_argument("--indirect", action="store_true",
+                        help="Sort (key, index) pairs and gather the records (--indirect of the benchmark).")
+    parser.add_argument("--batch", type=int, default=0,
+                        help="Elements per small array for the batched mode (--batch of the benchmark), 0 = off.")
+    parser.add_argument("--cache-mode", choices=["default", "cold", "warm"], default="default",
+                        help="Cache state of the input before every run (--cache of the benchmark).")
+    parser.add_argument("--output-base", default=None, help="Default: <repo>/run_record_server")
+    args = parser.parse_args()
+
+    threads = args.threads or os.cpu_count() or 1
+    if args.batch and args.indirect:
+        print("Error: --batch cannot be combined with --indirect", file=sys.stderr)
+        return 1
+    executable = os.path.join(args.build_dir, args.binary)
+    if not os.access(executable, os.X_OK):
+        print(f"Error: Executable not found or not executable: {executable}", file=sys.stderr)
+        return 1
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    base = args.output_base or os.path.join(script_dir, "..", "run_record_server")
+    timestamp = time.strftime("%Y-%m-%d_%H_%M_%S")
+    parent = os.path.abspath(os.path.join(base, f"server_run_{timestamp}"))
+    dirs = {"log": os.path.join(parent, "logs"), "txt": os.path.join(parent, "results_stdout"),
+            "err": os.path.join(parent, "results_stderr")}
+    try:
+        for path in dirs.values():
+            os.makedirs(path, exist_ok=True)
+    except OSError as e:
+        print(f"Error: Failed to create output subdirs in {parent}: {e}", file=sys.stderr)
+        return 1
+    log = Logger(os.path.join(dirs["log"], f"run_{timestamp}.log"))
+    with open(os.path.join(parent, "run_metadata.txt"), "w") as f:
+        f.write(f"machine={args.machine}\ntimestamp={timestamp}\nthreads={threads}\nmode=server\n"
+                f"indirect={str(args.indirect).lower()}\nbatch={args.batch}\ncache_mode={args.cache_mode}\n")
+        f.writelines(f"{key}={value}\n" for key, value in fingerprint().items())
+
+    command = [executable, "--server", "-m", args.machine, "-t", str(threads), "-b", str(args.min_log),
+               "-e", str(args.max_log), "-r", str(args.runs), "-v", "vector"]
+    if args.numactl and shutil.which("numactl"):
+        command = ["numactl"] + args.numactl.split() + command
+    env = dict(os.environ, ENABLE_PERF_CONTROL="false", PARLAY_NUM_THREADS=str(threads))
+    if args.cache_bytes is not None:
+        env["INPUT_CACHE_BYTES"] = str(args.cache_bytes)
+
+    log(f"Server sweep started at {time.strftime('%Y-%m-%d %H:%M:%S')}")
+    log(f"Output will be stored in: {parent}")
+    log(f"Executing: {' '.join(command)}")
+    stderr_file = open(os.path.join(dirs["err"], "server_stderr.err"), "w")
+    try:
+        server = BenchmarkServer(command, stderr_file, env)
+    except (OSError, RuntimeError) as e:
+        log(f"Error: {e}", error=True)
+        stderr_file.close()
+        return 1
+    log(server.ready_line)
+
+    failures = 0
+    started = time.monotonic()
+    try:
+        jobs = [(gen, data_type) for gen in args.generators for data_type in args.datatypes]
+        for index, (gen, data_type) in enumerate(jobs, 1):
+            outputs = {}
+            def on_result(line):
+                algo = result_fields(line).get("algo", "unknown")
+                name = RESULT_FILE_NAMES.get(algo, f"benchmark_{algo}")
+                if name not in outputs:
+                    outputs[name] = open(os.path.join(dirs["txt"], f"{name}_{gen}_{data_type}_stdout.txt"), "a")
+                outputs[name].write(line)
+            job = {"id": index, "algos": ",".join(args.algos), "generators": gen, "datatypes": data_type,
+                   "indirect": int(args.indirect), "batch": args.batch, "cache": args.cache_mode}
+            log(f"[{index}/{len(jobs)}] {gen} {data_type}: {', '.join(args.algos)}")
+            try:
+                done = server.submit(job, on_result, log)
+            finally:
+                for f in outputs.values():
+                    f.close()
+            if done.get("status") != "ok":
+                failures += 1
+                log(f"  -> error: {done.get('message', 'unknown')}", error=True)
+            else:
+                log(f"  -> ok in {float(done.get('milli', 0)) / 1000:.1f}s, cached inputs reused "
+                    f"{done.get('cachehits')} times, generated {done.get('cachemisses')}")
+        log(server.command("cache"))
+    except (RuntimeError, BrokenPipeError) as e:
+        log(f"Error: {e}", error=True)
+        failures += 1
+    finally:
+        returncode = server.close()
+        stderr_file.close()
+
+    log(f"Server sweep finished in {time.monotonic() - started:.1f}s (server exit {returncode}, {failures} failed jobs).")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+# datatype_sizes.py
+# -d 数据类型的 sizeof(T)，以及 harness 对 -b/-e 实际使用的数组大小 (与 src/benchmark.hpp 的 logSizes 相同)。
+# runtime_model.py 与 sweep_orchestrator.py 共用。
+
+# 与 src/pbbs_generators/data_types.h 中的类型大小一致；string 长度不定，不在其中
+DATATYPE_BYTES = {"byte": 100, "uint32": 4, "uint64": 8, "double": 8, "pair": 16, "qtuple": 32,
+                  **{f"rec{width}": width for width in (16, 32, 64, 128, 256)}}
+# sizeof(std::string) (libstdc++)；字符本身在堆上
+STRING_OBJECT_BYTES = 32
+DEFAULT_ELEMENT_BYTES = 8
+
+def sizeof_type(data_type):
+    """harness 中 sizeof(T)：决定 -e 对应的元素数。"""
+    if data_type == "string":
+        return STRING_OBJECT_BYTES
+    return DATATYPE_BYTES.get(data_type, DEFAULT_ELEMENT_BYTES)
+
+def elements_for_log(log_bytes, data_type):
+    """
+    -b/-e 是字节数的对数：logSizes 排序 2^(e - ceil(log2(sizeof T))) 个元素，e 小于 ceil(log2(sizeof T)) 时为 2^1。
+    """
+    type_log = (sizeof_type(data_type) - 1).bit_length()
+    return 1 << (log_bytes - type_log if log_bytes >= type_log else 1)
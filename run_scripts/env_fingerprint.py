@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# env_fingerprint.py
+# 输出当前机器的环境指纹 (每行 key=value)，由 runner 追加到 run_metadata.txt，
+# 以及每个配置运行前的快照 (--quick)。analysis_scripts/run_provenance.py 用这些键做过滤和噪声标记。
+import os
+import re
+import sys
+import glob
+import time
+import argparse
+import platform
+
+def read_text(path, default=""):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return default
+
+def bracketed_choice(text):
+    """THP 等 sysfs 文件的格式是 "always [madvise] never"，返回方括号中的值。"""
+    match = re.search(r'\[([^\]]+)\]', text)
+    return match.group(1) if match else text
+
+def cpufreq_values(filename):
+    """所有在线 CPU 的 cpufreq/<filename>，去重后以逗号连接 (通常只有一个值)。"""
+    values = sorted({read_text(path) for path in glob.glob(f"/sys/devices/system/cpu/cpu[0-9]*/cpufreq/{filename}")} - {""})
+    return ",".join(values)
+
+def turbo_state():
+    """
+    intel_pstate 的 no_turbo (1 = 关闭)，或 acpi-cpufreq / amd-pstate 的 cpufreq/boost (1 = 开启)。
+    """
+    no_turbo = read_text("/sys/devices/system/cpu/intel_pstate/no_turbo")
+    if no_turbo in ("0", "1"):
+        return "off" if no_turbo == "1" else "on"
+    boost = read_text("/sys/devices/system/cpu/cpufreq/boost")
+    if boost in ("0", "1"):
+        return "on" if boost == "1" else "off"
+    return "unknown"
+
+def cpu_model_and_nominal_mhz():
+    model, nominal = "", ""
+    cpuinfo = read_text("/proc/cpuinfo")
+    match = re.search(r'^model name\s*:\s*(.+)$', cpuinfo, re.MULTILINE)
+    if match:
+        model = match.group(1).strip()
+        ghz = re.search(r'@\s*([\d.]+)\s*GHz', model)
+        if ghz:
+            nominal = str(int(float(ghz.group(1)) * 1000))
+    if not nominal:
+        # intel_pstate 提供 base_frequency；其它驱动只有最大频率，不能代表标称频率，宁可留空
+        base = read_text("/sys/devices/system/cpu/cpu0/cpufreq/base_frequency")
+        if base.isdigit():
+            nominal = str(int(base) // 1000)
+    return model, nominal
+
+def cpu_times():
+    """返回 {cpu 编号: (busy, total)}，来自 /proc/stat (单位 jiffies)。"""
+    times = {}
+    for line in read_text("/proc/stat").splitlines():
+        if not re.match(r'^cpu\d+ ', line):
+            continue
+        name, *fields = line.split()
+        values = [int(v) for v in fields]
+        idle = values[3] + (values[4] if len(values) > 4 else 0) # idle + iowait
+        total = sum(values[:8])
+        times[int(name[3:])] = (total - idle, total)
+    return times
+
+def busy_cores(interval_s, threshold=0.10):
+    """
+    interval_s 内忙碌比例超过 threshold 的 CPU 个数，以及所有 CPU 的平均忙碌比例 (运行前的背景负载)。
+    """
+    before = cpu_times()
+    time.sleep(interval_s)
+    after = cpu_times()
+    loaded, shares = 0, []
+    for cpu, (busy, total) in after.items():
+        if cpu not in before:
+            continue
+        delta_total = total - before[cpu][1]
+        share = (busy - before[cpu][0]) / delta_total if delta_total > 0 else 0.0
+        shares.append(share)
+        loaded += share > threshold
+    return loaded, (sum(shares) / len(shares) if shares else 0.0)
+
+def current_mhz():
+    values = [int(v) for v in (read_text(p) for p in glob.glob("/sys/devices/system/cpu/cpu[0-9]*/cpufreq/scaling_cur_freq"))
+              if v.isdigit()]
+    return str(sum(values) // len(values) // 1000) if values else ""
+
+def fingerprint(quick=False, sample_s=0.5):
+    """
+    quick=True 时只采集随时间变化的部分 (负载、当前频率)，用于每个配置运行前的快照。
+    """
+    loaded, busy = busy_cores(sample_s)
+    values = {
+        "loadavg_1m": read_text("/proc/loadavg").split(" ")[0],
+        "loaded_cores": str(loaded),
+        "background_busy": f"{busy:.3f}",
+        "cur_mhz": current_mhz(),
+        "governor": cpufreq_values("scaling_governor"),
+        "turbo": turbo_state(),
+    }
+    if quick:
+        return values
+    model, nominal = cpu_model_and_nominal_mhz()
+    meminfo = read_text("/proc/meminfo")
+    available = re.search(r'^MemAvailable:\s*(\d+)', meminfo, re.MULTILINE)
+    values.update({
+        "kernel": platform.release(),
+        "hostname": platform.node(),
+        "cpu_model": model,
+        "nominal_mhz": nominal,
+        "online_cpus": str(os.cpu_count() or 0),
+        "cpufreq_driver": cpufreq_values("scaling_driver"),
+        "epp": cpufreq_values("energy_performance_preference"),
+        "smt": read_text("/sys/devices/system/cpu/smt/control", "unknown"),
+        "smt_active": read_text("/sys/devices/system/cpu/smt/active", "unknown"),
+        "thp_enabled": bracketed_choice(read_text("/sys/kernel/mm/transparent_hugepage/enabled", "unknown")),
+        "thp_defrag": bracketed_choice(read_text("/sys/kernel/mm/transparent_hugepage/defrag", "unknown")),
+        "numa_balancing": read_text("/proc/sys/kernel/numa_balancing", "unknown"),
+        "numa_nodes": str(len(glob.glob("/sys/devices/system/node/node[0-9]*"))),
+        "mem_available_kb": available.group(1) if available else "",
+        "perf_event_paranoid": read_text("/proc/sys/kernel/perf_event_paranoid", "unknown"),
+    })
+    return values
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Print an environment fingerprint (governor, turbo, SMT, THP, background load, kernel, ...) as "
+                    "key=value lines for run_metadata.txt.")
+    parser.add_argument("--quick", action="store_true",
+                        help="Only the time-varying part (load, current frequency), for per-configuration snapshots.")
+    parser.add_argument("--sample-s", type=float, default=0.5,
+                        help="Interval over which busy cores are measured (default: 0.5 s).")
+    parser.add_argument("--prefix", default="", help="Prefix for every key (e.g. 'post_').")
+    args = parser.parse_args()
+    for key, value in fingerprint(args.quick, args.sample_s).items():
+        print(f"{args.prefix}{key}={value}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
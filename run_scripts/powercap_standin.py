@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# powercap_standin.py
+# 在没有 RAPL 的机器 (虚拟机、ARM、没有 root) 上维护一个与 /sys/class/powercap 结构相同的目录树，
+# 让 src/energy_counter.hpp (POWERCAP_ROOT=<root>) 和整条能耗分析链路可以照常运行。
+# 能耗是按 /proc/stat 的 CPU 忙碌比例线性插值出来的估计值 (idle 到 busy 功率)，不是测量值；
+# 结果只能用来验证流程，或者在同一台机器上粗略比较算法，不能和真实 RAPL 数据混在一起比较。
+import os
+import sys
+import time
+import signal
+import argparse
+
+DEFAULT_MAX_RANGE_UJ = 262143328850 # 常见 Intel package 域的量程
+
+def cpu_busy_total():
+    """/proc/stat 第一行 (所有 CPU 之和) 的 (busy, total) jiffies。"""
+    with open("/proc/stat", "r") as f:
+        values = [int(v) for v in f.readline().split()[1:]]
+    idle = values[3] + (values[4] if len(values) > 4 else 0) # idle + iowait
+    total = sum(values[:8])
+    return total - idle, total
+
+def write_atomic(path, text):
+    """先写临时文件再 rename，读者不会读到写了一半的计数器。"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def create_tree(root, max_range_uj, with_dram):
+    """
+    建立 intel-rapl/intel-rapl:0 (package-0) 以及可选的 intel-rapl:0/intel-rapl:0:0 (dram)。
+    返回 {域名: energy_uj 路径}。
+    """
+    package_dir = os.path.join(root, "intel-rapl", "intel-rapl:0")
+    zones = {"package": package_dir}
+    if with_dram:
+        zones["dram"] = os.path.join(package_dir, "intel-rapl:0:0")
+    paths = {}
+    for domain, zone_dir in zones.items():
+        os.makedirs(zone_dir, exist_ok=True)
+        write_atomic(os.path.join(zone_dir, "name"), ("package-0" if domain == "package" else "dram") + "\n")
+        write_atomic(os.path.join(zone_dir, "max_energy_range_uj"), f"{max_range_uj}\n")
+        energy_path = os.path.join(zone_dir, "energy_uj")
+        if not os.path.exists(energy_path):
+            write_atomic(energy_path, "0\n")
+        paths[domain] = energy_path
+    return paths
+
+def read_counter(path):
+    try:
+        with open(path, "r") as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Maintain a /sys/class/powercap look-alike whose package/dram energy_uj counters advance with an "
+                    "estimate from CPU utilization, for machines without RAPL. Point the benchmark at it with "
+                    "POWERCAP_ROOT=<root>.")
+    parser.add_argument("--root", required=True, help="Directory of the stand-in tree.")
+    parser.add_argument("--idle-watts", type=float, default=20.0, help="Package power with all CPUs idle (default: 20).")
+    parser.add_argument("--busy-watts", type=float, default=150.0, help="Package power with all CPUs busy (default: 150).")
+    parser.add_argument("--dram-watts", type=float, default=8.0,
+                        help="Constant DRAM power; 0 omits the dram zone (default: 8).")
+    parser.add_argument("--interval", type=float, default=0.01, help="Update interval in seconds (default: 0.01).")
+    parser.add_argument("--max-range-uj", type=int, default=DEFAULT_MAX_RANGE_UJ,
+                        help="Counter wraparound range; use a small value to exercise the wraparound handling.")
+    parser.add_argument("--duration", type=float, default=0.0,
+                        help="Stop after this many seconds (default: run until SIGTERM/SIGINT).")
+    parser.add_argument("--init-only", action="store_true", help="Only create the tree with zeroed counters.")
+    args = parser.parse_args()
+
+    if args.busy_watts < args.idle_watts or args.idle_watts < 0 or args.dram_watts < 0:
+        print("Error: need 0 <= --idle-watts <= --busy-watts and --dram-watts >= 0.", file=sys.stderr)
+        return 1
+    try:
+        paths = create_tree(args.root, args.max_range_uj, args.dram_watts > 0)
+    except OSError as e:
+        print(f"Error creating stand-in tree below {args.root}: {e}", file=sys.stderr)
+        return 1
+    if args.init_only:
+        return 0
+
+    stop = []
+    signal.signal(signal.SIGTERM, lambda *_: stop.append(True))
+    signal.signal(signal.SIGINT, lambda *_: stop.append(True))
+    counters = {domain: read_counter(path) for domain, path in paths.items()}
+    busy_before, total_before = cpu_busy_total()
+    busy_share = 0.0
+    last = time.monotonic()
+    started = last
+    while not stop and (args.duration <= 0 or last - started < args.duration):
+        time.sleep(args.interval)
+        now = time.monotonic()
+        busy_after, total_after = cpu_busy_total()
+        delta_total = total_after - total_before
+        # jiffies 的分辨率比 interval 粗，没有新 jiffies 时沿用上一段的忙碌比例
+        if delta_total > 0:
+            busy_share = (busy_after - busy_before) / delta_total
+            busy_before, total_before = busy_after, total_after
+        elapsed = now - last
+        last = now
+        watts = {"package": args.idle_watts + (args.busy_watts - args.idle_watts) * busy_share,
+                 "dram": args.dram_watts}
+        for domain, path in paths.items():
+            counters[domain] = (counters[domain] + int(watts[domain] * elapsed * 1e6)) % args.max_range_uj
+            write_atomic(path, f"{counters[domain]}\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
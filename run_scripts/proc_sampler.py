@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# proc_sampler.py
+# 在 benchmark 运行的同时以毫秒级间隔轮询 /proc/<pid>/stat、status 与 smaps_rollup，
+# 记录 RSS / 缺页 / CPU 时间的时间序列，并跟踪 benchmark 的 stdout 文件，给每个 RESULT 行打上时间戳，
+# 以便 analyze_memory_only.py 按内部运行 (run=0,1,...) 切分。结果以压缩的 .npz 保存。
+import os
+import re
+import sys
+import time
+import argparse
+from array import array
+
+import numpy as np
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+STATUS_FIELDS = {b"VmRSS:": "rss_kb", b"RssAnon:": "anon_kb", b"RssFile:": "file_kb", b"VmHWM:": "hwm_kb"}
+RESULT_RUN_PATTERN = re.compile(r'\brun=(\d+)\b')
+RESULT_SIZE_PATTERN = re.compile(r'\bsize=(\d+)\b')
+
+def children_of(pid):
+    """
+    读取 /proc/<pid>/task/*/children 得到直接子进程 (需要 CONFIG_PROC_CHILDREN，现代发行版默认开启)。
+    """
+    children = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children", "r") as f:
+                children.extend(int(c) for c in f.read().split())
+    except OSError:
+        pass
+    return children
+
+def process_name(pid):
+    try:
+        with open(f"/proc/{pid}/comm", "r") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+def find_target(root_pid, match, timeout_s):
+    """
+    runner 启动的是 /usr/bin/time -> bash -> numactl -> benchmark 这样的进程链，
+    在 root_pid 的子孙进程中寻找名字包含 match 的那个进程。root_pid 退出或超时时返回 None。
+    """
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if not os.path.exists(f"/proc/{root_pid}"):
+            return None
+        pending = [root_pid]
+        while pending:
+            pid = pending.pop()
+            # comm 最多 15 个字符，所以两边都截断后再比较
+            if match[:15] in process_name(pid) or (pid == root_pid and match == ""):
+                return pid
+            pending.extend(children_of(pid))
+        time.sleep(0.001)
+    return None
+
+def read_stat(fd):
+    """
+    解析 /proc/<pid>/stat (comm 可能含空格，从最后一个 ')' 之后开始切分)。返回 (minflt, majflt, utime, stime, threads)。
+    """
+    data = os.pread(fd, 4096, 0)
+    fields = data[data.rindex(b")") + 2:].split()
+    return int(fields[7]), int(fields[9]), int(fields[11]), int(fields[12]), int(fields[17])
+
+def read_status(fd):
+    values = {}
+    for line in os.pread(fd, 8192, 0).splitlines():
+        key = line.split(None, 1)[0] if line else b""
+        name = STATUS_FIELDS.get(key)
+        if name:
+            values[name] = int(line.split()[1])
+    return values
+
+def read_smaps_rollup(fd):
+    """
+    返回 (Pss kB, AnonHugePages kB)。smaps_rollup 需要遍历整个地址空间的页表，代价远高于 status，所以降频读取。
+    """
+    pss = huge = -1
+    for line in os.pread(fd, 8192, 0).splitlines():
+        if line.startswith(b"Pss:"):
+            pss = int(line.split()[1])
+        elif line.startswith(b"AnonHugePages:"):
+            huge = int(line.split()[1])
+    return pss, huge
+
+class StdoutFollower:
+    """
+    增量读取 benchmark 的 stdout 文件，记录每个 RESULT 行 (一次内部运行结束) 被看到的时间。
+    """
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.partial = b""
+
+    def poll(self, now_ns, run_ids, run_sizes, run_end_ns):
+        if not self.path:
+            return
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self.offset)
+                data = f.read()
+        except OSError:
+            return
+        if not data:
+            return
+        self.offset += len(data)
+        lines = (self.partial + data).split(b"\n")
+        self.partial = lines.pop()
+        for raw in lines:
+            line = raw.decode("utf-8", errors="replace")
+            if not line.startswith("RESULT") or "configwarning=1" in line:
+                continue
+            run_match = RESULT_RUN_PATTERN.search(line)
+            size_match = RESULT_SIZE_PATTERN.search(line)
+            if run_match:
+                run_ids.append(int(run_match.group(1)))
+                run_sizes.append(int(size_match.group(1)) if size_match else 0)
+                run_end_ns.append(now_ns)
+
+def sample(pid, interval_ms, smaps_every, follower):
+    """
+    以固定节拍采样直到进程退出。返回各列的 array。
+    """
+    columns = {name: array('q') for name in ("t_us", "rss_kb", "anon_kb", "file_kb", "hwm_kb", "pss_kb", "anon_huge_kb",
+                                             "minflt", "majflt", "utime_ticks", "stime_ticks", "threads")}
+    run_ids, run_sizes, run_end_ns = array('q'), array('q'), array('q')
+    try:
+        stat_fd = os.open(f"/proc/{pid}/stat", os.O_RDONLY)
+        status_fd = os.open(f"/proc/{pid}/status", os.O_RDONLY)
+        smaps_fd = os.open(f"/proc/{pid}/smaps_rollup", os.O_RDONLY) if smaps_every > 0 else -1
+    except OSError as e:
+        print(f"[proc_sampler] Error: cannot open /proc/{pid}: {e}", file=sys.stderr)
+        return columns, (run_ids, run_sizes, run_end_ns), 0
+    start_ns = time.monotonic_ns()
+    interval_ns = int(interval_ms * 1_000_000)
+    next_ns = start_ns
+    count = 0
+    pss, huge = -1, -1
+    try:
+        while True:
+            now_ns = time.monotonic_ns()
+            try:
+                minflt, majflt, utime, stime, threads = read_stat(stat_fd)
+                status = read_status(status_fd)
+                if smaps_fd >= 0 and count % smaps_every == 0:
+                    pss, huge = read_smaps_rollup(smaps_fd)
+            except (OSError, ValueError, IndexError):
+                break # 进程已退出 (或变成僵尸进程，status 不再有 VmRSS)
+            if "rss_kb" not in status:
+                break
+            columns["t_us"].append((now_ns - start_ns) // 1000)
+            for name in ("rss_kb", "anon_kb", "file_kb", "hwm_kb"):
+                columns[name].append(status.get(name, -1))
+            columns["pss_kb"].append(pss)
+            columns["anon_huge_kb"].append(huge)
+            columns["minflt"].append(minflt)
+            columns["majflt"].append(majflt)
+            columns["utime_ticks"].append(utime)
+            columns["stime_ticks"].append(stime)
+            columns["threads"].append(threads)
+            if count % 10 == 0:
+                follower.poll((now_ns - start_ns), run_ids, run_sizes, run_end_ns)
+            count += 1
+            next_ns += interval_ns
+            delay = next_ns - time.monotonic_ns()
+            if delay > 0:
+                time.sleep(delay / 1e9)
+            else:
+                next_ns = time.monotonic_ns() # 跟不上时不追赶，避免连续忙等
+    finally:
+        for fd in (stat_fd, status_fd, smaps_fd):
+            if fd >= 0:
+                os.close(fd)
+    follower.poll(time.monotonic_ns() - start_ns, run_ids, run_sizes, run_end_ns)
+    return columns, (run_ids, run_sizes, run_end_ns), count
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Sidecar sampler: poll /proc/<pid>/stat, status and smaps_rollup of a running benchmark at "
+                    "millisecond granularity and store the RSS / page fault timeline as a compressed .npz.")
+    parser.add_argument("--root-pid", type=int, required=True,
+                        help="PID of the process started by the runner (e.g. /usr/bin/time); the benchmark is searched among its descendants.")
+    parser.add_argument("--match", default="benchmark_",
+                        help="Substring of the benchmark process name (default: benchmark_).")
+    parser.add_argument("--output", required=True, help="Output .npz file.")
+    parser.add_argument("--stdout-file", default=None,
+                        help="Benchmark stdout file to follow; every RESULT line marks the end of an internal run.")
+    parser.add_argument("--interval-ms", type=float, default=1.0, help="Sampling interval in ms (default: 1).")
+    parser.add_argument("--smaps-every", type=int, default=20,
+                        help="Read smaps_rollup (PSS, THP) only every N-th sample, 0 = never (default: 20). "
+                             "It walks the page tables and is much more expensive than status.")
+    parser.add_argument("--wait-timeout", type=float, default=60.0,
+                        help="Seconds to wait for the benchmark process to appear (default: 60).")
+    args = parser.parse_args()
+
+    pid = find_target(args.root_pid, args.match, args.wait_timeout)
+    if pid is None:
+        print(f"[proc_sampler] Error: no process matching '{args.match}' below PID {args.root_pid}.", file=sys.stderr)
+        return 1
+
+    follower = StdoutFollower(args.stdout_file) # runner 用 '>' 重新创建 stdout 文件，所以从头开始读
+    wall_start = time.time()
+    columns, (run_ids, run_sizes, run_end_ns), count = sample(pid, args.interval_ms, args.smaps_every, follower)
+
+    data = {name: np.array(values, dtype=np.int64) for name, values in columns.items()}
+    data["threads"] = data["threads"].astype(np.int32)
+    data["run_id"] = np.array(run_ids, dtype=np.int32)
+    data["run_size"] = np.array(run_sizes, dtype=np.int64)
+    data["run_end_us"] = np.array(run_end_ns, dtype=np.int64) // 1000
+    data["meta"] = np.array([pid, int(args.interval_ms * 1000), CLOCK_TICKS, int(wall_start)], dtype=np.int64)
+    try:
+        np.savez_compressed(args.output, **data)
+    except OSError as e:
+        print(f"[proc_sampler] Error writing {args.output}: {e}", file=sys.stderr)
+        return 1
+    duration = data["t_us"][-1] / 1e6 if count else 0.0
+    print(f"[proc_sampler] PID {pid}: {count} samples over {duration:.1f}s, {len(run_ids)} run marks -> {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#!/bin/bash
+
+# ==============================================================================
+# Benchmark Script with the LD_PRELOAD Allocation Tracer (liballoc_trace.so).
+# Every malloc/free/mmap/munmap/madvise inside the profiled section
+# (the same section PerfControl::start_profiling covers, warm-up run 0 excluded)
+# is written to a binary log; analyze_alloc_trace.py turns it into
+# peak scratch bytes per element, allocation counts per run and churn.
+# No perf is needed for this round.
+# ==============================================================================
+
+# --- Configuration ---
+BUILD_DIR="$HOME/parallel-bench-suite/build" # Make sure this path is correct
+ALLOC_TRACE_LIB="${BUILD_DIR}/liballoc_trace.so" # Built by the 'alloc_trace' CMake target
+ALGOS=("benchmark_dovetailsort" "benchmark_ips4oparallel" "benchmark_plss" "benchmark_plis" "benchmark_ips2raparallel" "benchmark_donothing" "benchmark_aspasparallel" "benchmark_mcstlmwm")
+DATATYPES=(pair)
+GENERATORS=(gen_graph)
+MIN_LOG=32
+MAX_LOG=32
+NUM_RUNS=6
+MACHINE="cheetah"
+# Maximum number of events kept per internal run (40 bytes each, the buffer is MAP_NORESERVE)
+ALLOC_TRACE_CAPACITY=$((8 * 1024 * 1024))
+
+# System Setup & Directory Setup
+TOTAL_CORES=$(nproc); if [ -z "$TOTAL_CORES" ]; then TOTAL_CORES=1; fi
+SCRIPT_ABSOLUTE_DIR=$(cd -- "$( dirname -- "${BASH_SOURCE[0]}" )" &> /dev/null && pwd); if [ -z "${SCRIPT_ABSOLUTE_DIR}" ]; then echo "Error: Could not determine script directory."; exit 1; fi
+BASE_OUTPUT_DIR_REL="${SCRIPT_ABSOLUTE_DIR}/../run_record_alloc"; BASE_OUTPUT_DIR=$(mkdir -p "${BASE_OUTPUT_DIR_REL}" && cd "${BASE_OUTPUT_DIR_REL}" &> /dev/null && pwd); if [ $? -ne 0 ] || [ -z "${BASE_OUTPUT_DIR}" ]; then echo "Error: Could not resolve/create base output dir: ${BASE_OUTPUT_DIR_REL}"; exit 1; fi
+RUN_TIMESTAMP=$(date '+%Y-%m-%d_%H_%M_%S'); PARENT_DIR="${BASE_OUTPUT_DIR}/alloc_trace_run_${RUN_TIMESTAMP}"
+
+LOG_DIR="${PARENT_DIR}/logs";
+TXT_DIR="${PARENT_DIR}/results_stdout";
+ERR_DIR="${PARENT_DIR}/results_stderr";
+TRACE_DIR="${PARENT_DIR}/alloc_traces"  # For the binary allocation logs
+
+mkdir -p "${LOG_DIR}" "${TXT_DIR}" "${ERR_DIR}" "${TRACE_DIR}"; if [ $? -ne 0 ]; then echo "Error: Failed to create output subdirs in ${PARENT_DIR}"; exit 1; fi
+LOG_FILE="${LOG_DIR}/run_${RUN_TIMESTAMP}.log"
+
+echo "Benchmark Script (Allocation Trace) Started at $(date '+%Y-%m-%d %H:%M:%S')" | tee -a "${LOG_FILE}"
+echo "Output will be stored in: ${PARENT_DIR}" | tee -a "${LOG_FILE}"
+
+if [ ! -f "${ALLOC_TRACE_LIB}" ]; then
+    echo "CRITICAL ERROR: ${ALLOC_TRACE_LIB} not found. Build it with 'make alloc_trace' in ${BUILD_DIR}. Exiting." | tee -a "${LOG_FILE}"
+    exit 1
+fi
+echo "Using tracer library: ${ALLOC_TRACE_LIB}" | tee -a "${LOG_FILE}"
+
+# The tracer only records between the benchmark's begin/end calls, the FIFO perf control stays off
+export ENABLE_PERF_CONTROL="false"
+
+# --- Main Execution Logic ---
+echo "======================================================" | tee -a "${LOG_FILE}"
+echo "Starting Main Benchmark Runs (Allocation Trace) at $(date '+%Y-%m-%d %H:%M:%S')" | tee -a "${LOG_FILE}"
+
+for algo in "${ALGOS[@]}"; do
+    echo "------------------------------------------------------" | tee -a "${LOG_FILE}"
+    echo "Processing Algorithm: ${algo}" | tee -a "${LOG_FILE}"
+    ALGO_EXECUTABLE="${BUILD_DIR}/${algo}"
+    if [ ! -f "${ALGO_EXECUTABLE}" ] || [ ! -x "${ALGO_EXECUTABLE}" ]; then
+        echo "Error: Executable not found or not executable: ${ALGO_EXECUTABLE}" | tee -a "${LOG_FILE}"
+        continue
+    fi
+
+    for gen in "${GENERATORS[@]}"; do
+        for type in "${DATATYPES[@]}"; do
+            CONFIG_TAG="${algo}_${gen}_${type}"
+            echo "--- Processing Config: ${CONFIG_TAG} (Allocation Trace) ---" | tee -a "${LOG_FILE}"
+
+            # Arguments for the C++ benchmark application
+            BENCHMARK_ARGS_FOR_CPP_APP="-b ${MIN_LOG} -e ${MAX_LOG} -r ${NUM_RUNS} -t ${TOTAL_CORES} -g ${gen} -d ${type} -v vector -m ${MACHINE}"
+            FULL_CPP_COMMAND_BASE="numactl -i all ${ALGO_EXECUTABLE} ${BENCHMARK_ARGS_FOR_CPP_APP}"
+
+            TRACE_STDOUT_FILE="${TXT_DIR}/${CONFIG_TAG}_alloc_trace_stdout.txt"
+            TRACE_STDERR_FILE="${ERR_DIR}/${CONFIG_TAG}_alloc_trace_stderr.err"
+            TRACE_OUTPUT_FILE="${TRACE_DIR}/${CONFIG_TAG}_alloc_trace.bin"
+
+            :> "${TRACE_STDOUT_FILE}"
+            :> "${TRACE_STDERR_FILE}"
+            rm -f "${TRACE_OUTPUT_FILE}"
+
+            # LD_PRELOAD is inherited through numactl; the log is only opened once the benchmark enters its first profiled section
+            TRACE_COMMAND="LD_PRELOAD='${ALLOC_TRACE_LIB}' ALLOC_TRACE_OUTPUT='${TRACE_OUTPUT_FILE}' ALLOC_TRACE_CAPACITY=${ALLOC_TRACE_CAPACITY} \
+                              ${FULL_CPP_COMMAND_BASE} > '${TRACE_STDOUT_FILE}' 2>> '${TRACE_STDERR_FILE}'"
+
+            echo "Executing Allocation Trace Command:" | tee -a "${LOG_FILE}"
+            echo "${TRACE_COMMAND}" | sed 's/^/    /' | tee -a "${LOG_FILE}"
+            eval "${TRACE_COMMAND}"
+            trace_exit_status=$?
+
+            if [ $trace_exit_status -ne 0 ]; then
+                echo "Error during allocation trace for ${CONFIG_TAG} (Exit: ${trace_exit_status}). Check logs." | tee -a "${LOG_FILE}"
+            elif [ ! -s "${TRACE_OUTPUT_FILE}" ]; then
+                echo "Warning: No trace written for ${CONFIG_TAG}; the binary may predate the AllocTrace hooks in benchmark.hpp." | tee -a "${LOG_FILE}"
+            else
+                echo "Allocation trace finished for ${CONFIG_TAG}. Data: ${TRACE_OUTPUT_FILE}" | tee -a "${LOG_FILE}"
+            fi
+            if grep -q 'AllocTrace\] Warning' "${TRACE_STDERR_FILE}" 2>/dev/null; then
+                echo "Warning: events were dropped for ${CONFIG_TAG}; raise ALLOC_TRACE_CAPACITY." | tee -a "${LOG_FILE}"
+            fi
+            if [ -f "${TRACE_STDOUT_FILE}" ] && grep -q 'configwarning=1' "${TRACE_STDOUT_FILE}"; then
+                echo "CONFIG WARNING DETECTED in C++ stdout for allocation trace of ${CONFIG_TAG}!" | tee -a "${LOG_FILE}"
+            fi
+            echo "--- Finished Allocation Trace for ${CONFIG_TAG} ---" | tee -a "${LOG_FILE}"
+            echo "---" | tee -a "${LOG_FILE}" # Separator for configs
+        done # --- End datatype loop ---
+    done # --- End generator loop ---
+done # --- End algorithm loop ---
+
+echo "======================================================" | tee -a "${LOG_FILE}"
+echo "All Allocation Trace Runs Completed at $(date '+%Y-%m-%d %H:%M:%S')" | tee -a "${LOG_FILE}"
+echo "Main log file: ${LOG_FILE}" | tee -a "${LOG_FILE}"
+echo "C++ stdout logs (RESULT lines) are in: ${TXT_DIR}" | tee -a "${LOG_FILE}"
+echo "C++ stderr logs are in: ${ERR_DIR}" | tee -a "${LOG_FILE}"
+echo "Allocation logs (*_alloc_trace.bin) are stored in: ${TRACE_DIR}" | tee -a "${LOG_FILE}"
+echo "======================================================" | tee -a "${LOG_FILE}"
+echo "To analyze: python analysis_scripts/analyze_alloc_trace.py ${PARENT_DIR}"
+echo "Benchmark completed. Check directory ${PARENT_DIR} for outputs."
+
+exit 0
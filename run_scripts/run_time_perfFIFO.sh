@@ -16,6 +16,87 @@ MAX_LOG=32 # Updated as per your script
 NUM_RUNS=6 # This NUM_RUNS is for the C++ program's internal loop
 MACHINE="142"
 
+# Sidecar sampler for the no perf round: polls /proc/<pid> every PROC_SAMPLER_INTERVAL_MS ms (RSS / page fault timeline).
+# Off by default because the no perf round gives the wall times; when on, it is pinned to the CPUs outside BENCH_CPUS
+# and CORUN_CPUS (it shares the benchmark's cores if there are none). Override with ENABLE_PROC_SAMPLER=true ./run_...
+ENABLE_PROC_SAMPLER="${ENABLE_PROC_SAMPLER:-false}"
+PROC_SAMPLER_INTERVAL_MS="${PROC_SAMPLER_INTERVAL_MS:-1}"
+
+# Effective frequency per sort in the no perf round (APERF/MPERF or cycles/ref-cycles, see src/freq_counter.hpp);
+# adds freqratio/cpubusy to the RESULT lines. Needs root or perf_event_paranoid <= 0, otherwise it is skipped.
+ENABLE_FREQ_COUNTER="true"
+
+# Package/DRAM energy per sort in the no perf round from /sys/class/powercap (see src/energy_counter.hpp); adds
+# pkgjoules/dramjoules to the RESULT lines. Reading energy_uj needs root on recent kernels.
+ENABLE_ENERGY_COUNTER="true"
+# "true" on machines without RAPL: run powercap_standin.py and point POWERCAP_ROOT at its tree. The energy is then
+# an estimate from CPU utilization, only good for checking the pipeline.
+POWERCAP_STANDIN="false"
+
+# Bytes read from / written to storage and major/minor page faults per sort in the no perf round (/proc/self/io and
+# getrusage, see src/io_counter.hpp); adds ioreadbytes/iowritebytes/majfaults/minfaults/inputbytes/memlimitbytes.
+ENABLE_IO_COUNTER="true"
+
+# Input array type: "vector" (in memory) or "mmapfile" (a file in MMAP_VECTOR_DIR mapped with MAP_SHARED, so inputs
+# can be larger than RAM; written back and dropped from the page cache before every sort, see src/mmap_vector.hpp).
+# For out-of-core runs add benchmark_externalsort to ALGOS and compare with analysis_scripts/analyze_out_of_core.py.
+VECTOR_TYPE="vector"
+MMAP_VECTOR_DIR="/var/tmp" # must be on a disk, not tmpfs, and have room for about twice the input
+
+# Generators, the input cache and the checker run on a persistent pool of -t threads, worker j pinned to the j-th
+# allowed CPU (src/parallel/thread_pool.hpp), so input pages are first touched on the cores the algorithm uses.
+# "false" leaves the pool unpinned. RESULT lines record poolthreads/poolcpus.
+THREAD_POOL_PIN="true"
+
+# Parallel runtime sweep: with BENCHMARK_RUNTIME_VARIANTS (CMake, on by default) the ParlayLib-based sorts also exist
+# as benchmark_<x>_omp / _tbb / _cilk, the same code on OpenMP, oneTBB and OpenCilk instead of ParlayLib's own
+# scheduler. Add them to ALGOS next to benchmark_<x> and compare with analysis_scripts/analyze_runtimes.py.
+# "true" adds the process CPU time and context switches per sort (usermilli/sysmilli/vcsw/ivcsw, src/runtime_info.hpp).
+ENABLE_SCHED_COUNTER="true"
+EXTERNAL_SORT_MEMORY_BYTES="" # memory budget of benchmark_externalsort; empty: a quarter of the physical memory
+
+# "true": pass --indirect, i.e. sort (key, index) pairs with each algorithm and gather the records afterwards
+# (src/indirect_sort.hpp). Adds keymilli/keysortmilli/gathermilli to the RESULT lines; compare with a direct run
+# using analysis_scripts/analyze_indirect.py.
+INDIRECT_SORT="false"
+
+# > 0: pass --batch, i.e. split every input into independent arrays of this many elements and record per-array
+# latency percentiles plus a LATENCY histogram line (src/batch_sort.hpp, analysis_scripts/analyze_batch.py).
+# Cannot be combined with INDIRECT_SORT.
+BATCH_ELEMENTS=0
+
+# Cache state of the input before every internal run (--cache, src/cache_mode.hpp): "default" (as the generator and
+# checker left it), "cold" (stream over CACHE_FLUSH_BYTES, default 4x the LLC, to evict it from the caches and TLB) or
+# "warm" (each thread reads the part of the input it will sort first). Run the sweep once per mode and compare with
+# analysis_scripts/analyze_cache_modes.py.
+CACHE_MODE="default"
+CACHE_FLUSH_BYTES="" # empty: 4x the total LLC size from /sys/devices/system/cpu
+CACHE_COLD_DROP_PAGES="false" # "true": cold also pages the input out (madvise MADV_PAGEOUT, needs swap for anonymous memory)
+
+# Primitives other than sorting run through the same harness: add benchmark_semisort, benchmark_merge,
+# benchmark_prefixsum, benchmark_histogram or benchmark_topk to ALGOS (src/algorithm/primitives.hpp).
+# Their parameters (the sorting binaries ignore them):
+HISTOGRAM_BUCKETS=256
+TOPK_ELEMENTS=1024
+
+# Co-run interference (analysis_scripts/analyze_corun.py): while each configuration runs pinned to BENCH_CPUS, a
+# co-runner runs pinned to CORUN_CPUS (disjoint). CORUN_MODE: "none", "stressor" (${BUILD_DIR}/mem_stressor with
+# CORUN_STRESSOR_ARGS, see src/stressor/mem_stressor.cpp) or "command" (CORUN_COMMAND, e.g. another benchmark binary,
+# restarted whenever it exits). For the isolated baseline use the same BENCH_CPUS with CORUN_MODE="none".
+CORUN_MODE="none"
+BENCH_CPUS="" # e.g. "0-15"; empty: no pinning, -t = all cores. Otherwise -t = number of CPUs in the list
+CORUN_CPUS="" # e.g. "16-31"
+CORUN_STRESSOR_ARGS="--mode bandwidth --bytes 2G"
+CORUN_COMMAND=""
+CORUN_WARMUP_S=2 # head start of the co-runner before the first round of a configuration
+
+# Checkpointing: every configuration is journaled in <run>/job_journal.tsv and its files are written to
+# <run>/.staging/ first, then moved into place once all its rounds finished. After a crash or reboot,
+# "run_time_perfFIFO.sh --resume <perf_benchmark_run_dir>" skips the configurations journaled as done.
+MAX_ATTEMPTS=3 # attempts per configuration when a round exits non-zero
+RETRY_DELAY_S=30
+RETRY_FAILED_ON_RESUME="false" # "true": also rerun configurations that used up their attempts last time
+
 PERF_CTL_PIPE="/tmp/my_app_perf_ctl.fifo"
 PERF_ACK_PIPE="/tmp/my_app_perf_ack.fifo"
 
@@ -29,19 +110,183 @@ ALL_GROUPS=("GROUP1" "GROUP2" "GROUP3" "GROUP4")
 
 # System Setup & Directory Setup
 TOTAL_CORES=$(nproc); if [ -z "$TOTAL_CORES" ]; then TOTAL_CORES=1; fi
+# "0-3,8,10-11" -> one CPU number per line
+expand_cpu_list() { local part; for part in ${1//,/ }; do if [[ "$part" == *-* ]]; then seq "${part%-*}" "${part#*-}"; else echo "$part"; fi; done; }
+NUMACTL_PREFIX="numactl -i all"
+if [ -n "${BENCH_CPUS}" ]; then
+    if ! [[ "${BENCH_CPUS}" =~ ^[0-9]+(-[0-9]+)?(,[0-9]+(-[0-9]+)?)*$ ]]; then echo "Error: BENCH_CPUS '${BENCH_CPUS}' is not a CPU list like 0-15,32-47."; exit 1; fi
+    TOTAL_CORES=$(expand_cpu_list "${BENCH_CPUS}" | sort -u | wc -l)
+    NUMACTL_PREFIX="numactl -i all --physcpubind=${BENCH_CPUS}"
+fi
+case "${CACHE_MODE}" in
+    default|cold|warm) ;;
+    *) echo "Error: CACHE_MODE must be default, cold or warm, not '${CACHE_MODE}'."; exit 1 ;;
+esac
+case "${CORUN_MODE}" in
+    none) ;;
+    stressor|command)
+        if [ -z "${BENCH_CPUS}" ] || [ -z "${CORUN_CPUS}" ]; then echo "Error: CORUN_MODE=${CORUN_MODE} needs both BENCH_CPUS and CORUN_CPUS."; exit 1; fi
+        if ! [[ "${CORUN_CPUS}" =~ ^[0-9]+(-[0-9]+)?(,[0-9]+(-[0-9]+)?)*$ ]]; then echo "Error: CORUN_CPUS '${CORUN_CPUS}' is not a CPU list like 16-31."; exit 1; fi
+        CPU_OVERLAP=$(comm -12 <(expand_cpu_list "${BENCH_CPUS}" | sort -u) <(expand_cpu_list "${CORUN_CPUS}" | sort -u) | tr '\n' ' ')
+        if [ -n "${CPU_OVERLAP}" ]; then echo "Error: BENCH_CPUS and CORUN_CPUS overlap (CPUs ${CPU_OVERLAP})."; exit 1; fi
+        if [ "${CORUN_MODE}" = "command" ] && [ -z "${CORUN_COMMAND}" ]; then echo "Error: CORUN_MODE=command needs CORUN_COMMAND."; exit 1; fi
+        if [ "${CORUN_MODE}" = "stressor" ] && [ ! -x "${BUILD_DIR}/mem_stressor" ]; then echo "Error: ${BUILD_DIR}/mem_stressor not found (make mem_stressor)."; exit 1; fi
+        ;;
+    *) echo "Error: CORUN_MODE must be none, stressor or command, not '${CORUN_MODE}'."; exit 1 ;;
+esac
+PROC_SAMPLER_CPUS=""
+if [ "${ENABLE_PROC_SAMPLER}" = "true" ]; then
+    if [ -n "${BENCH_CPUS}" ]; then
+        PROC_SAMPLER_CPUS=$(comm -23 <(seq 0 $(( $(nproc --all) - 1 )) | sort -u) \
+                                    <({ expand_cpu_list "${BENCH_CPUS}"; [ -n "${CORUN_CPUS}" ] && expand_cpu_list "${CORUN_CPUS}"; } | sort -u) \
+                            | sort -n | paste -sd, -)
+    fi
+    if [ -z "${PROC_SAMPLER_CPUS}" ]; then
+        echo "Warning: ENABLE_PROC_SAMPLER=true but no CPU is free of BENCH_CPUS/CORUN_CPUS; the sampler shares the benchmark's cores and perturbs the no perf round timings."
+    fi
+fi
 SCRIPT_ABSOLUTE_DIR=$(cd -- "$( dirname -- "${BASH_SOURCE[0]}" )" &> /dev/null && pwd); if [ -z "${SCRIPT_ABSOLUTE_DIR}" ]; then echo "Error: Could not determine script directory."; exit 1; fi
 BASE_OUTPUT_DIR_REL="${SCRIPT_ABSOLUTE_DIR}/../run"; BASE_OUTPUT_DIR=$(cd "${BASE_OUTPUT_DIR_REL}" &> /dev/null && pwd); if [ $? -ne 0 ] || [ -z "${BASE_OUTPUT_DIR}" ]; then echo "Error: Could not resolve base output directory path from relative path: ${BASE_OUTPUT_DIR_REL}"; exit 1; fi
-mkdir -p "${BASE_OUTPUT_DIR}"; RUN_TIMESTAMP=$(date '+%Y-%m-%d_%H_%M_%S'); PARENT_DIR="${BASE_OUTPUT_DIR}/perf_benchmark_run_${RUN_TIMESTAMP}"
+RESUME_DIR=""
+if [ "$1" = "--resume" ]; then
+    if [ -z "$2" ] || [ ! -d "$2" ]; then echo "Error: --resume needs an existing run directory (perf_benchmark_run_*)."; exit 1; fi
+    RESUME_DIR=$(cd "$2" && pwd)
+fi
+mkdir -p "${BASE_OUTPUT_DIR}"; RUN_TIMESTAMP=$(date '+%Y-%m-%d_%H_%M_%S'); PARENT_DIR="${RESUME_DIR:-${BASE_OUTPUT_DIR}/perf_benchmark_run_${RUN_TIMESTAMP}}"
 LOG_DIR="${PARENT_DIR}/logs"; TXT_DIR="${PARENT_DIR}/results_stdout"; ERR_DIR="${PARENT_DIR}/results_stderr"; STAT_DIR="${PARENT_DIR}/perf_stats"
 # --- NEW: Directory for memory reports from /usr/bin/time -v ---
 MEM_DIR="${PARENT_DIR}/mem_reports"
+# Environment snapshot (load, governor, current frequency) taken right before each no perf round
+ENV_DIR="${PARENT_DIR}/env_snapshots"
+# Output of the co-runner per configuration (CORUN_MODE != none)
+CORUN_DIR="${PARENT_DIR}/corun_logs"
 
-mkdir -p "${LOG_DIR}" "${TXT_DIR}" "${ERR_DIR}" "${STAT_DIR}" "${MEM_DIR}"; if [ $? -ne 0 ]; then echo "Error: Failed to create necessary output subdirectories in ${PARENT_DIR}"; exit 1; fi
+mkdir -p "${LOG_DIR}" "${TXT_DIR}" "${ERR_DIR}" "${STAT_DIR}" "${MEM_DIR}" "${ENV_DIR}"; if [ $? -ne 0 ]; then echo "Error: Failed to create necessary output subdirectories in ${PARENT_DIR}"; exit 1; fi
 LOG_FILE="${LOG_DIR}/run_${RUN_TIMESTAMP}.log"
+JOURNAL_FILE="${PARENT_DIR}/job_journal.tsv"
+STAGE_ROOT="${PARENT_DIR}/.staging"
+FAILED_DIR="${PARENT_DIR}/failed"
+
+# journal <job> <state: started|retry|committing|done|failed> <attempt> <detail>; synced so it survives a power loss
+journal() { printf '%s\t%s\t%s\t%s\t%s\n' "$(date '+%Y-%m-%d %H:%M:%S')" "$1" "$2" "$3" "$4" >> "${JOURNAL_FILE}"; sync "${JOURNAL_FILE}" 2>/dev/null || true; }
+# Last journaled state of a configuration (empty if it never started)
+job_state() { awk -F'\t' -v job="$1" '$2 == job { state = $3 } END { print state }' "${JOURNAL_FILE}" 2>/dev/null; }
+# Moves a staged configuration into the run directory (rename within one file system), flushing the files first.
+# The stdout file is moved last and is the commit point: the analysis scripts start from results_stdout/, so the
+# configuration only exists once it is there. The journal says "committing" before the first move; --resume rolls
+# such a configuration forward from its staging directory (every mv is idempotent), so a crash mid-commit never
+# leaves a partial configuration behind.
+commit_job() {
+    local stage=$1 pair sub dest f
+    for pair in results_stderr:"${ERR_DIR}" perf_stats:"${STAT_DIR}" perf_stats_configwarning:"${STAT_DIR}/configwarning" \
+                mem_reports:"${MEM_DIR}" env_snapshots:"${ENV_DIR}" corun_logs:"${CORUN_DIR}" results_stdout:"${TXT_DIR}"; do
+        sub=${pair%%:*}; dest=${pair#*:}
+        [ -d "${stage}/${sub}" ] || continue
+        mkdir -p "${dest}"
+        for f in "${stage}/${sub}"/*; do
+            [ -f "$f" ] || continue
+            sync "$f" 2>/dev/null || true
+            mv -f "$f" "${dest}/"
+        done
+    done
+    sync "${TXT_DIR}" 2>/dev/null || true
+    rm -rf "${stage}"
+}
+# Keeps the files of a configuration that used up its attempts in <run>/failed/<job> (one rename), out of the
+# directories the analysis scripts read
+discard_job() {
+    local stage=$1 job=$2
+    mkdir -p "${FAILED_DIR}"
+    rm -rf "${FAILED_DIR:?}/${job}"
+    mv "${stage}" "${FAILED_DIR}/${job}"
+}
+
+# Starts the co-runner for one configuration in its own process group (so all of it can be stopped at once),
+# pinned to CORUN_CPUS; its output goes to $1. Returns non-zero if it is not running after the warm-up.
+CORUN_PID=""
+start_corunner() {
+    local output=$1
+    [ "${CORUN_MODE}" = "none" ] && return 0
+    if [ "${CORUN_MODE}" = "stressor" ]; then
+        setsid taskset -c "${CORUN_CPUS}" "${BUILD_DIR}/mem_stressor" ${CORUN_STRESSOR_ARGS} > "${output}" 2>&1 &
+    else
+        setsid taskset -c "${CORUN_CPUS}" bash -c "while :; do ${CORUN_COMMAND}; done" > "${output}" 2>&1 &
+    fi
+    CORUN_PID=$!
+    sleep "${CORUN_WARMUP_S}"
+    kill -0 "${CORUN_PID}" 2>/dev/null
+}
+stop_corunner() {
+    [ -n "${CORUN_PID}" ] || return 0
+    kill -TERM -- "-${CORUN_PID}" 2>/dev/null || kill -TERM "${CORUN_PID}" 2>/dev/null
+    wait "${CORUN_PID}" 2>/dev/null
+    CORUN_PID=""
+}
+
+# --- Run metadata (used by analysis_scripts/analyze_history.py to explain performance shifts) ---
+CMAKE_CACHE="${BUILD_DIR}/CMakeCache.txt"
+cmake_cache_value() { grep -m1 "^$1:" "${CMAKE_CACHE}" 2>/dev/null | cut -d= -f2-; }
+CXX_COMPILER=$(cmake_cache_value CMAKE_CXX_COMPILER)
+BUILD_TYPE=$(cmake_cache_value CMAKE_BUILD_TYPE)
+if [ -n "${RESUME_DIR}" ]; then
+    echo "resumed=${RUN_TIMESTAMP}" >> "${PARENT_DIR}/run_metadata.txt"
+else
+{
+    echo "machine=${MACHINE}"
+    echo "hostname=$(hostname)"
+    echo "timestamp=${RUN_TIMESTAMP}"
+    echo "commit=$(git -C "${SCRIPT_ABSOLUTE_DIR}/.." rev-parse --short HEAD 2>/dev/null)"
+    echo "kernel=$(uname -r)"
+    echo "compiler=$( [ -n "${CXX_COMPILER}" ] && "${CXX_COMPILER}" --version 2>/dev/null | head -n1)"
+    echo "build_type=${BUILD_TYPE}"
+    echo "cxx_flags=$(cmake_cache_value CMAKE_CXX_FLAGS) $(cmake_cache_value CMAKE_CXX_FLAGS_${BUILD_TYPE^^})"
+    echo "threads=${TOTAL_CORES}"
+    echo "indirect=${INDIRECT_SORT}"
+    echo "batch=${BATCH_ELEMENTS}"
+    echo "histogram_buckets=${HISTOGRAM_BUCKETS}"
+    echo "topk=${TOPK_ELEMENTS}"
+    echo "vector=${VECTOR_TYPE}"
+    echo "thread_pool_pin=${THREAD_POOL_PIN}"
+    echo "cache_mode=${CACHE_MODE}"
+    [ "${CACHE_MODE}" = "cold" ] && echo "cache_cold_drop_pages=${CACHE_COLD_DROP_PAGES}"
+    echo "parlay_num_threads=${TOTAL_CORES}"
+    [ "${VECTOR_TYPE}" = "mmapfile" ] && echo "mmap_vector_dir=${MMAP_VECTOR_DIR}"
+    echo "proc_sampler=${ENABLE_PROC_SAMPLER}"
+    [ "${ENABLE_PROC_SAMPLER}" = "true" ] && echo "proc_sampler_interval_ms=${PROC_SAMPLER_INTERVAL_MS}" \
+        && echo "proc_sampler_cpus=${PROC_SAMPLER_CPUS:-shared}"
+    echo "corun_mode=${CORUN_MODE}"
+    echo "bench_cpus=${BENCH_CPUS}"
+    echo "corun_cpus=${CORUN_CPUS}"
+    [ "${CORUN_MODE}" = "stressor" ] && echo "corun_args=${CORUN_STRESSOR_ARGS}"
+    [ "${CORUN_MODE}" = "command" ] && echo "corun_command=${CORUN_COMMAND}"
+} > "${PARENT_DIR}/run_metadata.txt"
+# Environment fingerprint: governor, turbo, SMT, THP, background load, ... (analysis_scripts/run_provenance.py)
+python3 "${SCRIPT_ABSOLUTE_DIR}/env_fingerprint.py" >> "${PARENT_DIR}/run_metadata.txt" 2>> "${LOG_FILE}" \
+    || echo "Warning: env_fingerprint.py failed; run_metadata.txt has no environment fingerprint." | tee -a "${LOG_FILE}"
+fi
+
+export MMAP_VECTOR_DIR
+export THREAD_POOL_PIN
+# ParlayLib's own scheduler sizes itself from hardware_concurrency, which ignores BENCH_CPUS; pin it to -t like the others
+export PARLAY_NUM_THREADS="${TOTAL_CORES}"
+[ -n "${EXTERNAL_SORT_MEMORY_BYTES}" ] && export EXTERNAL_SORT_MEMORY_BYTES
+[ -n "${CACHE_FLUSH_BYTES}" ] && export CACHE_FLUSH_BYTES
+export CACHE_COLD_DROP_PAGES
 
-cleanup_fifos() { echo "Cleaning up FIFOs: ${PERF_CTL_PIPE}, ${PERF_ACK_PIPE}" | tee -a "${LOG_FILE}"; unlink "${PERF_CTL_PIPE}" 2>/dev/null || true; unlink "${PERF_ACK_PIPE}" 2>/dev/null || true; }
+cleanup_fifos() { echo "Cleaning up FIFOs: ${PERF_CTL_PIPE}, ${PERF_ACK_PIPE}" | tee -a "${LOG_FILE}"; unlink "${PERF_CTL_PIPE}" 2>/dev/null || true; unlink "${PERF_ACK_PIPE}" 2>/dev/null || true; if [ -n "${STANDIN_PID}" ]; then kill "${STANDIN_PID}" 2>/dev/null || true; fi; stop_corunner; }
 trap cleanup_fifos EXIT SIGINT SIGTERM
 
+STANDIN_PID=""
+if [ "${ENABLE_ENERGY_COUNTER}" = "true" ] && [ "${POWERCAP_STANDIN}" = "true" ]; then
+    export POWERCAP_ROOT="${PARENT_DIR}/powercap_standin"
+    python3 "${SCRIPT_ABSOLUTE_DIR}/powercap_standin.py" --root "${POWERCAP_ROOT}" >> "${LOG_FILE}" 2>&1 &
+    STANDIN_PID=$!
+    [ -n "${RESUME_DIR}" ] || echo "energy_source=standin" >> "${PARENT_DIR}/run_metadata.txt"
+    echo "Energy: using the powercap stand-in tree ${POWERCAP_ROOT} (estimated, PID ${STANDIN_PID})" | tee -a "${LOG_FILE}"
+elif [ "${ENABLE_ENERGY_COUNTER}" = "true" ]; then
+    [ -n "${RESUME_DIR}" ] || echo "energy_source=rapl" >> "${PARENT_DIR}/run_metadata.txt"
+fi
+
 echo "Ensuring control FIFOs exist at fixed paths..." | tee -a "${LOG_FILE}"; echo "Control FIFO: ${PERF_CTL_PIPE}" | tee -a "${LOG_FILE}"; echo "Ack FIFO: ${PERF_ACK_PIPE}" | tee -a "${LOG_FILE}"
 unlink "${PERF_CTL_PIPE}" 2>/dev/null || true; mkfifo "${PERF_CTL_PIPE}"; if [ $? -ne 0 ]; then echo "FATAL: Failed to create CTL FIFO: ${PERF_CTL_PIPE}." | tee -a "${LOG_FILE}"; exit 1; fi
 unlink "${PERF_ACK_PIPE}" 2>/dev/null || true; mkfifo "${PERF_ACK_PIPE}"; if [ $? -ne 0 ]; then echo "FATAL: Failed to create ACK FIFO: ${PERF_ACK_PIPE}." | tee -a "${LOG_FILE}"; unlink "${PERF_CTL_PIPE}"; exit 1; fi
@@ -106,12 +351,139 @@ FILTERED_GROUP4_EVENTS=(); filter_group_events GROUP4_EVENTS FILTERED_GROUP4_EVE
 # --- Main Execution Logic ---
 echo "======================================================" | tee -a "${LOG_FILE}"
 echo "Starting Main Benchmark Runs at $(date '+%Y-%m-%d %H:%M:%S')" | tee -a "${LOG_FILE}"
-echo "Using ${TOTAL_CORES} cores on machine '${MACHINE}'." | tee -a "${LOG_FILE}"
+echo "Using ${TOTAL_CORES} cores on machine '${MACHINE}'${BENCH_CPUS:+ (CPUs ${BENCH_CPUS})}." | tee -a "${LOG_FILE}"
+if [ "${CORUN_MODE}" != "none" ]; then
+    echo "Co-runner (${CORUN_MODE}) on CPUs ${CORUN_CPUS}: $( [ "${CORUN_MODE}" = "stressor" ] && echo "mem_stressor ${CORUN_STRESSOR_ARGS}" || echo "${CORUN_COMMAND}")" | tee -a "${LOG_FILE}"
+fi
 echo "Algorithms to run: ${ALGOS[*]}" | tee -a "${LOG_FILE}"
+if [ -n "${RESUME_DIR}" ]; then
+    echo "Resuming ${PARENT_DIR}: $(awk -F'\t' '$3 == "done"' "${JOURNAL_FILE}" 2>/dev/null | wc -l) configuration(s) already done." | tee -a "${LOG_FILE}"
+fi
 echo "======================================================" | tee -a "${LOG_FILE}"
 
 ALL_ALGOS_TO_PROFILE=("${ALGOS[@]}")
 
+# Runs all rounds of one configuration into the staging directory $4 (same layout as the run directory).
+# Returns non-zero if the no perf round or a perf stat round failed; the reason is left in JOB_FAILURE.
+run_configuration() {
+    local algo=$1 gen=$2 type=$3 stage=$4
+    JOB_FAILURE=""
+    BENCH_TXT_FILE="${stage}/results_stdout/${algo}_${gen}_${type}_stdout.txt"
+    BENCH_ERR_FILE="${stage}/results_stderr/${algo}_${gen}_${type}_stderr.err"
+    :> "${BENCH_ERR_FILE}" 
+
+    BENCHMARK_ARGS_BASE="${NUMACTL_PREFIX} ${ALGO_EXECUTABLE} \
+                        -b ${MIN_LOG} -e ${MAX_LOG} -r ${NUM_RUNS} -t ${TOTAL_CORES} \
+                        -g ${gen} -d ${type} -v ${VECTOR_TYPE} -m ${MACHINE}"
+    [ "${INDIRECT_SORT}" = "true" ] && BENCHMARK_ARGS_BASE="${BENCHMARK_ARGS_BASE} --indirect"
+    [ "${BATCH_ELEMENTS}" -gt 0 ] && BENCHMARK_ARGS_BASE="${BENCHMARK_ARGS_BASE} --batch ${BATCH_ELEMENTS}"
+    BENCHMARK_ARGS_BASE="${BENCHMARK_ARGS_BASE} --buckets ${HISTOGRAM_BUCKETS} --topk ${TOPK_ELEMENTS} --cache ${CACHE_MODE}"
+
+    # --- 1. NO PERF ROUND (for internal C++ timing AND memory profiling with /usr/bin/time) ---
+    echo "          Performing NO PERF ROUND for: algo=${algo}, gen=${gen}, type=${type} (for internal timing & memory report)" | tee -a "${LOG_FILE}"
+    export ENABLE_PERF_CONTROL="false" 
+    export MEASURE_FREQUENCY="${ENABLE_FREQ_COUNTER}"
+    export MEASURE_ENERGY="${ENABLE_ENERGY_COUNTER}"
+    export MEASURE_IO="${ENABLE_IO_COUNTER}"
+    export MEASURE_SCHEDULING="${ENABLE_SCHED_COUNTER}"
+    python3 "${SCRIPT_ABSOLUTE_DIR}/env_fingerprint.py" --quick --sample-s 0.2 > "${stage}/env_snapshots/${algo}_${gen}_${type}_env.txt" 2>> "${LOG_FILE}"
+
+    # --- MODIFIED: Define memory report file and wrap the command with /usr/bin/time -v ---
+    MEM_REPORT_FILE="${stage}/mem_reports/${algo}_${gen}_${type}_no_perf_round_mem_report.txt"
+    
+    # This is the command string for the C++ benchmark's own output redirection
+    COMMAND_FOR_INTERNAL_TIMING_OUTPUT="${BENCHMARK_ARGS_BASE} > '${BENCH_TXT_FILE}' 2>> '${BENCH_ERR_FILE}'"
+    
+    # /usr/bin/time will execute bash, which will in turn execute COMMAND_FOR_INTERNAL_TIMING_OUTPUT
+    # The output of /usr/bin/time -v itself goes to MEM_REPORT_FILE
+    TIME_WRAPPED_NO_PERF_COMMAND="/usr/bin/time -v -o '${MEM_REPORT_FILE}' bash -c \"${COMMAND_FOR_INTERNAL_TIMING_OUTPUT}\""
+
+    echo "                 Executing No Perf Round Command (with memory profiling)..." | tee -a "${LOG_FILE}"
+    # echo "DEBUG: TIME_WRAPPED_NO_PERF_COMMAND is: ${TIME_WRAPPED_NO_PERF_COMMAND}" | tee -a "${LOG_FILE}" # For debugging
+    if [ "${ENABLE_PROC_SAMPLER}" = "true" ]; then
+        MEM_TIMELINE_FILE="${stage}/mem_reports/${algo}_${gen}_${type}_no_perf_round_mem_timeline.npz"
+        eval "${TIME_WRAPPED_NO_PERF_COMMAND}" &
+        no_perf_pid=$!
+        ${PROC_SAMPLER_CPUS:+taskset -c "${PROC_SAMPLER_CPUS}"} python3 "${SCRIPT_ABSOLUTE_DIR}/proc_sampler.py" --root-pid ${no_perf_pid} --match "${algo}" \
+            --interval-ms ${PROC_SAMPLER_INTERVAL_MS} --stdout-file "${BENCH_TXT_FILE}" \
+            --output "${MEM_TIMELINE_FILE}" >> "${LOG_FILE}" 2>&1 &
+        sampler_pid=$!
+        wait ${no_perf_pid}
+        no_perf_exit_status=$?
+        wait ${sampler_pid} || echo "                 Warning: proc sampler failed for ${algo}_${gen}_${type}, see log." | tee -a "${LOG_FILE}"
+    else
+        eval "${TIME_WRAPPED_NO_PERF_COMMAND}"
+        no_perf_exit_status=$? # This captures the exit status of /usr/bin/time (which should reflect bash -c)
+    fi
+
+    if [ $no_perf_exit_status -ne 0 ]; then
+        echo "                 Error during NO PERF ROUND for ${algo}_${gen}_${type} (Exit: ${no_perf_exit_status}). Stderr in '${BENCH_ERR_FILE}', Mem report in '${MEM_REPORT_FILE}'." | tee -a "${LOG_FILE}"
+        JOB_FAILURE="no perf round exit ${no_perf_exit_status}"
+        return 1 # the perf rounds would fail the same way
+    else
+        echo "                 No Perf Round finished for ${algo}_${gen}_${type}. Memory report in '${MEM_REPORT_FILE}'." | tee -a "${LOG_FILE}"
+    fi
+    if [ -s "${BENCH_ERR_FILE}" ]; then
+        echo "                 Note: No Perf Round stderr file '${BENCH_ERR_FILE}' is non-empty." | tee -a "${LOG_FILE}"
+    fi
+
+    # --- 2. PERF STAT RUNS FOR EACH GROUP ---
+    export ENABLE_PERF_CONTROL="true" 
+    export MEASURE_FREQUENCY="false" # the per-CPU counters would compete with perf stat for the PMU
+    export MEASURE_ENERGY="false"
+    export MEASURE_IO="false"
+    export MEASURE_SCHEDULING="false"
+
+    BENCHMARK_COMMAND_FOR_PERF_SHELL="${BENCHMARK_ARGS_BASE} >> '${BENCH_TXT_FILE}' 2>> '${BENCH_ERR_FILE}'"
+
+    for group_name in "${ALL_GROUPS[@]}"; do
+        echo "          Running Group: ${group_name} for: algo=${algo}, gen=${gen}, type=${type}" | tee -a "${LOG_FILE}"
+        current_filtered_list_name="FILTERED_${group_name}_EVENTS[@]"
+        CURRENT_GROUP_EVENTS_TO_RUN=( "${!current_filtered_list_name}" )
+
+        if [ ${#CURRENT_GROUP_EVENTS_TO_RUN[@]} -eq 0 ]; then
+            echo "                 Warning: No available events configured for ${group_name}. Skipping group." | tee -a "${LOG_FILE}"
+            continue
+        fi
+
+        AVAILABLE_GROUP_EVENTS_STR=$(IFS=,; echo "${CURRENT_GROUP_EVENTS_TO_RUN[*]}")
+        echo "                 Using pre-filtered events for ${group_name}: ${AVAILABLE_GROUP_EVENTS_STR}" | tee -a "${LOG_FILE}"
+        PERF_STAT_OUTPUT_FILE="${stage}/perf_stats/${algo}_${gen}_${type}_${group_name}_perf_stat.txt"
+
+        PERF_COMMAND="perf stat -e ${AVAILABLE_GROUP_EVENTS_STR} \
+                        -o '${PERF_STAT_OUTPUT_FILE}' \
+                        --control fifo:${PERF_CTL_PIPE},${PERF_ACK_PIPE} \
+                        -- bash -c \"${BENCHMARK_COMMAND_FOR_PERF_SHELL}\""
+
+        echo "                 Executing Perf Command for ${group_name}..." | tee -a "${LOG_FILE}"
+        eval "${PERF_COMMAND}"
+        exit_status=$?
+
+        if [ $exit_status -ne 0 ]; then
+            echo "                 Error occurred during perf stat run for ${group_name} (Exit Status: ${exit_status}). Check '${PERF_STAT_OUTPUT_FILE}' and '${BENCH_ERR_FILE}'." | tee -a "${LOG_FILE}"
+            JOB_FAILURE="${JOB_FAILURE:+${JOB_FAILURE}, }${group_name} exit ${exit_status}"
+        else
+            echo "                 Perf stat finished for ${group_name}." | tee -a "${LOG_FILE}"
+        fi
+
+        if [ -s "${BENCH_ERR_FILE}" ]; then
+            echo "                 Note: Benchmark stderr file '${BENCH_ERR_FILE}' may contain new messages from this group's run." | tee -a "${LOG_FILE}"
+        fi
+        echo "                 --- Group ${group_name} Finished ---" | tee -a "${LOG_FILE}"
+    done # --- End event group loop ---
+
+    echo "          Finished all groups for: algo=${algo}, gen=${gen}, type=${type}" | tee -a "${LOG_FILE}"
+
+    if grep -q 'configwarning=1' "${BENCH_TXT_FILE}"; then
+        # Not comparable with the other configurations, but kept (perf_stats/configwarning/) instead of deleted
+        echo "          CONFIG WARNING DETECTED in ${BENCH_TXT_FILE}!" | tee -a "${LOG_FILE}"
+        echo "          Moving its perf stat files to ${STAT_DIR}/configwarning/ so the analysis skips them." | tee -a "${LOG_FILE}"
+        mkdir -p "${stage}/perf_stats_configwarning"
+        mv -f "${stage}/perf_stats/"* "${stage}/perf_stats_configwarning/" 2>/dev/null
+    fi
+    [ -z "${JOB_FAILURE}" ]
+}
+
 for algo in "${ALL_ALGOS_TO_PROFILE[@]}"; do
     echo "------------------------------------------------------" | tee -a "${LOG_FILE}"
     echo "Processing Algorithm: ${algo}" | tee -a "${LOG_FILE}"
@@ -124,97 +496,58 @@ for algo in "${ALL_ALGOS_TO_PROFILE[@]}"; do
 
     for gen in "${GENERATORS[@]}"; do
         for type in "${DATATYPES[@]}"; do
-            BENCH_TXT_FILE="${TXT_DIR}/${algo}_${gen}_${type}_stdout.txt"
-            BENCH_ERR_FILE="${ERR_DIR}/${algo}_${gen}_${type}_stderr.err"
-            :> "${BENCH_ERR_FILE}" 
-
-            BENCHMARK_ARGS_BASE="numactl -i all ${ALGO_EXECUTABLE} \
-                                -b ${MIN_LOG} -e ${MAX_LOG} -r ${NUM_RUNS} -t ${TOTAL_CORES} \
-                                -g ${gen} -d ${type} -v vector -m ${MACHINE}"
-
-            # --- 1. NO PERF ROUND (for internal C++ timing AND memory profiling with /usr/bin/time) ---
-            echo "          Performing NO PERF ROUND for: algo=${algo}, gen=${gen}, type=${type} (for internal timing & memory report)" | tee -a "${LOG_FILE}"
-            export ENABLE_PERF_CONTROL="false" 
-
-            # --- MODIFIED: Define memory report file and wrap the command with /usr/bin/time -v ---
-            MEM_REPORT_FILE="${MEM_DIR}/${algo}_${gen}_${type}_no_perf_round_mem_report.txt"
-            
-            # This is the command string for the C++ benchmark's own output redirection
-            COMMAND_FOR_INTERNAL_TIMING_OUTPUT="${BENCHMARK_ARGS_BASE} > '${BENCH_TXT_FILE}' 2>> '${BENCH_ERR_FILE}'"
-            
-            # /usr/bin/time will execute bash, which will in turn execute COMMAND_FOR_INTERNAL_TIMING_OUTPUT
-            # The output of /usr/bin/time -v itself goes to MEM_REPORT_FILE
-            TIME_WRAPPED_NO_PERF_COMMAND="/usr/bin/time -v -o '${MEM_REPORT_FILE}' bash -c \"${COMMAND_FOR_INTERNAL_TIMING_OUTPUT}\""
-
-            echo "                 Executing No Perf Round Command (with memory profiling)..." | tee -a "${LOG_FILE}"
-            # echo "DEBUG: TIME_WRAPPED_NO_PERF_COMMAND is: ${TIME_WRAPPED_NO_PERF_COMMAND}" | tee -a "${LOG_FILE}" # For debugging
-            eval "${TIME_WRAPPED_NO_PERF_COMMAND}"
-            no_perf_exit_status=$? # This captures the exit status of /usr/bin/time (which should reflect bash -c)
-
-            if [ $no_perf_exit_status -ne 0 ]; then
-                echo "                 Error during NO PERF ROUND for ${algo}_${gen}_${type} (Exit: ${no_perf_exit_status}). Stderr in '${BENCH_ERR_FILE}', Mem report in '${MEM_REPORT_FILE}'." | tee -a "${LOG_FILE}"
-            else
-                echo "                 No Perf Round finished for ${algo}_${gen}_${type}. Memory report in '${MEM_REPORT_FILE}'." | tee -a "${LOG_FILE}"
+            JOB_KEY="${algo}_${gen}_${type}"
+            JOB_STATE=$(job_state "${JOB_KEY}")
+            if [ "${JOB_STATE}" = "done" ] || { [ "${JOB_STATE}" = "failed" ] && [ "${RETRY_FAILED_ON_RESUME}" != "true" ]; }; then
+                echo "          Skipping ${JOB_KEY}: journaled as ${JOB_STATE}." | tee -a "${LOG_FILE}"
+                continue
             fi
-            if [ -s "${BENCH_ERR_FILE}" ]; then
-                echo "                 Note: No Perf Round stderr file '${BENCH_ERR_FILE}' is non-empty." | tee -a "${LOG_FILE}"
-            fi
-
-            # --- 2. PERF STAT RUNS FOR EACH GROUP ---
-            export ENABLE_PERF_CONTROL="true" 
-
-            BENCHMARK_COMMAND_FOR_PERF_SHELL="${BENCHMARK_ARGS_BASE} >> '${BENCH_TXT_FILE}' 2>> '${BENCH_ERR_FILE}'"
-
-            for group_name in "${ALL_GROUPS[@]}"; do
-                echo "          Running Group: ${group_name} for: algo=${algo}, gen=${gen}, type=${type}" | tee -a "${LOG_FILE}"
-                current_filtered_list_name="FILTERED_${group_name}_EVENTS[@]"
-                CURRENT_GROUP_EVENTS_TO_RUN=( "${!current_filtered_list_name}" )
-
-                if [ ${#CURRENT_GROUP_EVENTS_TO_RUN[@]} -eq 0 ]; then
-                    echo "                 Warning: No available events configured for ${group_name}. Skipping group." | tee -a "${LOG_FILE}"
-                    continue
-                fi
-
-                AVAILABLE_GROUP_EVENTS_STR=$(IFS=,; echo "${CURRENT_GROUP_EVENTS_TO_RUN[*]}")
-                echo "                 Using pre-filtered events for ${group_name}: ${AVAILABLE_GROUP_EVENTS_STR}" | tee -a "${LOG_FILE}"
-                PERF_STAT_OUTPUT_FILE="${STAT_DIR}/${algo}_${gen}_${type}_${group_name}_perf_stat.txt"
 
-                PERF_COMMAND="perf stat -e ${AVAILABLE_GROUP_EVENTS_STR} \
-                                -o '${PERF_STAT_OUTPUT_FILE}' \
-                                --control fifo:${PERF_CTL_PIPE},${PERF_ACK_PIPE} \
-                                -- bash -c \"${BENCHMARK_COMMAND_FOR_PERF_SHELL}\""
-
-                echo "                 Executing Perf Command for ${group_name}..." | tee -a "${LOG_FILE}"
-                eval "${PERF_COMMAND}"
-                exit_status=$?
-
-                if [ $exit_status -ne 0 ]; then
-                    echo "                 Error occurred during perf stat run for ${group_name} (Exit Status: ${exit_status}). Check '${PERF_STAT_OUTPUT_FILE}' and '${BENCH_ERR_FILE}'." | tee -a "${LOG_FILE}"
+            STAGE_DIR="${STAGE_ROOT}/${JOB_KEY}"
+            if [ "${JOB_STATE}" = "committing" ]; then
+                # interrupted while moving a finished configuration into place: finish the move (the staging
+                # directory is only removed after the last file moved)
+                [ -d "${STAGE_DIR}" ] && commit_job "${STAGE_DIR}"
+                journal "${JOB_KEY}" done "" "resumed commit"
+                echo "          Finished the interrupted commit of ${JOB_KEY}." | tee -a "${LOG_FILE}"
+                continue
+            fi
+            attempt=1
+            job_ok=0
+            while [ ${attempt} -le ${MAX_ATTEMPTS} ]; do
+                rm -rf "${STAGE_DIR}" # leftovers of an interrupted attempt
+                mkdir -p "${STAGE_DIR}/results_stdout" "${STAGE_DIR}/results_stderr" "${STAGE_DIR}/perf_stats" \
+                         "${STAGE_DIR}/mem_reports" "${STAGE_DIR}/env_snapshots" "${STAGE_DIR}/corun_logs"
+                journal "${JOB_KEY}" started ${attempt} ""
+                if ! start_corunner "${STAGE_DIR}/corun_logs/${JOB_KEY}_corun.txt"; then
+                    JOB_FAILURE="co-runner exited during warm-up"
+                    stop_corunner
+                elif run_configuration "${algo}" "${gen}" "${type}" "${STAGE_DIR}"; then
+                    stop_corunner
+                    job_ok=1
+                    break
                 else
-                    echo "                 Perf stat finished for ${group_name}." | tee -a "${LOG_FILE}"
+                    stop_corunner
                 fi
-
-                if [ -s "${BENCH_ERR_FILE}" ]; then
-                    echo "                 Note: Benchmark stderr file '${BENCH_ERR_FILE}' may contain new messages from this group's run." | tee -a "${LOG_FILE}"
+                journal "${JOB_KEY}" retry ${attempt} "${JOB_FAILURE}"
+                if [ ${attempt} -lt ${MAX_ATTEMPTS} ]; then
+                    echo "          Attempt ${attempt}/${MAX_ATTEMPTS} of ${JOB_KEY} failed (${JOB_FAILURE}), retrying in ${RETRY_DELAY_S}s." | tee -a "${LOG_FILE}"
+                    sleep ${RETRY_DELAY_S}
                 fi
-                echo "                 --- Group ${group_name} Finished ---" | tee -a "${LOG_FILE}"
-            done # --- End event group loop ---
-
-            echo "          Finished all groups for: algo=${algo}, gen=${gen}, type=${type}" | tee -a "${LOG_FILE}"
-
-            if [ -f "${BENCH_TXT_FILE}" ]; then
-                if grep -q 'configwarning=1' "${BENCH_TXT_FILE}"; then
-                    echo "          CONFIG WARNING DETECTED in ${BENCH_TXT_FILE}!" | tee -a "${LOG_FILE}"
-                    echo "          Deleting potentially misleading perf stat files for this configuration." | tee -a "${LOG_FILE}"
-                    perf_file_pattern="${STAT_DIR}/${algo}_${gen}_${type}_GROUP"
-                    files_to_delete=$(ls ${perf_file_pattern}*_perf_stat.txt 2>/dev/null)
-                    if [ -n "$files_to_delete" ]; then
-                        echo "          Deleting files:" | tee -a "${LOG_FILE}"
-                        for file_to_del in $files_to_delete; do
-                            echo "                 - $file_to_del" | tee -a "${LOG_FILE}"; rm -f "$file_to_del"; done
-                    else echo "          No perf stat files found matching pattern to delete." | tee -a "${LOG_FILE}"; fi
-                fi
-            else echo "          Warning: Benchmark stdout file not found: ${BENCH_TXT_FILE}. Cannot check for configwarning." | tee -a "${LOG_FILE}"; fi
+                attempt=$((attempt + 1))
+            done
+
+            if [ ${job_ok} -eq 1 ]; then
+                journal "${JOB_KEY}" committing ${attempt} ""
+                commit_job "${STAGE_DIR}"
+                rm -rf "${FAILED_DIR:?}/${JOB_KEY}" # files of an earlier run that gave up on it
+                journal "${JOB_KEY}" done ${attempt} "$(grep -q 'configwarning=1' "${TXT_DIR}/${JOB_KEY}_stdout.txt" 2>/dev/null && echo configwarning)"
+                echo "          Committed ${JOB_KEY} (attempt ${attempt})." | tee -a "${LOG_FILE}"
+            else
+                discard_job "${STAGE_DIR}" "${JOB_KEY}"
+                journal "${JOB_KEY}" failed ${MAX_ATTEMPTS} "${JOB_FAILURE}"
+                echo "          Giving up on ${JOB_KEY} after ${MAX_ATTEMPTS} attempts (${JOB_FAILURE}); its last attempt is in ${FAILED_DIR}/${JOB_KEY}." | tee -a "${LOG_FILE}"
+            fi
             echo "---" | tee -a "${LOG_FILE}"
         done # --- End datatype loop ---
     done # --- End generator loop ---
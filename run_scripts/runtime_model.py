@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# runtime_model.py
+# 由以往运行的 RESULT 行预测一个任务 (一个 benchmark 可执行文件 + 生成器 + 数据类型 + 大小范围 + 线程数) 的耗时，
+# 用于安排任务顺序 (LPT，使多机 makespan 最小)、在时间预算内挑选任务，以及运行中的 ETA。
+#
+# 每次内部运行的代价 = generatormilli + preprocmilli + milli + checkermilli (RESULT 行中都有)，任务耗时 = runs * 代价。
+# 没有完全相同的历史时：
+#   - 大小: 同一 (算法, 生成器, 类型) 有 >= 2 个不同大小时拟合 log(代价) = a + b*log(元素数)，否则 b = 1.05 (约 n log n)；
+#   - 线程: 取最接近的线程数，并行算法按 (t0/t)^0.8 缩放 (历史中 parallel=1)；
+#   - 没有该算法的历史: 用同一 (生成器, 类型) 其它算法的中位数，再没有就用 --default-gib-seconds。
+# 运行中每完成一个任务就把它的 RESULT 行加入模型，并按主机维护 实际/预测 的指数平滑校正系数。
+#
+# 单独运行时打印一个计划：python3 runtime_model.py --history ../run_record* --algos ... --hosts 2 --time-budget 12
+import os
+import re
+import sys
+import math
+import argparse
+import itertools
+import statistics
+from collections import defaultdict
+
+from datatype_sizes import DATATYPE_BYTES, DEFAULT_ELEMENT_BYTES, elements_for_log
+
+STDOUT_FILE_PATTERN = re.compile(r'^(benchmark_.*?)_([^_]+)_([^_]+)_stdout\.txt$')
+COST_FIELDS = ("generatormilli", "preprocmilli", "milli", "checkermilli")
+
+DEFAULT_SIZE_EXPONENT = 1.05
+THREAD_EXPONENT = 0.8
+# 进程启动、numactl、内存分配等与运行次数无关的开销 (秒)
+PROCESS_OVERHEAD_S = 1.0
+CORRECTION_SMOOTHING = 0.3
+
+# 没有历史时按数据量估计；string 按每个元素 8 字节估计
+def element_bytes(data_type):
+    return DATATYPE_BYTES.get(data_type, DEFAULT_ELEMENT_BYTES)
+
+def parse_result_fields(line):
+    return dict(token.split("=", 1) for token in line.rstrip("\n").split("\t") if "=" in token)
+
+def find_stdout_files(paths):
+    """递归查找 paths 下所有 results_stdout/benchmark_*_stdout.txt。"""
+    for path in paths:
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            if os.path.basename(root) != "results_stdout":
+                continue
+            for filename in sorted(files):
+                if STDOUT_FILE_PATTERN.match(filename):
+                    yield os.path.join(root, filename)
+
+def read_observations(filepath):
+    """
+    一个 stdout 文件 -> [(algo, gen, type, machine, threads, size, parallel, 每次运行秒数)]。
+    文件名中的类型与 RESULT 行的 datatype 不一致时 (例如 cgroup 运行带限制后缀的文件名) 返回 []。
+    """
+    match = STDOUT_FILE_PATTERN.match(os.path.basename(filepath))
+    if not match:
+        return []
+    algo, gen, data_type = match.groups()
+    observations = []
+    try:
+        with open(filepath, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if not line.startswith("RESULT"):
+                    continue
+                fields = parse_result_fields(line)
+                if fields.get("configwarning") == "1" or fields.get("datatype") != data_type:
+                    continue
+                try:
+                    seconds = sum(float(fields.get(key, 0) or 0) for key in COST_FIELDS) / 1000.0
+                    size, threads = int(fields["size"]), int(fields["threads"])
+                except (KeyError, ValueError):
+                    continue
+                observations.append((algo, gen, data_type, fields.get("machine", ""), threads, size,
+                                     fields.get("parallel") == "1", seconds))
+    except OSError:
+        pass
+    return observations
+
+class RuntimeModel:
+    """
+    观测按 (算法, 生成器, 类型) 分组，每组记录 {(线程数, 元素数): [每次运行秒数]} 以及该算法是否并行。
+    """
+    def __init__(self, default_gib_seconds=2.0):
+        self.samples = defaultdict(lambda: defaultdict(list))
+        self.parallel = {}
+        self.default_gib_seconds = default_gib_seconds
+        self.corrections = {}
+
+    def add(self, observations):
+        for algo, gen, data_type, _machine, threads, size, parallel, seconds in observations:
+            self.samples[(algo, gen, data_type)][(threads, size)].append(seconds)
+            self.parallel[algo] = self.parallel.get(algo, False) or parallel
+        return self
+
+    def load_history(self, paths):
+        files = 0
+        for filepath in find_stdout_files(paths):
+            self.add(read_observations(filepath))
+            files += 1
+        return files
+
+    def _size_exponent(self, points):
+        sizes = sorted({size for _threads, size in points})
+        if len(sizes) < 2:
+            return DEFAULT_SIZE_EXPONENT
+        xs = [math.log(size) for (_t, size), values in points.items() for _ in values]
+        ys = [math.log(max(v, 1e-6)) for values in points.values() for v in values]
+        mean_x, mean_y = statistics.mean(xs), statistics.mean(ys)
+        var_x = sum((x - mean_x) ** 2 for x in xs)
+        if var_x == 0:
+            return DEFAULT_SIZE_EXPONENT
+        slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+        return min(1.5, max(0.8, slope)) # 噪声大的拟合不要外推得太离谱
+
+    def run_seconds(self, algo, gen, data_type, threads, size):
+        """
+        预测一次内部运行的秒数，返回 (秒数, 来源)，来源为 exact / extrapolated / similar / default。
+        """
+        points = self.samples.get((algo, gen, data_type))
+        if points:
+            if (threads, size) in points:
+                return statistics.median(points[(threads, size)]), "exact"
+            # 最接近的线程数，其中最接近的大小
+            near_threads = min({t for t, _s in points}, key=lambda t: (abs(math.log(t / threads)), -t))
+            near_size = min({s for t, s in points if t == near_threads}, key=lambda s: abs(math.log(s / size)))
+            seconds = statistics.median(points[(near_threads, near_size)])
+            seconds *= (size / near_size) ** self._size_exponent(points)
+            if self.parallel.get(algo) and near_threads != threads:
+                seconds *= (near_threads / threads) ** THREAD_EXPONENT
+            return seconds, "extrapolated"
+        similar = []
+        for (other_algo, other_gen, other_type), other_points in self.samples.items():
+            if (other_gen, other_type) == (gen, data_type):
+                seconds, _source = self.run_seconds(other_algo, gen, data_type, threads, size)
+                similar.append(seconds)
+        if similar:
+            return statistics.median(similar), "similar"
+        return size * element_bytes(data_type) / (1 << 30) * self.default_gib_seconds, "default"
+
+    def predict(self, job, runs, min_log, max_log, threads, host=None):
+        """
+        job = (可执行文件名, 生成器, 类型)。-b..-e 中每个大小运行 runs 次。返回 (秒数, 来源)，
+        来源取所有大小中最弱的一个。已有该主机的校正系数时乘上它。
+        """
+        algo, gen, data_type = job
+        total, sources = PROCESS_OVERHEAD_S, []
+        for log_bytes in range(min_log, max_log + 1):
+            size = elements_for_log(log_bytes, data_type)
+            seconds, source = self.run_seconds(algo, gen, data_type, threads, size)
+            total += runs * seconds
+            sources.append(source)
+        weakest = max(sources, key=["exact", "extrapolated", "similar", "default"].index)
+        return total * self.corrections.get(host, 1.0), weakest
+
+    def observe(self, host, predicted_seconds, actual_seconds, stdout_path=None):
+        """
+        一个任务完成：更新该主机的校正系数 (对数空间的指数平滑)，并把它的 RESULT 行加入模型。
+        predicted_seconds 应为未校正的预测值。
+        """
+        if predicted_seconds > 0 and actual_seconds > 0:
+            ratio = math.log(actual_seconds / predicted_seconds)
+            previous = math.log(self.corrections.get(host, 1.0))
+            self.corrections[host] = math.exp(previous + CORRECTION_SMOOTHING * (ratio - previous))
+        if stdout_path:
+            self.add(read_observations(stdout_path))
+
+def lpt_schedule(durations, hosts):
+    """
+    Longest Processing Time 优先：按预测耗时从长到短，每个任务交给当前负载最小的主机。
+    durations: {job: 秒数}。返回 ([每台主机的任务列表], [每台主机的总秒数])。
+    """
+    loads = [0.0] * hosts
+    assignment = [[] for _ in range(hosts)]
+    for job in sorted(durations, key=lambda j: -durations[j]):
+        target = loads.index(min(loads))
+        assignment[target].append(job)
+        loads[target] += durations[job]
+    return assignment, loads
+
+def fit_budget(durations, budget_seconds, hosts):
+    """
+    在 hosts 台主机、每台 budget_seconds 秒内尽量多地运行配置：按预测耗时从短到长贪心选择，
+    每加入一个任务都用 LPT 检查 makespan。返回 (选中的任务, 放弃的任务)。
+    """
+    selected, dropped = [], []
+    for job in sorted(durations, key=lambda j: durations[j]):
+        _assignment, loads = lpt_schedule({j: durations[j] for j in selected + [job]}, hosts)
+        if max(loads) <= budget_seconds:
+            selected.append(job)
+        else:
+            dropped.append(job)
+    return selected, dropped
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    return f"{hours}h{rest // 60:02d}m" if hours else f"{rest // 60}m{rest % 60:02d}s"
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Predict job durations from past RESULT timings and print an LPT schedule / time-budget plan.")
+    parser.add_argument("--history", nargs="+", required=True,
+                        help="Directories searched recursively for results_stdout/benchmark_*_stdout.txt.")
+    parser.add_argument("--algos", nargs="+", required=True)
+    parser.add_argument("--generators", nargs="+", default=["RNAcentral", "SDSS"])
+    parser.add_argument("--datatypes", nargs="+", default=["double"])
+    parser.add_argument("--min-log", type=int, default=32)
+    parser.add_argument("--max-log", type=int, default=32)
+    parser.add_argument("--runs", type=int, default=6)
+    parser.add_argument("--threads", type=int, default=None, help="Default: all cores of this machine.")
+    parser.add_argument("--hosts", type=int, default=1, help="Number of identical hosts sharing the jobs.")
+    parser.add_argument("--time-budget", type=float, default=None, help="Hours per host; longer jobs are dropped.")
+    parser.add_argument("--default-gib-seconds", type=float, default=2.0,
+                        help="Seconds per GiB and run for configurations without any history (default: %(default)s).")
+    args = parser.parse_args()
+
+    threads = args.threads or os.cpu_count() or 1
+    model = RuntimeModel(args.default_gib_seconds)
+    files = model.load_history(args.history)
+    if not files:
+        print(f"Warning: no results_stdout files found under {' '.join(args.history)}; using defaults only.",
+              file=sys.stderr)
+    predictions = {job: model.predict(job, args.runs, args.min_log, args.max_log, threads)
+                   for job in itertools.product(args.algos, args.generators, args.datatypes)}
+    durations = {job: seconds for job, (seconds, _source) in predictions.items()}
+    dropped = []
+    if args.time_budget is not None:
+        selected, dropped = fit_budget(durations, args.time_budget * 3600, args.hosts)
+        durations = {job: durations[job] for job in selected}
+    assignment, loads = lpt_schedule(durations, args.hosts)
+
+    print(f"History: {files} stdout file(s). Threads: {threads}. Hosts: {args.hosts}.")
+    for host, jobs in enumerate(assignment):
+        print(f"\nhost {host}: {format_duration(loads[host])}")
+        for job in jobs:
+            seconds, source = predictions[job]
+            print(f"  {format_duration(seconds):>8}  {source:<12}  {' '.join(job)}")
+    if dropped:
+        print(f"\nDropped to fit {args.time_budget}h: " + ", ".join(' '.join(job) for job in dropped))
+    print(f"\nPredicted makespan: {format_duration(max(loads) if loads else 0)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+# shard_orchestrator.py
+# 多机运行：把 (算法, 生成器, 数据类型) 任务矩阵分发到一组工作主机 (默认通过 ssh，也可以是任意命令前缀)，
+# 结果实时流回本机，写入同一个运行仓库，按机器分目录：
+#
+#   run_record_shard/shard_run_<时间戳>/
+#     run_metadata.txt              本次多机运行的参数
+#     shard_jobs.jsonl              每个任务一行 (主机、机器名、状态、耗时)，同时是断点续跑的日志
+#     machines/<machine>/           每台机器一个普通的运行目录 (run_metadata.txt 含远端环境指纹, results_stdout/)
+#
+# machines/<machine> 与 perf_benchmark_run_* 的结构相同，analysis_scripts/analyze_machines.py 一次读取所有机器做对比。
+# --import-runs 可以把以前在各台机器上单独跑出来的运行目录按 RESULT 行中的 machine= 合并进同一个仓库。
+#
+# 任务顺序与 ETA 来自 runtime_model.py：按历史 RESULT 预测每个任务的耗时，partition 模式按 LPT (最长的先) 排队，
+# --time-budget 在预算内挑选尽量多的配置，每完成一个任务就用实际耗时校正预测并打印剩余时间。
+#
+# 用同一个 --store 再次运行时跳过 shard_jobs.jsonl 中已成功的任务；每个任务的 stdout 先写入 .partial 文件，
+# 成功后再改名，失败的任务最多重试 --retries 次 (partition 模式下可能换一台主机)。
+#
+# 主机写作 host 或 host=machine；"localhost" / "local" 不经过 transport 直接在本机运行，
+# 例如 --hosts localhost=fakeA localhost=fakeB 可以在一台机器上测试整个流程。
+import os
+import re
+import sys
+import json
+import time
+import queue
+import shlex
+import shutil
+import argparse
+import itertools
+import threading
+import subprocess
+from collections import defaultdict
+
+from env_fingerprint import fingerprint
+from runtime_model import RuntimeModel, fit_budget, format_duration
+
+LOCAL_HOSTS = ("localhost", "local")
+# ssh 连接失败时的退出码：认为主机不可用，把任务交还给其它主机
+SSH_CONNECTION_FAILURE = 255
+STDOUT_FILE_PATTERN = re.compile(r'^(benchmark_.*?)_([^_]+)_([^_]+)_stdout\.txt$')
+RESULT_MACHINE_PATTERN = re.compile(r'\tmachine=([^\t\n]*)')
+
+class Logger:
+    """
+    同时输出到终端与日志文件 (与 bash runner 中的 '| tee -a "${LOG_FILE}"' 相同)，多个主机线程共用。
+    """
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def __call__(self, message, error=False):
+        with self.lock:
+            print(message, file=sys.stderr if error else sys.stdout, flush=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(message + "\n")
+
+def safe_name(text):
+    return re.sub(r'[^A-Za-z0-9.-]', '-', text) or "unknown"
+
+def parse_hosts(entries):
+    """
+    "host" 或 "host=machine" -> [(host, machine)]。机器名用作 -m 参数和目录名，必须唯一。
+    """
+    workers = []
+    for entry in entries:
+        host, _, machine = entry.partition("=")
+        if not host:
+            raise ValueError(f"invalid host '{entry}'")
+        workers.append((host, safe_name(machine or host)))
+    machines = [machine for _, machine in workers]
+    duplicates = sorted({m for m in machines if machines.count(m) > 1})
+    if duplicates:
+        raise ValueError(f"machine names must be unique (use host=machine): {', '.join(duplicates)}")
+    return workers
+
+def shell_path(path):
+    """引用路径，但保留开头的 ~/ 让工作主机上的 shell 展开。"""
+    if path.startswith("~/"):
+        return '"$HOME"/' + shlex.quote(path[2:])
+    return shlex.quote(path)
+
+def remote_command(host, shell_command, transport):
+    """本机直接用 sh -c；其它主机: transport 模板 (例如 "ssh -o BatchMode=yes {host}") + 命令字符串。"""
+    if host in LOCAL_HOSTS:
+        return ["sh", "-c", shell_command]
+    return shlex.split(transport.format(host=host)) + [shell_command]
+
+def remote_fingerprint(host, args, log):
+    """在工作主机上运行 env_fingerprint.py --quick，失败时返回 {} 并给出警告。"""
+    script = shell_path(os.path.join(args.remote_repo, "run_scripts", "env_fingerprint.py"))
+    try:
+        output = subprocess.run(remote_command(host, f"python3 {script} --quick", args.transport),
+                                capture_output=True, text=True, timeout=60).stdout
+    except (OSError, subprocess.SubprocessError) as e:
+        log(f"Warning: no environment fingerprint from {host}: {e}", error=True)
+        return {}
+    values = dict(line.split("=", 1) for line in output.splitlines() if "=" in line)
+    if not values:
+        log(f"Warning: no environment fingerprint from {host} (is {args.remote_repo} checked out there?)", error=True)
+    return values
+
+def machine_dirs(store, machine):
+    base = os.path.join(store, "machines", machine)
+    dirs = {"base": base, "txt": os.path.join(base, "results_stdout"), "err": os.path.join(base, "results_stderr")}
+    for path in dirs.values():
+        os.makedirs(path, exist_ok=True)
+    return dirs
+
+def run_job(job, host, machine, dirs, args, log):
+    """
+    在 host 上运行一个任务，stdout 边读边写入 machines/<machine>/results_stdout/。返回 shard_jobs.jsonl 的记录。
+    """
+    algo, gen, data_type = job
+    arguments = ["-b", str(args.min_log), "-e", str(args.max_log), "-r", str(args.runs), "-g", gen, "-d", data_type,
+                 "-v", "vector", "-m", machine]
+    # 线程数默认取工作主机的 nproc
+    shell_command = (f"ENABLE_PERF_CONTROL=false {shell_path(os.path.join(args.remote_build_dir, algo))} "
+                     f"{' '.join(shlex.quote(a) for a in arguments)} -t {args.threads or '$(nproc)'}")
+    if args.numactl:
+        shell_command = (f"if command -v numactl >/dev/null; then exec numactl {args.numactl} {shell_command}; "
+                         f"else exec {shell_command}; fi")
+    config_tag = f"{algo}_{gen}_{data_type}"
+    stdout_path = os.path.join(dirs["txt"], f"{config_tag}_stdout.txt")
+    record = {"host": host, "machine": machine, "algo": algo, "gen": gen, "datatype": data_type,
+              "stdout": os.path.relpath(stdout_path, args.store)}
+    stderr_path = os.path.join(dirs["err"], f"{config_tag}_stderr.err")
+    started = time.monotonic()
+    results = 0
+    try:
+        with open(stdout_path + ".partial", "w") as out, open(stderr_path + ".partial", "w") as err:
+            process = subprocess.Popen(remote_command(host, shell_command, args.transport), stdout=subprocess.PIPE,
+                                       stderr=err, stdin=subprocess.DEVNULL, text=True, bufsize=1)
+            for line in process.stdout:
+                out.write(line)
+                if line.startswith("RESULT"):
+                    results += 1
+                    out.flush()
+            returncode = process.wait()
+            out.flush()
+            os.fsync(out.fileno())
+        # 改名是原子的：results_stdout 中只会出现完整的输出
+        os.replace(stdout_path + ".partial", stdout_path)
+        os.replace(stderr_path + ".partial", stderr_path)
+    except OSError as e:
+        log(f"Error launching {config_tag} on {host}: {e}", error=True)
+        record.update(status="launch_error", returncode=None)
+        return record
+    record.update(returncode=returncode, results=results, wall_s=time.monotonic() - started)
+    if returncode == 0:
+        record["status"] = "ok"
+    elif returncode == SSH_CONNECTION_FAILURE and host not in LOCAL_HOSTS and results == 0:
+        record["status"] = "unreachable"
+    else:
+        record["status"] = "failed"
+    return record
+
+class SweepProgress:
+    """
+    运行中的预测状态：每台机器的队列、正在运行的任务和 RuntimeModel。所有方法都在调用者持有 lock 时使用。
+    """
+    def __init__(self, model, args, queues, hosts):
+        self.model = model
+        self.args = args
+        self.queues = queues # {machine: queue.Queue}，partition 模式下都是同一个队列
+        self.hosts = hosts # {machine: host}
+        self.running = {} # {machine: (开始时间, 校正后的预测秒数)}
+        self.attempts = defaultdict(lambda: 1) # {job: 当前是第几次尝试} (replicate 模式下各主机共用计数)
+        self.live = set(queues)
+        self.threads = args.threads or os.cpu_count() or 1
+
+    def predict(self, job, machine=None, corrected=True):
+        host = self.hosts.get(machine) if corrected else None
+        return self.model.predict(job, self.args.runs, self.args.min_log, self.args.max_log, self.threads, host)[0]
+
+    def _running_left(self, machine, now):
+        if machine not in self.running:
+            return 0.0
+        started, predicted = self.running[machine]
+        return max(0.0, predicted - (now - started))
+
+    def eta_seconds(self):
+        now = time.monotonic()
+        if self.args.mode == "replicate":
+            return max((self._running_left(m, now) + sum(self.predict(j, m) for j in list(self.queues[m].queue))
+                        for m in self.live), default=0.0)
+        # partition: 共享队列由最先空闲的主机领取，近似为总剩余量平均分到仍在线的主机上
+        machines = sorted(self.live) or [None]
+        pending = list(next(iter(self.queues.values())).queue)
+        total = sum(self._running_left(m, now) for m in self.live) + sum(self.predict(j, machines[0]) for j in pending)
+        longest = max([self.predict(j, machines[0]) for j in pending] + [self._running_left(m, now) for m in self.live],
+                      default=0.0)
+        return max(longest, total / len(machines))
+
+def worker(host, machine, jobs, args, log, records, lock, progress):
+    """
+    一个主机线程：从 jobs 队列 (replicate 模式下是本机专用队列，partition 模式下是共享队列) 取任务直到为空。
+    每个任务完成后用实际耗时校正模型并打印 ETA。主机不可达时把当前任务放回共享队列并退出。
+    """
+    dirs = machine_dirs(args.store, machine)
+    while True:
+        try:
+            job = jobs.get_nowait()
+        except queue.Empty:
+            with lock:
+                progress.live.discard(machine)
+            return
+        with lock:
+            predicted = progress.predict(job, machine, corrected=False)
+            progress.running[machine] = (time.monotonic(), progress.predict(job, machine))
+        log(f"[{machine}] {' '.join(job)} (predicted {format_duration(progress.running[machine][1])})")
+        record = run_job(job, host, machine, dirs, args, log)
+        record["predicted_s"] = progress.running[machine][1]
+        log(f"[{machine}] {' '.join(job)} -> {record['status']} (exit {record.get('returncode')}, "
+            f"{record.get('results', 0)} RESULT lines, {record.get('wall_s', 0):.1f}s)",
+            error=record["status"] != "ok")
+        with lock:
+            del progress.running[machine]
+            if record["status"] == "ok":
+                progress.model.observe(host, predicted, record["wall_s"],
+                                       os.path.join(args.store, record["stdout"]))
+            records.append(record)
+            with open(os.path.join(args.store, "shard_jobs.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            if record["status"] == "unreachable":
+                progress.live.discard(machine)
+            retry = record["status"] in ("failed", "launch_error") and progress.attempts[job] <= args.retries
+            if retry:
+                progress.attempts[job] += 1
+                jobs.put(job)
+            eta = progress.eta_seconds()
+        if retry:
+            log(f"[{machine}] retrying {' '.join(job)} (attempt {progress.attempts[job]} of {args.retries + 1}).")
+        log(f"ETA: {format_duration(eta)} left, finishing around {time.strftime('%Y-%m-%d %H:%M', time.localtime(time.time() + eta))}")
+        if record["status"] == "unreachable":
+            if args.mode == "partition":
+                jobs.put(job)
+            log(f"[{machine}] {host} is unreachable, no further jobs are sent to it.", error=True)
+            return
+
+def completed_jobs(store):
+    """shard_jobs.jsonl 中已成功的任务: {(machine, algo, gen, type)}。"""
+    done = set()
+    try:
+        with open(os.path.join(store, "shard_jobs.jsonl"), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue # 崩溃时写了一半的最后一行
+                if record.get("status") == "ok":
+                    done.add((record["machine"], record["algo"], record["gen"], record["datatype"]))
+    except OSError:
+        pass
+    return done
+
+def import_runs(run_dirs, store, log):
+    """
+    把单独运行的目录合并进仓库：每个 results_stdout 文件按其 RESULT 行的 machine= 放到 machines/<machine>/。
+    同一机器同一配置已存在时跳过 (分析只读取文件中的第一个执行块)。返回导入的文件数。
+    """
+    imported = 0
+    for run_dir in run_dirs:
+        stdout_dir = os.path.join(run_dir, "results_stdout")
+        if not os.path.isdir(stdout_dir):
+            log(f"Warning: {run_dir} has no results_stdout directory, skipping.", error=True)
+            continue
+        for filename in sorted(os.listdir(stdout_dir)):
+            if not STDOUT_FILE_PATTERN.match(filename):
+                continue
+            source = os.path.join(stdout_dir, filename)
+            machine = None
+            with open(source, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    match = RESULT_MACHINE_PATTERN.search(line) if line.startswith("RESULT") else None
+                    if match:
+                        machine = safe_name(match.group(1))
+                        break
+            if machine is None:
+                continue
+            dirs = machine_dirs(store, machine)
+            target = os.path.join(dirs["txt"], filename)
+            if os.path.exists(target):
+                log(f"Warning: {machine}/{filename} already in the store, keeping it (skipped {source}).", error=True)
+                continue
+            shutil.copyfile(source, target)
+            metadata = os.path.join(run_dir, "run_metadata.txt")
+            if os.path.isfile(metadata) and not os.path.exists(os.path.join(dirs["base"], "run_metadata.txt")):
+                shutil.copyfile(metadata, os.path.join(dirs["base"], "run_metadata.txt"))
+            imported += 1
+    return imported
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Shard a benchmark sweep across worker hosts (ssh or any command transport), stream the results "
+                    "back and merge them into one run store keyed by machine for analyze_machines.py.")
+    parser.add_argument("--hosts", nargs="+", default=[],
+                        help="Worker hosts as host or host=machine; 'localhost' runs locally without the transport.")
+    parser.add_argument("--transport", default="ssh -o BatchMode=yes {host}",
+                        help="Command prefix for remote hosts; {host} is substituted and the shell command appended.")
+    parser.add_argument("--mode", choices=["replicate", "partition"], default="replicate",
+                        help="replicate: every host runs the whole matrix (cross-machine comparison); "
+                             "partition: hosts share one job queue (throughput on identical hosts).")
+    parser.add_argument("--remote-build-dir", default="~/parallel-bench-suite/build",
+                        help="Build directory on the workers (same path on every host).")
+    parser.add_argument("--remote-repo", default="~/parallel-bench-suite",
+                        help="Repository checkout on the workers, used to collect their environment fingerprint.")
+    parser.add_argument("--algos", nargs="+", default=["benchmark_ips4oparallel", "benchmark_mcstlmwm",
+                                                       "benchmark_mcstlbq", "benchmark_plss"])
+    parser.add_argument("--generators", nargs="+", default=["RNAcentral", "SDSS"])
+    parser.add_argument("--datatypes", nargs="+", default=["double"])
+    parser.add_argument("--min-log", type=int, default=32)
+    parser.add_argument("--max-log", type=int, default=32)
+    parser.add_argument("--runs", type=int, default=6, help="Internal runs of the C++ program (-r), run 0 is the warm-up.")
+    parser.add_argument("--threads", type=int, default=None, help="-t on every worker (default: each host's nproc).")
+    parser.add_argument("--numactl", default="-i all", help="numactl arguments, empty to run without numactl.")
+    parser.add_argument("--history", nargs="+", default=None,
+                        help="Directories with earlier runs for the runtime model (default: <repo>/run_record*).")
+    parser.add_argument("--time-budget", type=float, default=None,
+                        help="Hours per host: run as many configurations as fit (shortest predicted first), "
+                             "drop the rest.")
+    parser.add_argument("--default-gib-seconds", type=float, default=2.0,
+                        help="Seconds per GiB and run for configurations without any history (default: %(default)s).")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="Rerun a job that exits non-zero up to this many times (default: %(default)s).")
+    parser.add_argument("--import-runs", nargs="+", default=[],
+                        help="Existing run directories to merge into the store (split by the machine= field).")
+    parser.add_argument("--store", default=None,
+                        help="Run store to create or extend (default: <repo>/run_record_shard/shard_run_<timestamp>).")
+    args = parser.parse_args()
+
+    if not args.hosts and not args.import_runs:
+        print("Error: Specify --hosts and/or --import-runs.", file=sys.stderr)
+        return 1
+    try:
+        workers = parse_hosts(args.hosts)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if "{host}" not in args.transport and any(host not in LOCAL_HOSTS for host, _ in workers):
+        print("Error: --transport must contain {host}.", file=sys.stderr)
+        return 1
+
+    timestamp = time.strftime("%Y-%m-%d_%H_%M_%S")
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    args.store = os.path.abspath(args.store or os.path.join(script_dir, "..", "run_record_shard",
+                                                            f"shard_run_{timestamp}"))
+    try:
+        os.makedirs(os.path.join(args.store, "logs"), exist_ok=True)
+    except OSError as e:
+        print(f"Error: Failed to create {args.store}: {e}", file=sys.stderr)
+        return 1
+    log = Logger(os.path.join(args.store, "logs", f"run_{timestamp}.log"))
+    log(f"Sharded sweep started at {time.strftime('%Y-%m-%d %H:%M:%S')}")
+    log(f"Run store: {args.store}")
+
+    if args.import_runs:
+        log(f"Imported {import_runs(args.import_runs, args.store, log)} result file(s) from "
+            f"{len(args.import_runs)} run director{'y' if len(args.import_runs) == 1 else 'ies'}.")
+    if not workers:
+        print(f"To analyze: python analysis_scripts/analyze_machines.py {args.store}")
+        return 0
+
+    with open(os.path.join(args.store, "run_metadata.txt"), "a") as f:
+        f.write(f"timestamp={timestamp}\nmode=shard-{args.mode}\n"
+                f"hosts={' '.join(f'{h}={m}' for h, m in workers)}\n")
+    for host, machine in workers:
+        dirs = machine_dirs(args.store, machine)
+        metadata_path = os.path.join(dirs["base"], "run_metadata.txt")
+        if os.path.isfile(metadata_path) and os.path.getsize(metadata_path) > 0:
+            with open(metadata_path, "a") as f:
+                f.write(f"resumed={timestamp}\n") # 保留第一次运行时的指纹
+            continue
+        # localhost 的指纹直接在本进程中取
+        values = fingerprint(quick=True) if host in LOCAL_HOSTS else remote_fingerprint(host, args, log)
+        with open(os.path.join(dirs["base"], "run_metadata.txt"), "w") as f:
+            f.write(f"machine={machine}\nhost={host}\ntimestamp={timestamp}\nmode=shard-{args.mode}\n")
+            f.write(f"threads={args.threads or 'nproc'}\n")
+            f.writelines(f"{key}={value}\n" for key, value in values.items())
+
+    model = RuntimeModel(args.default_gib_seconds)
+    history = args.history or sorted(os.path.join(script_dir, "..", d) for d in os.listdir(os.path.join(script_dir, ".."))
+                                     if d.startswith("run_record"))
+    log(f"Runtime model: {model.load_history(history)} earlier stdout file(s) from {len(history)} director(ies).")
+    matrix = list(itertools.product(args.algos, args.generators, args.datatypes))
+    queues = {machine: queue.Queue() for _, machine in workers}
+    if args.mode == "partition":
+        shared = queue.Queue()
+        queues = {machine: shared for machine in queues}
+    progress = SweepProgress(model, args, queues, {machine: host for host, machine in workers})
+    predictions = {job: model.predict(job, args.runs, args.min_log, args.max_log, progress.threads) for job in matrix}
+    durations = {job: seconds for job, (seconds, _source) in predictions.items()}
+    if args.time_budget is not None:
+        selected, dropped = fit_budget(durations, args.time_budget * 3600,
+                                       len(workers) if args.mode == "partition" else 1)
+        for job in dropped:
+            log(f"Dropped to fit the {args.time_budget}h budget: {' '.join(job)} "
+                f"(predicted {format_duration(durations[job])})", error=True)
+        matrix = [job for job in matrix if job in selected]
+    # 最长的先 (LPT)：partition 模式下由最先空闲的主机领取，makespan 不超过最优解的 4/3
+    matrix.sort(key=lambda job: -durations[job])
+    with open(os.path.join(args.store, "sweep_plan.tsv"), "w") as f:
+        f.write("algo\tgen\tdatatype\tpredicted_s\tsource\n")
+        f.writelines("\t".join(job) + f"\t{durations[job]:.1f}\t{predictions[job][1]}\n" for job in matrix)
+    done = completed_jobs(args.store)
+    skipped = 0
+    for job in matrix:
+        if args.mode == "partition":
+            if any((machine,) + job in done for _, machine in workers):
+                skipped += 1
+            else:
+                queues[workers[0][1]].put(job)
+            continue
+        for _, machine in workers:
+            if (machine,) + job in done:
+                skipped += 1
+            else:
+                queues[machine].put(job)
+    if skipped:
+        log(f"Resuming {args.store}: skipping {skipped} job(s) already completed.")
+    log(f"{len(matrix)} configuration(s) on {len(workers)} host(s), mode {args.mode}, "
+        f"predicted makespan {format_duration(progress.eta_seconds())}.")
+
+    records, lock, threads = [], threading.Lock(), []
+    for host, machine in workers:
+        thread = threading.Thread(target=worker, args=(host, machine, queues[machine], args, log, records, lock,
+                                                       progress), daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+    failed = [r for r in records if r["status"] != "ok"]
+    expected = len(matrix) * (len(workers) if args.mode == "replicate" else 1) - skipped
+    completed = sum(r["status"] == "ok" for r in records)
+    log("======================================================")
+    log(f"Sharded sweep finished at {time.strftime('%Y-%m-%d %H:%M:%S')}: {completed}/{expected} jobs ok, "
+        f"{len(failed)} failed or unreachable.")
+    print(f"To analyze: python analysis_scripts/analyze_machines.py {args.store}")
+    return 0 if completed == expected else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
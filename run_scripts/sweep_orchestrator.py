@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+# sweep_orchestrator.py
+# 受限资源模式：每个 benchmark 配置在一个临时的 cgroup v2 中运行，依次收紧 memory.max / cpu.max，
+# 运行结束后读取 cgroup 的 cpu.stat、memory.events、memory.peak 与 PSI (*.pressure) 文件，
+# 每次运行追加一行到 <run>/cgroup_runs.jsonl，由 analysis_scripts/analyze_cgroup_limits.py 汇总
+# 各算法的耗时随限制收紧如何变化 (或失败)。
+#
+# 需要 cgroup v2 (统一层级)，并且对 --cgroup-parent 有写权限 (root，或 systemd 委派的子树，
+# 例如 systemd-run --user --scope -p Delegate=yes python3 sweep_orchestrator.py --cgroup-parent <scope 路径> ...)。
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import signal
+import argparse
+import itertools
+import subprocess
+import statistics
+
+from env_fingerprint import fingerprint
+from datatype_sizes import DATATYPE_BYTES, elements_for_log
+
+CGROUP2_MOUNT = "/sys/fs/cgroup"
+CPU_PERIOD_US = 100000
+
+SIZE_PATTERN = re.compile(r'^(\d+(?:\.\d+)?)([KMGT]?)i?B?$', re.IGNORECASE)
+RESULT_RUN_PATTERN = re.compile(r'\brun=(\d+)\b')
+RESULT_MILLI_PATTERN = re.compile(r'\bmilli=([\d.]+(?:e-?\d+)?)')
+
+# 从 memory.stat 中保留的字段
+MEMORY_STAT_FIELDS = ("anon", "file", "kernel", "sock", "pgfault", "pgmajfault", "workingset_refault_anon",
+                      "workingset_refault_file", "pgscan", "pgsteal", "thp_fault_alloc")
+
+class Logger:
+    """
+    同时输出到终端与日志文件 (与 bash runner 中的 '| tee -a "${LOG_FILE}"' 相同)。
+    """
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self, message, error=False):
+        print(message, file=sys.stderr if error else sys.stdout, flush=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(message + "\n")
+
+def largest_input_bytes(max_log, data_type):
+    """
+    -e 下最大输入数组的字节数 (元素数见 datatype_sizes.elements_for_log)。string 等大小不定的类型返回 None，
+    不能用相对内存限制。
+    """
+    if data_type not in DATATYPE_BYTES:
+        return None
+    return elements_for_log(max_log, data_type) * DATATYPE_BYTES[data_type]
+
+def parse_memory_limit(text, input_bytes):
+    """
+    "max"、绝对大小 ("512M", "16G") 或输入数组大小的倍数 ("1.5x")。返回字节数或 "max"；
+    倍数形式在输入大小未知 (string) 时返回 None。
+    """
+    text = text.strip()
+    if text.lower() == "max":
+        return "max"
+    if text.lower().endswith("x"):
+        if input_bytes is None:
+            return None
+        return int(float(text[:-1]) * input_bytes)
+    match = SIZE_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"invalid memory limit '{text}' (use max, 512M, 16G or 1.5x)")
+    scale = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}[match.group(2).upper()]
+    return int(float(match.group(1)) * scale)
+
+def parse_cpu_limit(text, total_cores):
+    """
+    "max"、占全部核心的百分比 ("50%") 或核心数 ("4c")。返回 cpu.max 的内容 ("<quota> <period>" 或 "max <period>")。
+    """
+    text = text.strip().lower()
+    if text == "max":
+        return f"max {CPU_PERIOD_US}"
+    if text.endswith("%"):
+        cores = float(text[:-1]) / 100.0 * total_cores
+    elif text.endswith("c"):
+        cores = float(text[:-1])
+    else:
+        raise ValueError(f"invalid CPU limit '{text}' (use max, 50% or 4c)")
+    return f"{max(1000, int(cores * CPU_PERIOD_US))} {CPU_PERIOD_US}"
+
+def cgroup2_available():
+    return os.path.isfile(os.path.join(CGROUP2_MOUNT, "cgroup.controllers"))
+
+def read_flat_keyed(path):
+    """
+    读取 "key value" 形式的 cgroup 文件 (cpu.stat, memory.events, memory.stat)。文件不存在时返回 {}。
+    """
+    values = {}
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2 and parts[1].lstrip("-").isdigit():
+                    values[parts[0]] = int(parts[1])
+    except OSError:
+        pass
+    return values
+
+def read_pressure(path):
+    """
+    读取 PSI 文件 ("some avg10=0.00 avg60=0.00 avg300=0.00 total=123")，返回 {"some_total_us", "full_total_us", ...}。
+    """
+    values = {}
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                kind, *fields = line.split()
+                for field in fields:
+                    key, _, value = field.partition("=")
+                    if key == "total":
+                        values[f"{kind}_total_us"] = int(value)
+                    elif key == "avg10":
+                        values[f"{kind}_avg10"] = float(value)
+    except OSError:
+        pass
+    return values
+
+def read_single_value(path):
+    try:
+        with open(path, "r") as f:
+            text = f.read().strip()
+        return int(text) if text.isdigit() else text
+    except OSError:
+        return None
+
+class CgroupSandbox:
+    """
+    一个临时的 cgroup v2 子组：创建时写入 memory.max / memory.swap.max / cpu.max，
+    子进程在 exec 之前把自己写入 cgroup.procs，结束后读取统计并删除目录。
+    """
+    def __init__(self, parent, name):
+        self.path = os.path.join(parent, name)
+        self.parent = parent
+
+    def create(self, memory_max, cpu_max, swap_max):
+        # 父组需要把 memory 与 cpu 控制器开放给子组 (cgroup v2 "no internal processes" 规则要求父组本身没有进程)
+        subtree = os.path.join(self.parent, "cgroup.subtree_control")
+        with open(subtree, "r") as f:
+            enabled = f.read().split()
+        missing = [c for c in ("memory", "cpu") if c not in enabled]
+        if missing:
+            with open(subtree, "w") as f:
+                f.write(" ".join(f"+{c}" for c in missing))
+        if os.path.isdir(self.path):
+            self.destroy()
+        os.mkdir(self.path)
+        self._write("memory.max", str(memory_max))
+        if swap_max is not None and os.path.exists(os.path.join(self.path, "memory.swap.max")):
+            self._write("memory.swap.max", str(swap_max))
+        self._write("cpu.max", cpu_max)
+
+    def _write(self, filename, value):
+        with open(os.path.join(self.path, filename), "w") as f:
+            f.write(value)
+
+    def join_current_process(self):
+        """在 preexec_fn 中调用：把子进程 (exec 之前) 移入本组。"""
+        with open(os.path.join(self.path, "cgroup.procs"), "w") as f:
+            f.write(str(os.getpid()))
+
+    def kill_all(self):
+        """优先用 cgroup.kill (5.14+)，否则逐个发送 SIGKILL。"""
+        kill_file = os.path.join(self.path, "cgroup.kill")
+        if os.path.exists(kill_file):
+            try:
+                self._write("cgroup.kill", "1")
+                return
+            except OSError:
+                pass
+        try:
+            with open(os.path.join(self.path, "cgroup.procs"), "r") as f:
+                for pid in f.read().split():
+                    try:
+                        os.kill(int(pid), signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+        except OSError:
+            pass
+
+    def stats(self):
+        result = {
+            "cpu_stat": read_flat_keyed(os.path.join(self.path, "cpu.stat")),
+            "memory_events": read_flat_keyed(os.path.join(self.path, "memory.events")),
+            "memory_stat": {k: v for k, v in read_flat_keyed(os.path.join(self.path, "memory.stat")).items()
+                            if k in MEMORY_STAT_FIELDS},
+            "memory_peak": read_single_value(os.path.join(self.path, "memory.peak")), # 5.19+
+            "swap_events": read_flat_keyed(os.path.join(self.path, "memory.swap.events")),
+        }
+        for resource in ("cpu", "memory", "io"):
+            result[f"{resource}_pressure"] = read_pressure(os.path.join(self.path, f"{resource}.pressure"))
+        return result
+
+    def destroy(self, timeout_s=10.0):
+        deadline = time.monotonic() + timeout_s
+        while True:
+            try:
+                os.rmdir(self.path)
+                return True
+            except FileNotFoundError:
+                return True
+            except OSError:
+                if time.monotonic() > deadline:
+                    return False
+                self.kill_all()
+                time.sleep(0.05)
+
+def parse_stdout_times(path):
+    """
+    返回 (被测运行的 milli 列表 (run != 0)，看到的最大 run id)。
+    """
+    times, max_run = [], -1
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if not line.startswith("RESULT") or "configwarning=1" in line:
+                    continue
+                run_match = RESULT_RUN_PATTERN.search(line)
+                milli_match = RESULT_MILLI_PATTERN.search(line)
+                if not run_match:
+                    continue
+                run = int(run_match.group(1))
+                max_run = max(max_run, run)
+                if run != 0 and milli_match:
+                    times.append(float(milli_match.group(1)))
+    except OSError:
+        pass
+    return times, max_run
+
+def limit_tag(memory_text, cpu_text):
+    clean = lambda text: text.strip().lower().replace("%", "pct").replace(".", "p")
+    return f"mem{clean(memory_text)}_cpu{clean(cpu_text)}"
+
+def run_constrained(config, args, dirs, log):
+    """
+    在一个新的 cgroup 中运行一个 (算法, 生成器, 类型, 限制) 组合，返回写入 cgroup_runs.jsonl 的记录。
+    """
+    algo, gen, data_type, memory_text, cpu_text = config
+    tag = limit_tag(memory_text, cpu_text)
+    config_tag = f"{algo}_{gen}_{data_type}"
+    input_bytes = largest_input_bytes(args.max_log, data_type)
+    record = {"algo": algo, "gen": gen, "datatype": data_type, "memory_limit_arg": memory_text,
+              "cpu_limit_arg": cpu_text, "limit_tag": tag, "input_bytes": input_bytes,
+              "threads": args.threads, "size_log": args.max_log}
+
+    memory_max = parse_memory_limit(memory_text, input_bytes)
+    if memory_max is None:
+        log(f"Skipping {config_tag} [{tag}]: relative memory limit needs a fixed-size datatype.", error=True)
+        record["status"] = "skipped"
+        return record
+    cpu_max = parse_cpu_limit(cpu_text, args.total_cores)
+    record["memory_max"] = memory_max
+    record["cpu_max"] = cpu_max
+
+    executable = os.path.join(args.build_dir, algo)
+    command = [executable, "-b", str(args.min_log), "-e", str(args.max_log), "-r", str(args.runs),
+               "-t", str(args.threads), "-g", gen, "-d", data_type, "-v", "vector", "-m", args.machine]
+    if args.numactl and shutil.which("numactl"):
+        command = ["numactl"] + args.numactl.split() + command
+    stdout_path = os.path.join(dirs["txt"], f"{config_tag}_{tag}_stdout.txt")
+    stderr_path = os.path.join(dirs["err"], f"{config_tag}_{tag}_stderr.err")
+    record["stdout"] = os.path.relpath(stdout_path, dirs["parent"])
+
+    sandbox = CgroupSandbox(args.cgroup_parent, f"sortbench_{os.getpid()}_{config_tag}_{tag}")
+    try:
+        sandbox.create(memory_max, cpu_max, None if args.allow_swap else 0)
+    except OSError as e:
+        log(f"Error: cannot create cgroup {sandbox.path}: {e}", error=True)
+        record["status"] = "cgroup_error"
+        return record
+
+    log(f"Executing [{tag}] memory.max={memory_max} cpu.max='{cpu_max}': {' '.join(command)}")
+    started = time.monotonic()
+    status = "ok"
+    try:
+        with open(stdout_path, "w") as out, open(stderr_path, "w") as err:
+            process = subprocess.Popen(command, stdout=out, stderr=err, preexec_fn=sandbox.join_current_process,
+                                       env=dict(os.environ, ENABLE_PERF_CONTROL="false"))
+            try:
+                returncode = process.wait(timeout=args.timeout if args.timeout > 0 else None)
+            except subprocess.TimeoutExpired:
+                sandbox.kill_all()
+                returncode = process.wait()
+                status = "timeout"
+    except (OSError, subprocess.SubprocessError) as e:
+        log(f"Error launching {config_tag} [{tag}]: {e}", error=True)
+        sandbox.destroy()
+        record["status"] = "launch_error"
+        return record
+    record["wall_s"] = time.monotonic() - started
+    record["returncode"] = returncode
+    record.update(sandbox.stats())
+    if not sandbox.destroy():
+        log(f"Warning: could not remove cgroup {sandbox.path}", error=True)
+
+    times, max_run = parse_stdout_times(stdout_path)
+    record["sort_milli"] = times
+    record["completed_runs"] = max_run + 1
+    record["median_milli"] = statistics.median(times) if times else None
+    if status == "ok" and returncode != 0:
+        status = "oom_killed" if record["memory_events"].get("oom_kill", 0) > 0 else "failed"
+    elif status == "ok" and record["completed_runs"] < args.runs:
+        status = "incomplete"
+    record["status"] = status
+
+    throttled = record["cpu_stat"].get("throttled_usec", 0) / 1e6
+    log(f"  -> {status} (exit {returncode}) in {record['wall_s']:.1f}s, median sort "
+        f"{record['median_milli'] if record['median_milli'] is not None else '-'} ms, throttled {throttled:.1f}s, "
+        f"memory.peak {record['memory_peak']}, oom_kill {record['memory_events'].get('oom_kill', 0)}")
+    return record
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Resource-constrained sweep: run every benchmark configuration inside a transient cgroup v2 with "
+                    "each combination of memory.max / cpu.max, and record throttling, OOM events and pressure stall "
+                    "information for analyze_cgroup_limits.py.")
+    parser.add_argument("--build-dir", default=os.path.expanduser("~/parallel-bench-suite/build"))
+    parser.add_argument("--algos", nargs="+", default=["benchmark_ips4oparallel", "benchmark_mcstlmwm",
+                                                       "benchmark_mcstlbq", "benchmark_plss"])
+    parser.add_argument("--generators", nargs="+", default=["RNAcentral", "SDSS"])
+    parser.add_argument("--datatypes", nargs="+", default=["double"])
+    parser.add_argument("--min-log", type=int, default=32)
+    parser.add_argument("--max-log", type=int, default=32)
+    parser.add_argument("--runs", type=int, default=6, help="Internal runs of the C++ program (-r), run 0 is the warm-up.")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="-t passed to the benchmark (default: all cores, so a CPU quota shows up as throttling).")
+    parser.add_argument("--machine", default="142")
+    parser.add_argument("--memory-max", nargs="+", default=["max", "4x", "3x", "2.5x", "2x"],
+                        help="memory.max values: max, absolute sizes (16G) or multiples of the input array (2.5x). "
+                             "'max' is always added as the baseline.")
+    parser.add_argument("--cpu-max", nargs="+", default=["max", "50%", "25%"],
+                        help="cpu.max values: max, share of all cores (50%%) or a number of cores (4c). "
+                             "'max' is always added as the baseline.")
+    parser.add_argument("--allow-swap", action="store_true",
+                        help="Leave memory.swap.max alone (default: 0, so hitting memory.max means reclaim/OOM, not swap).")
+    parser.add_argument("--cgroup-parent", default=os.path.join(CGROUP2_MOUNT, "sortbench"),
+                        help="Writable cgroup v2 directory under which the transient groups are created "
+                             "(created if missing; must not contain processes itself).")
+    parser.add_argument("--numactl", default="-i all", help="numactl arguments, empty to run without numactl.")
+    parser.add_argument("--timeout", type=float, default=0, help="Kill a configuration after this many seconds (0 = never).")
+    parser.add_argument("--output-base", default=None, help="Default: <repo>/run_record_cgroup")
+    args = parser.parse_args()
+
+    args.total_cores = os.cpu_count() or 1
+    args.threads = args.threads or args.total_cores
+    for values in (args.memory_max, args.cpu_max):
+        if not any(v.strip().lower() == "max" for v in values):
+            values.insert(0, "max")
+    try:
+        for data_type in args.datatypes:
+            for text in args.memory_max:
+                parse_memory_limit(text, DATATYPE_BYTES.get(data_type, 1))
+        for text in args.cpu_max:
+            parse_cpu_limit(text, args.total_cores)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if not cgroup2_available():
+        print(f"Error: cgroup v2 is not mounted at {CGROUP2_MOUNT} (hybrid/v1 hierarchy). "
+              "Boot with systemd.unified_cgroup_hierarchy=1 or run on a cgroup v2 host.", file=sys.stderr)
+        return 1
+    try:
+        os.makedirs(args.cgroup_parent, exist_ok=True)
+    except OSError as e:
+        print(f"Error: cannot create {args.cgroup_parent}: {e}. Run as root or pass a delegated subtree via "
+              "--cgroup-parent.", file=sys.stderr)
+        return 1
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    base = args.output_base or os.path.join(script_dir, "..", "run_record_cgroup")
+    timestamp = time.strftime("%Y-%m-%d_%H_%M_%S")
+    parent = os.path.abspath(os.path.join(base, f"cgroup_run_{timestamp}"))
+    dirs = {"parent": parent, "log": os.path.join(parent, "logs"), "txt": os.path.join(parent, "results_stdout"),
+            "err": os.path.join(parent, "results_stderr")}
+    try:
+        for path in dirs.values():
+            os.makedirs(path, exist_ok=True)
+    except OSError as e:
+        print(f"Error: Failed to create output subdirs in {parent}: {e}", file=sys.stderr)
+        return 1
+    log = Logger(os.path.join(dirs["log"], f"run_{timestamp}.log"))
+    with open(os.path.join(parent, "run_metadata.txt"), "w") as f:
+        f.write(f"machine={args.machine}\ntimestamp={timestamp}\n"
+                f"threads={args.threads}\nmode=cgroup\n")
+        f.writelines(f"{key}={value}\n" for key, value in fingerprint().items())
+
+    log(f"Resource-constrained sweep started at {time.strftime('%Y-%m-%d %H:%M:%S')}")
+    log(f"Output will be stored in: {parent}")
+    log(f"memory.max values: {' '.join(args.memory_max)}; cpu.max values: {' '.join(args.cpu_max)}; "
+        f"cgroup parent: {args.cgroup_parent}")
+
+    results_path = os.path.join(parent, "cgroup_runs.jsonl")
+    configs = list(itertools.product(args.algos, args.generators, args.datatypes, args.memory_max, args.cpu_max))
+    failures = 0
+    for index, config in enumerate(configs, 1):
+        algo = config[0]
+        if not os.access(os.path.join(args.build_dir, algo), os.X_OK):
+            log(f"Error: Executable not found or not executable: {os.path.join(args.build_dir, algo)}", error=True)
+            continue
+        log(f"--- [{index}/{len(configs)}] {algo} {config[1]} {config[2]} memory={config[3]} cpu={config[4]} ---")
+        record = run_constrained(config, args, dirs, log)
+        failures += record["status"] not in ("ok", "skipped")
+        with open(results_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    log("======================================================")
+    log(f"All constrained runs completed at {time.strftime('%Y-%m-%d %H:%M:%S')} ({failures} failed or limited).")
+    log(f"Per-run cgroup statistics: {results_path}")
+    print(f"To analyze: python analysis_scripts/analyze_cgroup_limits.py {parent}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+/*******************************************************************************
+ * Project Ips4o Benchmark Suite
+ *
+ * src/algorithm/externalsort.hpp
+ *
+ * External merge sort baseline for out-of-core inputs (-v mmapfile).
+ *
+ * This program is free software: you can redistribute it and/or
+ * modify it under the terms of the GNU General Public License as
+ * published by the Free Software Foundation, either version 3 of the
+ * License, or (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful, but
+ * WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+ * General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program. If not, see
+ * <https://www.gnu.org/licenses/>.
+ ******************************************************************************/
+
+#pragma once
+
+#include <algorithm>
+#include <atomic>
+#include <cerrno>
+#include <chrono>
+#include <cstdlib>
+#include <cstring>
+#include <queue>
+#include <stdexcept>
+#include <string>
+#include <thread>
+#include <type_traits>
+#include <vector>
+
+#include <fcntl.h>
+#include <unistd.h>
+
+#include "../datatypes.hpp"
+#include "../sequence.hpp"
+
+// 经典的两阶段外部归并排序，只在 EXTERNAL_SORT_MEMORY_BYTES (默认物理内存的 1/4) 的内存预算内工作：
+//   1. 生成有序段: num_threads 个线程各自把一段输入 (预算 / 线程数) 读进自己的缓冲区，std::sort 后用 pwrite 整段写入临时文件；
+//   2. 多路归并: 每个有序段一个读缓冲区 (pread 分块读取)，用最小堆归并，结果顺序写回输入数组 (对 -v mmapfile 即写回文件)。
+// 临时文件放在 EXTERNAL_SORT_DIR (默认与 MMAP_VECTOR_DIR 相同，再默认 /var/tmp)，创建后立即 unlink。
+// 输入不超过一个有序段时直接原地排序。
+namespace stdthread {
+
+class Externalsort {
+ public:
+    Externalsort() {}
+
+    template <class T>
+    static constexpr bool accepts() {
+        return std::is_trivially_copyable_v<T>;
+    }
+
+    static bool isParallel() { return true; }
+
+    static std::string name() { return "externalsort"; }
+
+    static size_t memory_budget_bytes() {
+        if (const char* env = std::getenv("EXTERNAL_SORT_MEMORY_BYTES")) {
+            const unsigned long long value = std::strtoull(env, nullptr, 10);
+            if (value > 0) return value;
+        }
+        const long pages = sysconf(_SC_PHYS_PAGES);
+        const long page_size = sysconf(_SC_PAGESIZE);
+        return pages > 0 && page_size > 0 ? static_cast<size_t>(pages) * page_size / 4 : size_t(1) << 30;
+    }
+
+    static std::string scratch_directory() {
+        for (const char* name : {"EXTERNAL_SORT_DIR", "MMAP_VECTOR_DIR"}) {
+            const char* env = std::getenv(name);
+            if (env != nullptr && *env != '\0') return env;
+        }
+        return "/var/tmp";
+    }
+
+    template <class T, template <class T1> class Vector>
+    static std::pair<double, double> sort(T* begin, T* end, size_t num_threads) {
+        auto start = std::chrono::high_resolution_clock::now();
+        const size_t size = end - begin;
+        const size_t threads = std::max<size_t>(1, num_threads);
+        const size_t run_size = std::max<size_t>(1, memory_budget_bytes() / sizeof(T) / threads);
+        if (size <= run_size) {
+            std::sort(begin, end, Datatype<T>::getComparator());
+            std::chrono::duration<double, std::milli> elapsed = std::chrono::high_resolution_clock::now() - start;
+            return {0, elapsed.count()};
+        }
+
+        const size_t runs = (size + run_size - 1) / run_size;
+        std::string path = scratch_directory() + "/sortbench_runs_XXXXXX";
+        const int fd = mkstemp(path.data());
+        if (fd == -1) fail("cannot create a scratch file in " + scratch_directory());
+        unlink(path.c_str());
+
+        // 1. 有序段：整段读入、排序、整段写出
+        std::atomic<size_t> next_run{0};
+        std::atomic<bool> io_error{false};
+        auto form_runs = [&]() {
+            std::vector<T> buffer(std::min(run_size, size));
+            for (size_t r = next_run++; r < runs && !io_error; r = next_run++) {
+                const size_t first = r * run_size;
+                const size_t count = std::min(run_size, size - first);
+                std::copy(begin + first, begin + first + count, buffer.begin());
+                std::sort(buffer.begin(), buffer.begin() + count, Datatype<T>::getComparator());
+                if (!write_all(fd, buffer.data(), count * sizeof(T), first * sizeof(T))) io_error = true;
+            }
+        };
+        std::vector<std::thread> workers;
+        for (size_t t = 1; t < std::min(threads, runs); ++t) workers.emplace_back(form_runs);
+        form_runs();
+        for (auto& worker : workers) worker.join();
+        if (io_error) {
+            close(fd);
+            fail("cannot write the sorted runs");
+        }
+
+        // 2. 多路归并：预算的一半分给各段的读缓冲区，每块至少 64 KiB
+        const size_t block = std::max<size_t>(std::max<size_t>(1, (size_t(64) << 10) / sizeof(T)),
+                                              run_size * threads / 2 / runs);
+        struct Cursor {
+            std::vector<T> buffer;
+            size_t position = 0; // 缓冲区中的下一个元素
+            size_t filled = 0;
+            size_t next_offset = 0; // 段内下一个未读元素
+            size_t run_end = 0;
+        };
+        std::vector<Cursor> cursors(runs);
+        auto refill = [&](Cursor& c) {
+            const size_t count = std::min(block, c.run_end - c.next_offset);
+            if (!read_all(fd, c.buffer.data(), count * sizeof(T), c.next_offset * sizeof(T))) {
+                close(fd);
+                fail("cannot read a sorted run");
+            }
+            c.next_offset += count;
+            c.position = 0;
+            c.filled = count;
+        };
+        const auto comp = Datatype<T>::getComparator();
+        auto heap_comp = [&](size_t a, size_t b) {
+            return comp(cursors[b].buffer[cursors[b].position], cursors[a].buffer[cursors[a].position]);
+        };
+        std::priority_queue<size_t, std::vector<size_t>, decltype(heap_comp)> heap(heap_comp);
+        for (size_t r = 0; r < runs; ++r) {
+            cursors[r].buffer.resize(block);
+            cursors[r].next_offset = r * run_size;
+            cursors[r].run_end = std::min(size, (r + 1) * run_size);
+            refill(cursors[r]);
+            heap.push(r);
+        }
+        T* out = begin;
+        while (!heap.empty()) {
+            const size_t r = heap.top();
+            heap.pop();
+            Cursor& c = cursors[r];
+            *out++ = c.buffer[c.position++];
+            if (c.position == c.filled) {
+                if (c.next_offset == c.run_end) continue;
+                refill(c);
+            }
+            heap.push(r);
+        }
+        close(fd);
+
+        std::chrono::duration<double, std::milli> elapsed = std::chrono::high_resolution_clock::now() - start;
+        return {0, elapsed.count()};
+    }
+
+ private:
+    static bool write_all(int fd, const void* data, size_t bytes, size_t offset) {
+        const char* p = static_cast<const char*>(data);
+        while (bytes > 0) {
+            const ssize_t written = pwrite(fd, p, bytes, static_cast<off_t>(offset));
+            if (written < 0 && errno == EINTR) continue;
+            if (written <= 0) return false;
+            p += written;
+            bytes -= written;
+            offset += written;
+        }
+        return true;
+    }
+
+    static bool read_all(int fd, void* data, size_t bytes, size_t offset) {
+        char* p = static_cast<char*>(data);
+        while (bytes > 0) {
+            const ssize_t got = pread(fd, p, bytes, static_cast<off_t>(offset));
+            if (got < 0 && errno == EINTR) continue;
+            if (got <= 0) return false;
+            p += got;
+            bytes -= got;
+            offset += got;
+        }
+        return true;
+    }
+
+    [[noreturn]] static void fail(const std::string& what) {
+        throw std::runtime_error("[ExternalSort] " + what + ": " + std::strerror(errno));
+    }
+};
+
+}  // namespace stdthread
@@ -21,6 +21,8 @@ class Mysort {
     static constexpr bool accepts() {
         if constexpr (std::is_same<T, pair_t>::value) {
             return false;  // 显式拒绝 pair_t 类型
+        } else if constexpr (is_record_type<T>::value) {
+            return false;  // key + payload 记录与 pair_t 一样不是算术类型
         } else {
             return is_simple_key_type<T>::value;  // 对其他类型使用 is_simple_key_type 判断
         }
@@ -0,0 +1,281 @@
+/*******************************************************************************
+ * Project Ips4o Benchmark Suite
+ *
+ * src/algorithm/primitives.hpp
+ *
+ * Parallel primitives other than sorting: semisort, merge, prefix sum,
+ * histogram and top-k selection.
+ *
+ * This program is free software: you can redistribute it and/or
+ * modify it under the terms of the GNU General Public License as
+ * published by the Free Software Foundation, either version 3 of the
+ * License, or (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful, but
+ * WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+ * General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program. If not, see
+ * <https://www.gnu.org/licenses/>.
+ ******************************************************************************/
+
+#pragma once
+
+#include <algorithm>
+#include <atomic>
+#include <chrono>
+#include <cstdint>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "../datatypes.hpp"
+#include "../parallel/parallel_for.hpp"
+#include "../primitives.hpp"
+#include "../sequence.hpp"
+
+// 每个原语一个分块实现，在常驻线程池上执行 (parallel_chunks)，线程数为 -t (-t 1 即顺序基线)。语义与检查器见 src/primitives.hpp。
+namespace stdthread {
+
+// 两遍分块扫描：先求每块的和，再对块和做前缀，最后每块带偏移再扫一遍 (输入读两遍，写一遍)。
+class PrefixSum {
+ public:
+    static constexpr Primitives::Kind kind = Primitives::Kind::PrefixSum;
+
+    template <class T>
+    static constexpr bool accepts() {
+        return Primitives::accepts<kind, T>();
+    }
+
+    static bool isParallel() { return true; }
+
+    static std::string name() { return "prefixsum"; }
+
+    template <class T, template <class T1> class Vector>
+    static std::pair<double, double> run(T* begin, T* end, Primitives::Workspace<T, Vector>& /* ws */,
+                                         size_t num_threads) {
+        auto start = std::chrono::high_resolution_clock::now();
+        const size_t size = end - begin;
+        std::vector<T> chunk_sums(std::max<size_t>(1, num_threads), T());
+        parallel_chunks(size, num_threads, [&](size_t t, size_t b, size_t e) {
+            T sum = T();
+            for (size_t i = b; i != e; ++i) sum += begin[i];
+            chunk_sums[t] = sum;
+        });
+        T offset = T();
+        for (auto& sum : chunk_sums) {
+            const T chunk = sum;
+            sum = offset;
+            offset += chunk;
+        }
+        parallel_chunks(size, num_threads, [&](size_t t, size_t b, size_t e) {
+            T sum = chunk_sums[t];
+            for (size_t i = b; i != e; ++i) {
+                sum += begin[i];
+                begin[i] = sum;
+            }
+        });
+        std::chrono::duration<double, std::milli> elapsed = std::chrono::high_resolution_clock::now() - start;
+        return {0, elapsed.count()};
+    }
+};
+
+// 每个线程先计数到自己的局部直方图，再把局部直方图加到 workspace.counts。
+class Histogram {
+ public:
+    static constexpr Primitives::Kind kind = Primitives::Kind::Histogram;
+
+    template <class T>
+    static constexpr bool accepts() {
+        return Primitives::accepts<kind, T>();
+    }
+
+    static bool isParallel() { return true; }
+
+    static std::string name() { return "histogram"; }
+
+    template <class T, template <class T1> class Vector>
+    static std::pair<double, double> run(T* begin, T* end, Primitives::Workspace<T, Vector>& ws,
+                                         size_t num_threads) {
+        auto start = std::chrono::high_resolution_clock::now();
+        const size_t size = end - begin;
+        const uint64_t buckets = ws.buckets;
+        std::vector<std::vector<uint64_t>> local(std::max<size_t>(1, num_threads));
+        parallel_chunks(size, num_threads, [&](size_t t, size_t b, size_t e) {
+            local[t].assign(buckets, 0);
+            for (size_t i = b; i != e; ++i) ++local[t][Primitives::key_of(begin[i]) % buckets];
+        });
+        std::fill(ws.counts.begin(), ws.counts.end(), 0);
+        for (const auto& counts : local) {
+            for (size_t bucket = 0; bucket < counts.size(); ++bucket) ws.counts[bucket] += counts[bucket];
+        }
+        std::chrono::duration<double, std::milli> elapsed = std::chrono::high_resolution_clock::now() - start;
+        return {0, elapsed.count()};
+    }
+};
+
+// 按键的哈希分成 8 * 线程数 个桶：计数、前缀和、scatter 到 workspace.output，
+// 然后各线程从共享计数器领取桶，在桶内按键排序，使相同的键相邻。
+class SemiSort {
+ public:
+    static constexpr Primitives::Kind kind = Primitives::Kind::SemiSort;
+
+    template <class T>
+    static constexpr bool accepts() {
+        return Primitives::accepts<kind, T>();
+    }
+
+    static bool isParallel() { return true; }
+
+    static std::string name() { return "semisort"; }
+
+    template <class T, template <class T1> class Vector>
+    static std::pair<double, double> run(T* begin, T* end, Primitives::Workspace<T, Vector>& ws,
+                                         size_t num_threads) {
+        auto start = std::chrono::high_resolution_clock::now();
+        const size_t size = end - begin;
+        const size_t threads = std::max<size_t>(1, num_threads);
+        const size_t buckets = 8 * threads;
+        const auto bucket_of = [buckets](const T& value) {
+            return Primitives::hash_key(Primitives::key_of(value)) % buckets;
+        };
+        T* out = ws.output->get();
+
+        // offsets[t * buckets + b]: 第 t 块中桶 b 的元素在输出中的起始位置
+        std::vector<size_t> offsets(threads * buckets, 0);
+        parallel_chunks(size, threads, [&](size_t t, size_t b, size_t e) {
+            for (size_t i = b; i != e; ++i) ++offsets[t * buckets + bucket_of(begin[i])];
+        });
+        std::vector<size_t> bucket_begin(buckets + 1, 0);
+        size_t position = 0;
+        for (size_t bucket = 0; bucket < buckets; ++bucket) {
+            bucket_begin[bucket] = position;
+            for (size_t t = 0; t < threads; ++t) {
+                const size_t count = offsets[t * buckets + bucket];
+                offsets[t * buckets + bucket] = position;
+                position += count;
+            }
+        }
+        bucket_begin[buckets] = position;
+        parallel_chunks(size, threads, [&](size_t t, size_t b, size_t e) {
+            size_t* mine = offsets.data() + t * buckets;
+            for (size_t i = b; i != e; ++i) out[mine[bucket_of(begin[i])]++] = begin[i];
+        });
+
+        std::atomic<size_t> next{0};
+        const auto key_less = [](const T& a, const T& b) { return Primitives::key_of(a) < Primitives::key_of(b); };
+        parallel_chunks(threads, threads, [&](size_t, size_t, size_t) {
+            for (size_t bucket = next++; bucket < buckets; bucket = next++) {
+                std::sort(out + bucket_begin[bucket], out + bucket_begin[bucket + 1], key_less);
+            }
+        });
+        std::chrono::duration<double, std::milli> elapsed = std::chrono::high_resolution_clock::now() - start;
+        return {0, elapsed.count()};
+    }
+};
+
+// Merge path：把输出等分给各线程，每个线程用二分查找在两个输入中找到自己的起点，然后 std::merge 自己那一段。
+class Merge {
+ public:
+    static constexpr Primitives::Kind kind = Primitives::Kind::Merge;
+
+    template <class T>
+    static constexpr bool accepts() {
+        return Primitives::accepts<kind, T>();
+    }
+
+    static bool isParallel() { return true; }
+
+    static std::string name() { return "merge"; }
+
+    template <class T, template <class T1> class Vector>
+    static std::pair<double, double> run(T* begin, T* end, Primitives::Workspace<T, Vector>& ws,
+                                         size_t num_threads) {
+        auto start = std::chrono::high_resolution_clock::now();
+        const auto comp = Datatype<T>::getComparator();
+        const T* a = begin;
+        const T* b = begin + ws.split;
+        const size_t a_size = ws.split;
+        const size_t b_size = (end - begin) - ws.split;
+        T* out = ws.output->get();
+
+        // 输出位置 diagonal 之前取自 a 的元素个数 (相等时先取 a，与 std::merge 一致)
+        const auto split_of = [&](size_t diagonal) {
+            size_t low = diagonal > b_size ? diagonal - b_size : 0;
+            size_t high = std::min(diagonal, a_size);
+            while (low < high) {
+                const size_t i = low + (high - low) / 2;
+                if (comp(b[diagonal - i - 1], a[i])) {
+                    high = i;
+                } else {
+                    low = i + 1;
+                }
+            }
+            return low;
+        };
+        parallel_chunks(a_size + b_size, num_threads, [&](size_t, size_t first, size_t last) {
+            const size_t a_first = split_of(first);
+            const size_t a_last = split_of(last);
+            std::merge(a + a_first, a + a_last, b + (first - a_first), b + (last - a_last), out + first, comp);
+        });
+        std::chrono::duration<double, std::milli> elapsed = std::chrono::high_resolution_clock::now() - start;
+        return {0, elapsed.count()};
+    }
+};
+
+// 每个线程扫描自己的块，用大小为 k 的最大堆保留块内最小的 k 个元素 (只读输入)；
+// 再从所有线程的候选中用 nth_element 选出最小的 k 个写入 workspace.output。
+class TopK {
+ public:
+    static constexpr Primitives::Kind kind = Primitives::Kind::TopK;
+
+    template <class T>
+    static constexpr bool accepts() {
+        return Primitives::accepts<kind, T>();
+    }
+
+    static bool isParallel() { return true; }
+
+    static std::string name() { return "topk"; }
+
+    template <class T, template <class T1> class Vector>
+    static std::pair<double, double> run(T* begin, T* end, Primitives::Workspace<T, Vector>& ws,
+                                         size_t num_threads) {
+        auto start = std::chrono::high_resolution_clock::now();
+        const auto comp = Datatype<T>::getComparator();
+        const size_t k = ws.k;
+        std::vector<std::vector<T>> local(std::max<size_t>(1, num_threads));
+        parallel_chunks(end - begin, num_threads, [&](size_t t, size_t b, size_t e) {
+            auto& heap = local[t];
+            heap.reserve(std::min(k, e - b));
+            for (size_t i = b; i != e; ++i) {
+                if (heap.size() < k) {
+                    heap.push_back(begin[i]);
+                    std::push_heap(heap.begin(), heap.end(), comp);
+                } else if (comp(begin[i], heap.front())) {
+                    std::pop_heap(heap.begin(), heap.end(), comp);
+                    heap.back() = begin[i];
+                    std::push_heap(heap.begin(), heap.end(), comp);
+                }
+            }
+        });
+        std::vector<T> candidates;
+        for (auto& heap : local) {
+            if (candidates.empty()) {
+                candidates = std::move(heap);
+            } else {
+                candidates.insert(candidates.end(), heap.begin(), heap.end());
+            }
+        }
+        if (candidates.size() > k) {
+            std::nth_element(candidates.begin(), candidates.begin() + (k - 1), candidates.end(), comp);
+        }
+        std::copy(candidates.begin(), candidates.begin() + std::min(k, candidates.size()), ws.output->get());
+        std::chrono::duration<double, std::milli> elapsed = std::chrono::high_resolution_clock::now() - start;
+        return {0, elapsed.count()};
+    }
+};
+
+}  // namespace stdthread
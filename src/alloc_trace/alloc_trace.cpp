@@ -0,0 +1,405 @@
+// LD_PRELOAD 分配跟踪库 (liballoc_trace.so)。
+//
+// 拦截 malloc/calloc/realloc/free/posix_memalign/aligned_alloc/memalign/mmap/munmap/mremap/madvise，
+// 但只在 benchmark 的被测区间内记录 (benchmark.hpp 通过 alloc_trace_control.hpp 调用 alloc_trace_region)，
+// 与 PerfControl::start_profiling / stop_profiling 的区间一致：run=0 (预热) 不记录。
+//
+// 记录先写入一个预先 mmap 的全局缓冲区 (原子下标，无锁)，在区间结束时由控制线程写入二进制日志。
+// 日志格式 (小端，见 analysis_scripts/alloc_trace_parser.py):
+//   文件头:   char magic[8] = "ALLOCTR1", uint32 version, uint32 record_size
+//   每个区间: uint32 tag = 'RGN1', int32 run, uint64 begin_ns, uint64 end_ns, uint64 count, uint64 dropped
+//             随后是 count 条 Record
+//
+// 环境变量: ALLOC_TRACE_OUTPUT (默认 alloc_trace_<pid>.bin)，ALLOC_TRACE_CAPACITY (每个区间最多记录条数，默认 8M)。
+
+#include <atomic>
+#include <cstdarg>
+#include <cerrno>
+#include <cstddef>
+#include <cstdint>
+#include <cstdio>
+#include <cstdlib>
+#include <cstring>
+
+#include <dlfcn.h>
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/syscall.h>
+#include <time.h>
+#include <unistd.h>
+
+namespace {
+
+enum Kind : uint16_t {
+    KIND_MALLOC = 1,
+    KIND_CALLOC = 2,
+    KIND_REALLOC = 3,   // addr = 新地址, aux = 旧地址
+    KIND_MEMALIGN = 4,  // posix_memalign / aligned_alloc / memalign
+    KIND_FREE = 5,
+    KIND_MMAP = 6,      // aux = flags
+    KIND_MUNMAP = 7,
+    KIND_MREMAP = 8,    // addr = 新地址, aux = 旧地址 (之前另有一条旧映射的 KIND_MUNMAP)
+    KIND_MADVISE = 9,   // aux = advice
+};
+
+struct Record {
+    uint64_t time_ns;
+    uint64_t addr;
+    uint64_t size;
+    uint64_t aux;
+    uint32_t tid;
+    uint16_t kind;
+    uint16_t reserved;
+};
+static_assert(sizeof(Record) == 40, "Record layout is part of the log format");
+
+struct RegionHeader {
+    uint32_t tag;
+    int32_t run;
+    uint64_t begin_ns;
+    uint64_t end_ns;
+    uint64_t count;
+    uint64_t dropped;
+};
+
+constexpr uint32_t REGION_TAG = 0x314e4752; // "RGN1"
+constexpr uint32_t LOG_VERSION = 1;
+
+using malloc_fn = void* (*)(size_t);
+using calloc_fn = void* (*)(size_t, size_t);
+using realloc_fn = void* (*)(void*, size_t);
+using free_fn = void (*)(void*);
+using posix_memalign_fn = int (*)(void**, size_t, size_t);
+using aligned_alloc_fn = void* (*)(size_t, size_t);
+using mmap_fn = void* (*)(void*, size_t, int, int, int, off_t);
+using munmap_fn = int (*)(void*, size_t);
+using mremap_fn = void* (*)(void*, size_t, size_t, int, ...);
+using madvise_fn = int (*)(void*, size_t, int);
+
+malloc_fn real_malloc = nullptr;
+calloc_fn real_calloc = nullptr;
+realloc_fn real_realloc = nullptr;
+free_fn real_free = nullptr;
+posix_memalign_fn real_posix_memalign = nullptr;
+aligned_alloc_fn real_aligned_alloc = nullptr;
+aligned_alloc_fn real_memalign = nullptr;
+mmap_fn real_mmap = nullptr;
+munmap_fn real_munmap = nullptr;
+mremap_fn real_mremap = nullptr;
+madvise_fn real_madvise = nullptr;
+
+// dlsym 自身可能调用 calloc；解析完成之前用这块静态内存应付
+alignas(64) char bootstrap_heap[64 * 1024];
+size_t bootstrap_used = 0;
+std::atomic<bool> resolving{false};
+
+std::atomic<bool> g_active{false};
+std::atomic<int> g_inflight{0};
+std::atomic<uint64_t> g_next{0};
+std::atomic<uint64_t> g_dropped{0};
+Record* g_records = nullptr;
+uint64_t g_capacity = 0;
+int g_run = -1;
+uint64_t g_begin_ns = 0;
+int g_fd = -1;
+
+__thread bool t_in_hook = false;
+__thread uint32_t t_tid = 0;
+
+bool is_bootstrap(void* ptr) {
+    return ptr >= static_cast<void*>(bootstrap_heap) && ptr < static_cast<void*>(bootstrap_heap + sizeof(bootstrap_heap));
+}
+
+// 每块前面有 16 字节的头，记录块的大小 (realloc 只能复制这么多)，块本身保持 16 字节对齐
+constexpr size_t BOOTSTRAP_HEADER = 16;
+
+void* bootstrap_alloc(size_t size) {
+    size_t offset = (bootstrap_used + 15) & ~static_cast<size_t>(15);
+    if (size > sizeof(bootstrap_heap) || offset + BOOTSTRAP_HEADER + size > sizeof(bootstrap_heap)) return nullptr;
+    memcpy(bootstrap_heap + offset, &size, sizeof(size));
+    bootstrap_used = offset + BOOTSTRAP_HEADER + size;
+    return bootstrap_heap + offset + BOOTSTRAP_HEADER;
+}
+
+size_t bootstrap_size(void* ptr) {
+    size_t size;
+    memcpy(&size, static_cast<char*>(ptr) - BOOTSTRAP_HEADER, sizeof(size));
+    return size;
+}
+
+void resolve() {
+    if (real_malloc != nullptr) return;
+    resolving.store(true);
+    real_malloc = reinterpret_cast<malloc_fn>(dlsym(RTLD_NEXT, "malloc"));
+    real_calloc = reinterpret_cast<calloc_fn>(dlsym(RTLD_NEXT, "calloc"));
+    real_realloc = reinterpret_cast<realloc_fn>(dlsym(RTLD_NEXT, "realloc"));
+    real_free = reinterpret_cast<free_fn>(dlsym(RTLD_NEXT, "free"));
+    real_posix_memalign = reinterpret_cast<posix_memalign_fn>(dlsym(RTLD_NEXT, "posix_memalign"));
+    real_aligned_alloc = reinterpret_cast<aligned_alloc_fn>(dlsym(RTLD_NEXT, "aligned_alloc"));
+    real_memalign = reinterpret_cast<aligned_alloc_fn>(dlsym(RTLD_NEXT, "memalign"));
+    real_mmap = reinterpret_cast<mmap_fn>(dlsym(RTLD_NEXT, "mmap"));
+    real_munmap = reinterpret_cast<munmap_fn>(dlsym(RTLD_NEXT, "munmap"));
+    real_mremap = reinterpret_cast<mremap_fn>(dlsym(RTLD_NEXT, "mremap"));
+    real_madvise = reinterpret_cast<madvise_fn>(dlsym(RTLD_NEXT, "madvise"));
+    resolving.store(false);
+}
+
+uint64_t now_ns() {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return static_cast<uint64_t>(ts.tv_sec) * 1000000000ull + static_cast<uint64_t>(ts.tv_nsec);
+}
+
+void record(Kind kind, const void* addr, uint64_t size, uint64_t aux) {
+    // 先登记为"正在写"，再检查开关：区间结束时控制线程等 inflight 归零后才读取缓冲区。
+    // 这是 Dekker 式的握手 (这里 inflight 写后读 active，控制线程 active 写后读 inflight)，
+    // 两边都必须是 seq_cst，release/acquire 允许 store->load 重排，两边可能同时看到对方的旧值。
+    g_inflight.fetch_add(1, std::memory_order_seq_cst);
+    if (g_active.load(std::memory_order_seq_cst)) {
+        const uint64_t index = g_next.fetch_add(1, std::memory_order_relaxed);
+        if (index < g_capacity) {
+            if (t_tid == 0) t_tid = static_cast<uint32_t>(syscall(SYS_gettid));
+            Record& r = g_records[index];
+            r.time_ns = now_ns();
+            r.addr = reinterpret_cast<uint64_t>(addr);
+            r.size = size;
+            r.aux = aux;
+            r.tid = t_tid;
+            r.kind = kind;
+            r.reserved = 0;
+        } else {
+            g_dropped.fetch_add(1, std::memory_order_relaxed);
+        }
+    }
+    g_inflight.fetch_sub(1, std::memory_order_release); // 发布记录的内容
+}
+
+struct HookGuard {
+    bool outer;
+    HookGuard() : outer(!t_in_hook) { t_in_hook = true; }
+    ~HookGuard() { if (outer) t_in_hook = false; }
+};
+
+bool write_all(int fd, const void* data, size_t bytes) {
+    const char* p = static_cast<const char*>(data);
+    while (bytes > 0) {
+        ssize_t n = write(fd, p, bytes);
+        if (n < 0) {
+            if (errno == EINTR) continue;
+            return false;
+        }
+        p += n;
+        bytes -= static_cast<size_t>(n);
+    }
+    return true;
+}
+
+bool open_log() {
+    if (g_fd >= 0) return true;
+    char default_path[64];
+    const char* path = getenv("ALLOC_TRACE_OUTPUT");
+    if (path == nullptr || *path == '\0') {
+        snprintf(default_path, sizeof(default_path), "alloc_trace_%d.bin", static_cast<int>(getpid()));
+        path = default_path;
+    }
+    g_fd = open(path, O_WRONLY | O_CREAT | O_TRUNC | O_CLOEXEC, 0644);
+    if (g_fd < 0) {
+        fprintf(stderr, "[AllocTrace] ERROR: cannot open %s: %s\n", path, strerror(errno));
+        return false;
+    }
+    char header[16] = {'A', 'L', 'L', 'O', 'C', 'T', 'R', '1'};
+    const uint32_t version = LOG_VERSION, record_size = sizeof(Record);
+    memcpy(header + 8, &version, 4);
+    memcpy(header + 12, &record_size, 4);
+    return write_all(g_fd, header, sizeof(header));
+}
+
+bool ensure_buffer() {
+    if (g_records != nullptr) return true;
+    const char* capacity_env = getenv("ALLOC_TRACE_CAPACITY");
+    g_capacity = capacity_env != nullptr ? strtoull(capacity_env, nullptr, 10) : (8ull << 20);
+    if (g_capacity == 0) g_capacity = 8ull << 20;
+    // MAP_NORESERVE: 只有真正写到的页才占用内存
+    void* mem = real_mmap(nullptr, g_capacity * sizeof(Record), PROT_READ | PROT_WRITE,
+                          MAP_PRIVATE | MAP_ANONYMOUS | MAP_NORESERVE, -1, 0);
+    if (mem == MAP_FAILED) {
+        fprintf(stderr, "[AllocTrace] ERROR: cannot map the trace buffer (%llu records).\n",
+                static_cast<unsigned long long>(g_capacity));
+        return false;
+    }
+    g_records = static_cast<Record*>(mem);
+    return true;
+}
+
+} // namespace
+
+extern "C" {
+
+// 由 benchmark 调用 (通过 dlsym 查找，没有预加载本库时为空操作)。active=1 开始记录，active=0 结束并写入日志。
+__attribute__((visibility("default"))) void alloc_trace_region(int active, int run) {
+    HookGuard guard;
+    resolve();
+    if (active) {
+        if (!ensure_buffer() || !open_log()) return;
+        g_next.store(0);
+        g_dropped.store(0);
+        g_run = run;
+        g_begin_ns = now_ns();
+        g_active.store(true, std::memory_order_release);
+        return;
+    }
+    if (!g_active.load()) return;
+    g_active.store(false, std::memory_order_seq_cst); // 与 record() 的握手，见那里的说明
+    const uint64_t end_ns = now_ns();
+    while (g_inflight.load(std::memory_order_seq_cst) != 0) {
+        // 等待仍在写记录的线程 (只可能是区间结束前已经进入 record 的线程)
+    }
+    uint64_t count = g_next.load();
+    const uint64_t dropped = g_dropped.load();
+    if (count > g_capacity) count = g_capacity;
+    RegionHeader header{REGION_TAG, g_run, g_begin_ns, end_ns, count, dropped};
+    if (!write_all(g_fd, &header, sizeof(header)) ||
+        !write_all(g_fd, g_records, count * sizeof(Record))) {
+        fprintf(stderr, "[AllocTrace] ERROR: failed to write region of run %d: %s\n", g_run, strerror(errno));
+    }
+    if (dropped > 0) {
+        fprintf(stderr, "[AllocTrace] Warning: run %d dropped %llu events (raise ALLOC_TRACE_CAPACITY).\n", g_run,
+                static_cast<unsigned long long>(dropped));
+    }
+    // 把缓冲区还给内核，避免其常驻内存影响下一次运行的 RSS
+    real_madvise(g_records, g_capacity * sizeof(Record), MADV_DONTNEED);
+}
+
+void* malloc(size_t size) {
+    if (real_malloc == nullptr) {
+        if (resolving.load()) return bootstrap_alloc(size);
+        resolve();
+    }
+    void* ptr = real_malloc(size);
+    if (!t_in_hook) {
+        HookGuard guard;
+        record(KIND_MALLOC, ptr, size, 0);
+    }
+    return ptr;
+}
+
+void* calloc(size_t count, size_t size) {
+    if (real_calloc == nullptr) {
+        if (resolving.load()) {
+            void* ptr = bootstrap_alloc(count * size);
+            if (ptr != nullptr) memset(ptr, 0, count * size);
+            return ptr;
+        }
+        resolve();
+    }
+    void* ptr = real_calloc(count, size);
+    if (!t_in_hook) {
+        HookGuard guard;
+        record(KIND_CALLOC, ptr, count * size, 0);
+    }
+    return ptr;
+}
+
+void* realloc(void* old_ptr, size_t size) {
+    if (real_realloc == nullptr) resolve();
+    if (is_bootstrap(old_ptr)) {
+        void* ptr = real_malloc(size);
+        if (ptr != nullptr) memcpy(ptr, old_ptr, size < bootstrap_size(old_ptr) ? size : bootstrap_size(old_ptr));
+        return ptr;
+    }
+    void* ptr = real_realloc(old_ptr, size);
+    if (!t_in_hook) {
+        HookGuard guard;
+        record(KIND_REALLOC, ptr, size, reinterpret_cast<uint64_t>(old_ptr));
+    }
+    return ptr;
+}
+
+void free(void* ptr) {
+    if (ptr == nullptr || is_bootstrap(ptr)) return;
+    if (real_free == nullptr) resolve();
+    if (!t_in_hook) {
+        HookGuard guard;
+        record(KIND_FREE, ptr, 0, 0);
+    }
+    real_free(ptr);
+}
+
+int posix_memalign(void** out, size_t alignment, size_t size) {
+    if (real_posix_memalign == nullptr) resolve();
+    int result = real_posix_memalign(out, alignment, size);
+    if (result == 0 && !t_in_hook) {
+        HookGuard guard;
+        record(KIND_MEMALIGN, *out, size, alignment);
+    }
+    return result;
+}
+
+void* aligned_alloc(size_t alignment, size_t size) {
+    if (real_aligned_alloc == nullptr) resolve();
+    void* ptr = real_aligned_alloc(alignment, size);
+    if (!t_in_hook) {
+        HookGuard guard;
+        record(KIND_MEMALIGN, ptr, size, alignment);
+    }
+    return ptr;
+}
+
+void* memalign(size_t alignment, size_t size) {
+    if (real_memalign == nullptr) resolve();
+    void* ptr = real_memalign(alignment, size);
+    if (!t_in_hook) {
+        HookGuard guard;
+        record(KIND_MEMALIGN, ptr, size, alignment);
+    }
+    return ptr;
+}
+
+void* mmap(void* addr, size_t length, int prot, int flags, int fd, off_t offset) {
+    if (real_mmap == nullptr) resolve();
+    void* ptr = real_mmap(addr, length, prot, flags, fd, offset);
+    if (ptr != MAP_FAILED && !t_in_hook) {
+        HookGuard guard;
+        record(KIND_MMAP, ptr, length, static_cast<uint64_t>(flags));
+    }
+    return ptr;
+}
+
+int munmap(void* addr, size_t length) {
+    if (real_munmap == nullptr) resolve();
+    if (!t_in_hook) {
+        HookGuard guard;
+        record(KIND_MUNMAP, addr, length, 0);
+    }
+    return real_munmap(addr, length);
+}
+
+void* mremap(void* old_addr, size_t old_size, size_t new_size, int flags, ...) {
+    if (real_mremap == nullptr) resolve();
+    void* new_addr_hint = nullptr;
+    if (flags & MREMAP_FIXED) {
+        va_list args;
+        va_start(args, flags);
+        new_addr_hint = va_arg(args, void*);
+        va_end(args);
+    }
+    void* ptr = real_mremap(old_addr, old_size, new_size, flags, new_addr_hint);
+    if (ptr != MAP_FAILED && !t_in_hook) {
+        // 记为旧映射的 munmap 加新映射，分析时不需要再知道旧映射的大小
+        HookGuard guard;
+        record(KIND_MUNMAP, old_addr, old_size, 0);
+        record(KIND_MREMAP, ptr, new_size, reinterpret_cast<uint64_t>(old_addr));
+    }
+    return ptr;
+}
+
+int madvise(void* addr, size_t length, int advice) {
+    if (real_madvise == nullptr) resolve();
+    if (!t_in_hook) {
+        HookGuard guard;
+        record(KIND_MADVISE, addr, length, static_cast<uint64_t>(advice));
+    }
+    return real_madvise(addr, length, advice);
+}
+
+} // extern "C"
@@ -0,0 +1,38 @@
+#ifndef ALLOC_TRACE_CONTROL_H
+#define ALLOC_TRACE_CONTROL_H
+
+#include <dlfcn.h> // For dlsym
+
+// 与 liballoc_trace.so (src/alloc_trace/alloc_trace.cpp) 通信的开关。
+// 库通过 LD_PRELOAD 加载时导出 alloc_trace_region；没有预加载时查找失败，begin/end 为空操作，
+// 所以 benchmark 不需要链接这个库，也不需要额外的环境变量。
+namespace AllocTrace {
+
+    using region_fn = void (*)(int active, int run);
+
+    /**
+     * @brief Returns the alloc_trace_region entry point of the preloaded tracer, or nullptr.
+     *
+     * The lookup is done once; RTLD_DEFAULT searches the global scope, which includes LD_PRELOAD libraries.
+     */
+    inline region_fn region_function() {
+        static const region_fn fn = reinterpret_cast<region_fn>(dlsym(RTLD_DEFAULT, "alloc_trace_region"));
+        return fn;
+    }
+
+    /**
+     * @brief Starts recording allocations for the given internal run (same section as PerfControl::start_profiling).
+     */
+    inline void begin(int run) {
+        if (region_fn fn = region_function()) fn(1, run);
+    }
+
+    /**
+     * @brief Stops recording and lets the tracer append the region to its binary log.
+     */
+    inline void end(int run) {
+        if (region_fn fn = region_function()) fn(0, run);
+    }
+
+} // namespace AllocTrace
+#endif // ALLOC_TRACE_CONTROL_H
@@ -0,0 +1,126 @@
+#ifndef BATCH_SORT_H
+#define BATCH_SORT_H
+
+#include <algorithm>
+#include <atomic>
+#include <chrono>
+#include <cmath>
+#include <cstdint>
+#include <map>
+#include <ostream>
+#include <string>
+#include <vector>
+
+#include "parallel/thread_pool.hpp"
+
+// 批量小数组模式 (--batch <元素数>)：把每次运行生成的输入切成 size / batch 个互不相关的小数组分别排序，
+// 每个小数组的排序时间 (调用方看到的延迟，steady_clock，包括线程池调度等固定开销) 都被记录下来。
+//   - 顺序算法 (perthread): 常驻线程池中 config.num_threads 个绑核线程各自从共享计数器领取小数组，每个线程一次排序一个；
+//   - 并行算法 (parallel): 小数组依次排序，每个都使用全部线程。
+// RESULT 行的 milli 为整批的墙钟时间，另外输出 p50/p90/p99/p999/max 延迟 (微秒) 与 arrayspersec；
+// 随后的 LATENCY 行是延迟直方图 (每个 2 倍区间 4 个桶)，供 analysis_scripts/analyze_batch.py 画分布图。
+namespace BatchSort {
+
+    constexpr int BUCKETS_PER_OCTAVE = 4;
+
+    struct Result {
+        double wall_ms = 0.0;
+        size_t arrays = 0;
+        bool per_thread = false;
+        std::vector<double> latencies_ns; // 排好序
+    };
+
+    inline double percentile_ns(const Result& result, double q) {
+        if (result.latencies_ns.empty()) return 0.0;
+        const size_t rank = static_cast<size_t>(std::ceil(q * result.latencies_ns.size()));
+        return result.latencies_ns[std::min(result.latencies_ns.size() - 1, rank == 0 ? 0 : rank - 1)];
+    }
+
+    /**
+     * @brief Sorts the batch arrays [begin + i * batch, begin + (i + 1) * batch) for i < size / batch.
+     */
+    template <class T, template <class T1> class Vector, class Algo>
+    Result run(T* begin, size_t size, size_t batch, size_t num_threads) {
+        using clock = std::chrono::steady_clock;
+        Result result;
+        batch = std::max<size_t>(1, std::min(batch, size));
+        result.arrays = size / batch;
+        result.per_thread = !Algo::isParallel();
+        const size_t workers = result.per_thread ? std::max<size_t>(1, std::min(num_threads, result.arrays)) : 1;
+        std::vector<std::vector<double>> latencies(workers);
+        std::atomic<size_t> next{0};
+
+        auto work = [&](size_t worker) {
+            auto& mine = latencies[worker];
+            mine.reserve(result.arrays / workers + 1);
+            const size_t sort_threads = result.per_thread ? 1 : num_threads;
+            for (size_t i = next.fetch_add(1, std::memory_order_relaxed); i < result.arrays;
+                 i = next.fetch_add(1, std::memory_order_relaxed)) {
+                T* array = begin + i * batch;
+                const auto start = clock::now();
+                Algo::template sort<T, Vector>(array, array + batch, sort_threads);
+                mine.push_back(std::chrono::duration<double, std::nano>(clock::now() - start).count());
+            }
+        };
+
+        const auto start = clock::now();
+        if (workers == 1) {
+            work(0);
+        } else {
+            // 每个池线程一个 worker (池已按 -t 启动并绑核)，wall_ms 不包含线程创建
+            ThreadPool::run(workers, work);
+        }
+        result.wall_ms = std::chrono::duration<double, std::milli>(clock::now() - start).count();
+
+        for (auto& mine : latencies) {
+            result.latencies_ns.insert(result.latencies_ns.end(), mine.begin(), mine.end());
+        }
+        std::sort(result.latencies_ns.begin(), result.latencies_ns.end());
+        return result;
+    }
+
+    template <class T, class Comp>
+    bool arrays_sorted(const T* begin, size_t size, size_t batch, Comp comp) {
+        batch = std::max<size_t>(1, std::min(batch, size));
+        for (size_t i = 0; i + batch <= size; i += batch) {
+            if (!std::is_sorted(begin + i, begin + i + batch, comp)) return false;
+        }
+        return true;
+    }
+
+    inline void print_fields(std::ostream& out, const Result& result, size_t batch) {
+        out << "\tbatch=" << batch << "\tarrays=" << result.arrays
+            << "\tbatchmode=" << (result.per_thread ? "perthread" : "parallel")
+            << "\tp50us=" << percentile_ns(result, 0.5) / 1000.0
+            << "\tp90us=" << percentile_ns(result, 0.9) / 1000.0
+            << "\tp99us=" << percentile_ns(result, 0.99) / 1000.0
+            << "\tp999us=" << percentile_ns(result, 0.999) / 1000.0
+            << "\tmaxus=" << (result.latencies_ns.empty() ? 0.0 : result.latencies_ns.back() / 1000.0)
+            << "\tarrayspersec=" << (result.wall_ms > 0 ? result.arrays / (result.wall_ms / 1000.0) : 0.0);
+    }
+
+    /**
+     * @brief LATENCY line: lower bucket bounds (ns, 4 buckets per power of two) and counts of the non-empty buckets.
+     */
+    inline void print_histogram(std::ostream& out, const Result& result, const std::string& prefix) {
+        std::map<int, size_t> buckets;
+        for (const double ns : result.latencies_ns) {
+            ++buckets[static_cast<int>(std::floor(BUCKETS_PER_OCTAVE * std::log2(std::max(ns, 1.0))))];
+        }
+        out << "LATENCY" << prefix << "\tbucketns=";
+        bool first = true;
+        for (const auto& [index, count] : buckets) {
+            out << (first ? "" : ",") << std::exp2(static_cast<double>(index) / BUCKETS_PER_OCTAVE);
+            first = false;
+        }
+        out << "\tcounts=";
+        first = true;
+        for (const auto& [index, count] : buckets) {
+            out << (first ? "" : ",") << count;
+            first = false;
+        }
+        out << std::endl;
+    }
+
+} // namespace BatchSort
+#endif // BATCH_SORT_H
@@ -5,11 +5,15 @@
 #include <algorithm>
 #include <cassert>
 #include <chrono>
+#include <cstdint>
+#include <cstdlib>
+#include <cstring>
 #include <iostream>
 #include <random>
 #include <vector>
 #include <functional>
 #include <optional>
+#include <sstream>
 
 #include <numa_array.hpp>
 #include <tclap/CmdLine.h>
@@ -21,11 +25,23 @@
 #include "generator/generator.hpp"
 #include "name_extractor.hpp"
 #include "parallel/parallel_checker.hpp"
+#include "parallel/thread_pool.hpp" // persistent pinned workers for generators, input cache and checker
 #include "timer.hpp"
 #include "typename.hpp"
 #include "vector_types.hpp"
 // #include "papi_settings.hpp"
 #include "perf_control.hpp" // Include the header for perf control
+#include "alloc_trace_control.hpp" // LD_PRELOAD allocation tracer (no-op when not preloaded)
+#include "freq_counter.hpp" // APERF/MPERF or ref-cycles per sort (MEASURE_FREQUENCY=true)
+#include "energy_counter.hpp" // powercap/RAPL package and DRAM energy per sort (MEASURE_ENERGY=true)
+#include "io_counter.hpp" // /proc/self/io bytes and major faults per sort (MEASURE_IO=true)
+#include "runtime_info.hpp" // runtime= tag, CPU time and context switches per sort (MEASURE_SCHEDULING=true)
+#include "input_cache.hpp" // pristine inputs kept resident in --server mode
+#include "benchmark_server.hpp" // --server: jobs from stdin, many algorithms per process
+#include "indirect_sort.hpp" // --indirect: sort (key, index) pairs, then gather the records
+#include "batch_sort.hpp" // --batch: many small independent arrays, per-array latency percentiles
+#include "primitives.hpp" // semisort, merge, prefix sum, histogram, top-k with the same harness
+#include "cache_mode.hpp" // --cache cold / warm: flush or pre-touch the input before every run
 
 constexpr uint32_t ALIGNMENT = 0x100;
 
@@ -35,6 +51,17 @@ constexpr bool g_enable_benchmark_checker = false;
 constexpr bool g_enable_benchmark_checker = true; 
 #endif
 
+// REPORT_BUFFER_ADDRESSES=true 时，每次运行在 RESULT 行之后额外输出一行 BUFFER：
+// 输入数组的地址范围以及排序的起止时间 (steady_clock，即 CLOCK_MONOTONIC 纳秒)。
+// record_mem_access.sh 用 perf record -k CLOCK_MONOTONIC 采样，分析脚本据此把数据地址归属到输入数组。
+inline bool report_buffer_addresses() {
+    static const bool enabled = [] {
+        const char* env = std::getenv("REPORT_BUFFER_ADDRESSES");
+        return env != nullptr && std::strcmp(env, "true") == 0;
+    }();
+    return enabled;
+}
+
 
 template <class T>
 std::pair<size_t, size_t> logSizes(const Config& config) {
@@ -97,6 +124,8 @@ namespace detail { // Encapsulate helper
     ) {
         T* current_data_ptr = v_container.get();
         T* current_data_end_ptr = v_container.get() + current_data_size;
+        // Generators, input cache and checker run on the persistent pool, pinned to the cores of the -t threads.
+        ThreadPool::configure(config.num_threads);
     
         auto start_gen = std::chrono::high_resolution_clock::now();
         generate_data_fn(current_data_ptr, current_data_end_ptr);
@@ -113,14 +142,23 @@ namespace detail { // Encapsulate helper
             current_data_ptr = v_container.get();
             current_data_end_ptr = v_container.get() + current_data_size;
         }
+        constexpr Primitives::Kind kind = Primitives::kind_of<Algo>();
+        Primitives::prepare<kind>(current_data_ptr, current_data_end_ptr);
         auto finish_gen = std::chrono::high_resolution_clock::now();
         std::chrono::duration<double, std::milli> elapsed_gen = finish_gen - start_gen;
     
         // --- Benchmark Checker Logic (Compile-time conditional) ---
         double time_checker_ms = 0.0; // Accumulates checker timing, defaults to 0 if disabled.
         std::optional<ParallelChecker<T>> checker_instance_opt; // Optional checker instance.
+        std::vector<T> primitive_input; // Other primitives are checked against a copy of their input.
 
-        if constexpr (g_enable_benchmark_checker) {
+        if constexpr (g_enable_benchmark_checker && kind != Primitives::Kind::Sort) {
+            auto start_checker_timing = std::chrono::high_resolution_clock::now();
+            primitive_input.assign(current_data_ptr, current_data_end_ptr);
+            time_checker_ms += std::chrono::duration<double, std::milli>(
+                                   std::chrono::high_resolution_clock::now() - start_checker_timing)
+                                   .count();
+        } else if constexpr (g_enable_benchmark_checker) {
             // Only instantiate and use the checker if enabled at compile time.
             checker_instance_opt.emplace(); // Construct ParallelChecker instance.
 
@@ -133,6 +171,36 @@ namespace detail { // Encapsulate helper
         }
         // --- End Benchmark Checker Logic (Pre-sort) ---
 
+        // -v mmapfile: write the generated input back to its file in one go and drop it from the page cache,
+        // so every sort starts with the input on disk.
+        double writeback_ms = 0.0;
+        if constexpr (is_file_backed_vector<Vector<T>>::value) {
+            writeback_ms = v_container.write_back_and_evict();
+        }
+
+        // --indirect: the key+index array and the output array are allocated outside the timed region;
+        // their first touch (page faults) happens in the key and gather phases.
+        std::optional<Vector<pair_t>> indirect_keys;
+        std::optional<Vector<T>> indirect_output;
+        IndirectSort::Timings indirect_timings;
+        BatchSort::Result batch_result;
+        // Output and count arrays of other primitives, also allocated outside the timed region.
+        std::optional<Primitives::Workspace<T, Vector>> workspace;
+        if constexpr (kind != Primitives::Kind::Sort) {
+            workspace.emplace(Primitives::make_workspace<kind, T, Vector>(current_data_size, config,
+                                                                          std::max<size_t>(16, ALIGNMENT)));
+        } else if constexpr (IndirectSort::supports<T, Algo>()) {
+            if (config.indirect) {
+                indirect_keys.emplace(current_data_size, std::max<size_t>(16, ALIGNMENT));
+                indirect_output.emplace(current_data_size, std::max<size_t>(16, ALIGNMENT));
+            }
+        }
+
+        // --cache cold / warm: outside the timed and the profiled region, after everything else touched the input.
+        const CacheMode::Result cache_result = CacheMode::prepare(
+                config.cache_mode, current_data_ptr, current_data_size * sizeof(T), Algo::isParallel(),
+                config.num_threads, is_file_backed_vector<Vector<T>>::value);
+
         if (run_iteration_id!=0 && g_perf_ctl_fd != -1)
         { // 或者检查 perf_initialized 状态
             if (!PerfControl::start_profiling("my_target_function_call"))
@@ -140,9 +208,50 @@ namespace detail { // Encapsulate helper
                 std::cerr << "[PerfControl] Failed to start profiling." << std::endl;
             }
         }
+        // 分配跟踪与 perf 使用同一个被测区间 (跳过预热 run=0)，但不依赖 perf FIFO 是否打开
+        if (run_iteration_id != 0) AllocTrace::begin(run_iteration_id);
         // Algo::sort modifies the data in place.
-        const auto [preprocessing, sorting] = execute_sorting_step<T, Vector, Algo>(
-            current_data_ptr, current_data_end_ptr, config);
+        const auto energy_before = EnergyCounter::snapshot();
+        const auto io_before = IoCounter::snapshot();
+        const auto sched_before = RuntimeInfo::snapshot();
+        const auto freq_before = FreqCounter::snapshot();
+        const auto sort_begin_time = std::chrono::steady_clock::now();
+        double preprocessing = 0.0;
+        double sorting = 0.0;
+        if constexpr (kind != Primitives::Kind::Sort) {
+            std::tie(preprocessing, sorting) = Algo::template run<T, Vector>(
+                current_data_ptr, current_data_end_ptr, *workspace, config.num_threads);
+        } else if (indirect_output) {
+            if constexpr (IndirectSort::supports<T, Algo>()) {
+                indirect_timings = IndirectSort::sort<T, Vector, Algo>(
+                    current_data_ptr, current_data_end_ptr, indirect_keys->get(), indirect_output->get(),
+                    config.num_threads);
+                preprocessing = indirect_timings.preprocessing_ms;
+                sorting = indirect_timings.total();
+            }
+        } else if (config.batch > 0) {
+            batch_result = BatchSort::run<T, Vector, Algo>(current_data_ptr, current_data_size, config.batch,
+                                                           config.num_threads);
+            sorting = batch_result.wall_ms;
+        } else {
+            std::tie(preprocessing, sorting) = execute_sorting_step<T, Vector, Algo>(
+                current_data_ptr, current_data_end_ptr, config);
+        }
+        const auto sort_end_time = std::chrono::steady_clock::now();
+        const auto freq_after = FreqCounter::snapshot();
+        const auto sched_after = RuntimeInfo::snapshot();
+        const auto io_after = IoCounter::snapshot();
+        const auto energy_after = EnergyCounter::snapshot();
+        if (run_iteration_id != 0) AllocTrace::end(run_iteration_id);
+
+        if (indirect_output) {
+            // The sorted records are in the output array; it replaces the input like in copyback.
+            v_container = std::move(*indirect_output);
+            indirect_output.reset();
+            indirect_keys.reset();
+            current_data_ptr = v_container.get();
+            current_data_end_ptr = v_container.get() + current_data_size;
+        }
 
         if (run_iteration_id!=0 && g_perf_ctl_fd != -1)
         {
@@ -152,7 +261,15 @@ namespace detail { // Encapsulate helper
             }
         }
         // --- Benchmark Checker Logic (Compile-time conditional) ---
-        if constexpr (g_enable_benchmark_checker) {
+        bool primitive_correct = false;
+        if constexpr (g_enable_benchmark_checker && kind != Primitives::Kind::Sort) {
+            auto start_checker_timing = std::chrono::high_resolution_clock::now();
+            primitive_correct = Primitives::check<kind>(primitive_input, current_data_ptr, current_data_end_ptr,
+                                                        *workspace);
+            time_checker_ms += std::chrono::duration<double, std::milli>(
+                                   std::chrono::high_resolution_clock::now() - start_checker_timing)
+                                   .count();
+        } else if constexpr (g_enable_benchmark_checker) {
             // Ensure checker_instance_opt is valid if checker is enabled.
             // This assertion is technically redundant due to if constexpr, but can be a sanity check.
             // assert(checker_instance_opt.has_value());
@@ -172,18 +289,32 @@ namespace detail { // Encapsulate helper
                   << "\talgo=" << Algo::name()
                   << "\tparallel=" << Algo::isParallel()
                   << "\tthreads=" << config.num_threads
+                  << "\truntime=" << RuntimeInfo::name()
                   << "\tvector=" << Vector<T>::name()
                   << "\tcopyback=" << copyback
+                  << "\tindirect=" << config.indirect
                   << "\tsize=" << current_data_size
                   << "\trun=" << run_iteration_id
                   << "\tbenchmarkconfigerror=0";
+        if constexpr (kind != Primitives::Kind::Sort) {
+            std::cout << "\tprimitive=" << Primitives::name(kind);
+            if constexpr (kind == Primitives::Kind::Histogram) std::cout << "\tbuckets=" << workspace->buckets;
+            if constexpr (kind == Primitives::Kind::TopK) std::cout << "\ttopk=" << workspace->k;
+        }
 
         // Conditionally output checker-related metrics.
-        if constexpr (g_enable_benchmark_checker) {
+        if constexpr (g_enable_benchmark_checker && kind != Primitives::Kind::Sort) {
+            std::cout << "\tcheckermilli=" << time_checker_ms
+                      << "\tcorrect=" << primitive_correct;
+        } else if constexpr (g_enable_benchmark_checker) {
             // assert(checker_instance_opt.has_value()); // Redundant, but for clarity.
+            // In --batch mode only the small arrays are sorted, not the whole input.
+            const bool sorted = config.batch > 0
+                    ? BatchSort::arrays_sorted(current_data_ptr, current_data_size, config.batch,
+                                               Datatype<T>::getComparator())
+                    : checker_instance_opt->is_likely_sorted(Datatype<T>::getComparator());
             std::cout << "\tcheckermilli=" << time_checker_ms
-                      << "\tsortedsequence="
-                      << checker_instance_opt->is_likely_sorted(Datatype<T>::getComparator())
+                      << "\tsortedsequence=" << sorted
                       << "\tpermutation=" << checker_instance_opt->is_likely_permutated();
         } else {
             // Output placeholders or omit if checker is disabled.
@@ -194,8 +325,25 @@ namespace detail { // Encapsulate helper
         
         std::cout << "\tgeneratormilli=" << elapsed_gen.count()
                   << "\tpreprocmilli=" << preprocessing
-                  << "\tmilli=" << sorting
-                  << config.info;
+                  << "\tmilli=" << sorting;
+        if (config.indirect) {
+            std::cout << "\tkeymilli=" << indirect_timings.key_ms
+                      << "\tkeysortmilli=" << indirect_timings.sort_ms
+                      << "\tgathermilli=" << indirect_timings.gather_ms;
+        }
+        if (config.batch > 0) {
+            BatchSort::print_fields(std::cout, batch_result, std::min(config.batch, current_data_size));
+        }
+        if constexpr (is_file_backed_vector<Vector<T>>::value) {
+            std::cout << "\twritebackmilli=" << writeback_ms;
+        }
+        CacheMode::print_fields(std::cout, config.cache_mode, cache_result);
+        ThreadPool::print_fields(std::cout);
+        std::cout << config.info;
+        FreqCounter::print_fields(std::cout, freq_before, freq_after);
+        EnergyCounter::print_fields(std::cout, energy_before, energy_after);
+        IoCounter::print_fields(std::cout, io_before, io_after, current_data_size * sizeof(T));
+        RuntimeInfo::print_fields(std::cout, sched_before, sched_after);
     
     #ifdef IPS4O_TIMER
         std::cout << "\tbasecase=" << g_base_case.getTime()
@@ -217,6 +365,29 @@ namespace detail { // Encapsulate helper
     #endif
     
         std::cout << std::endl;
+
+        if (config.batch > 0) {
+            std::ostringstream prefix;
+            prefix << "\tmachine=" << config.machine << "\tgen=" << get_generator_name_fn()
+                   << "\tdatatype=" << Datatype<T>::name() << "\talgo=" << Algo::name()
+                   << "\tthreads=" << config.num_threads << "\tsize=" << current_data_size
+                   << "\tbatch=" << std::min(config.batch, current_data_size) << "\trun=" << run_iteration_id;
+            BatchSort::print_histogram(std::cout, batch_result, prefix.str());
+        }
+
+        if (report_buffer_addresses()) {
+            const auto to_ns = [](std::chrono::steady_clock::time_point t) {
+                return std::chrono::duration_cast<std::chrono::nanoseconds>(t.time_since_epoch()).count();
+            };
+            std::cout << "BUFFER"
+                      << "\trun=" << run_iteration_id
+                      << "\tname=input"
+                      << "\tbegin=0x" << std::hex << reinterpret_cast<std::uintptr_t>(current_data_ptr) << std::dec
+                      << "\tbytes=" << current_data_size * sizeof(T)
+                      << "\tsortbeginns=" << to_ns(sort_begin_time)
+                      << "\tsortendns=" << to_ns(sort_end_time)
+                      << std::endl;
+        }
     }
     
 } // namespace detail
@@ -238,7 +409,9 @@ void exec(const Config &config)
             // Lambda to call generator without index
             auto generate_lambda = [&](T *begin, T *end)
             {
-                gen_instance(begin, end);
+                InputCache::restore_or_generate(Datatype<T>::name() + "/" + Generator::name() + "/" + std::to_string(size),
+                                                begin, end, config.num_threads,
+                                                [&](T *b, T *e) { gen_instance(b, e); });
             };
             // Lambda to get generator name without index
             auto name_lambda = [&]()
@@ -268,7 +441,9 @@ exec(const Config& config, const size_t index) {
         for (int run = 0; run != numRuns<T>(config, size, Algo::isParallel()); ++run) {
             // Lambda to call generator with index
             auto generate_lambda = [&](T* begin, T* end) {
-                gen_instance(begin, end, index);
+                InputCache::restore_or_generate(Datatype<T>::name() + "/" + Generator::name(index) + "/" + std::to_string(size),
+                                                begin, end, config.num_threads,
+                                                [&](T* b, T* e) { gen_instance(b, e, index); });
             };
             // Lambda to get generator name with index
             auto name_lambda = [&]() {
@@ -300,7 +475,10 @@ exec(const Config& config, const size_t index) {
     for (int run = 0; run != numRuns<T>(config, size, Algo::isParallel()); ++run) {
         // Lambda to call generator with index
         auto generate_lambda = [&](T* begin, T* end) {
-            gen_instance(begin, end, index); // Regenerate data for each run
+            // Regenerate data for each run (or restore the cached copy in --server mode)
+            InputCache::restore_or_generate(Datatype<T>::name() + "/" + Generator::name(index) + "/" + std::to_string(size),
+                                            begin, end, config.num_threads,
+                                            [&](T* b, T* e) { gen_instance(b, e, index); });
         };
         // Lambda to get generator name with index
         auto name_lambda = [&]() {
@@ -326,6 +504,11 @@ void selectAndExecVector(const Config& config, Args&&... args) {
                   Numa::AlignedArray<T>::name()) != config.vectors.end()) {
         exec<T, Generator, Algo, Numa::AlignedArray>(config, std::forward<Args>(args)...);
     }
+
+    if (std::find(config.vectors.begin(), config.vectors.end(),
+                  MmapFileArray<T>::name()) != config.vectors.end()) {
+        exec<T, Generator, Algo, MmapFileArray>(config, std::forward<Args>(args)...);
+    }
 }
 
 
@@ -336,7 +519,20 @@ void selectAndExecAlgo(const Config& config, Args&&... args) {
     for (const auto& algo : config.algos) {
         if (!Algorithm::name().compare(algo)) {
             if constexpr (Algorithm::template accepts<T>()) {
-                selectAndExecVector<T, Generator, Algorithm>(config, std::forward<Args>(args)...);
+                if (!Primitives::is_sort<Algorithm>() && (config.indirect || config.batch > 0)) {
+                    // --indirect and --batch only apply to sorting
+                    std::cout << "RESULT"
+                              << "\talgo=" << Algorithm::name() << "\tconfigwarning=1"
+                              << "\tdatatype=" << Datatype<T>::name() << "\tprimitive="
+                              << Primitives::name(Primitives::kind_of<Algorithm>()) << std::endl;
+                } else if (config.indirect && !IndirectSort::supports<T, Algorithm>()) {
+                    // --indirect needs an unsigned integer key and an algorithm that sorts pair_t
+                    std::cout << "RESULT"
+                              << "\talgo=" << Algorithm::name() << "\tconfigwarning=1"
+                              << "\tdatatype=" << Datatype<T>::name() << "\tindirect=1" << std::endl;
+                } else {
+                    selectAndExecVector<T, Generator, Algorithm>(config, std::forward<Args>(args)...);
+                }
             } else {
                 std::cout << "RESULT"
                           << "\talgo=" << Algorithm::name() << "\tconfigwarning=1"
@@ -429,6 +625,10 @@ void selectAndExecGenerators(const Config &config)
     initialize_papi_globally_once(); // Call at the very beginning
 #endif
  bool perf_initialized = PerfControl::init(); // 使用默认路径
+        FreqCounter::init(); // 在任何工作线程启动之前打开计数器
+        EnergyCounter::init();
+        IoCounter::init();
+        RuntimeInfo::init();
 
         if (!perf_initialized) {
             std::cerr << "Failed to initialize PerfControl. Proceeding without perf signaling." << std::endl;
@@ -440,11 +640,20 @@ void selectAndExecGenerators(const Config &config)
                 std::cerr << "[PerfControl] Failed to stop profiling." << std::endl;
             }
         }
-        selectAndExecDatatype<Algorithms, Datatypes>(config);
+        if (config.server) {
+            BenchmarkServer::serve(config, NameExtractor<Algorithms>(), NameExtractor<Generators>(),
+                                   NameExtractor<Datatypes>(),
+                                   [](const Config& job) { selectAndExecDatatype<Algorithms, Datatypes>(job); });
+        } else {
+            selectAndExecDatatype<Algorithms, Datatypes>(config);
+        }
     
          if (perf_initialized) {
         PerfControl::cleanup();
     }
+        FreqCounter::cleanup();
+        EnergyCounter::cleanup();
+        IoCounter::cleanup();
     }
 
     inline Config readParameters(int argc, char *argv[],
@@ -490,7 +699,7 @@ void selectAndExecGenerators(const Config &config)
 
         TCLAP::MultiArg<std::string> vector_arg("v", "vector",
                                                 "Name of the vector. If no vector is "
-                                                "specified, all vectors are executed.",
+                                                "specified, all in-memory vectors are executed.",
                                                 false, &vector_allowedVals);
 
         TCLAP::ValueArg<long> runs_arg(
@@ -512,6 +721,46 @@ void selectAndExecGenerators(const Config &config)
         TCLAP::ValueArg<long> threads_arg("t", "threads", "Number of threads", true, 0,
                                           "long");
 
+        TCLAP::SwitchArg indirect_arg(
+                "", "indirect",
+                "Sort indirectly: build (key, index) pairs, sort them with the algorithm and gather the records "
+                "into a new array. The three phases are reported as keymilli, keysortmilli and gathermilli; milli "
+                "is their sum. Datatypes without an unsigned integer key are skipped with a configwarning.",
+                false);
+
+        TCLAP::ValueArg<long> batch_arg(
+                "", "batch",
+                "Split every input into independent arrays of this many elements and sort them one by one: "
+                "sequential algorithms sort one array per thread, parallel algorithms sort each array with all "
+                "threads. Adds per-array latency percentiles to the RESULT line and a LATENCY histogram line.",
+                false, 0, "long");
+
+        TCLAP::ValueArg<long> buckets_arg(
+                "", "buckets",
+                "Number of buckets of the histogram primitive (key modulo buckets).",
+                false, 256, "long");
+
+        TCLAP::ValueArg<long> topk_arg(
+                "", "topk",
+                "Number of smallest elements selected by the top-k primitive (at most the input size).",
+                false, 1024, "long");
+
+        std::vector<std::string> cache_allowed = CacheMode::names();
+        TCLAP::ValuesConstraint<std::string> cache_allowedVals(cache_allowed);
+        TCLAP::ValueArg<std::string> cache_arg(
+                "", "cache",
+                "Cache state of the input before every run: default (as left by the generator and checker), cold "
+                "(stream over a buffer of 4x the LLC to evict it from the caches and the TLB; "
+                "CACHE_COLD_DROP_PAGES=true also pages it out) or warm (read it in the order the threads of the "
+                "algorithm will). Recorded as cachemode=.",
+                false, "default", &cache_allowedVals);
+
+        TCLAP::SwitchArg server_arg(
+                "", "server",
+                "Keep running and read jobs (one per line, see benchmark_server.hpp) from stdin. Generated inputs "
+                "stay resident and are restored with a parallel memcpy for every further run and algorithm.",
+                false);
+
         TCLAP::ValueArg<long> begin_logsize_arg(
                 "b", "beginlogsize", "The logarithm of the minimum input size in bytes.",
                 true, 0, "long");
@@ -532,10 +781,28 @@ void selectAndExecGenerators(const Config &config)
         cmd.add(threads_arg);
         cmd.add(begin_logsize_arg);
         cmd.add(end_logsize_arg);
+        cmd.add(server_arg);
+        cmd.add(indirect_arg);
+        cmd.add(batch_arg);
+        cmd.add(buckets_arg);
+        cmd.add(topk_arg);
+        cmd.add(cache_arg);
 
         cmd.parse(argc, argv);
 
         config.copyback = copyback_arg.getValue();
+        config.server = server_arg.getValue();
+        config.indirect = indirect_arg.getValue();
+        config.batch = batch_arg.getValue() > 0 ? static_cast<size_t>(batch_arg.getValue()) : 0;
+        if (config.batch > 0 && config.indirect) {
+            throw TCLAP::CmdLineParseException("cannot be combined with --indirect", "batch");
+        }
+        if (buckets_arg.getValue() < 1 || topk_arg.getValue() < 1) {
+            throw TCLAP::CmdLineParseException("--buckets and --topk must be at least 1", "buckets/topk");
+        }
+        config.buckets = static_cast<size_t>(buckets_arg.getValue());
+        config.topk = static_cast<size_t>(topk_arg.getValue());
+        config.cache_mode = cache_arg.getValue();
         config.algos = algo_arg.getValue();
         config.generators = generator_arg.getValue();
         config.datatypes = datatype_arg.getValue();
@@ -543,8 +810,18 @@ void selectAndExecGenerators(const Config &config)
 
         if (config.algos.empty()) { config.algos = algo_allowed; }
         if (config.generators.empty()) { config.generators = generator_allowed; }
-        if (config.datatypes.empty()) { config.datatypes = datatype_allowed; }
-        if (config.vectors.empty()) { config.vectors = vector_allowed; }
+        if (config.datatypes.empty()) {
+            // the record-width types rec16 ... rec256 only run when asked for (-d recN)
+            for (const auto& datatype : datatype_allowed) {
+                if (datatype.rfind("rec", 0) != 0) config.datatypes.push_back(datatype);
+            }
+        }
+        if (config.vectors.empty()) {
+            // -v mmapfile puts the inputs on disk, so it only runs when asked for
+            for (const auto& vector : vector_allowed) {
+                if (vector != MmapFileArray<int>::name()) config.vectors.push_back(vector);
+            }
+        }
 
         config.machine = machine_arg.getValue();
         config.info = info_arg.getValue();
@@ -0,0 +1,36 @@
+/*******************************************************************************
+ * src/benchmark/benchmark_server.cpp
+ *
+ * Several parallel sorts linked into one binary for --server mode
+ * (run_scripts/bench_server_driver.py): inputs are generated once and every
+ * algorithm sorts the same resident copy. Without --server it behaves like the
+ * single-algorithm benchmarks and runs every selected algorithm in turn.
+ *
+ * DovetailSort ships its own copy of ParlayLib and stays a separate binary.
+ ******************************************************************************/
+
+#include "../algorithm/ips4oparallel.hpp"
+#include "../algorithm/ips2raparallel.hpp"
+#include "../algorithm/mcstlmwm.hpp"
+#include "../algorithm/mcstlbq.hpp"
+#include "../algorithm/parlayinplacesamplesort.hpp"
+#include "../algorithm/parlayinplaceIntegerSort.hpp"
+#include "../algorithm/stdsort.hpp"
+#include "../benchmark.hpp"
+#include "../name_extractor.hpp"
+
+using Algorithm =
+        Sequence<false, omp::Ips4oparallel,
+        Sequence<false, omp::Ips3roParallel,
+        Sequence<false, omp::Mcstlmwm,
+        Sequence<false, omp::Mcstlbq,
+        Sequence<false, PLSS::PLSS,
+        Sequence<false, PLIS::PLIS,
+        Sequence<true, sequential::Stdsort>>>>>>>;
+
+int main(int argc, char *argv[]) {
+    Config config = readParameters(argc, argv, NameExtractor<Algorithm>());
+    omp_set_num_threads(config.num_threads); // --server jobs with threads=N update this per job
+    benchmark<Algorithm>(config);
+    return 0;
+}
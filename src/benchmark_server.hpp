@@ -0,0 +1,170 @@
+#ifndef BENCHMARK_SERVER_H
+#define BENCHMARK_SERVER_H
+
+#include <algorithm>
+#include <chrono>
+#include <cstdlib>
+#include <iostream>
+#include <sstream>
+#include <string>
+#include <vector>
+
+#include <dlfcn.h> // For dlsym
+
+#include "config.hpp"
+#include "cache_mode.hpp"
+#include "input_cache.hpp"
+
+// --server 模式：一个进程里依次执行 Python driver (run_scripts/bench_server_driver.py) 通过 stdin 发来的任务，
+// 生成的输入留在 InputCache 中，同一输入上的多个算法 / 多次运行只生成一次。
+// 每行一个任务，字段为 key=value (制表符或空格分隔)，缺省的字段取命令行参数：
+//   id=3 algos=ips4oparallel,plss generators=random datatypes=uint64 b=32 e=32 runs=6 threads=64 indirect=0 batch=0 cache=default info=x
+// 每个任务结束时输出 JOBDONE 行。其它命令: "cache" (输出 CACHE 行)、"clear" (清空缓存)、"quit"。
+namespace BenchmarkServer {
+
+    using omp_set_fn = void (*)(int);
+
+    /**
+     * @brief Applies the job's thread count to OpenMP if the binary links it (looked up once, like AllocTrace).
+     *        ParlayLib reads PARLAY_NUM_THREADS once per process, so its thread count is fixed at server start.
+     */
+    inline void set_omp_threads(int num_threads) {
+        static const omp_set_fn fn = reinterpret_cast<omp_set_fn>(dlsym(RTLD_DEFAULT, "omp_set_num_threads"));
+        if (fn) fn(num_threads);
+    }
+
+    inline std::vector<std::string> split_list(const std::string& value) {
+        std::vector<std::string> items;
+        std::stringstream stream(value);
+        std::string item;
+        while (std::getline(stream, item, ',')) {
+            if (!item.empty()) items.push_back(item);
+        }
+        return items;
+    }
+
+    inline bool check_names(const std::vector<std::string>& names, const std::vector<std::string>& allowed,
+                            const char* what, std::string& error) {
+        for (const auto& name : names) {
+            if (std::find(allowed.begin(), allowed.end(), name) == allowed.end()) {
+                error = std::string("unknown ") + what + " '" + name + "'";
+                return false;
+            }
+        }
+        return true;
+    }
+
+    /**
+     * @brief Parses one job line on top of the server's command line defaults. Returns false with error set for
+     *        unknown keys, names that are not linked into this binary, or malformed numbers.
+     */
+    inline bool parse_job(const std::string& line, const Config& defaults, const std::vector<std::string>& algos,
+                          const std::vector<std::string>& generators, const std::vector<std::string>& datatypes,
+                          Config& job, std::string& id, std::string& error) {
+        job = defaults;
+        std::istringstream stream(line);
+        std::string token;
+        try {
+            while (stream >> token) {
+                const size_t eq = token.find('=');
+                if (eq == std::string::npos) {
+                    error = "expected key=value, got '" + token + "'";
+                    return false;
+                }
+                const std::string key = token.substr(0, eq);
+                const std::string value = token.substr(eq + 1);
+                if (key == "id") id = value;
+                else if (key == "algos") job.algos = split_list(value);
+                else if (key == "generators") job.generators = split_list(value);
+                else if (key == "datatypes") job.datatypes = split_list(value);
+                else if (key == "b") job.begin_logn = std::stol(value);
+                else if (key == "e") job.end_logn = std::stol(value);
+                else if (key == "runs") job.runs = std::stoi(value);
+                else if (key == "threads") job.num_threads = std::stoi(value);
+                else if (key == "info") job.info = value;
+                else if (key == "indirect") job.indirect = std::stoi(value) != 0;
+                else if (key == "batch") job.batch = std::stoul(value);
+                else if (key == "cache") job.cache_mode = value;
+                else {
+                    error = "unknown key '" + key + "'";
+                    return false;
+                }
+            }
+        } catch (const std::exception&) {
+            error = "malformed number in '" + token + "'";
+            return false;
+        }
+        if (job.num_threads < 1 || job.begin_logn > job.end_logn) {
+            error = "need threads >= 1 and b <= e";
+            return false;
+        }
+        if (job.batch > 0 && job.indirect) {
+            error = "batch cannot be combined with indirect";
+            return false;
+        }
+        if (!check_names({job.cache_mode}, CacheMode::names(), "cache mode", error)) return false;
+        return check_names(job.algos, algos, "algorithm", error) && check_names(job.generators, generators, "generator", error)
+               && check_names(job.datatypes, datatypes, "datatype", error);
+    }
+
+    inline void print_cache_line() {
+        const auto& s = InputCache::state();
+        std::cout << "CACHE\tentries=" << s.entries.size() << "\tbytes=" << s.used << "\tcapacity=" << s.capacity
+                  << "\thits=" << s.hits << "\tmisses=" << s.misses << std::endl;
+    }
+
+    /**
+     * @brief Reads jobs from in until EOF or "quit" and runs each with run_job(config). RESULT lines are printed by
+     *        the normal benchmark code; a JOBDONE line (status, job wall time, cache hits/misses of the job) follows.
+     */
+    template <typename RunJob>
+    void serve(const Config& defaults, const std::vector<std::string>& algos, const std::vector<std::string>& generators,
+               const std::vector<std::string>& datatypes, RunJob&& run_job, std::istream& in = std::cin) {
+        InputCache::enable();
+        std::cout << "SERVER\tready\talgos=";
+        for (size_t i = 0; i < algos.size(); ++i) std::cout << (i ? "," : "") << algos[i];
+        std::cout << "\tcapacity=" << InputCache::state().capacity << std::endl;
+
+        std::string line;
+        while (std::getline(in, line)) {
+            if (line.empty() || line[0] == '#') continue;
+            if (line == "quit") break;
+            if (line == "cache") {
+                print_cache_line();
+                continue;
+            }
+            if (line == "clear") {
+                InputCache::clear();
+                print_cache_line();
+                continue;
+            }
+            Config job;
+            std::string id = "-";
+            std::string error;
+            if (!parse_job(line, defaults, algos, generators, datatypes, job, id, error)) {
+                std::cout << "JOBDONE\tid=" << id << "\tstatus=error\tmessage=" << error << std::endl;
+                continue;
+            }
+            set_omp_threads(job.num_threads);
+            const size_t hits_before = InputCache::state().hits;
+            const size_t misses_before = InputCache::state().misses;
+            const auto start = std::chrono::steady_clock::now();
+            std::string status = "ok";
+            try {
+                run_job(job);
+            } catch (const std::bad_alloc&) {
+                status = "error\tmessage=out of memory";
+                InputCache::clear(); // 释放缓存，让后续任务还有机会
+            } catch (const std::exception& e) {
+                status = std::string("error\tmessage=") + e.what();
+            }
+            const double milli = std::chrono::duration<double, std::milli>(std::chrono::steady_clock::now() - start).count();
+            std::cout << "JOBDONE\tid=" << id << "\tstatus=" << status << "\tmilli=" << milli
+                      << "\tcachehits=" << InputCache::state().hits - hits_before
+                      << "\tcachemisses=" << InputCache::state().misses - misses_before << std::endl;
+        }
+        InputCache::clear();
+    }
+
+} // namespace BenchmarkServer
+#endif // BENCHMARK_SERVER_H
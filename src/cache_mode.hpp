@@ -0,0 +1,207 @@
+#ifndef CACHE_MODE_H
+#define CACHE_MODE_H
+
+#include <algorithm>
+#include <chrono>
+#include <cstdint>
+#include <cstdlib>
+#include <cstring>
+#include <fstream>
+#include <iostream>
+#include <map>
+#include <memory>
+#include <string>
+#include <vector>
+
+#include <sys/mman.h>
+#include <unistd.h>
+
+#include "parallel/thread_pool.hpp"
+
+// 每次内部运行之前输入的缓存状态 (--cache，RESULT 行的 cachemode=)：
+//   default  与以前相同，不做处理 (缓存 / TLB 中留着生成器与检查器最后碰过的数据)；
+//   cold     在线程池上流式读一遍 CACHE_FLUSH_BYTES (默认 4 倍 LLC 总容量) 的缓冲区，把输入挤出 LLC、各核的私有缓存
+//            与 TLB；CACHE_COLD_DROP_PAGES=true 时另外对输入 madvise(MADV_PAGEOUT)，让排序从缺页开始
+//            (匿名内存只有在有 swap 时才真的被换出，没有 swap 时内核保留页面；-v mmapfile 已经在 write_back_and_evict 中丢弃)；
+//   warm     按排序的访问方式预读输入：并行算法由第 t 个池线程 (与算法的第 t 个线程同核) 读第 t 块，顺序算法由调用线程读整个输入；
+//            块内从尾到头读，让排序最先访问的块开头最后进入缓存。
+// 缓冲区只分配并写入一次 (写入非零值，否则读到的是共享零页)，之后只读，被挤出时是干净的，不会在计时区间内产生写回。
+// 准备时间在计时区间与 perf 区间之外，RESULT 行输出 cacheprepmilli (cold 时还有 cachedrop)。
+namespace CacheMode {
+
+    constexpr size_t kLineBytes = 64;
+
+    inline const std::vector<std::string>& names() {
+        static const std::vector<std::string> modes{"default", "cold", "warm"};
+        return modes;
+    }
+
+    inline bool env_true(const char* name) {
+        const char* env = std::getenv(name);
+        return env != nullptr && std::strcmp(env, "true") == 0;
+    }
+
+    // "32768K" / "32M" -> 字节数
+    inline uint64_t parse_size(const std::string& text) {
+        char* end = nullptr;
+        uint64_t value = std::strtoull(text.c_str(), &end, 10);
+        if (end != nullptr && (*end == 'K' || *end == 'k')) value <<= 10;
+        if (end != nullptr && (*end == 'M' || *end == 'm')) value <<= 20;
+        return value;
+    }
+
+    /**
+     * @brief Total last-level cache capacity: every distinct LLC instance (by shared_cpu_list) counted once.
+     */
+    inline uint64_t llc_bytes() {
+        std::map<std::string, uint64_t> instances;
+        int best_level = 0;
+        const long cpus = sysconf(_SC_NPROCESSORS_CONF);
+        for (long cpu = 0; cpu < std::max(1L, cpus); ++cpu) {
+            for (int index = 0;; ++index) {
+                const std::string dir = "/sys/devices/system/cpu/cpu" + std::to_string(cpu) + "/cache/index"
+                                        + std::to_string(index) + "/";
+                std::ifstream level_file(dir + "level");
+                int level = 0;
+                if (!(level_file >> level)) break;
+                std::ifstream type_file(dir + "type");
+                std::ifstream size_file(dir + "size");
+                std::ifstream shared_file(dir + "shared_cpu_list");
+                std::string type, size, shared;
+                type_file >> type;
+                size_file >> size;
+                shared_file >> shared;
+                if (type == "Instruction" || level < best_level) continue;
+                if (level > best_level) {
+                    instances.clear();
+                    best_level = level;
+                }
+                instances[shared] = parse_size(size);
+            }
+        }
+        uint64_t total = 0;
+        for (const auto& instance : instances) total += instance.second;
+        return total;
+    }
+
+    inline size_t flush_bytes() {
+        if (const char* env = std::getenv("CACHE_FLUSH_BYTES")) {
+            const unsigned long long value = std::strtoull(env, nullptr, 10);
+            if (value > 0) return value;
+        }
+        const uint64_t llc = llc_bytes();
+        return llc > 0 ? 4 * llc : size_t(256) << 20;
+    }
+
+    struct State {
+        std::unique_ptr<unsigned char[]> buffer;
+        size_t bytes = 0;
+        bool warned_drop = false;
+    };
+
+    inline State& state() {
+        static State s;
+        return s;
+    }
+
+    inline volatile unsigned char touch_sink = 0;
+
+    // 每个缓存行读一个字节；结果写入 touch_sink，编译器不能省略这些读
+    inline void touch(const unsigned char* begin, const unsigned char* end, bool backwards) {
+        unsigned char acc = 0;
+        const size_t lines = (end - begin + kLineBytes - 1) / kLineBytes;
+        for (size_t i = 0; i < lines; ++i) {
+            acc ^= begin[(backwards ? lines - 1 - i : i) * kLineBytes];
+        }
+        touch_sink = acc;
+    }
+
+    inline void flush(bool parallel) {
+        State& s = state();
+        if (!s.buffer) {
+            s.bytes = flush_bytes();
+            s.buffer.reset(new unsigned char[s.bytes]);
+            ThreadPool::run(ThreadPool::size(), [&](size_t t) {
+                const size_t first = t * s.bytes / ThreadPool::size();
+                const size_t last = (t + 1) * s.bytes / ThreadPool::size();
+                std::memset(s.buffer.get() + first, 1, last - first);
+            });
+        }
+        const unsigned char* buffer = s.buffer.get();
+        if (parallel) {
+            // 每个池线程读缓冲区的连续一段，合起来正好读完整个缓冲区
+            const size_t workers = ThreadPool::size();
+            ThreadPool::run(workers, [&](size_t t) {
+                touch(buffer + t * s.bytes / workers, buffer + (t + 1) * s.bytes / workers, false);
+            });
+        } else {
+            touch(buffer, buffer + s.bytes, false);
+        }
+    }
+
+    /**
+     * @brief MADV_PAGEOUT on the whole pages inside [data, data + bytes); false if the kernel refused it.
+     */
+    inline bool drop_pages(void* data, size_t bytes) {
+#ifdef MADV_PAGEOUT
+        const uintptr_t page = static_cast<uintptr_t>(sysconf(_SC_PAGESIZE));
+        const uintptr_t first = (reinterpret_cast<uintptr_t>(data) + page - 1) / page * page;
+        const uintptr_t last = (reinterpret_cast<uintptr_t>(data) + bytes) / page * page;
+        if (last <= first) return false;
+        if (madvise(reinterpret_cast<void*>(first), last - first, MADV_PAGEOUT) == 0) return true;
+#endif
+        if (!state().warned_drop) {
+            state().warned_drop = true;
+            std::cerr << "[CacheMode] Warning: madvise(MADV_PAGEOUT) is not available (needs Linux 5.4); "
+                         "CACHE_COLD_DROP_PAGES only flushes the caches." << std::endl;
+        }
+        return false;
+    }
+
+    inline void warm(const void* data, size_t bytes, bool parallel, size_t num_threads) {
+        const unsigned char* begin = static_cast<const unsigned char*>(data);
+        if (!parallel) {
+            touch(begin, begin + bytes, true);
+            return;
+        }
+        const size_t chunks = std::max<size_t>(1, num_threads);
+        ThreadPool::run(chunks, [&](size_t t) {
+            touch(begin + t * bytes / chunks, begin + (t + 1) * bytes / chunks, true);
+        });
+    }
+
+    struct Result {
+        double prep_ms = 0.0;
+        bool dropped = false;
+    };
+
+    /**
+     * @brief Brings the input into the state of the mode right before the timed region.
+     *        file_backed: -v mmapfile, whose pages were already dropped by write_back_and_evict.
+     */
+    inline Result prepare(const std::string& mode, void* data, size_t bytes, bool parallel, size_t num_threads,
+                          bool file_backed) {
+        Result result;
+        if (mode == "default" || mode.empty()) return result;
+        const auto start = std::chrono::steady_clock::now();
+        if (mode == "cold") {
+            result.dropped = file_backed || (env_true("CACHE_COLD_DROP_PAGES") && drop_pages(data, bytes));
+            flush(parallel);
+        } else if (mode == "warm") {
+            warm(data, bytes, parallel, num_threads);
+        }
+        result.prep_ms = std::chrono::duration<double, std::milli>(std::chrono::steady_clock::now() - start).count();
+        return result;
+    }
+
+    /**
+     * @brief Appends cachemode, and for cold / warm the preparation time (plus cachedrop for cold).
+     */
+    inline void print_fields(std::ostream& out, const std::string& mode, const Result& result) {
+        out << "\tcachemode=" << (mode.empty() ? "default" : mode);
+        if (mode == "cold" || mode == "warm") out << "\tcacheprepmilli=" << result.prep_ms;
+        if (mode == "cold") out << "\tcachedrop=" << result.dropped;
+    }
+
+} // namespace CacheMode
+#endif // CACHE_MODE_H
@@ -24,6 +24,7 @@
 
 #pragma once
 
+#include <cstddef>
 #include <string>
 #include <vector>
 
@@ -39,4 +40,10 @@ struct Config {
     std::vector<std::string> vectors;
     std::string info;
     bool copyback;
+    bool server{false}; // --server: read jobs from stdin, keep generated inputs resident
+    bool indirect{false}; // --indirect: sort (key, index) pairs and gather the records (indirect_sort.hpp)
+    size_t batch{0}; // --batch: elements per small array, 0 = one big array (batch_sort.hpp)
+    size_t buckets{256}; // --buckets: histogram buckets (primitives.hpp)
+    size_t topk{1024}; // --topk: elements selected by top-k (primitives.hpp)
+    std::string cache_mode{"default"}; // --cache: default, cold or warm input before every run (cache_mode.hpp)
 };
@@ -75,6 +75,20 @@ struct is_simple_key_type<std::string> {
     static bool constexpr value = false;
 };
 
+// Key + payload records of the record-width sweep behave like pair_t: a
+// simple 64-bit key, the payload is moved along with it.
+template <size_t Bytes>
+struct is_simple_key_type<record_t<Bytes>> {
+    static bool constexpr value = true;
+    using Type = typename record_t<Bytes>::int_type;
+};
+
+template <class T>
+struct is_record_type : std::false_type {};
+
+template <size_t Bytes>
+struct is_record_type<record_t<Bytes>> : std::true_type {};
+
 
 template <class T>
 struct Datatype {
@@ -365,9 +379,51 @@ constexpr bool Datatype<std::string>::hasRadulsFormat() {
     return false;
 }
 
+// ===================================================================
+//  Key + payload records (record-width sweep)
+// ===================================================================
+// All widths share one partial specialization; the name encodes the total
+// record size in bytes (rec16, rec32, ...).
+template <size_t Bytes>
+struct Datatype<record_t<Bytes>> {
+    using value_type = record_t<Bytes>;
+
+    static std::string name() { return "rec" + std::to_string(Bytes); }
+    static constexpr auto getComparator() { return std::less<value_type>{}; }
+    static constexpr auto getKeyExtractor() {
+        return [](const value_type& a) { return a.k; };
+    }
+    static constexpr auto getSkaKeyExtractor() {
+        return [](const value_type& a) { return a.k; };
+    }
+    static constexpr bool hasKeyExtractor() { return true; }
+    static constexpr bool hasUnsignedKey() {
+        return std::is_unsigned_v<typename value_type::int_type>;
+    }
+    static constexpr size_t sizeofKey() { return sizeof(typename value_type::int_type); }
+    static constexpr bool hasRadulsFormat() { return false; }
+};
+
 // ===================================================================
 //  Updated Datatypes List
 // ===================================================================
+#ifdef BENCHMARK_RECORD_TYPES
+// Record-width sweep: uint64 is the 8 byte point, rec16 ... rec256 add payload.
+using Datatypes =
+        Sequence<false, Datatype<pair_t>,
+        Sequence<false, Datatype<qtuple_t>,
+        Sequence<false, Datatype<byte_t>,
+        Sequence<false, Datatype<double>,
+        Sequence<false, Datatype<uint32_t>,
+        Sequence<false, Datatype<uint64_t>,
+        Sequence<false, Datatype<std::string>,
+        Sequence<false, Datatype<record_t<16>>,
+        Sequence<false, Datatype<record_t<32>>,
+        Sequence<false, Datatype<record_t<64>>,
+        Sequence<false, Datatype<record_t<128>>,
+        Sequence<true,  Datatype<record_t<256>>
+        >>>>>>>>>>>>;
+#else
 using Datatypes =
         Sequence<false, Datatype<pair_t>,
         Sequence<false, Datatype<qtuple_t>,
@@ -377,3 +433,4 @@ using Datatypes =
         Sequence<false, Datatype<uint64_t>,
         Sequence<true,  Datatype<std::string>
         >>>>>>>;
+#endif
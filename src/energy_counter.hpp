@@ -0,0 +1,131 @@
+#ifndef ENERGY_COUNTER_H
+#define ENERGY_COUNTER_H
+
+#include <algorithm>
+#include <cstdint>
+#include <cstdlib>
+#include <cstring>
+#include <filesystem>
+#include <fstream>
+#include <iomanip>
+#include <iostream>
+#include <string>
+#include <vector>
+
+// 每次排序期间的能耗：读取 powercap (RAPL) 的 package 与 DRAM 域的 energy_uj 计数器。
+// 计数器在 max_energy_range_uj 处回绕，所以差值要加上一个量程。没有 RAPL 的机器 (或虚拟机) 可以把
+// POWERCAP_ROOT 指向 run_scripts/powercap_standin.py 维护的同结构目录树。只有 MEASURE_ENERGY=true 时启用。
+// 新内核上 energy_uj 只有 root 可读。
+namespace EnergyCounter {
+
+    enum class Domain { Package, Dram };
+
+    struct Zone {
+        Domain domain;
+        std::string energy_path;
+        uint64_t max_range_uj = 0;
+    };
+
+    using Snapshot = std::vector<uint64_t>; // 与 zones() 一一对应
+
+    inline std::vector<Zone>& zones() {
+        static std::vector<Zone> z;
+        return z;
+    }
+
+    inline bool read_u64(const std::string& path, uint64_t& value) {
+        std::ifstream in(path);
+        return static_cast<bool>(in >> value);
+    }
+
+    inline std::string read_name(const std::filesystem::path& zone_dir) {
+        std::ifstream in(zone_dir / "name");
+        std::string name;
+        std::getline(in, name);
+        return name;
+    }
+
+    /**
+     * @brief Collects the package-N zones and their dram subzones below POWERCAP_ROOT (default /sys/class/powercap).
+     *        psys and core/uncore subzones are skipped so that nothing is counted twice.
+     */
+    inline void init() {
+        const char* env = std::getenv("MEASURE_ENERGY");
+        if (!env || strcmp(env, "true") != 0) return;
+        const char* root_env = std::getenv("POWERCAP_ROOT");
+        const std::filesystem::path root = root_env ? root_env : "/sys/class/powercap";
+        std::vector<std::filesystem::path> candidates;
+        std::error_code ec;
+        for (const auto& entry : std::filesystem::recursive_directory_iterator(root, ec)) {
+            const std::string dirname = entry.path().filename().string();
+            if (dirname.rfind("intel-rapl:", 0) == 0) candidates.push_back(entry.path());
+        }
+        std::sort(candidates.begin(), candidates.end());
+        for (const auto& zone_dir : candidates) {
+            const std::string name = read_name(zone_dir);
+            Zone zone;
+            if (name.rfind("package", 0) == 0) zone.domain = Domain::Package;
+            else if (name == "dram") zone.domain = Domain::Dram;
+            else continue;
+            // sysfs 里子域同时出现在父目录下和顶层 (符号链接)，按能量文件的真实路径去重
+            zone.energy_path = std::filesystem::weakly_canonical(zone_dir / "energy_uj", ec).string();
+            const bool duplicate = std::any_of(zones().begin(), zones().end(),
+                                               [&](const Zone& z) { return z.energy_path == zone.energy_path; });
+            uint64_t probe = 0;
+            if (duplicate || !read_u64(zone.energy_path, probe)) continue;
+            if (!read_u64((zone_dir / "max_energy_range_uj").string(), zone.max_range_uj)) zone.max_range_uj = 0;
+            zones().push_back(zone);
+        }
+        if (zones().empty()) {
+            std::cerr << "[EnergyCounter] Warning: no readable package/dram energy_uj below " << root.string()
+                      << " (needs RAPL and root, or POWERCAP_ROOT pointing at a stand-in tree). Energy is not recorded."
+                      << std::endl;
+        } else {
+            std::cout << "[EnergyCounter] Using " << zones().size() << " powercap zones below " << root.string() << "."
+                      << std::endl;
+        }
+    }
+
+    inline bool enabled() {
+        return !zones().empty();
+    }
+
+    inline Snapshot snapshot() {
+        Snapshot s(zones().size(), 0);
+        for (size_t i = 0; i < zones().size(); ++i) read_u64(zones()[i].energy_path, s[i]);
+        return s;
+    }
+
+    // 一个区间内的能耗 (微焦)。计数器最多回绕一次：区间远短于回绕周期 (几十秒到几分钟)。
+    inline uint64_t delta_uj(const Zone& zone, uint64_t before, uint64_t after) {
+        if (after >= before) return after - before;
+        return zone.max_range_uj > before ? after + (zone.max_range_uj - before) : 0;
+    }
+
+    /**
+     * @brief Appends the RESULT fields pkgjoules and (if a DRAM domain exists) dramjoules for the sort.
+     */
+    inline void print_fields(std::ostream& out, const Snapshot& before, const Snapshot& after) {
+        if (!enabled() || before.size() != zones().size() || after.size() != zones().size()) return;
+        uint64_t package_uj = 0, dram_uj = 0;
+        bool has_dram = false;
+        for (size_t i = 0; i < zones().size(); ++i) {
+            const uint64_t delta = delta_uj(zones()[i], before[i], after[i]);
+            if (zones()[i].domain == Domain::Package) {
+                package_uj += delta;
+            } else {
+                dram_uj += delta;
+                has_dram = true;
+            }
+        }
+        out << "\tpkgjoules=" << std::fixed << std::setprecision(6) << static_cast<double>(package_uj) * 1e-6;
+        if (has_dram) out << "\tdramjoules=" << static_cast<double>(dram_uj) * 1e-6;
+        out << std::defaultfloat << std::setprecision(6);
+    }
+
+    inline void cleanup() {
+        zones().clear();
+    }
+
+} // namespace EnergyCounter
+#endif // ENERGY_COUNTER_H
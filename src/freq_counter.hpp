@@ -0,0 +1,164 @@
+#ifndef FREQ_COUNTER_H
+#define FREQ_COUNTER_H
+
+#include <cstdint>
+#include <cstdlib>
+#include <cstring>
+#include <iomanip>
+#include <iostream>
+#include <string>
+#include <vector>
+
+#include <fcntl.h>               // For open()
+#include <linux/perf_event.h>    // For perf_event_attr
+#include <sys/syscall.h>         // For SYS_perf_event_open
+#include <unistd.h>              // For pread, read, close, sysconf
+
+// 每次排序期间的有效频率：优先读取所有 CPU 的 APERF/MPERF (/dev/cpu/N/msr，需要 root 与 msr 模块)，
+// 否则用每个 CPU 的 cycles / ref-cycles 计数器 (perf_event_open，需要 perf_event_paranoid <= 0)。
+// 两者的比值都是 "运行时的平均频率 / 标称频率"，分析时用来把耗时归一化到标称频率并标记噪声运行。
+// 计数是整机范围的，所以同时也反映了后台负载 (cpubusy)。只有 MEASURE_FREQUENCY=true 时启用。
+namespace FreqCounter {
+
+    enum class Source { None, Msr, Perf };
+
+    struct Snapshot {
+        uint64_t actual = 0;    // APERF 或 cycles 之和
+        uint64_t reference = 0; // MPERF 或 ref-cycles 之和
+        uint64_t tsc = 0;       // 仅 msr：CPU 0 的 TSC，用于计算忙碌比例
+    };
+
+    constexpr uint32_t MSR_IA32_TSC = 0x10;
+    constexpr uint32_t MSR_IA32_MPERF = 0xE7;
+    constexpr uint32_t MSR_IA32_APERF = 0xE8;
+
+    inline Source& source() {
+        static Source s = Source::None;
+        return s;
+    }
+
+    // msr: 每个 CPU 一个 fd；perf: 每个 CPU 两个 fd (cycles, ref-cycles)
+    inline std::vector<int>& fds() {
+        static std::vector<int> f;
+        return f;
+    }
+
+    inline void close_all() {
+        for (int fd : fds()) close(fd);
+        fds().clear();
+        source() = Source::None;
+    }
+
+    inline bool open_msr(long num_cpus) {
+        for (long cpu = 0; cpu < num_cpus; ++cpu) {
+            const std::string path = "/dev/cpu/" + std::to_string(cpu) + "/msr";
+            const int fd = open(path.c_str(), O_RDONLY);
+            if (fd == -1) {
+                close_all();
+                return false;
+            }
+            uint64_t probe = 0;
+            if (pread(fd, &probe, sizeof(probe), MSR_IA32_APERF) != sizeof(probe)) {
+                close(fd);
+                close_all();
+                return false;
+            }
+            fds().push_back(fd);
+        }
+        source() = Source::Msr;
+        return true;
+    }
+
+    inline int open_perf_counter(uint64_t config, int cpu) {
+        perf_event_attr attr;
+        memset(&attr, 0, sizeof(attr));
+        attr.type = PERF_TYPE_HARDWARE;
+        attr.size = sizeof(attr);
+        attr.config = config;
+        return static_cast<int>(syscall(SYS_perf_event_open, &attr, -1, cpu, -1, 0));
+    }
+
+    inline bool open_perf(long num_cpus) {
+        for (long cpu = 0; cpu < num_cpus; ++cpu) {
+            const int cycles = open_perf_counter(PERF_COUNT_HW_CPU_CYCLES, static_cast<int>(cpu));
+            const int ref_cycles = cycles == -1 ? -1 : open_perf_counter(PERF_COUNT_HW_REF_CPU_CYCLES, static_cast<int>(cpu));
+            if (cycles == -1 || ref_cycles == -1) {
+                if (cycles != -1) close(cycles);
+                close_all();
+                return false;
+            }
+            fds().push_back(cycles);
+            fds().push_back(ref_cycles);
+        }
+        source() = Source::Perf;
+        return true;
+    }
+
+    /**
+     * @brief Opens the counters if MEASURE_FREQUENCY=true. Falls back from MSRs to perf counters to nothing.
+     */
+    inline void init() {
+        const char* env = std::getenv("MEASURE_FREQUENCY");
+        if (!env || strcmp(env, "true") != 0) return;
+        const long num_cpus = sysconf(_SC_NPROCESSORS_ONLN);
+        if (open_msr(num_cpus)) {
+            std::cout << "[FreqCounter] Using APERF/MPERF MSRs of " << num_cpus << " CPUs." << std::endl;
+        } else if (open_perf(num_cpus)) {
+            std::cout << "[FreqCounter] Using per-CPU cycles/ref-cycles perf counters of " << num_cpus << " CPUs." << std::endl;
+        } else {
+            std::cerr << "[FreqCounter] Warning: neither /dev/cpu/*/msr nor system-wide perf counters are accessible "
+                         "(needs root / perf_event_paranoid <= 0). Frequency is not recorded." << std::endl;
+        }
+    }
+
+    inline bool enabled() {
+        return source() != Source::None;
+    }
+
+    inline Snapshot snapshot() {
+        Snapshot s;
+        if (source() == Source::Msr) {
+            for (int fd : fds()) {
+                uint64_t aperf = 0, mperf = 0;
+                if (pread(fd, &aperf, sizeof(aperf), MSR_IA32_APERF) == sizeof(aperf)) s.actual += aperf;
+                if (pread(fd, &mperf, sizeof(mperf), MSR_IA32_MPERF) == sizeof(mperf)) s.reference += mperf;
+            }
+            if (!fds().empty() && pread(fds()[0], &s.tsc, sizeof(s.tsc), MSR_IA32_TSC) != sizeof(s.tsc)) s.tsc = 0;
+        } else if (source() == Source::Perf) {
+            for (size_t i = 0; i < fds().size(); ++i) {
+                uint64_t value = 0;
+                if (read(fds()[i], &value, sizeof(value)) == sizeof(value)) {
+                    (i % 2 == 0 ? s.actual : s.reference) += value;
+                }
+            }
+        }
+        return s;
+    }
+
+    /**
+     * @brief Appends the RESULT fields freqsource, freqratio (actual / nominal frequency) and, for MSRs,
+     *        cpubusy (share of all CPUs' time spent in C0 during the sort).
+     */
+    inline void print_fields(std::ostream& out, const Snapshot& before, const Snapshot& after) {
+        if (!enabled()) return;
+        const uint64_t actual = after.actual - before.actual;
+        const uint64_t reference = after.reference - before.reference;
+        out << "\tfreqsource=" << (source() == Source::Msr ? "msr" : "perf");
+        if (reference > 0) {
+            out << "\tfreqratio=" << std::setprecision(4) << static_cast<double>(actual) / static_cast<double>(reference)
+                << std::setprecision(6);
+        }
+        const uint64_t tsc = after.tsc - before.tsc;
+        if (source() == Source::Msr && tsc > 0) {
+            out << "\tcpubusy=" << std::setprecision(4)
+                << static_cast<double>(reference) / (static_cast<double>(tsc) * static_cast<double>(fds().size()))
+                << std::setprecision(6);
+        }
+    }
+
+    inline void cleanup() {
+        close_all();
+    }
+
+} // namespace FreqCounter
+#endif // FREQ_COUNTER_H
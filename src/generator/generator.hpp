@@ -72,7 +72,8 @@ class GenSorted {
         return std::is_same_v<T, pair_t>
                 || std::is_same_v<T, double>
                 || std::is_same_v<T, uint32_t>
-                || std::is_same_v<T, uint64_t>;
+                || std::is_same_v<T, uint64_t>
+                || is_record_type<T>::value;
     }
 
     template <class T>
@@ -97,7 +98,8 @@ class GenReverse {
         return std::is_same_v<T, pair_t>
                 || std::is_same_v<T, double>
                 || std::is_same_v<T, uint32_t>
-                || std::is_same_v<T, uint64_t>;
+                || std::is_same_v<T, uint64_t>
+                || is_record_type<T>::value;
     }
 
     template <class T>
@@ -124,7 +126,8 @@ class GenRootdupls {
         return std::is_same_v<T, pair_t>
                 || std::is_same_v<T, double>
                 || std::is_same_v<T, uint32_t>
-                || std::is_same_v<T, uint64_t>;
+                || std::is_same_v<T, uint64_t>
+                || is_record_type<T>::value;
     }
 
     template <class T>
@@ -157,7 +160,8 @@ class GenZero {
         return std::is_same_v<T, pair_t>
                 || std::is_same_v<T, double>
                 || std::is_same_v<T, uint32_t>
-                || std::is_same_v<T, uint64_t>;
+                || std::is_same_v<T, uint64_t>
+                || is_record_type<T>::value;
     }
 
     template <class T>
@@ -182,7 +186,8 @@ class GenRandom {
         return std::is_same_v<T, pair_t>
                 || std::is_same_v<T, double>
                 || std::is_same_v<T, uint32_t>
-                || std::is_same_v<T, uint64_t>;
+                || std::is_same_v<T, uint64_t>
+                || is_record_type<T>::value;
     }
 
     template <class T>
@@ -190,7 +195,8 @@ class GenRandom {
         static_assert(std::is_same_v<T, pair_t>
                       || std::is_same_v<T, double>
                       || std::is_same_v<T, uint32_t>
-                      || std::is_same_v<T, uint64_t>);
+                      || std::is_same_v<T, uint64_t>
+                      || is_record_type<T>::value);
 
         std::random_device rd;
         const uint32_t seed = rd();
@@ -218,6 +224,12 @@ class GenRandom {
                 SimdMtGenerator<uint64_t>::fill(seed + thread_id, begin + begin_idx,
                                                 begin + end_idx);
             });
+        } else if constexpr (is_record_type<T>::value) {
+            std_parallel_for(end - begin, [begin, seed](size_t begin_idx, size_t end_idx,
+                                                        size_t thread_id) {
+                SimdMtGeneratorUint64 gen(seed + thread_id);
+                for (size_t i = begin_idx; i != end_idx; ++i) { begin[i] = T{gen()}; }
+            });
         } else {
             assert(false);
         }
@@ -235,7 +247,8 @@ class GenZipf {
         return std::is_same_v<T, pair_t>
                 || std::is_same_v<T, uint32_t>
                 || std::is_same_v<T, uint64_t>
-                || std::is_same_v<T, double>;
+                || std::is_same_v<T, double>
+                || is_record_type<T>::value;
     }
 
     template <class T>
@@ -243,7 +256,8 @@ class GenZipf {
         static_assert(std::is_same_v<T, pair_t>
                       || std::is_same_v<T, uint32_t>
                       || std::is_same_v<T, uint64_t>
-                      || std::is_same_v<T, double>);
+                      || std::is_same_v<T, double>
+                      || is_record_type<T>::value);
 
         const size_t N = 1000000;
         const double s = 0.75;
@@ -255,7 +269,8 @@ class GenZipf {
         if constexpr (std::is_same_v<T, pair_t>
                       || std::is_same_v<T, uint32_t>
                       || std::is_same_v<T, uint64_t>
-                      || std::is_same_v<T, double>) {
+                      || std::is_same_v<T, double>
+                      || is_record_type<T>::value) {
             std::random_device rd;
             const uint32_t seed = rd();
             std_parallel_for(end - begin, [begin, seed, &make_zipf](size_t begin_idx,
@@ -407,7 +422,8 @@ class GenAlmostsorted {
         return std::is_same_v<T, pair_t>
                 || std::is_same_v<T, double>
                 || std::is_same_v<T, uint32_t>
-                || std::is_same_v<T, uint64_t>;
+                || std::is_same_v<T, uint64_t>
+                || is_record_type<T>::value;
     }
 
     template <class T>
@@ -446,7 +462,8 @@ class GenTwicedupes {
         return std::is_same_v<T, pair_t>  // only if pair_t contains 64 bit types
                || std::is_same_v<T, double>
                || std::is_same_v<T, uint64_t>
-               || std::is_same_v<T, uint32_t>;
+               || std::is_same_v<T, uint32_t>
+               || is_record_type<T>::value;
     }
 
     template <class T>
@@ -485,7 +502,8 @@ class GenEightdupes {
         return std::is_same_v<T, pair_t>  // only if pair_t contains 64 bit types
                || std::is_same_v<T, double>
                || std::is_same_v<T, uint64_t>
-               || std::is_same_v<T, uint32_t>;
+               || std::is_same_v<T, uint32_t>
+               || is_record_type<T>::value;
     }
 
     template <class T>
@@ -0,0 +1,137 @@
+#ifndef INPUT_CACHE_H
+#define INPUT_CACHE_H
+
+#include <algorithm>
+#include <chrono>
+#include <cstdint>
+#include <cstdlib>
+#include <cstring>
+#include <iostream>
+#include <list>
+#include <memory>
+#include <string>
+#include <type_traits>
+#include <vector>
+
+#include "parallel/thread_pool.hpp"
+
+// 服务器模式 (--server) 下的输入缓存：每个 (数据类型, 生成器, 元素个数) 的输入只生成一次，保存一份原始副本，
+// 之后每次运行用多线程 memcpy 把副本恢复到工作数组。generatormilli 因此变成恢复时间。
+// 普通模式下缓存关闭，行为与原来完全一致 (每次运行重新生成)。
+// 容量由 INPUT_CACHE_BYTES 控制 (默认 16 GiB)，超出时按 LRU 淘汰；单个输入超过容量时不缓存。
+namespace InputCache {
+
+    struct Entry {
+        std::string key;
+        size_t bytes = 0;
+        std::unique_ptr<char, decltype(&std::free)> data{nullptr, &std::free};
+    };
+
+    struct State {
+        bool enabled = false;
+        size_t capacity = size_t(16) << 30;
+        size_t used = 0;
+        size_t hits = 0;
+        size_t misses = 0;
+        std::list<Entry> entries; // 前面是最近使用的
+    };
+
+    inline State& state() {
+        static State s;
+        return s;
+    }
+
+    inline void enable() {
+        State& s = state();
+        s.enabled = true;
+        if (const char* env = std::getenv("INPUT_CACHE_BYTES")) {
+            char* end = nullptr;
+            const unsigned long long value = std::strtoull(env, &end, 10);
+            if (end != env) s.capacity = static_cast<size_t>(value);
+        }
+    }
+
+    inline void clear() {
+        state().entries.clear();
+        state().used = 0;
+    }
+
+    /**
+     * @brief Copies bytes with up to num_threads pool workers (contiguous chunks, so each worker touches the same
+     *        pages of the work array in every run).
+     */
+    inline void parallel_copy(char* dst, const char* src, size_t bytes, size_t num_threads) {
+        constexpr size_t MIN_CHUNK = size_t(1) << 22; // 小输入不值得开线程
+        const size_t threads = std::max<size_t>(1, std::min(num_threads, bytes / MIN_CHUNK));
+        if (threads == 1) {
+            std::memcpy(dst, src, bytes);
+            return;
+        }
+        const size_t chunk = (bytes + threads - 1) / threads;
+        ThreadPool::run(threads, [=](size_t t) {
+            const size_t begin = std::min(bytes, t * chunk);
+            const size_t end = std::min(bytes, begin + chunk);
+            std::memcpy(dst + begin, src + begin, end - begin);
+        });
+    }
+
+    inline Entry* find(const std::string& key) {
+        auto& entries = state().entries;
+        for (auto it = entries.begin(); it != entries.end(); ++it) {
+            if (it->key == key) {
+                entries.splice(entries.begin(), entries, it); // 移到最前 (LRU)
+                return &entries.front();
+            }
+        }
+        return nullptr;
+    }
+
+    inline void store(const std::string& key, const char* src, size_t bytes, size_t num_threads) {
+        State& s = state();
+        if (bytes > s.capacity) return;
+        while (!s.entries.empty() && s.used + bytes > s.capacity) {
+            s.used -= s.entries.back().bytes;
+            s.entries.pop_back();
+        }
+        Entry entry;
+        entry.key = key;
+        entry.bytes = bytes;
+        entry.data.reset(static_cast<char*>(std::aligned_alloc(0x100, (bytes + 0xff) & ~size_t(0xff))));
+        if (!entry.data) {
+            std::cerr << "[InputCache] Warning: cannot allocate " << bytes << " bytes for " << key << std::endl;
+            return;
+        }
+        parallel_copy(entry.data.get(), src, bytes, num_threads);
+        s.used += bytes;
+        s.entries.push_front(std::move(entry));
+    }
+
+    /**
+     * @brief Fills [begin, end) from the cached pristine copy of key, or runs generate() and caches the result.
+     *        std::string inputs own heap memory and are always generated (the other datatypes are plain structs
+     *        that are safe to memcpy even where they declare their own copy constructor, like pair_t).
+     */
+    template <class T, typename GenerateFn>
+    void restore_or_generate(const std::string& key, T* begin, T* end, size_t num_threads, GenerateFn&& generate) {
+        if constexpr (std::is_same_v<T, std::string>) {
+            generate(begin, end);
+        } else {
+            State& s = state();
+            if (!s.enabled) {
+                generate(begin, end);
+                return;
+            }
+            const size_t bytes = static_cast<size_t>(end - begin) * sizeof(T);
+            if (Entry* entry = find(key); entry && entry->bytes == bytes) {
+                parallel_copy(reinterpret_cast<char*>(begin), entry->data.get(), bytes, num_threads);
+                ++s.hits;
+                return;
+            }
+            generate(begin, end);
+            store(key, reinterpret_cast<const char*>(begin), bytes, num_threads);
+            ++s.misses;
+        }
+    }
+
+} // namespace InputCache
+#endif // INPUT_CACHE_H
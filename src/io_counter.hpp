@@ -0,0 +1,125 @@
+#ifndef IO_COUNTER_H
+#define IO_COUNTER_H
+
+#include <algorithm>
+#include <cstdint>
+#include <cstdlib>
+#include <cstring>
+#include <fstream>
+#include <iostream>
+#include <string>
+
+#include <sys/resource.h>
+#include <unistd.h>
+
+// 每次排序期间的 I/O 量与缺页：/proc/self/io 的 read_bytes / write_bytes (真正发往块设备的字节数，
+// 包括文件映射的换入与脏页) 以及 getrusage 的 major / minor page faults，都是整个进程 (所有线程) 的。
+// 另外输出输入大小与本进程可用的内存上限 (MemTotal 与所在 cgroup 及其祖先的 memory.max 中的最小值)，
+// 分析脚本据此计算 输入 / 内存 比例 (analysis_scripts/analyze_out_of_core.py)。只有 MEASURE_IO=true 时启用。
+namespace IoCounter {
+
+    struct Snapshot {
+        uint64_t read_bytes = 0;
+        uint64_t write_bytes = 0;
+        uint64_t major_faults = 0;
+        uint64_t minor_faults = 0;
+    };
+
+    struct State {
+        bool enabled = false;
+        uint64_t memory_limit = 0;
+    };
+
+    inline State& state() {
+        static State s;
+        return s;
+    }
+
+    inline bool read_proc_io(Snapshot& s) {
+        std::ifstream in("/proc/self/io");
+        std::string key;
+        uint64_t value = 0;
+        bool found = false;
+        while (in >> key >> value) {
+            if (key == "read_bytes:") {
+                s.read_bytes = value;
+                found = true;
+            } else if (key == "write_bytes:") {
+                s.write_bytes = value;
+            }
+        }
+        return found;
+    }
+
+    /**
+     * @brief MemTotal, lowered to the smallest memory.max of this process's cgroup (v2) and its ancestors.
+     */
+    inline uint64_t memory_limit_bytes() {
+        const long pages = sysconf(_SC_PHYS_PAGES);
+        const long page_size = sysconf(_SC_PAGESIZE);
+        uint64_t limit = pages > 0 && page_size > 0 ? static_cast<uint64_t>(pages) * page_size : 0;
+        std::ifstream cgroup_file("/proc/self/cgroup");
+        std::string line;
+        while (std::getline(cgroup_file, line)) {
+            if (line.rfind("0::", 0) != 0) continue;
+            std::string path = line.substr(3);
+            while (true) {
+                std::ifstream max_file("/sys/fs/cgroup" + path + "/memory.max");
+                uint64_t value = 0;
+                if (max_file >> value && value > 0) limit = limit == 0 ? value : std::min(limit, value);
+                if (path.empty() || path == "/") break;
+                path = path.substr(0, path.find_last_of('/'));
+            }
+        }
+        return limit;
+    }
+
+    inline void init() {
+        const char* env = std::getenv("MEASURE_IO");
+        if (!env || strcmp(env, "true") != 0) return;
+        Snapshot probe;
+        if (!read_proc_io(probe)) {
+            std::cerr << "[IoCounter] Warning: /proc/self/io is not readable (needs CONFIG_TASK_IO_ACCOUNTING). "
+                         "I/O volume is not recorded." << std::endl;
+            return;
+        }
+        state().enabled = true;
+        state().memory_limit = memory_limit_bytes();
+    }
+
+    inline bool enabled() {
+        return state().enabled;
+    }
+
+    inline Snapshot snapshot() {
+        Snapshot s;
+        if (!enabled()) return s;
+        read_proc_io(s);
+        rusage usage{};
+        if (getrusage(RUSAGE_SELF, &usage) == 0) {
+            s.major_faults = static_cast<uint64_t>(usage.ru_majflt);
+            s.minor_faults = static_cast<uint64_t>(usage.ru_minflt);
+        }
+        return s;
+    }
+
+    /**
+     * @brief Appends ioreadbytes, iowritebytes, majfaults, minfaults, inputbytes and memlimitbytes for the sort.
+     */
+    inline void print_fields(std::ostream& out, const Snapshot& before, const Snapshot& after, uint64_t input_bytes) {
+        if (!enabled()) return;
+        const auto delta = [](uint64_t b, uint64_t a) -> uint64_t { return a >= b ? a - b : 0; };
+        out << "\tioreadbytes=" << delta(before.read_bytes, after.read_bytes)
+            << "\tiowritebytes=" << delta(before.write_bytes, after.write_bytes)
+            << "\tmajfaults=" << delta(before.major_faults, after.major_faults)
+            << "\tminfaults=" << delta(before.minor_faults, after.minor_faults)
+            << "\tinputbytes=" << input_bytes
+            << "\tmemlimitbytes=" << state().memory_limit;
+    }
+
+    inline void cleanup() {
+        state() = State{};
+    }
+
+} // namespace IoCounter
+#endif // IO_COUNTER_H
@@ -0,0 +1,132 @@
+#ifndef MMAP_VECTOR_H
+#define MMAP_VECTOR_H
+
+#include <algorithm>
+#include <cerrno>
+#include <chrono>
+#include <cstdlib>
+#include <cstring>
+#include <iostream>
+#include <memory>
+#include <new>
+#include <string>
+#include <type_traits>
+#include <utility>
+
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <unistd.h>
+
+// 文件映射的输入数组 (-v mmapfile)：数组放在 MMAP_VECTOR_DIR (默认 /var/tmp，应当是磁盘而不是 tmpfs) 下的一个临时文件里，
+// 用 MAP_SHARED 映射，所以输入可以比内存大，由内核按页换入换出 (major page faults)。文件创建后立即 unlink，进程退出时自动释放。
+// 生成器照常写入映射；生成结束后 write_back_and_evict() 用一次 msync 把所有脏页批量写回文件，
+// 再把这些页从页缓存中丢弃，于是每次排序都从磁盘上的输入开始 (RESULT 行的 writebackmilli)。
+// MMAP_VECTOR_EVICT=false 时只写回、不丢弃 (输入留在页缓存中，测的是"热"的文件映射)。
+template <class T>
+class MmapFileArray {
+public:
+    MmapFileArray() = default;
+
+    MmapFileArray(size_t size, size_t /* alignment: mmap is page aligned */) : size_(size) {
+        const size_t bytes = std::max<size_t>(1, size * sizeof(T));
+        std::string path = directory() + "/sortbench_mmap_XXXXXX";
+        fd_ = mkstemp(path.data());
+        if (fd_ == -1) fail("cannot create a file in " + directory());
+        unlink(path.c_str());
+        // 先预留磁盘空间：稀疏文件在磁盘写满时会在排序中途 SIGBUS
+        const int reserve = posix_fallocate(fd_, 0, static_cast<off_t>(bytes));
+        if (reserve != 0 && (reserve != EOPNOTSUPP && reserve != EINVAL)) {
+            errno = reserve;
+            fail("cannot reserve " + std::to_string(bytes) + " bytes in " + directory());
+        }
+        if (reserve != 0 && ftruncate(fd_, static_cast<off_t>(bytes)) != 0) fail("cannot resize the file");
+        void* mapped = mmap(nullptr, bytes, PROT_READ | PROT_WRITE, MAP_SHARED, fd_, 0);
+        if (mapped == MAP_FAILED) fail("cannot map " + std::to_string(bytes) + " bytes");
+        data_ = static_cast<T*>(mapped);
+        if constexpr (!std::is_trivially_default_constructible_v<T>) {
+            std::uninitialized_default_construct_n(data_, size_);
+        }
+    }
+
+    MmapFileArray(MmapFileArray&& other) noexcept { swap(other); }
+
+    MmapFileArray& operator=(MmapFileArray&& other) noexcept {
+        MmapFileArray tmp(std::move(other));
+        swap(tmp);
+        return *this;
+    }
+
+    MmapFileArray(const MmapFileArray&) = delete;
+    MmapFileArray& operator=(const MmapFileArray&) = delete;
+
+    ~MmapFileArray() {
+        if (data_ != nullptr) {
+            if constexpr (!std::is_trivially_destructible_v<T>) std::destroy_n(data_, size_);
+            munmap(data_, std::max<size_t>(1, size_ * sizeof(T)));
+        }
+        if (fd_ != -1) close(fd_);
+    }
+
+    T* get() const { return data_; }
+    size_t size() const { return size_; }
+    int fd() const { return fd_; }
+
+    static std::string name() { return "mmapfile"; }
+
+    /**
+     * @brief Writes all dirty pages back to the file in one msync and (unless MMAP_VECTOR_EVICT=false) drops them
+     *        from the page cache. Returns the elapsed milliseconds.
+     */
+    double write_back_and_evict() {
+        const auto start = std::chrono::high_resolution_clock::now();
+        const size_t bytes = std::max<size_t>(1, size_ * sizeof(T));
+        if (msync(data_, bytes, MS_SYNC) != 0) {
+            std::cerr << "[MmapVector] Warning: msync failed: " << std::strerror(errno) << std::endl;
+        }
+        if (evict()) {
+            // 先解除页表映射，映射中的页才能被 fadvise 从页缓存中丢弃
+            madvise(data_, bytes, MADV_DONTNEED);
+            posix_fadvise(fd_, 0, static_cast<off_t>(bytes), POSIX_FADV_DONTNEED);
+        }
+        return std::chrono::duration<double, std::milli>(std::chrono::high_resolution_clock::now() - start).count();
+    }
+
+    static std::string directory() {
+        const char* env = std::getenv("MMAP_VECTOR_DIR");
+        return env != nullptr && *env != '\0' ? env : "/var/tmp";
+    }
+
+private:
+    static bool evict() {
+        static const bool enabled = [] {
+            const char* env = std::getenv("MMAP_VECTOR_EVICT");
+            return env == nullptr || std::strcmp(env, "false") != 0;
+        }();
+        return enabled;
+    }
+
+    [[noreturn]] void fail(const std::string& what) {
+        std::cerr << "[MmapVector] Error: " << what << ": " << std::strerror(errno) << std::endl;
+        if (fd_ != -1) close(fd_);
+        fd_ = -1;
+        throw std::bad_alloc();
+    }
+
+    void swap(MmapFileArray& other) noexcept {
+        std::swap(data_, other.data_);
+        std::swap(size_, other.size_);
+        std::swap(fd_, other.fd_);
+    }
+
+    T* data_ = nullptr;
+    size_t size_ = 0;
+    int fd_ = -1;
+};
+
+template <class V>
+struct is_file_backed_vector : std::false_type {};
+
+template <class T>
+struct is_file_backed_vector<MmapFileArray<T>> : std::true_type {};
+
+#endif // MMAP_VECTOR_H
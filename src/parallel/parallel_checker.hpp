@@ -32,12 +32,14 @@
 
 #include <sort_checker.hpp>
 
+#include "thread_pool.hpp"
+
 template <class T>
 class ParallelChecker {
     using Checker = checker::SortChecker<T>;
 
  public:
-    ParallelChecker() : num_threads_(std::thread::hardware_concurrency()) {
+    ParallelChecker() : num_threads_(ThreadPool::size()) {
         scs_.resize(num_threads_);
     }
 
@@ -45,26 +47,12 @@ class ParallelChecker {
         const size_t size = end - begin;
         const size_t thread_size = (size + num_threads_ - 1) / num_threads_;
 
-        std::vector<std::thread> threads(num_threads_ - 1);
-
-        auto exec = [](T* my_begin, T* my_end, Checker* sc) {
-            for (auto it = my_begin; it != my_end; ++it) { sc->add_pre(*it); }
-        };
-
-        // Create threads and execute.
-        for (size_t i = 0; i < num_threads_ - 1; ++i) {
+        // One checker per pool worker, each over a contiguous part of the input.
+        ThreadPool::run(num_threads_, [&](size_t i) {
             const size_t start = std::min(i * thread_size, size);
             const size_t stop = std::min(start + thread_size, size);
-            threads[i] = std::thread(exec, begin + start, begin + stop, scs_.data() + i);
-        }
-
-        // Execute the remainder
-        const size_t start = std::min((num_threads_ - 1) * thread_size, size);
-        const size_t stop = std::min(start + thread_size, size);
-        exec(begin + start, begin + stop, scs_.data() + (num_threads_ - 1));
-
-        // Wait for the other thread to finish their task
-        std::for_each(threads.begin(), threads.end(), std::mem_fn(&std::thread::join));
+            for (auto it = begin + start; it != begin + stop; ++it) { scs_[i].add_pre(*it); }
+        });
     }
 
     template <class Comp>
@@ -72,26 +60,11 @@ class ParallelChecker {
         const size_t size = end - begin;
         const size_t thread_size = (size + num_threads_ - 1) / num_threads_;
 
-        std::vector<std::thread> threads(num_threads_ - 1);
-
-        auto exec = [&comp](T* my_begin, T* my_end, Checker* sc) {
-            for (auto it = my_begin; it != my_end; ++it) { sc->add_post(*it, comp); }
-        };
-
-        // Create threads and execute.
-        for (size_t i = 0; i < num_threads_ - 1; ++i) {
+        ThreadPool::run(num_threads_, [&](size_t i) {
             const size_t start = std::min(i * thread_size, size);
             const size_t stop = std::min(start + thread_size, size);
-            threads[i] = std::thread(exec, begin + start, begin + stop, scs_.data() + i);
-        }
-
-        // Execute the remainder
-        const size_t start = std::min((num_threads_ - 1) * thread_size, size);
-        const size_t stop = std::min(start + thread_size, size);
-        exec(begin + start, begin + stop, scs_.data() + (num_threads_ - 1));
-
-        // Wait for the other threads to finish their task
-        std::for_each(threads.begin(), threads.end(), std::mem_fn(&std::thread::join));
+            for (auto it = begin + start; it != begin + stop; ++it) { scs_[i].add_post(*it, comp); }
+        });
     }
 
     bool is_likely_permutated() {
@@ -25,10 +25,12 @@
 #pragma once
 
 #include <algorithm>
-#include <functional>
 #include <thread>
-#include <vector>
 
+#include "thread_pool.hpp"
+
+// The index range is still split into hardware_concurrency chunks (the generators seed each chunk with its index,
+// so the input does not depend on -t); the chunks are spread contiguously over the workers of the persistent pool.
 template <class Fct>
 static void std_parallel_for(size_t size, Fct&& fct) {
     size_t num_concurrency = std::thread::hardware_concurrency();
@@ -36,24 +38,26 @@ static void std_parallel_for(size_t size, Fct&& fct) {
 
     const size_t thread_size = (size + num_threads - 1) / num_threads;
 
-    std::vector<std::thread> threads(num_threads - 1);
-
-    // Create threads and execute.
-    for (size_t i = 0; i < num_threads - 1; ++i) {
+    ThreadPool::run(num_threads, [&](size_t i) {
         const size_t start = std::min(i * thread_size, size);
         const size_t stop = std::min(start + thread_size, size);
+        fct(start, stop, i);
+    });
+}
 
-        threads[i] = std::thread(std::forward<Fct>(fct), start, stop, i);
+// Runs fct(t, begin, end) on min(num_threads, size) contiguous chunks of [0, size), t being the chunk index. The chunks
+// run on the persistent pool (configured to -t pinned workers, so each chunk gets its own worker and timed phases do
+// not pay for thread creation); a single chunk runs on the calling thread.
+template <class Fct>
+void parallel_chunks(size_t size, size_t num_threads, Fct&& fct) {
+    const size_t threads = std::max<size_t>(1, std::min(num_threads, size));
+    const size_t chunk = (size + threads - 1) / threads;
+    if (threads == 1) {
+        fct(size_t(0), size_t(0), size);
+        return;
     }
-
-    // Execute the remainder
-    // size_t start = (num_threads - 1) * thread_size;
-    // fct(start, size, num_threads);
-
-    const size_t start = std::min((num_threads - 1) * thread_size, size);
-    const size_t stop = std::min(start + thread_size, size);
-    fct(start, stop, num_threads - 1);
-
-    // Wait for the other thread to finish their task
-    std::for_each(threads.begin(), threads.end(), std::mem_fn(&std::thread::join));
+    ThreadPool::run(threads, [&](size_t t) {
+        const size_t begin = std::min(size, t * chunk);
+        fct(t, begin, std::min(size, begin + chunk));
+    });
 }
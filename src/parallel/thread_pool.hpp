@@ -0,0 +1,235 @@
+/*******************************************************************************
+ * Project Ips4o Benchmark Suite
+ *
+ * src/parallel/thread_pool.hpp
+ *
+ * Persistent, pinned thread pool for the generators, the input cache and the
+ * checker.
+ *
+ * This program is free software: you can redistribute it and/or
+ * modify it under the terms of the GNU General Public License as
+ * published by the Free Software Foundation, either version 3 of the
+ * License, or (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful, but
+ * WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+ * General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program. If not, see
+ * <https://www.gnu.org/licenses/>.
+ ******************************************************************************/
+
+#pragma once
+
+#include <algorithm>
+#include <condition_variable>
+#include <cstdlib>
+#include <cstring>
+#include <exception>
+#include <functional>
+#include <iostream>
+#include <memory>
+#include <mutex>
+#include <string>
+#include <thread>
+#include <vector>
+
+#include <pthread.h>
+#include <sched.h>
+
+// 常驻线程池：生成器 (std_parallel_for)、--server 的输入缓存复制与 ParallelChecker 都在这里执行，
+// 不再在每次运行前新建 hardware_concurrency 个线程。池的大小为 -t (run_experiment_iteration 中 configure)，
+// 第 j 个线程绑定到进程允许的 CPU 集合 (sched_getaffinity，即 numactl / taskset / BENCH_CPUS 之后) 中的第 j 个 CPU，
+// 与 OMP_PLACES=cores OMP_PROC_BIND=close 时算法的第 j 个线程相同，所以输入页由算法将要使用的核首次写入。
+// run(tasks, fn) 把 tasks 个任务按连续区间分给各线程 (线程 w 执行第 [w * tasks / n, (w + 1) * tasks / n) 个)；
+// 调用线程只等待，自己不绑定 (算法之后创建的线程会继承调用线程的 affinity)。
+// THREAD_POOL_PIN=false 时不绑定。RESULT 行的 poolthreads / poolcpus 记录池的大小与绑定的 CPU。
+namespace ThreadPool {
+
+    struct State {
+        std::vector<std::thread> workers;
+        std::vector<int> cpus; // cpus[w]: 线程 w 绑定的 CPU，-1 为未绑定
+        std::mutex mutex;
+        std::condition_variable wake;
+        std::condition_variable done;
+        std::mutex run_mutex; // 同一时间只有一个 run()
+        const std::function<void(size_t)>* job = nullptr;
+        std::exception_ptr error;
+        size_t generation = 0;
+        size_t pending = 0;
+        bool stop = false;
+
+        ~State() { shutdown(); }
+
+        void shutdown() {
+            {
+                std::lock_guard<std::mutex> lock(mutex);
+                stop = true;
+            }
+            wake.notify_all();
+            for (auto& worker : workers) worker.join();
+            std::lock_guard<std::mutex> lock(mutex);
+            workers.clear();
+            cpus.clear();
+            // 新线程从 seen = 0 开始等待，generation 必须归零，否则它们会立即执行上一个 (已经结束的) job
+            generation = 0;
+            stop = false;
+        }
+    };
+
+    inline State& state() {
+        static State s;
+        return s;
+    }
+
+    inline bool& in_worker() {
+        static thread_local bool flag = false;
+        return flag;
+    }
+
+    inline bool pin_enabled() {
+        const char* env = std::getenv("THREAD_POOL_PIN");
+        return env == nullptr || std::strcmp(env, "false") != 0;
+    }
+
+    inline std::vector<int> allowed_cpus() {
+        std::vector<int> cpus;
+        cpu_set_t set;
+        CPU_ZERO(&set);
+        if (sched_getaffinity(0, sizeof(set), &set) == 0) {
+            for (int cpu = 0; cpu < CPU_SETSIZE; ++cpu) {
+                if (CPU_ISSET(cpu, &set)) cpus.push_back(cpu);
+            }
+        }
+        return cpus;
+    }
+
+    inline void worker_loop(size_t w, int cpu) {
+        State& s = state();
+        in_worker() = true;
+        if (cpu >= 0) {
+            cpu_set_t set;
+            CPU_ZERO(&set);
+            CPU_SET(cpu, &set);
+            if (pthread_setaffinity_np(pthread_self(), sizeof(set), &set) != 0) {
+                std::lock_guard<std::mutex> lock(s.mutex);
+                std::cerr << "[ThreadPool] Warning: cannot pin worker " << w << " to CPU " << cpu << std::endl;
+                s.cpus[w] = -1;
+            }
+        }
+        size_t seen = 0;
+        std::unique_lock<std::mutex> lock(s.mutex);
+        while (true) {
+            s.wake.wait(lock, [&] { return s.stop || s.generation != seen; });
+            if (s.stop) return;
+            seen = s.generation;
+            const auto* job = s.job;
+            lock.unlock();
+            try {
+                (*job)(w);
+            } catch (...) {
+                lock.lock();
+                if (!s.error) s.error = std::current_exception();
+                lock.unlock();
+            }
+            lock.lock();
+            if (--s.pending == 0) s.done.notify_all();
+        }
+    }
+
+    /**
+     * @brief (Re)starts the pool with num_threads pinned workers; a no-op if it already has that size.
+     */
+    inline void configure(size_t num_threads) {
+        State& s = state();
+        num_threads = std::max<size_t>(1, num_threads);
+        std::lock_guard<std::mutex> guard(s.run_mutex);
+        if (s.workers.size() == num_threads) return;
+        s.shutdown();
+        const std::vector<int> allowed = pin_enabled() ? allowed_cpus() : std::vector<int>();
+        // cpus 在启动线程之前填好，worker_loop 只在绑定失败时改写自己的那一项
+        s.cpus.resize(num_threads);
+        for (size_t w = 0; w < num_threads; ++w) {
+            s.cpus[w] = allowed.empty() ? -1 : allowed[w % allowed.size()];
+        }
+        s.workers.reserve(num_threads);
+        for (size_t w = 0; w < num_threads; ++w) {
+            s.workers.emplace_back(worker_loop, w, s.cpus[w]);
+        }
+    }
+
+    inline size_t size() {
+        if (state().workers.empty()) {
+            const size_t hardware = std::thread::hardware_concurrency();
+            configure(hardware == 0 ? 1 : hardware);
+        }
+        return state().workers.size();
+    }
+
+    /**
+     * @brief Runs fn(task) for task in [0, tasks), contiguous task ranges per worker; returns when all are done.
+     *        Called from inside a worker, the tasks run inline.
+     */
+    template <class Fn>
+    void run(size_t tasks, Fn&& fn) {
+        if (tasks == 0) return;
+        if (in_worker()) {
+            for (size_t task = 0; task < tasks; ++task) fn(task);
+            return;
+        }
+        const size_t workers = size();
+        State& s = state();
+        const std::function<void(size_t)> job = [&](size_t w) {
+            const size_t first = w * tasks / workers;
+            const size_t last = (w + 1) * tasks / workers;
+            for (size_t task = first; task < last; ++task) fn(task);
+        };
+        std::lock_guard<std::mutex> guard(s.run_mutex);
+        std::unique_lock<std::mutex> lock(s.mutex);
+        s.job = &job;
+        s.error = nullptr;
+        s.pending = s.workers.size();
+        ++s.generation;
+        s.wake.notify_all();
+        s.done.wait(lock, [&] { return s.pending == 0; });
+        s.job = nullptr;
+        if (s.error) std::rethrow_exception(s.error);
+    }
+
+    /**
+     * @brief Pinned CPUs as a compact list ("0-3,8"), or "unpinned".
+     */
+    inline std::string cpu_list() {
+        std::vector<int> cpus;
+        {
+            // worker_loop 在绑定失败时改写 cpus[w]
+            std::lock_guard<std::mutex> lock(state().mutex);
+            for (int cpu : state().cpus) {
+                if (cpu >= 0) cpus.push_back(cpu);
+            }
+        }
+        if (cpus.empty()) return "unpinned";
+        std::sort(cpus.begin(), cpus.end());
+        cpus.erase(std::unique(cpus.begin(), cpus.end()), cpus.end());
+        std::string out;
+        for (size_t i = 0; i < cpus.size();) {
+            size_t j = i;
+            while (j + 1 < cpus.size() && cpus[j + 1] == cpus[j] + 1) ++j;
+            if (!out.empty()) out += ",";
+            out += std::to_string(cpus[i]);
+            if (j > i) out += "-" + std::to_string(cpus[j]);
+            i = j + 1;
+        }
+        return out;
+    }
+
+    /**
+     * @brief Appends poolthreads and poolcpus (the placement of the pool that generated and checked the input).
+     */
+    inline void print_fields(std::ostream& out) {
+        out << "\tpoolthreads=" << state().workers.size() << "\tpoolcpus=" << cpu_list();
+    }
+
+} // namespace ThreadPool
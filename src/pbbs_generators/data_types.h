@@ -174,3 +174,31 @@ struct byte_t {
     int_type k[keySize];
     int_type v[valSize];
 };
+
+// Key + payload record of Bytes bytes in total: a 64-bit key followed by
+// Bytes - 8 payload bytes. Used by the record-width sweep (rec16 ... rec256
+// in datatypes.hpp) to see how algorithms behave as records grow.
+template <size_t Bytes>
+struct record_t {
+    static_assert(Bytes >= 16 && Bytes % 8 == 0);
+
+    static constexpr const size_t valSize = Bytes - sizeof(uint64_t);
+
+    using int_type = uint64_t;
+
+    // The payload is derived from the key so that generators which construct
+    // elements from integers also touch every byte of the record.
+    record_t(int_type k) : k(k) { memset(v, static_cast<int>(k & 0xff), valSize); }
+    record_t() {}
+
+    bool operator<(const record_t& r) const { return k < r.k; }
+
+    bool operator>(const record_t& r) const { return k > r.k; }
+
+    bool operator==(const record_t& r) const { return k == r.k; }
+
+    bool operator!=(const record_t& r) const { return !(*this == r); }
+
+    int_type k;
+    uint8_t v[valSize];
+};
@@ -0,0 +1,207 @@
+#ifndef PRIMITIVES_H
+#define PRIMITIVES_H
+
+#include <algorithm>
+#include <cmath>
+#include <cstdint>
+#include <optional>
+#include <string>
+#include <type_traits>
+#include <unordered_set>
+#include <utility>
+#include <vector>
+
+#include "config.hpp"
+#include "datatypes.hpp"
+#include "parallel/thread_pool.hpp"
+
+// 排序以外的并行原语：与排序使用同一个 harness (生成器、数据类型、数组类型、perf FIFO、RESULT 行与分析脚本)。
+// 算法类照常提供 accepts<T>() / isParallel() / name()，另外声明 static constexpr Primitives::Kind kind，
+// 并实现 run<T, Vector>(begin, end, workspace, num_threads) 代替 sort；没有 kind 的算法就是排序。
+//   semisort   把键相同的元素放在一起 (组之间无序)，结果在 workspace.output；
+//   merge      输入的前后两半各自有序 (prepare 在生成阶段排好，计入 generatormilli)，归并到 workspace.output；
+//   prefixsum  原地 inclusive 前缀和 (算术类型，无符号整数按模溢出)；
+//   histogram  按 键 % --buckets 计数到 workspace.counts，输入不变；
+//   topk       选出最小的 --topk 个元素 (无序) 写入 workspace.output，输入不变。
+// 输出数组与计数数组在计时区间之外分配。检查器 (DISABLE_PERF_INTERFERENCE_CHECKS 未定义时) 在计时前复制输入，
+// 运行后与顺序参考实现比较，RESULT 行输出 primitive=<名字> 与 correct=0/1 (代替 sortedsequence / permutation)。
+namespace Primitives {
+
+    enum class Kind { Sort, SemiSort, Merge, PrefixSum, Histogram, TopK };
+
+    template <class Algo, class = void>
+    struct KindOf {
+        static constexpr Kind value = Kind::Sort;
+    };
+
+    template <class Algo>
+    struct KindOf<Algo, std::void_t<decltype(Algo::kind)>> {
+        static constexpr Kind value = Algo::kind;
+    };
+
+    template <class Algo>
+    constexpr Kind kind_of() {
+        return KindOf<Algo>::value;
+    }
+
+    template <class Algo>
+    constexpr bool is_sort() {
+        return kind_of<Algo>() == Kind::Sort;
+    }
+
+    inline std::string name(Kind kind) {
+        switch (kind) {
+            case Kind::SemiSort: return "semisort";
+            case Kind::Merge: return "merge";
+            case Kind::PrefixSum: return "prefixsum";
+            case Kind::Histogram: return "histogram";
+            case Kind::TopK: return "topk";
+            default: return "sort";
+        }
+    }
+
+    /**
+     * @brief Types the primitive is defined for: prefix sums need arithmetic types, semisort and histogram an
+     *        integer key; merge and top-k only need the comparator.
+     */
+    template <Kind K, class T>
+    constexpr bool accepts() {
+        if constexpr (K == Kind::PrefixSum) {
+            return std::is_arithmetic_v<T>;
+        } else if constexpr (K == Kind::SemiSort || K == Kind::Histogram) {
+            if constexpr (Datatype<T>::hasKeyExtractor()) {
+                using Key = std::decay_t<decltype(Datatype<T>::getKeyExtractor()(std::declval<const T&>()))>;
+                return std::is_integral_v<Key>;
+            } else {
+                return false;
+            }
+        } else {
+            return true;
+        }
+    }
+
+    template <class T>
+    uint64_t key_of(const T& value) {
+        return static_cast<uint64_t>(Datatype<T>::getKeyExtractor()(value));
+    }
+
+    // splitmix64 的收尾函数：semisort 按键的哈希分桶，连续或只在高位不同的键也能均匀分开
+    inline uint64_t hash_key(uint64_t key) {
+        key = (key ^ (key >> 30)) * 0xbf58476d1ce4e5b9ULL;
+        key = (key ^ (key >> 27)) * 0x94d049bb133111ebULL;
+        return key ^ (key >> 31);
+    }
+
+    /**
+     * @brief Output arrays of a primitive, allocated outside the timed region.
+     */
+    template <class T, template <class T1> class Vector>
+    struct Workspace {
+        std::optional<Vector<T>> output; // semisort / merge: size elements, topk: k elements
+        std::vector<uint64_t> counts;    // histogram
+        size_t size = 0;
+        size_t split = 0;   // merge: [0, split) and [split, size) are the sorted inputs
+        size_t k = 0;       // topk
+        size_t buckets = 0; // histogram
+    };
+
+    template <Kind K, class T, template <class T1> class Vector>
+    Workspace<T, Vector> make_workspace(size_t size, const Config& config, size_t alignment) {
+        Workspace<T, Vector> ws;
+        ws.size = size;
+        ws.split = size / 2;
+        ws.k = std::max<size_t>(1, std::min(config.topk, size));
+        ws.buckets = std::max<size_t>(1, config.buckets);
+        if constexpr (K == Kind::SemiSort || K == Kind::Merge) {
+            ws.output.emplace(size, alignment);
+        } else if constexpr (K == Kind::TopK) {
+            ws.output.emplace(ws.k, alignment);
+        } else if constexpr (K == Kind::Histogram) {
+            ws.counts.assign(ws.buckets, 0);
+        }
+        return ws;
+    }
+
+    /**
+     * @brief Per-primitive input shaping after the generator: merge sorts both halves (on the thread pool).
+     */
+    template <Kind K, class T>
+    void prepare(T* begin, T* end) {
+        if constexpr (K == Kind::Merge) {
+            T* middle = begin + (end - begin) / 2;
+            const auto comp = Datatype<T>::getComparator();
+            ThreadPool::run(2, [&](size_t half) {
+                if (half == 0) {
+                    std::sort(begin, middle, comp);
+                } else {
+                    std::sort(middle, end, comp);
+                }
+            });
+        }
+    }
+
+    template <class T>
+    bool same_multiset(std::vector<T> a, std::vector<T> b) {
+        const auto comp = Datatype<T>::getComparator();
+        if (a.size() != b.size()) return false;
+        std::sort(a.begin(), a.end(), comp);
+        std::sort(b.begin(), b.end(), comp);
+        for (size_t i = 0; i < a.size(); ++i) {
+            if (comp(a[i], b[i]) || comp(b[i], a[i])) return false;
+        }
+        return true;
+    }
+
+    /**
+     * @brief Compares the result of the primitive with a sequential reference computed from the input copy.
+     */
+    template <Kind K, class T, template <class T1> class Vector>
+    bool check(const std::vector<T>& input, const T* begin, const T* end, const Workspace<T, Vector>& ws) {
+        const auto comp = Datatype<T>::getComparator();
+        const size_t size = end - begin;
+        if constexpr (K == Kind::PrefixSum) {
+            T sum = T();
+            double magnitude = 0.0;
+            for (size_t i = 0; i < size; ++i) {
+                sum += input[i];
+                if constexpr (std::is_floating_point_v<T>) {
+                    // 并行求和的顺序不同，浮点结果只要求相对误差足够小
+                    magnitude += std::abs(static_cast<double>(input[i]));
+                    if (std::abs(static_cast<double>(begin[i] - sum)) > 1e-9 * std::max(1.0, magnitude)) return false;
+                } else if (begin[i] != sum) {
+                    return false;
+                }
+            }
+            return true;
+        } else if constexpr (K == Kind::Histogram) {
+            std::vector<uint64_t> counts(ws.buckets, 0);
+            for (const T& value : input) ++counts[key_of(value) % ws.buckets];
+            if (counts != ws.counts) return false;
+            for (size_t i = 0; i < size; ++i) {
+                if (comp(input[i], begin[i]) || comp(begin[i], input[i])) return false;
+            }
+            return true;
+        } else if constexpr (K == Kind::TopK) {
+            std::vector<T> expected(input);
+            std::nth_element(expected.begin(), expected.begin() + (ws.k - 1), expected.end(), comp);
+            expected.resize(ws.k);
+            return same_multiset(std::move(expected), std::vector<T>(ws.output->get(), ws.output->get() + ws.k));
+        } else {
+            const T* out = ws.output->get();
+            if constexpr (K == Kind::Merge) {
+                if (!std::is_sorted(out, out + size, comp)) return false;
+            } else {
+                // 每个键只能出现在一个连续的组里
+                std::unordered_set<uint64_t> closed;
+                for (size_t i = 1; i < size; ++i) {
+                    if (key_of(out[i]) != key_of(out[i - 1])) {
+                        if (!closed.insert(key_of(out[i - 1])).second || closed.count(key_of(out[i]))) return false;
+                    }
+                }
+            }
+            return same_multiset(std::vector<T>(input), std::vector<T>(out, out + size));
+        }
+    }
+
+} // namespace Primitives
+#endif // PRIMITIVES_H
@@ -0,0 +1,61 @@
+# sortbench.py
+# 把 _sortbench 与 _sortbench_dovetail 两个扩展模块 (src/python/sortbench_module.cpp) 合并成一个接口。
+# CMake (-DSORTBENCH_PYTHON=ON) 会把本文件和扩展模块一起放到 <build>/python/，把该目录加入 PYTHONPATH 即可：
+#
+#   import numpy as np, sortbench
+#   a = np.random.randint(0, 2**63, 10**8, dtype=np.uint64)
+#   stats = sortbench.sort(a, "ips4oparallel", threads=32, stats=True)   # 原地排序，不拷贝，不持有 GIL
+import sys
+
+from _sortbench import sort as _sort, algorithms as _algorithms
+
+try:
+    from _sortbench_dovetail import sort as _sort_dovetail, algorithms as _algorithms_dovetail
+    DOVETAIL_AVAILABLE = True
+except ImportError:
+    DOVETAIL_AVAILABLE = False
+
+def algorithms():
+    """所有编译进来的算法: [{name, parallel, threads ("openmp" | "parlay" | "sequential"), datatypes}]。"""
+    return _algorithms() + (_algorithms_dovetail() if DOVETAIL_AVAILABLE else [])
+
+def _is_dovetail(algorithm):
+    return algorithm.replace("benchmark_", "") == "dovetailsort"
+
+def sort(array, algorithm="ips4oparallel", threads=0, datatype=None, stats=False):
+    """
+    原地排序一个可写、C 连续的缓冲区 (NumPy 数组、memoryview、array.array ...)：uint32、uint64、float64，
+    或 datatype="pair" 时的 16 字节记录 / (n, 2) uint64 数组 (按第一个字段排序)。
+    threads=0 使用所有硬件线程；ParlayLib 的线程数在进程内第一次使用时固定 (PARLAY_NUM_THREADS)。
+    stats=True 时返回 {algo, datatype, size, threads, milli, preprocmilli, wallmilli[, freqratio, pkgjoules, ...]}。
+    """
+    if _is_dovetail(algorithm):
+        if not DOVETAIL_AVAILABLE:
+            raise ValueError("dovetailsort is not built (needs extern/DovetailSort and SORTBENCH_PYTHON=ON)")
+        return _sort_dovetail(array, algorithm, threads, datatype, stats)
+    return _sort(array, algorithm, threads, datatype, stats)
+
+def fastest(array, candidates=None, threads=0, datatype=None, repeats=3):
+    """
+    在 array 的副本上依次运行候选算法 (默认所有接受该类型的算法)，返回按中位耗时排序的
+    [(算法名, 中位 milli)]，用来在真实数据上挑选算法。需要 NumPy (用于复制输入)。
+    """
+    import numpy as np
+    if repeats < 1:
+        raise ValueError("repeats must be >= 1")
+    results = []
+    for info in algorithms():
+        if candidates is not None and info["name"] not in candidates:
+            continue
+        times = []
+        for _ in range(repeats):
+            work = np.array(array, copy=True, order="C")
+            try:
+                times.append(sort(work, info["name"], threads, datatype, stats=True)["milli"])
+            except TypeError:
+                break # 该算法不接受这种数据类型
+        if times:
+            results.append((info["name"], sorted(times)[len(times) // 2]))
+    if not results:
+        print("Warning: no compiled algorithm accepts this array.", file=sys.stderr)
+    return sorted(results, key=lambda item: item[1])
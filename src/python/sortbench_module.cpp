@@ -0,0 +1,429 @@
+/*******************************************************************************
+ * Project Ips4o Benchmark Suite
+ *
+ * src/python/sortbench_module.cpp
+ *
+ * Python bindings: sort NumPy arrays (or any writable C-contiguous buffer) in
+ * place with the benchmarked algorithms, without copying and without the GIL.
+ *
+ * This program is free software: you can redistribute it and/or
+ * modify it under the terms of the GNU General Public License as
+ * published by the Free Software Foundation, either version 3 of the
+ * License, or (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful, but
+ * WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+ * General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program. If not, see
+ * <https://www.gnu.org/licenses/>.
+ ******************************************************************************/
+
+// 同一个源文件编译成两个扩展模块 (见 CMakeLists.txt 的 SORTBENCH_PYTHON)：
+//   _sortbench           ips4o / ips2ra / mcstl / ParlayLib / pdqsort / std::sort
+//   _sortbench_dovetail  DovetailSort (自带一份不同版本的 parlay，不能和 ParlayLib 放进同一个翻译单元)
+// src/python/sortbench.py 把两者合并成一个 sortbench 模块。
+// 算法直接复用 src/algorithm/*.hpp 中的类，因此比较器、key extractor 与 benchmark_* 可执行文件完全一致。
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+#include <algorithm>
+#include <chrono>
+#include <cstdlib>
+#include <cstring>
+#include <new>
+#include <sstream>
+#include <stdexcept>
+#include <string>
+#include <thread>
+#include <vector>
+
+#include "../datatypes.hpp"
+#include "../energy_counter.hpp"
+#include "../freq_counter.hpp"
+
+#ifdef SORTBENCH_WITH_OPENMP
+#include <omp.h>
+#endif
+
+#ifdef SORTBENCH_WITH_DOVETAIL
+#include "../algorithm/DovetailSort.hpp"
+#else
+#include "../algorithm/stdsort.hpp"
+#ifdef SORTBENCH_WITH_PDQSORT
+#include "../algorithm/pdqsort.hpp"
+#endif
+#ifdef SORTBENCH_WITH_IPS4O
+#include "../algorithm/ips4o.hpp"
+#include "../algorithm/ips4oparallel.hpp"
+#endif
+#ifdef SORTBENCH_WITH_IPS2RA
+#include "../algorithm/ips2ra.hpp"
+#include "../algorithm/ips2raparallel.hpp"
+#endif
+#ifdef SORTBENCH_WITH_MCSTL
+#include "../algorithm/mcstlbq.hpp"
+#include "../algorithm/mcstlmwm.hpp"
+#endif
+#ifdef SORTBENCH_WITH_PARLAY
+#include "../algorithm/parlayinplaceIntegerSort.hpp"
+#include "../algorithm/parlayinplacesamplesort.hpp"
+#endif
+#endif
+
+#ifndef SORTBENCH_MODULE_NAME
+#define SORTBENCH_MODULE_NAME _sortbench
+#endif
+#define SORTBENCH_STR2(x) #x
+#define SORTBENCH_STR(x) SORTBENCH_STR2(x)
+#define SORTBENCH_CONCAT2(a, b) a##b
+#define SORTBENCH_CONCAT(a, b) SORTBENCH_CONCAT2(a, b)
+
+namespace sortbench {
+
+    // 与 benchmark 的 -d 参数同名的数据类型
+    enum class Dtype { Uint32, Uint64, Double, Pair, Count };
+    constexpr const char* DTYPE_NAMES[] = {"uint32", "uint64", "double", "pair"};
+
+    enum class ThreadModel { Sequential, OpenMP, Parlay };
+
+    // 算法类的 Vector 模板参数只用于区分 benchmark 中的容器类型；这里的内存属于 Python 对象
+    template <class T>
+    struct BorrowedBuffer {};
+
+    // 返回算法自己计时的 {preprocessing ms, sorting ms}
+    using SortFn = std::pair<double, double> (*)(void* begin, size_t n, size_t num_threads);
+
+    struct Entry {
+        std::string name;
+        bool parallel;
+        ThreadModel threads;
+        SortFn fns[static_cast<int>(Dtype::Count)] = {};
+    };
+
+    template <class Algo, class T>
+    std::pair<double, double> call_sort(void* begin, size_t n, size_t num_threads) {
+        T* first = static_cast<T*>(begin);
+        return Algo::template sort<T, BorrowedBuffer>(first, first + n, num_threads);
+    }
+
+    template <class Algo, class T>
+    constexpr SortFn sort_fn() {
+        if constexpr (Algo::template accepts<T>()) {
+            return &call_sort<Algo, T>;
+        } else {
+            return nullptr;
+        }
+    }
+
+    template <class Algo>
+    Entry make_entry(ThreadModel threads) {
+        Entry entry{Algo::name(), Algo::isParallel(), threads};
+        entry.fns[static_cast<int>(Dtype::Uint32)] = sort_fn<Algo, uint32_t>();
+        entry.fns[static_cast<int>(Dtype::Uint64)] = sort_fn<Algo, uint64_t>();
+        entry.fns[static_cast<int>(Dtype::Double)] = sort_fn<Algo, double>();
+        entry.fns[static_cast<int>(Dtype::Pair)] = sort_fn<Algo, pair_t>();
+        return entry;
+    }
+
+    inline const std::vector<Entry>& registry() {
+        static const std::vector<Entry> entries = [] {
+            std::vector<Entry> e;
+#ifdef SORTBENCH_WITH_DOVETAIL
+            e.push_back(make_entry<DovetailSort::DovetailSort>(ThreadModel::Parlay));
+#else
+#ifdef SORTBENCH_WITH_IPS4O
+            e.push_back(make_entry<omp::Ips4oparallel>(ThreadModel::OpenMP));
+            e.push_back(make_entry<sequential::Ips4o>(ThreadModel::Sequential));
+#endif
+#ifdef SORTBENCH_WITH_IPS2RA
+            e.push_back(make_entry<omp::Ips3roParallel>(ThreadModel::OpenMP));
+            e.push_back(make_entry<sequential::Ips3ro>(ThreadModel::Sequential));
+#endif
+#ifdef SORTBENCH_WITH_MCSTL
+            e.push_back(make_entry<omp::Mcstlmwm>(ThreadModel::OpenMP));
+            e.push_back(make_entry<omp::Mcstlbq>(ThreadModel::OpenMP));
+#endif
+#ifdef SORTBENCH_WITH_PARLAY
+            e.push_back(make_entry<PLSS::PLSS>(ThreadModel::Parlay));
+            e.push_back(make_entry<PLIS::PLIS>(ThreadModel::Parlay));
+#endif
+#ifdef SORTBENCH_WITH_PDQSORT
+            e.push_back(make_entry<sequential::PdqSort>(ThreadModel::Sequential));
+#endif
+            e.push_back(make_entry<sequential::Stdsort>(ThreadModel::Sequential));
+#endif
+            return e;
+        }();
+        return entries;
+    }
+
+    inline const Entry* find_entry(const std::string& name) {
+        for (const auto& entry : registry()) {
+            // benchmark_ 前缀可有可无，方便直接使用 run_scripts 中的 ALGOS 名字
+            if (entry.name == name || "benchmark_" + entry.name == name) return &entry;
+        }
+        return nullptr;
+    }
+
+    /**
+     * @brief Applies the requested thread count and returns the number of threads that will actually be used.
+     *        OpenMP: omp_set_num_threads on the calling thread. ParlayLib: its worker pool is created on first use
+     *        from PARLAY_NUM_THREADS, so the count can only be chosen before the first parlay sort in the process.
+     */
+    inline size_t apply_threads(ThreadModel model, size_t requested) {
+        const size_t hardware = std::max<size_t>(1, std::thread::hardware_concurrency());
+        const size_t threads = requested == 0 ? hardware : requested;
+        switch (model) {
+        case ThreadModel::Sequential:
+            return 1;
+        case ThreadModel::OpenMP:
+#ifdef SORTBENCH_WITH_OPENMP
+            omp_set_num_threads(static_cast<int>(threads));
+#endif
+            return threads;
+        case ThreadModel::Parlay: {
+            static const size_t parlay_threads = [threads] {
+                if (!std::getenv("PARLAY_NUM_THREADS")) setenv("PARLAY_NUM_THREADS", std::to_string(threads).c_str(), 0);
+                return static_cast<size_t>(std::strtoul(std::getenv("PARLAY_NUM_THREADS"), nullptr, 10));
+            }();
+            return parlay_threads;
+        }
+        }
+        return threads;
+    }
+
+    // struct 模块格式中的字节序前缀 ('@', '=', '<' 与本机一致；'>' 与 '!' 在 x86 上需要字节交换，拒绝)
+    inline const char* strip_byte_order(const char* format) {
+        if (!format) return "B";
+        if (*format == '@' || *format == '=' || *format == '<') return format + 1;
+        return format;
+    }
+
+    /**
+     * @brief Maps a buffer (format, itemsize, shape) and an optional explicit datatype name to a Dtype.
+     *        pair accepts a 1-d buffer with 16-byte items (e.g. dtype [('k','<u8'),('v','<u8')]) or an (n, 2)
+     *        uint64 array; it is sorted by the first field like pair_t in the benchmark.
+     */
+    inline bool resolve_dtype(const Py_buffer& view, const char* requested, Dtype& dtype, size_t& count,
+                              std::string& error) {
+        const std::string format = strip_byte_order(view.format);
+        const bool unsigned_int = format == "B" || format == "H" || format == "I" || format == "L" || format == "Q"
+                                  || format == "N";
+        if (view.format && (view.format[0] == '>' || view.format[0] == '!')) {
+            error = "big-endian buffers are not supported";
+            return false;
+        }
+        if (requested && std::strcmp(requested, "pair") == 0) {
+            const bool records = view.ndim == 1 && view.itemsize == 16;
+            const bool columns = view.ndim == 2 && view.shape[1] == 2 && view.itemsize == 8 && unsigned_int;
+            if (!records && !columns) {
+                error = "datatype 'pair' needs a 1-d array of 16-byte records or an (n, 2) uint64 array";
+                return false;
+            }
+            dtype = Dtype::Pair;
+            count = static_cast<size_t>(view.len) / 16;
+            return true;
+        }
+        if (view.ndim != 1) {
+            error = "expected a 1-d array (use datatype='pair' for (n, 2) uint64 arrays)";
+            return false;
+        }
+        if (unsigned_int && view.itemsize == 4) dtype = Dtype::Uint32;
+        else if (unsigned_int && view.itemsize == 8) dtype = Dtype::Uint64;
+        else if (format == "d" && view.itemsize == 8) dtype = Dtype::Double;
+        else {
+            error = "unsupported element format '" + format + "' (itemsize " + std::to_string(view.itemsize)
+                    + "); supported: uint32, uint64, float64 and datatype='pair'";
+            return false;
+        }
+        if (requested && std::strcmp(requested, DTYPE_NAMES[static_cast<int>(dtype)]) != 0) {
+            error = std::string("buffer holds ") + DTYPE_NAMES[static_cast<int>(dtype)] + " but datatype='"
+                    + requested + "' was requested";
+            return false;
+        }
+        count = static_cast<size_t>(view.len / view.itemsize);
+        return true;
+    }
+
+    inline PyObject* set_double(PyObject* dict, const char* key, double value) {
+        PyObject* obj = PyFloat_FromDouble(value);
+        if (!obj || PyDict_SetItemString(dict, key, obj) != 0) {
+            Py_XDECREF(obj);
+            return nullptr;
+        }
+        Py_DECREF(obj);
+        return dict;
+    }
+
+    // 把 FreqCounter / EnergyCounter 输出的 "\tkey=value" 字段解析进统计字典
+    inline bool add_counter_fields(PyObject* dict, const std::string& fields) {
+        size_t pos = 0;
+        while ((pos = fields.find('\t', pos)) != std::string::npos) {
+            const size_t end = fields.find('\t', pos + 1);
+            const std::string token = fields.substr(pos + 1, end == std::string::npos ? std::string::npos : end - pos - 1);
+            const size_t eq = token.find('=');
+            if (eq != std::string::npos) {
+                const std::string key = token.substr(0, eq);
+                const std::string value = token.substr(eq + 1);
+                char* parse_end = nullptr;
+                const double number = std::strtod(value.c_str(), &parse_end);
+                PyObject* obj = (parse_end && *parse_end == '\0') ? PyFloat_FromDouble(number)
+                                                                   : PyUnicode_FromString(value.c_str());
+                if (!obj || PyDict_SetItemString(dict, key.c_str(), obj) != 0) {
+                    Py_XDECREF(obj);
+                    return false;
+                }
+                Py_DECREF(obj);
+            }
+            pos = end;
+        }
+        return true;
+    }
+
+}  // namespace sortbench
+
+static PyObject* sortbench_sort(PyObject*, PyObject* args, PyObject* kwargs) {
+    using namespace sortbench;
+    static const char* keywords[] = {"array", "algorithm", "threads", "datatype", "stats", nullptr};
+    PyObject* array = nullptr;
+    const char* algorithm = "ips4oparallel";
+    Py_ssize_t threads = 0;
+    const char* datatype = nullptr;
+    int want_stats = 0;
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|snzp", const_cast<char**>(keywords), &array, &algorithm,
+                                     &threads, &datatype, &want_stats)) {
+        return nullptr;
+    }
+    if (threads < 0) {
+        PyErr_SetString(PyExc_ValueError, "threads must be >= 0 (0 = all hardware threads)");
+        return nullptr;
+    }
+    const Entry* entry = find_entry(algorithm);
+    if (!entry) {
+        PyErr_Format(PyExc_ValueError, "unknown algorithm '%s' (see sortbench.algorithms())", algorithm);
+        return nullptr;
+    }
+
+    // 直接借用调用者的内存：要求可写且 C 连续，不做任何拷贝
+    Py_buffer view;
+    if (PyObject_GetBuffer(array, &view, PyBUF_WRITABLE | PyBUF_C_CONTIGUOUS | PyBUF_FORMAT) != 0) return nullptr;
+    Dtype dtype;
+    size_t count = 0;
+    std::string error;
+    if (!resolve_dtype(view, datatype, dtype, count, error)) {
+        PyBuffer_Release(&view);
+        PyErr_SetString(PyExc_TypeError, error.c_str());
+        return nullptr;
+    }
+    const SortFn fn = entry->fns[static_cast<int>(dtype)];
+    if (!fn) {
+        PyBuffer_Release(&view);
+        PyErr_Format(PyExc_TypeError, "%s does not accept %s", entry->name.c_str(), DTYPE_NAMES[static_cast<int>(dtype)]);
+        return nullptr;
+    }
+
+    std::pair<double, double> timing{0.0, 0.0};
+    double wall_ms = 0.0;
+    size_t effective_threads = 1;
+    std::ostringstream counter_fields;
+    const char* failure = nullptr;
+    Py_BEGIN_ALLOW_THREADS
+    try {
+        effective_threads = apply_threads(entry->threads, static_cast<size_t>(threads));
+        const auto energy_before = EnergyCounter::snapshot();
+        const auto freq_before = FreqCounter::snapshot();
+        const auto begin_time = std::chrono::steady_clock::now();
+        timing = fn(view.buf, count, effective_threads);
+        const auto end_time = std::chrono::steady_clock::now();
+        const auto freq_after = FreqCounter::snapshot();
+        const auto energy_after = EnergyCounter::snapshot();
+        wall_ms = std::chrono::duration<double, std::milli>(end_time - begin_time).count();
+        if (want_stats) {
+            FreqCounter::print_fields(counter_fields, freq_before, freq_after);
+            EnergyCounter::print_fields(counter_fields, energy_before, energy_after);
+        }
+    } catch (const std::bad_alloc&) {
+        failure = "out of memory while sorting";
+    } catch (...) {
+        failure = "the sort threw an exception";
+    }
+    Py_END_ALLOW_THREADS
+    PyBuffer_Release(&view);
+
+    if (failure) {
+        PyErr_SetString(PyExc_RuntimeError, failure);
+        return nullptr;
+    }
+    if (!want_stats) Py_RETURN_NONE;
+
+    PyObject* stats = Py_BuildValue("{s:s,s:s,s:n,s:n}", "algo", entry->name.c_str(), "datatype",
+                                    DTYPE_NAMES[static_cast<int>(dtype)], "size", static_cast<Py_ssize_t>(count),
+                                    "threads", static_cast<Py_ssize_t>(effective_threads));
+    if (!stats || !set_double(stats, "preprocmilli", timing.first) || !set_double(stats, "milli", timing.second)
+        || !set_double(stats, "wallmilli", wall_ms) || !add_counter_fields(stats, counter_fields.str())) {
+        Py_XDECREF(stats);
+        return nullptr;
+    }
+    return stats;
+}
+
+static PyObject* sortbench_algorithms(PyObject*, PyObject*) {
+    using namespace sortbench;
+    PyObject* list = PyList_New(0);
+    if (!list) return nullptr;
+    for (const auto& entry : registry()) {
+        PyObject* datatypes = PyList_New(0);
+        for (int d = 0; datatypes && d < static_cast<int>(Dtype::Count); ++d) {
+            if (!entry.fns[d]) continue;
+            PyObject* name = PyUnicode_FromString(DTYPE_NAMES[d]);
+            if (!name || PyList_Append(datatypes, name) != 0) Py_CLEAR(datatypes);
+            Py_XDECREF(name);
+        }
+        const char* model = entry.threads == ThreadModel::OpenMP ? "openmp"
+                            : entry.threads == ThreadModel::Parlay ? "parlay" : "sequential";
+        PyObject* item = datatypes ? Py_BuildValue("{s:s,s:O,s:s,s:N}", "name", entry.name.c_str(), "parallel",
+                                                   entry.parallel ? Py_True : Py_False, "threads", model,
+                                                   "datatypes", datatypes)
+                                   : nullptr;
+        if (!item || PyList_Append(list, item) != 0) {
+            Py_XDECREF(item);
+            Py_DECREF(list);
+            return nullptr;
+        }
+        Py_DECREF(item);
+    }
+    return list;
+}
+
+static PyMethodDef sortbench_methods[] = {
+    {"sort", reinterpret_cast<PyCFunction>(reinterpret_cast<void (*)(void)>(sortbench_sort)),
+     METH_VARARGS | METH_KEYWORDS,
+     "sort(array, algorithm='ips4oparallel', threads=0, datatype=None, stats=False)\n\n"
+     "Sort a writable C-contiguous buffer (uint32, uint64, float64, or pair records) in place without copying.\n"
+     "The GIL is released while sorting. threads=0 uses all hardware threads. With stats=True a dict with the\n"
+     "algorithm's own timing (milli, preprocmilli), the wall time, the threads used and, if MEASURE_FREQUENCY /\n"
+     "MEASURE_ENERGY were set when the module was imported, freqratio and pkgjoules/dramjoules is returned."},
+    {"algorithms", sortbench_algorithms, METH_NOARGS,
+     "algorithms() -> list of {name, parallel, threads, datatypes} compiled into this module."},
+    {nullptr, nullptr, 0, nullptr}};
+
+static void sortbench_free(void*) {
+    FreqCounter::cleanup();
+    EnergyCounter::cleanup();
+}
+
+static PyModuleDef sortbench_module = {
+    PyModuleDef_HEAD_INIT, SORTBENCH_STR(SORTBENCH_MODULE_NAME),
+    "In-place, zero-copy sorts of the ips4o benchmark suite for NumPy arrays.", -1, sortbench_methods,
+    nullptr, nullptr, nullptr, sortbench_free};
+
+PyMODINIT_FUNC SORTBENCH_CONCAT(PyInit_, SORTBENCH_MODULE_NAME)(void) {
+    // 与 benchmark 可执行文件相同的环境变量控制计数器 (默认关闭)
+    FreqCounter::init();
+    EnergyCounter::init();
+    return PyModule_Create(&sortbench_module);
+}
@@ -0,0 +1,85 @@
+#ifndef RUNTIME_INFO_H
+#define RUNTIME_INFO_H
+
+#include <cstdint>
+#include <cstdlib>
+#include <cstring>
+#include <iostream>
+#include <string>
+
+#include <sys/resource.h>
+
+// 并行运行时 (调度器) 作为一个扫描维度：同一个算法用不同的运行时编译成不同的可执行文件
+// (CMakeLists.txt 的 BENCHMARK_RUNTIME_VARIANTS，例如 benchmark_plss / benchmark_plss_omp / _tbb / _cilk)，
+// RESULT 行的 runtime= 记录本二进制使用的运行时：CMake 给出的 SORTBENCH_RUNTIME，否则由 ParlayLib 的后端宏推出，
+// 都没有时为 native (算法自带的线程方式，例如 --server 中每个算法各不相同)。
+// MEASURE_SCHEDULING=true 时另外输出每次排序期间整个进程的 CPU 时间与上下文切换 (getrusage)：
+// usermilli / sysmilli 减去真正的工作量就是调度开销 (空转窃取、yield、唤醒)，vcsw 是自愿切换 (工作线程睡眠)，
+// ivcsw 是被抢占的次数。这几个运行时都不对外提供窃取次数，所以没有 steals 字段
+// (analysis_scripts/analyze_runtimes.py 用 CPU 时间 / (墙钟时间 * 线程数) 与切换次数代替)。
+namespace RuntimeInfo {
+
+    inline std::string name() {
+#if defined(SORTBENCH_RUNTIME)
+        return SORTBENCH_RUNTIME;
+#elif defined(PARLAY_OPENCILK)
+        return "opencilk";
+#elif defined(PARLAY_OPENMP)
+        return "openmp";
+#elif defined(PARLAY_TBB)
+        return "tbb";
+#elif defined(PARLAY_SEQUENTIAL)
+        return "sequential";
+#else
+        return "native";
+#endif
+    }
+
+    struct Snapshot {
+        double user_ms = 0.0;
+        double sys_ms = 0.0;
+        uint64_t voluntary_switches = 0;
+        uint64_t involuntary_switches = 0;
+    };
+
+    inline bool& enabled_flag() {
+        static bool enabled = false;
+        return enabled;
+    }
+
+    inline void init() {
+        const char* env = std::getenv("MEASURE_SCHEDULING");
+        enabled_flag() = env != nullptr && std::strcmp(env, "true") == 0;
+    }
+
+    inline bool enabled() {
+        return enabled_flag();
+    }
+
+    inline Snapshot snapshot() {
+        Snapshot s;
+        if (!enabled()) return s;
+        rusage usage{};
+        if (getrusage(RUSAGE_SELF, &usage) != 0) return s;
+        const auto to_ms = [](const timeval& t) { return t.tv_sec * 1000.0 + t.tv_usec / 1000.0; };
+        s.user_ms = to_ms(usage.ru_utime);
+        s.sys_ms = to_ms(usage.ru_stime);
+        s.voluntary_switches = static_cast<uint64_t>(usage.ru_nvcsw);
+        s.involuntary_switches = static_cast<uint64_t>(usage.ru_nivcsw);
+        return s;
+    }
+
+    /**
+     * @brief Appends usermilli, sysmilli, vcsw and ivcsw of the whole process during the sort.
+     */
+    inline void print_fields(std::ostream& out, const Snapshot& before, const Snapshot& after) {
+        if (!enabled()) return;
+        const auto delta = [](uint64_t b, uint64_t a) -> uint64_t { return a >= b ? a - b : 0; };
+        out << "\tusermilli=" << after.user_ms - before.user_ms
+            << "\tsysmilli=" << after.sys_ms - before.sys_ms
+            << "\tvcsw=" << delta(before.voluntary_switches, after.voluntary_switches)
+            << "\tivcsw=" << delta(before.involuntary_switches, after.involuntary_switches);
+    }
+
+} // namespace RuntimeInfo
+#endif // RUNTIME_INFO_H
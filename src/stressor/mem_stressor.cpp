@@ -0,0 +1,181 @@
+// 内存干扰源 (mem_stressor)，用于共同运行 (co-run) 干扰测试 (run_scripts/run_time_perfFIFO.sh 的 CORUN_MODE=stressor)。
+//
+// 两种模式:
+//   bandwidth: 每个线程在自己的一段缓冲区上做顺序复制 (读一半写一半)，占满内存带宽；
+//   cache:     所有线程在一个大约 LLC 大小的共享缓冲区上做随机读-改-写 (每次一条缓存行)，把被测程序的数据挤出 LLC。
+// 线程数默认等于本进程可用的 CPU 数 (sched_getaffinity)，因此用 taskset / numactl --physcpubind 限定核心即可。
+// 默认一直运行直到收到 SIGTERM / SIGINT；结束时在 stdout 打印一行
+//   STRESSOR mode=... threads=... bytes=... seconds=... gbps=...
+// (gbps 为实际产生的内存流量估计：bandwidth 按读+写字节数，cache 按每次访问 64 字节计)。
+//
+// 用法: mem_stressor [--mode bandwidth|cache] [--threads N] [--bytes 2G] [--seconds S]
+
+#include <algorithm>
+#include <atomic>
+#include <chrono>
+#include <csignal>
+#include <cstdint>
+#include <cstdio>
+#include <cstdlib>
+#include <cstring>
+#include <string>
+#include <thread>
+#include <utility>
+#include <vector>
+
+#include <sched.h>
+#include <sys/mman.h>
+#include <unistd.h>
+
+namespace {
+
+constexpr size_t CACHE_LINE = 64;
+
+std::atomic<bool> stop_requested{false};
+
+void request_stop(int) { stop_requested.store(true, std::memory_order_relaxed); }
+
+struct Options {
+    std::string mode = "bandwidth";
+    size_t threads = 0;
+    size_t bytes = 0;    // 0: bandwidth 为 1 GiB，cache 为 32 MiB
+    double seconds = 0;  // 0: 直到被终止
+};
+
+// "64M" / "2G" / "512K" / "1048576" -> 字节数；格式错误返回 0
+size_t parse_bytes(const char* text) {
+    char* end = nullptr;
+    const double value = std::strtod(text, &end);
+    if (end == text || value <= 0) return 0;
+    size_t scale = 1;
+    switch (*end) {
+        case 'K': case 'k': scale = size_t{1} << 10; ++end; break;
+        case 'M': case 'm': scale = size_t{1} << 20; ++end; break;
+        case 'G': case 'g': scale = size_t{1} << 30; ++end; break;
+        default: break;
+    }
+    if (*end != '\0') return 0;
+    return static_cast<size_t>(value * scale);
+}
+
+bool parse_options(int argc, char** argv, Options& options) {
+    for (int i = 1; i < argc; ++i) {
+        const std::string arg = argv[i];
+        if (i + 1 >= argc) {
+            std::fprintf(stderr, "[MemStressor] Error: missing value for %s\n", arg.c_str());
+            return false;
+        }
+        const char* value = argv[++i];
+        if (arg == "--mode") {
+            options.mode = value;
+        } else if (arg == "--threads") {
+            options.threads = std::strtoul(value, nullptr, 10);
+        } else if (arg == "--bytes") {
+            options.bytes = parse_bytes(value);
+            if (options.bytes == 0) {
+                std::fprintf(stderr, "[MemStressor] Error: invalid --bytes %s\n", value);
+                return false;
+            }
+        } else if (arg == "--seconds") {
+            options.seconds = std::strtod(value, nullptr);
+        } else {
+            std::fprintf(stderr, "[MemStressor] Error: unknown option %s\n", arg.c_str());
+            return false;
+        }
+    }
+    if (options.mode != "bandwidth" && options.mode != "cache") {
+        std::fprintf(stderr, "[MemStressor] Error: --mode must be bandwidth or cache, not %s\n", options.mode.c_str());
+        return false;
+    }
+    return true;
+}
+
+size_t available_cpus() {
+    cpu_set_t set;
+    CPU_ZERO(&set);
+    if (sched_getaffinity(0, sizeof(set), &set) == 0 && CPU_COUNT(&set) > 0) return CPU_COUNT(&set);
+    const long online = sysconf(_SC_NPROCESSORS_ONLN);
+    return online > 0 ? static_cast<size_t>(online) : 1;
+}
+
+// 顺序复制 src -> dst，返回读+写的字节数
+uint64_t bandwidth_worker(uint8_t* slice, size_t slice_bytes) {
+    const size_t half = slice_bytes / 2;
+    uint8_t* src = slice;
+    uint8_t* dst = slice + half;
+    uint64_t traffic = 0;
+    while (!stop_requested.load(std::memory_order_relaxed)) {
+        std::memcpy(dst, src, half);
+        std::swap(src, dst);
+        traffic += 2 * half;
+    }
+    return traffic;
+}
+
+// 随机读-改-写缓存行，返回访问次数 * 64
+uint64_t cache_worker(uint8_t* buffer, size_t bytes, uint64_t seed) {
+    const size_t lines = bytes / CACHE_LINE;
+    uint64_t state = seed | 1;
+    uint64_t accesses = 0;
+    while (!stop_requested.load(std::memory_order_relaxed)) {
+        for (int i = 0; i < 4096; ++i) {
+            state ^= state << 13;
+            state ^= state >> 7;
+            state ^= state << 17;
+            volatile uint8_t* line = buffer + (state % lines) * CACHE_LINE;
+            *line = static_cast<uint8_t>(*line + 1);
+        }
+        accesses += 4096;
+    }
+    return accesses * CACHE_LINE;
+}
+
+} // namespace
+
+int main(int argc, char** argv) {
+    Options options;
+    if (!parse_options(argc, argv, options)) return 1;
+    const bool bandwidth = options.mode == "bandwidth";
+    const size_t threads = options.threads > 0 ? options.threads : available_cpus();
+    size_t bytes = options.bytes > 0 ? options.bytes : (bandwidth ? size_t{1} << 30 : size_t{32} << 20);
+    bytes = std::max(bytes, threads * 2 * CACHE_LINE);
+
+    void* mapped = mmap(nullptr, bytes, PROT_READ | PROT_WRITE, MAP_PRIVATE | MAP_ANONYMOUS, -1, 0);
+    if (mapped == MAP_FAILED) {
+        std::fprintf(stderr, "[MemStressor] Error: cannot map %zu bytes\n", bytes);
+        return 1;
+    }
+    uint8_t* buffer = static_cast<uint8_t*>(mapped);
+
+    std::signal(SIGTERM, request_stop);
+    std::signal(SIGINT, request_stop);
+
+    std::vector<uint64_t> traffic(threads, 0);
+    std::vector<std::thread> workers;
+    const size_t slice = (bytes / threads) / CACHE_LINE * CACHE_LINE;
+    const auto start = std::chrono::steady_clock::now();
+    for (size_t t = 0; t < threads; ++t) {
+        workers.emplace_back([&, t] {
+            // 每个线程先写自己的一段，使页面在本线程所在的 NUMA 节点上分配
+            std::memset(buffer + t * slice, static_cast<int>(t), slice);
+            traffic[t] = bandwidth ? bandwidth_worker(buffer + t * slice, slice)
+                                   : cache_worker(buffer, bytes, 0x9E3779B97F4A7C15ull * (t + 1));
+        });
+    }
+    if (options.seconds > 0) {
+        while (!stop_requested.load(std::memory_order_relaxed)
+               && std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count() < options.seconds) {
+            std::this_thread::sleep_for(std::chrono::milliseconds(10));
+        }
+        stop_requested.store(true);
+    }
+    for (auto& worker : workers) worker.join();
+    const double seconds = std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+
+    uint64_t total = 0;
+    for (const uint64_t t : traffic) total += t;
+    std::printf("STRESSOR\tmode=%s\tthreads=%zu\tbytes=%zu\tseconds=%.3f\tgbps=%.3f\n", options.mode.c_str(), threads,
+                bytes, seconds, seconds > 0 ? total / seconds / 1e9 : 0.0);
+    munmap(mapped, bytes);
+    return 0;
+}
@@ -30,7 +30,9 @@
 #include <AlignedUniquePtr.hpp>
 #include <numa_array.hpp>
 
+#include "mmap_vector.hpp"
+
 inline std::vector<std::string> get_vector_types() {
     return std::vector<std::string>(
-            {Numa::AlignedArray<int>::name(), AlignedUniquePtr<int>::name()});
+            {Numa::AlignedArray<int>::name(), AlignedUniquePtr<int>::name(), MmapFileArray<int>::name()});
 }